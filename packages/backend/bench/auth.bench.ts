@@ -0,0 +1,54 @@
+import { bench, describe } from 'vitest'
+import Fastify, { type FastifyInstance, type FastifyRequest, type FastifyReply } from 'fastify'
+import jwt from '@fastify/jwt'
+import { authMiddleware, requireAuth } from '../src/middleware/auth.js'
+
+// Per-request cost of authentication on a protected route: global hook + route preHandler.
+// "baseline" reproduces the previous behaviour (jwtVerify in both hooks).
+
+const SECRET = 'bench-secret-key-min-32-chars-long!!'
+
+async function baselineAuth(request: FastifyRequest): Promise<void> {
+  try {
+    await request.jwtVerify()
+  } catch {
+    // optional auth
+  }
+}
+
+async function baselineRequireAuth(request: FastifyRequest, reply: FastifyReply): Promise<void> {
+  try {
+    await request.jwtVerify()
+  } catch {
+    return reply.status(401).send({ error: 'Authentication required' })
+  }
+}
+
+async function buildApp(memoized: boolean): Promise<FastifyInstance> {
+  const app = Fastify({ logger: false })
+  await app.register(jwt, { secret: SECRET })
+  app.addHook('onRequest', memoized ? authMiddleware : baselineAuth)
+  app.get('/protected', { preHandler: memoized ? requireAuth : baselineRequireAuth }, async () => ({
+    ok: true,
+  }))
+  await app.ready()
+  return app
+}
+
+const baselineApp = await buildApp(false)
+const memoizedApp = await buildApp(true)
+const token = baselineApp.jwt.sign(
+  { id: 'user-1', email: 'user@example.com', barbershopId: 'tenant-id', role: 'ADMIN' },
+  { expiresIn: '15m' }
+)
+const headers = { authorization: `Bearer ${token}` }
+
+describe('protected route authentication', () => {
+  bench('baseline: jwtVerify in authMiddleware and requireAuth', async () => {
+    await baselineApp.inject({ method: 'GET', url: '/protected', headers })
+  })
+
+  bench('memoized per request + verified-token cache', async () => {
+    await memoizedApp.inject({ method: 'GET', url: '/protected', headers })
+  })
+})
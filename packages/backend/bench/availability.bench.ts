@@ -0,0 +1,33 @@
+import { bench, describe } from 'vitest'
+import { freeIntervals, type Interval } from '../src/lib/availability.js'
+
+// Free-slot computation for a busy month: 10 professionals with up to 16 half-hour bookings
+// a day (every fifth slot left free), sorted by date as the range query returns them. Offline.
+
+const PROFESSIONALS = 10
+const DAYS = 31
+const BOOKINGS_PER_DAY = 16
+
+const from = new Date('2026-10-01T00:00:00Z')
+const to = new Date(from.getTime() + DAYS * 24 * 60 * 60 * 1000)
+
+function monthOfBookings(seed: number): Interval[] {
+  const busy: Interval[] = []
+  for (let day = 0; day < DAYS; day++) {
+    const opening = from.getTime() + day * 24 * 60 * 60 * 1000 + 9 * 60 * 60 * 1000
+    for (let slot = 0; slot < BOOKINGS_PER_DAY; slot++) {
+      if ((slot + day + seed) % 5 === 0) continue
+      const start = opening + slot * 30 * 60 * 1000
+      busy.push({ start: new Date(start), end: new Date(start + 30 * 60 * 1000) })
+    }
+  }
+  return busy
+}
+
+const schedules = Array.from({ length: PROFESSIONALS }, (_, seed) => monthOfBookings(seed))
+
+describe(`${DAYS}-day availability for ${PROFESSIONALS} professionals`, () => {
+  bench('freeIntervals', () => {
+    for (const busy of schedules) freeIntervals(busy, from, to, 30)
+  })
+})
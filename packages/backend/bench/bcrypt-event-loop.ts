@@ -0,0 +1,54 @@
+import { monitorEventLoopDelay } from 'node:perf_hooks'
+import bcrypt from 'bcryptjs'
+import { PasswordHashPool } from '../src/lib/passwordHasher.js'
+
+// Event-loop lag while a burst of logins runs bcrypt compare (cost 10).
+// Usage: pnpm bench:bcrypt [concurrentLogins]
+
+const CONCURRENT_LOGINS = Number(process.argv[2] ?? 20)
+const PASSWORD = 'senha123'
+
+interface LagReport {
+  mode: string
+  totalMs: number
+  p50Ms: number
+  p99Ms: number
+  maxMs: number
+}
+
+async function measure(mode: string, compare: () => Promise<boolean>): Promise<LagReport> {
+  const histogram = monitorEventLoopDelay({ resolution: 1 })
+  histogram.enable()
+  const startedAt = performance.now()
+
+  await Promise.all(Array.from({ length: CONCURRENT_LOGINS }, compare))
+
+  const totalMs = performance.now() - startedAt
+  histogram.disable()
+
+  return {
+    mode,
+    totalMs: Math.round(totalMs),
+    p50Ms: Math.round(histogram.percentile(50) / 1e6),
+    p99Ms: Math.round(histogram.percentile(99) / 1e6),
+    maxMs: Math.round(histogram.max / 1e6),
+  }
+}
+
+const hash = await bcrypt.hash(PASSWORD, 10)
+const pool = new PasswordHashPool({ size: 4, maxQueue: CONCURRENT_LOGINS })
+
+// Warm up the workers so startup cost is not counted
+await pool.run({ op: 'compare', password: PASSWORD, hash })
+
+const reports = [
+  await measure('main thread (bcryptjs)', () => bcrypt.compare(PASSWORD, hash)),
+  await measure('worker pool (4 threads)', async () =>
+    Boolean(await pool.run({ op: 'compare', password: PASSWORD, hash }))
+  ),
+]
+
+await pool.destroy()
+
+console.log(`Event-loop lag with ${CONCURRENT_LOGINS} concurrent logins`)
+console.table(reports)
@@ -0,0 +1,76 @@
+import { bench, describe } from 'vitest'
+import { Decimal } from '@prisma/client/runtime/library'
+import { decodeCursor, seekBatches, STREAM_BATCH_SIZE } from '../src/lib/pagination.js'
+import { streamExport, type ExportColumns, type ExportFormat } from '../src/lib/export.js'
+
+// A 100k-transaction export as GET /transactions/export runs it: keyset batches of
+// STREAM_BATCH_SIZE read from a sorted in-memory table (each read waits a fixed delay standing
+// in for the Postgres round trip), converted and written as CSV or NDJSON, and drained like a
+// socket would. Runs offline.
+
+const ROWS = 100_000
+const ROUND_TRIP_MS = 2
+
+interface Row {
+  id: string
+  date: Date
+  type: string
+  category: string
+  description: string | null
+  amount: Decimal
+  paymentMethod: string | null
+}
+
+// Newest first, like the export
+const table: Row[] = Array.from({ length: ROWS }, (_, i) => ({
+  id: `tx-${String(ROWS - i).padStart(6, '0')}`,
+  date: new Date(Date.UTC(2026, 0, 1) - i * 5 * 60 * 1000),
+  type: i % 5 ? 'INCOME' : 'EXPENSE',
+  category: i % 5 ? 'Serviço' : 'Produtos, limpeza',
+  description: i % 3 ? null : `Atendimento ${i}`,
+  amount: new Decimal('45.00'),
+  paymentMethod: 'PIX',
+}))
+
+const index = new Map(table.map((row, position) => [row.id, position]))
+
+function read(cursor: string, take: number): Promise<Row[]> {
+  const after = cursor ? (index.get(decodeCursor(cursor)?.id ?? '') ?? -1) + 1 : 0
+  const rows = table.slice(after, after + take)
+  return new Promise((resolve) => setTimeout(() => resolve(rows), ROUND_TRIP_MS))
+}
+
+const columns: ExportColumns<Row> = {
+  id: (row) => row.id,
+  date: (row) => row.date.toISOString(),
+  type: (row) => row.type,
+  category: (row) => row.category,
+  description: (row) => row.description,
+  amount: (row) => row.amount.toNumber(),
+  paymentMethod: (row) => row.paymentMethod,
+}
+
+async function exportAll(format: ExportFormat): Promise<number> {
+  const rows = seekBatches(read, (row) => row.date, '', Infinity, STREAM_BATCH_SIZE)
+  let bytes = 0
+  for await (const chunk of streamExport(rows, columns, format)) bytes += chunk.length
+  return bytes
+}
+
+describe(`${ROWS}-transaction export`, () => {
+  bench(
+    'csv',
+    async () => {
+      await exportAll('csv')
+    },
+    { iterations: 3 }
+  )
+
+  bench(
+    'ndjson',
+    async () => {
+      await exportAll('ndjson')
+    },
+    { iterations: 3 }
+  )
+})
@@ -0,0 +1,62 @@
+import { bench, describe } from 'vitest'
+import { createServer } from 'node:net'
+import type { AddressInfo } from 'node:net'
+import {
+  RedisClient,
+  RedisReplyError,
+  type RedisCommand,
+  type RedisReply,
+} from '../src/lib/redisClient.js'
+import { MemoryRedisDriver } from '../src/lib/redisMemoryDriver.js'
+import { RespParser, TcpRedisDriver } from '../src/lib/redisTcpDriver.js'
+
+// 20 concurrent commands (one burst of requests) against a loopback RESP server that adds
+// a fixed delay per batch, standing in for the network round trip. Runs offline.
+
+const ROUND_TRIP_MS = 2
+const CONCURRENCY = 20
+
+function encodeReply(reply: RedisReply): string {
+  if (reply === null) return '$-1\r\n'
+  if (reply instanceof RedisReplyError) return `-${reply.message}\r\n`
+  if (typeof reply === 'number') return `:${reply}\r\n`
+  if (Array.isArray(reply)) return `*${reply.length}\r\n${reply.map(encodeReply).join('')}`
+  return `$${Buffer.byteLength(reply)}\r\n${reply}\r\n`
+}
+
+const memory = new MemoryRedisDriver()
+const server = createServer((socket) => {
+  const parser = new RespParser()
+  socket.on('data', async (chunk) => {
+    const commands = parser.push(chunk) as RedisCommand[]
+    await new Promise((resolve) => setTimeout(resolve, ROUND_TRIP_MS))
+    socket.write((await memory.send(commands)).map(encodeReply).join(''))
+  })
+})
+await new Promise<void>((resolve) => server.listen(0, '127.0.0.1', resolve))
+const url = `redis://127.0.0.1:${(server.address() as AddressInfo).port}`
+
+const plain = new RedisClient(new TcpRedisDriver({ url }))
+const pipelined = new RedisClient(new TcpRedisDriver({ url }), { autoPipeline: true })
+const inMemory = new RedisClient(new MemoryRedisDriver())
+await plain.set('barbershop:tenant:bench', 'tenant-id')
+
+function burst(client: RedisClient) {
+  return Promise.all(
+    Array.from({ length: CONCURRENCY }, () => client.get('barbershop:tenant:bench'))
+  )
+}
+
+describe(`${CONCURRENCY} concurrent GETs`, () => {
+  bench('tcp: one round trip per command', async () => {
+    await burst(plain)
+  })
+
+  bench('tcp: auto-pipelined', async () => {
+    await burst(pipelined)
+  })
+
+  bench('in-memory driver', async () => {
+    await burst(inMemory)
+  })
+})
@@ -0,0 +1,132 @@
+import Fastify from 'fastify'
+import { afterAll, beforeAll, bench, describe } from 'vitest'
+import { Decimal } from '@prisma/client/runtime/library'
+import { serializeAppointmentWithRelations, serializeResponse } from '../src/lib/serializer.js'
+
+// A 100-appointment list page with embedded relations, as the service hands it to Fastify
+// (Decimals already converted, Dates still Date objects), serialized by the route's compiled
+// response serializer with and without the generic deep walk in front of it. Both routes use
+// the same schema and must produce identical bodies. Runs offline (Fastify inject).
+
+const PAGE_SIZE = 100
+
+const professional = {
+  id: 'prof-1',
+  barbershopId: 'tenant-id',
+  name: 'Barber 1',
+  email: 'barber@example.com',
+  commissionRate: new Decimal('40'),
+  role: 'BARBER',
+  isActive: true,
+  createdAt: new Date('2026-01-01T00:00:00Z'),
+  updatedAt: new Date('2026-01-01T00:00:00Z'),
+}
+
+const page = {
+  data: Array.from({ length: PAGE_SIZE }, (_, i) => {
+    const date = new Date(Date.UTC(2026, 9, 19, 9) + i * 30 * 60 * 1000)
+    return serializeAppointmentWithRelations({
+      id: `apt-${i}`,
+      barbershopId: 'tenant-id',
+      professionalId: 'prof-1',
+      clientId: `client-${i}`,
+      serviceId: 'service-1',
+      createdById: 'prof-1',
+      date,
+      endsAt: new Date(date.getTime() + 30 * 60 * 1000),
+      status: 'CONFIRMED',
+      price: new Decimal('45.00'),
+      commissionValue: null,
+      notes: null,
+      createdAt: date,
+      updatedAt: date,
+      professional,
+      createdBy: professional,
+      client: {
+        id: `client-${i}`,
+        barbershopId: 'tenant-id',
+        name: `Client ${i}`,
+        phone: '11999990000',
+        isActive: true,
+        createdAt: date,
+        updatedAt: date,
+      },
+      service: {
+        id: 'service-1',
+        barbershopId: 'tenant-id',
+        name: 'Haircut',
+        price: new Decimal('45.00'),
+        duration: 30,
+        isActive: true,
+        createdAt: date,
+        updatedAt: date,
+      },
+    })
+  }),
+  pagination: { page: 1, limit: PAGE_SIZE, total: 1000, totalPages: 10 },
+}
+
+const dateTime = { type: 'string', format: 'date-time' } as const
+const listSchema = {
+  type: 'object',
+  properties: {
+    data: {
+      type: 'array',
+      items: {
+        type: 'object',
+        properties: {
+          id: { type: 'string' },
+          date: dateTime,
+          endsAt: dateTime,
+          status: { type: 'string' },
+          price: { type: 'number' },
+          commissionValue: { type: 'number', nullable: true },
+          notes: { type: 'string', nullable: true },
+          createdAt: dateTime,
+          updatedAt: dateTime,
+        },
+        additionalProperties: true,
+      },
+    },
+    pagination: { type: 'object', additionalProperties: true },
+  },
+} as const
+
+const app = Fastify({ logger: false })
+app.get('/walk', {
+  schema: { response: { 200: listSchema } },
+  preSerialization: async (_request, _reply, payload: unknown) => serializeResponse(payload),
+  handler: async () => page,
+})
+app.get('/compiled', { schema: { response: { 200: listSchema } }, handler: async () => page })
+
+// Objects and arrays the walk copies for one page (Dates become strings on top of that)
+function countCopies(value: unknown): number {
+  if (value === null || typeof value !== 'object' || value instanceof Date) return 0
+  const children = Array.isArray(value) ? value : Object.values(value)
+  return children.reduce((count: number, child) => count + countCopies(child), 1)
+}
+
+beforeAll(async () => {
+  await app.ready()
+  const [walk, compiled] = await Promise.all([
+    app.inject({ method: 'GET', url: '/walk' }),
+    app.inject({ method: 'GET', url: '/compiled' }),
+  ])
+  if (walk.body !== compiled.body) throw new Error('Compiled serializer changed the response')
+})
+
+describe(`${PAGE_SIZE}-appointment list response`, () => {
+  bench('deep walk + compiled serializer', async () => {
+    await app.inject({ method: 'GET', url: '/walk' })
+  })
+
+  bench('compiled serializer only', async () => {
+    await app.inject({ method: 'GET', url: '/compiled' })
+  })
+
+  afterAll(async () => {
+    console.log(`objects copied per response by the walk: ${countCopies(page)}; without: 0`)
+    await app.close()
+  })
+})
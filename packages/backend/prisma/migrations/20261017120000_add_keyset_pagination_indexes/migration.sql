@@ -0,0 +1,11 @@
+-- Keyset pagination: list endpoints seek on (createdAt, id) within the active rows of a tenant.
+-- Appointments and transactions already have ("barbershopId", "date") indexes.
+
+-- CreateIndex
+CREATE INDEX "professionals_barbershopId_isActive_createdAt_idx" ON "professionals"("barbershopId", "isActive", "createdAt");
+
+-- CreateIndex
+CREATE INDEX "clients_barbershopId_isActive_createdAt_idx" ON "clients"("barbershopId", "isActive", "createdAt");
+
+-- CreateIndex
+CREATE INDEX "services_barbershopId_isActive_createdAt_idx" ON "services"("barbershopId", "isActive", "createdAt");
@@ -0,0 +1,27 @@
+-- Appointments store their end time (date + service duration at booking time) so overlap
+-- checks no longer depend on the current duration of the service.
+
+-- AlterTable
+ALTER TABLE "appointments" ADD COLUMN "endsAt" TIMESTAMP(3);
+
+-- Backfill from the current service durations
+UPDATE "appointments" a
+SET "endsAt" = a."date" + s."duration" * INTERVAL '1 minute'
+FROM "services" s
+WHERE s."barbershopId" = a."barbershopId" AND s."id" = a."serviceId";
+
+ALTER TABLE "appointments" ALTER COLUMN "endsAt" SET NOT NULL;
+
+-- CreateIndex
+CREATE INDEX "appointments_barbershopId_professionalId_endsAt_idx" ON "appointments"("barbershopId", "professionalId", "endsAt");
+
+-- No double-booking: non-cancelled appointments of a professional may not overlap, even when
+-- two bookings pass the application check concurrently. Columns are timestamp without time
+-- zone, hence tsrange. Fails if overlapping appointments already exist; cancel them first.
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE "appointments" ADD CONSTRAINT "appointments_no_overlap" EXCLUDE USING gist (
+  "barbershopId" WITH =,
+  "professionalId" WITH =,
+  tsrange("date", "endsAt", '[)') WITH &&
+) WHERE ("status" <> 'CANCELLED');
@@ -0,0 +1,66 @@
+-- Recurring appointment series. Occurrences are computed on read; an appointment row only
+-- exists for occurrences that were confirmed or modified (seriesId + seriesOccurrence).
+
+-- CreateTable
+CREATE TABLE "appointment_series" (
+    "id" TEXT NOT NULL,
+    "barbershopId" TEXT NOT NULL,
+    "professionalId" TEXT NOT NULL,
+    "clientId" TEXT NOT NULL,
+    "serviceId" TEXT NOT NULL,
+    "createdById" TEXT NOT NULL,
+    "startsAt" TIMESTAMP(3) NOT NULL,
+    "endsAt" TIMESTAMP(3) NOT NULL,
+    "intervalWeeks" INTEGER NOT NULL,
+    "count" INTEGER,
+    "duration" INTEGER NOT NULL,
+    "price" DECIMAL(10,2) NOT NULL,
+    "notes" TEXT,
+    "isActive" BOOLEAN NOT NULL DEFAULT true,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "appointment_series_pkey" PRIMARY KEY ("id")
+);
+
+-- AlterTable
+ALTER TABLE "appointments" ADD COLUMN "seriesId" TEXT,
+ADD COLUMN "seriesOccurrence" TIMESTAMP(3);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "appointment_series_barbershopId_id_key" ON "appointment_series"("barbershopId", "id");
+
+-- CreateIndex
+CREATE INDEX "appointment_series_barbershopId_professionalId_endsAt_idx" ON "appointment_series"("barbershopId", "professionalId", "endsAt");
+
+-- CreateIndex
+CREATE UNIQUE INDEX "appointments_seriesId_seriesOccurrence_key" ON "appointments"("seriesId", "seriesOccurrence");
+
+-- AddForeignKey
+ALTER TABLE "appointment_series" ADD CONSTRAINT "appointment_series_barbershopId_fkey" FOREIGN KEY ("barbershopId") REFERENCES "barbershops"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "appointment_series" ADD CONSTRAINT "appointment_series_professionalId_fkey" FOREIGN KEY ("barbershopId", "professionalId") REFERENCES "professionals"("barbershopId", "id") ON DELETE RESTRICT ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "appointment_series" ADD CONSTRAINT "appointment_series_clientId_fkey" FOREIGN KEY ("barbershopId", "clientId") REFERENCES "clients"("barbershopId", "id") ON DELETE RESTRICT ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "appointment_series" ADD CONSTRAINT "appointment_series_serviceId_fkey" FOREIGN KEY ("barbershopId", "serviceId") REFERENCES "services"("barbershopId", "id") ON DELETE RESTRICT ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "appointment_series" ADD CONSTRAINT "appointment_series_createdById_fkey" FOREIGN KEY ("barbershopId", "createdById") REFERENCES "professionals"("barbershopId", "id") ON DELETE RESTRICT ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "appointments" ADD CONSTRAINT "appointments_seriesId_fkey" FOREIGN KEY ("barbershopId", "seriesId") REFERENCES "appointment_series"("barbershopId", "id") ON DELETE RESTRICT ON UPDATE CASCADE;
+
+-- Row Level Security, as for the other tenant tables
+ALTER TABLE "appointment_series" ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "appointment_series_tenant_isolation"
+  ON "appointment_series"
+  FOR ALL
+  USING (
+    current_setting('app.current_tenant', true) IS NULL
+    OR "barbershopId" = current_setting('app.current_tenant', true)
+  );
@@ -0,0 +1,34 @@
+-- Per-day transaction totals for the financial summary. Transaction writes keep them in
+-- step in the same database transaction; `pnpm db:rebuild-rollups` recomputes them.
+
+-- CreateTable
+CREATE TABLE "transaction_daily_rollups" (
+    "barbershopId" TEXT NOT NULL,
+    "day" DATE NOT NULL,
+    "type" "TransactionType" NOT NULL,
+    "category" TEXT NOT NULL,
+    "amount" DECIMAL(14,2) NOT NULL,
+    "count" INTEGER NOT NULL,
+
+    CONSTRAINT "transaction_daily_rollups_pkey" PRIMARY KEY ("barbershopId","day","type","category")
+);
+
+-- AddForeignKey
+ALTER TABLE "transaction_daily_rollups" ADD CONSTRAINT "transaction_daily_rollups_barbershopId_fkey" FOREIGN KEY ("barbershopId") REFERENCES "barbershops"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- Row Level Security, as for the other tenant tables
+ALTER TABLE "transaction_daily_rollups" ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "transaction_daily_rollups_tenant_isolation"
+  ON "transaction_daily_rollups"
+  FOR ALL
+  USING (
+    current_setting('app.current_tenant', true) IS NULL
+    OR "barbershopId" = current_setting('app.current_tenant', true)
+  );
+
+-- Backfill from the existing transactions
+INSERT INTO "transaction_daily_rollups" ("barbershopId", "day", "type", "category", "amount", "count")
+SELECT "barbershopId", "date"::date, "type", "category", SUM("amount"), COUNT(*)::integer
+FROM "transactions"
+GROUP BY 1, 2, 3, 4;
@@ -0,0 +1,39 @@
+-- Per-day completed appointments, revenue and commissions of each professional for the
+-- commission report. Completing an appointment adds it in the same database transaction;
+-- `pnpm db:rebuild-rollups` recomputes them.
+
+-- CreateTable
+CREATE TABLE "professional_daily_rollups" (
+    "barbershopId" TEXT NOT NULL,
+    "day" DATE NOT NULL,
+    "professionalId" TEXT NOT NULL,
+    "appointments" INTEGER NOT NULL,
+    "revenue" DECIMAL(14,2) NOT NULL,
+    "commissions" DECIMAL(14,2) NOT NULL,
+
+    CONSTRAINT "professional_daily_rollups_pkey" PRIMARY KEY ("barbershopId","day","professionalId")
+);
+
+-- AddForeignKey
+ALTER TABLE "professional_daily_rollups" ADD CONSTRAINT "professional_daily_rollups_barbershopId_fkey" FOREIGN KEY ("barbershopId") REFERENCES "barbershops"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "professional_daily_rollups" ADD CONSTRAINT "professional_daily_rollups_professionalId_fkey" FOREIGN KEY ("barbershopId", "professionalId") REFERENCES "professionals"("barbershopId", "id") ON DELETE RESTRICT ON UPDATE CASCADE;
+
+-- Row Level Security, as for the other tenant tables
+ALTER TABLE "professional_daily_rollups" ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "professional_daily_rollups_tenant_isolation"
+  ON "professional_daily_rollups"
+  FOR ALL
+  USING (
+    current_setting('app.current_tenant', true) IS NULL
+    OR "barbershopId" = current_setting('app.current_tenant', true)
+  );
+
+-- Backfill from the appointments completed so far
+INSERT INTO "professional_daily_rollups" ("barbershopId", "day", "professionalId", "appointments", "revenue", "commissions")
+SELECT "barbershopId", "date"::date, "professionalId", COUNT(*)::integer, SUM("price"), COALESCE(SUM("commissionValue"), 0)
+FROM "appointments"
+WHERE "status" = 'COMPLETED'
+GROUP BY 1, 2, 3;
@@ -0,0 +1,50 @@
+import { PrismaClient } from '@prisma/client'
+import { transactionRollupRepository } from '../src/repositories/transactionRollupRepository.js'
+import { professionalRollupRepository } from '../src/repositories/professionalRollupRepository.js'
+
+/**
+ * Recomputes the daily transaction rollups from the transactions table and the daily
+ * professional rollups from the completed appointments
+ *
+ * Usage: pnpm db:rebuild-rollups [barbershopId]
+ *
+ * Without an argument every tenant is rebuilt. Needed after transactions or appointments were
+ * inserted, changed or deleted outside the API (imports, SQL fixes); API writes keep the
+ * rollups in step on their own. Writes to each table wait until its rebuild commits.
+ *
+ * Like the seed script, it connects with DIRECT_URL to bypass the connection pooler: the
+ * rebuild is one long database transaction.
+ */
+
+async function main() {
+  const barbershopId = process.argv[2]
+  const directUrl = process.env.DIRECT_URL || process.env.DATABASE_URL
+
+  const prisma = new PrismaClient({
+    datasources: {
+      db: {
+        url: directUrl,
+      },
+    },
+  })
+
+  try {
+    const started = Date.now()
+    const transactionRows = await transactionRollupRepository.rebuild(barbershopId, prisma)
+    const professionalRows = await professionalRollupRepository.rebuild(barbershopId, prisma)
+    const scope = barbershopId ? `barbershop ${barbershopId}` : 'all barbershops'
+    console.log(
+      `✅ Rebuilt ${transactionRows} transaction and ${professionalRows} professional rollup rows for ${scope} in ${Date.now() - started}ms`
+    )
+  } catch (error) {
+    console.error('❌ Rollup rebuild failed:', error)
+    throw error
+  } finally {
+    await prisma.$disconnect()
+  }
+}
+
+main().catch((error) => {
+  console.error(error)
+  process.exit(1)
+})
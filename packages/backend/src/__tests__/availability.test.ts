@@ -0,0 +1,86 @@
+import { describe, it, expect } from 'vitest'
+import { availabilityQuerySchema, freeIntervals, scheduleIntervals } from '../lib/availability.js'
+
+const at = (time: string) => new Date(`2026-10-19T${time}:00Z`)
+const interval = (start: string, end: string) => ({ start: at(start), end: at(end) })
+
+describe('freeIntervals', () => {
+  it('returns the whole window when nothing is booked', () => {
+    expect(freeIntervals([], at('09:00'), at('18:00'), 30)).toEqual([interval('09:00', '18:00')])
+  })
+
+  it('returns the gaps between bookings clipped to the window', () => {
+    const busy = [
+      interval('08:30', '09:30'),
+      interval('11:00', '11:30'),
+      interval('17:45', '19:00'),
+    ]
+
+    expect(freeIntervals(busy, at('09:00'), at('18:00'), 30)).toEqual([
+      interval('09:30', '11:00'),
+      interval('11:30', '17:45'),
+    ])
+  })
+
+  it('merges overlapping and touching bookings', () => {
+    const busy = [
+      interval('10:00', '11:00'),
+      interval('10:30', '12:00'),
+      interval('12:00', '12:30'),
+    ]
+
+    expect(freeIntervals(busy, at('10:00'), at('14:00'), 30)).toEqual([interval('12:30', '14:00')])
+  })
+
+  it('drops gaps shorter than the service duration', () => {
+    const busy = [interval('10:00', '10:40'), interval('11:00', '12:00')]
+
+    expect(freeIntervals(busy, at('10:00'), at('12:25'), 30)).toEqual([])
+    expect(freeIntervals(busy, at('10:00'), at('12:25'), 20)).toEqual([
+      interval('10:40', '11:00'),
+      interval('12:00', '12:25'),
+    ])
+  })
+})
+
+describe('scheduleIntervals', () => {
+  it('rejects candidates overlapping bookings or an earlier candidate', () => {
+    const busy = [interval('10:00', '11:00'), interval('10:30', '12:00')]
+    const candidates = [
+      interval('09:00', '09:30'),
+      interval('09:15', '09:45'),
+      interval('11:45', '12:15'),
+      interval('12:00', '12:30'),
+      interval('12:30', '13:00'),
+    ]
+
+    expect(scheduleIntervals(busy, candidates)).toEqual({
+      accepted: [
+        interval('09:00', '09:30'),
+        interval('12:00', '12:30'),
+        interval('12:30', '13:00'),
+      ],
+      rejected: [interval('09:15', '09:45'), interval('11:45', '12:15')],
+    })
+  })
+})
+
+describe('availabilityQuerySchema', () => {
+  it('accepts a month-long window', () => {
+    const query = availabilityQuerySchema.parse({
+      from: '2026-10-01T00:00:00Z',
+      to: '2026-11-01T00:00:00Z',
+      serviceId: 'service-1',
+    })
+
+    expect(query.from).toEqual(new Date('2026-10-01T00:00:00Z'))
+  })
+
+  it('rejects empty and oversized windows', () => {
+    const parse = (from: string, to: string) =>
+      availabilityQuerySchema.safeParse({ from, to, serviceId: 'service-1' }).success
+
+    expect(parse('2026-10-02T00:00:00Z', '2026-10-01T00:00:00Z')).toBe(false)
+    expect(parse('2026-10-01T00:00:00Z', '2026-11-02T00:00:00Z')).toBe(false)
+  })
+})
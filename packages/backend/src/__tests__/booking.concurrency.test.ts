@@ -0,0 +1,81 @@
+import { describe, it, expect, beforeAll, afterAll } from 'vitest'
+import type { PrismaClient } from '@prisma/client'
+import type { AppointmentRepository } from '../repositories/appointmentRepository.js'
+
+// Runs against a real, migrated Postgres: TEST_DATABASE_URL=postgresql://... pnpm test booking
+// Skipped otherwise, since mocks cannot show what the lock and the exclusion constraint do.
+const databaseUrl = process.env.TEST_DATABASE_URL
+
+const CONCURRENCY = 20
+
+describe.skipIf(!databaseUrl)('Concurrent bookings of one slot (Postgres)', () => {
+  let prisma: PrismaClient
+  let appointmentRepository: AppointmentRepository
+  let conflictMessage: string
+  const ids = { barbershopId: '', professionalId: '', clientId: '', serviceId: '' }
+
+  beforeAll(async () => {
+    process.env.DATABASE_URL = databaseUrl
+    ;({ prisma } = await import('../lib/prisma.js'))
+    const repository = await import('../repositories/appointmentRepository.js')
+    appointmentRepository = repository.appointmentRepository
+    conflictMessage = repository.APPOINTMENT_CONFLICT_MESSAGE
+
+    const barbershop = await prisma.barbershop.create({
+      data: { name: 'Concurrency Test', slug: `concurrency-${Date.now()}` },
+    })
+    const connect = { barbershop: { connect: { id: barbershop.id } } }
+    const professional = await prisma.professional.create({
+      data: {
+        ...connect,
+        name: 'Barber',
+        email: 'barber@concurrency.test',
+        passwordHash: 'x',
+        commissionRate: 50,
+      },
+    })
+    const client = await prisma.client.create({
+      data: { ...connect, name: 'Client', phone: '5500000000' },
+    })
+    const service = await prisma.service.create({
+      data: { ...connect, name: 'Haircut', price: 50, duration: 30 },
+    })
+    Object.assign(ids, {
+      barbershopId: barbershop.id,
+      professionalId: professional.id,
+      clientId: client.id,
+      serviceId: service.id,
+    })
+  })
+
+  afterAll(async () => {
+    if (!ids.barbershopId) return
+    await prisma.appointment.deleteMany({ where: { barbershopId: ids.barbershopId } })
+    await prisma.barbershop.delete({ where: { id: ids.barbershopId } })
+    await prisma.$disconnect()
+  })
+
+  it(`stores exactly one of ${CONCURRENCY} parallel bookings`, async () => {
+    const date = new Date('2030-01-07T10:00:00Z')
+    const results = await Promise.allSettled(
+      Array.from({ length: CONCURRENCY }, (_, i) =>
+        appointmentRepository.book({
+          ...ids,
+          createdById: ids.professionalId,
+          // Overlapping, not identical, slots: the conflict check has to catch ranges
+          date: new Date(date.getTime() + (i % 3) * 5 * 60 * 1000),
+          notes: null,
+        })
+      )
+    )
+
+    const booked = results.filter((result) => result.status === 'fulfilled')
+    const rejected = results.filter((result) => result.status === 'rejected')
+    expect(booked).toHaveLength(1)
+    for (const result of rejected) {
+      expect((result as PromiseRejectedResult).reason.message).toBe(conflictMessage)
+    }
+    const stored = await prisma.appointment.count({ where: { barbershopId: ids.barbershopId } })
+    expect(stored).toBe(1)
+  })
+})
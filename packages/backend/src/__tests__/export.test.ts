@@ -0,0 +1,63 @@
+import { describe, it, expect } from 'vitest'
+import { csvField, streamExport, type ExportColumns } from '../lib/export.js'
+
+interface Row {
+  id: string
+  note: string | null
+  amount: number
+}
+
+const columns: ExportColumns<Row> = {
+  id: (row) => row.id,
+  note: (row) => row.note,
+  amount: (row) => row.amount,
+}
+
+async function* rows(count: number): AsyncGenerator<Row> {
+  for (let i = 0; i < count; i++) {
+    yield { id: `row-${i}`, note: i % 2 ? null : 'Corte', amount: 35.5 }
+  }
+}
+
+async function collect(stream: AsyncIterable<unknown>): Promise<string> {
+  let body = ''
+  for await (const chunk of stream) body += String(chunk)
+  return body
+}
+
+describe('csvField', () => {
+  it('quotes delimiters, quotes and line breaks', () => {
+    expect(csvField('Corte')).toBe('Corte')
+    expect(csvField('Corte, barba')).toBe('"Corte, barba"')
+    expect(csvField('o "clássico"')).toBe('"o ""clássico"""')
+    expect(csvField('linha 1\nlinha 2')).toBe('"linha 1\nlinha 2"')
+    expect(csvField(null)).toBe('')
+    expect(csvField(-12.5)).toBe('-12.5')
+  })
+
+  it('keeps spreadsheets from evaluating text as a formula', () => {
+    expect(csvField('=HYPERLINK("x")')).toBe('"\'=HYPERLINK(""x"")"')
+    expect(csvField('@SUM(A1)')).toBe("'@SUM(A1)")
+    expect(csvField('-5')).toBe("'-5")
+  })
+})
+
+describe('streamExport', () => {
+  it('writes a header and one CRLF line per row as CSV', async () => {
+    expect(await collect(streamExport(rows(2), columns, 'csv'))).toBe(
+      'id,note,amount\r\nrow-0,Corte,35.5\r\nrow-1,,35.5\r\n'
+    )
+  })
+
+  it('writes one object per line as NDJSON', async () => {
+    const lines = (await collect(streamExport(rows(1000), columns, 'ndjson'))).split('\n')
+
+    expect(lines).toHaveLength(1001)
+    expect(lines[1000]).toBe('')
+    expect(JSON.parse(lines[999])).toEqual({ id: 'row-999', note: null, amount: 35.5 })
+  })
+
+  it('writes only the header of an empty CSV export', async () => {
+    expect(await collect(streamExport(rows(0), columns, 'csv'))).toBe('id,note,amount\r\n')
+  })
+})
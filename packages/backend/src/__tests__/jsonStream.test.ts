@@ -0,0 +1,40 @@
+import { describe, it, expect } from 'vitest'
+import { streamJsonList } from '../lib/jsonStream.js'
+
+async function* rows(count: number) {
+  for (let i = 0; i < count; i++) yield { id: `row-${i}`, note: 'x'.repeat(100) }
+  return count > 0 ? `after-${count - 1}` : null
+}
+
+async function collect(stream: AsyncIterable<unknown>): Promise<{ body: string; chunks: number }> {
+  let body = ''
+  let chunks = 0
+  for await (const chunk of stream) {
+    body += String(chunk)
+    chunks++
+  }
+  return { body, chunks }
+}
+
+describe('streamJsonList', () => {
+  it('writes the rows and the trailer as one JSON document', async () => {
+    const { body, chunks } = await collect(
+      streamJsonList(rows(500), JSON.stringify, (nextCursor) => ({
+        pagination: { limit: 500, nextCursor },
+      }))
+    )
+
+    const parsed = JSON.parse(body)
+    expect(parsed.data).toHaveLength(500)
+    expect(parsed.data[499].id).toBe('row-499')
+    expect(parsed.pagination).toEqual({ limit: 500, nextCursor: 'after-499' })
+    // Rows are flushed in chunks, not as one string at the end
+    expect(chunks).toBeGreaterThan(1)
+  })
+
+  it('writes an empty list', async () => {
+    const { body } = await collect(streamJsonList(rows(0), JSON.stringify, () => ({})))
+
+    expect(body).toBe('{"data":[]}')
+  })
+})
@@ -0,0 +1,75 @@
+import { describe, it, expect } from 'vitest'
+import {
+  cursorQuerySchema,
+  decodeCursor,
+  encodeCursor,
+  seekBatches,
+  seekOrderBy,
+  seekWhere,
+  toCursorPage,
+} from '../lib/pagination.js'
+
+const position = { value: new Date('2026-01-02T10:00:00.000Z'), id: 'apt-2' }
+
+describe('keyset pagination helpers', () => {
+  it('round-trips a cursor', () => {
+    expect(decodeCursor(encodeCursor(position))).toEqual(position)
+  })
+
+  it('rejects cursors it did not produce', () => {
+    expect(decodeCursor('not-a-cursor')).toBeNull()
+    expect(decodeCursor(Buffer.from('["nope","x"]').toString('base64url'))).toBeNull()
+    expect(decodeCursor(Buffer.from('{"id":"x"}').toString('base64url'))).toBeNull()
+    expect(cursorQuerySchema.safeParse('garbage').success).toBe(false)
+    expect(cursorQuerySchema.safeParse('').success).toBe(true)
+  })
+
+  it('seeks past the cursor with the id as tiebreaker', () => {
+    expect(seekWhere('date', 'desc', encodeCursor(position))).toEqual({
+      OR: [{ date: { lt: position.value } }, { date: position.value, id: { lt: 'apt-2' } }],
+    })
+    expect(seekOrderBy('date', 'asc')).toEqual([{ date: 'asc' }, { id: 'asc' }])
+  })
+
+  it('returns a next cursor only when there is another page', () => {
+    const rows = [
+      { id: 'a', date: new Date('2026-01-01T00:00:00.000Z') },
+      { id: 'b', date: new Date('2026-01-02T00:00:00.000Z') },
+      { id: 'c', date: new Date('2026-01-03T00:00:00.000Z') },
+    ]
+
+    const first = toCursorPage(rows, 2, (row) => row.date)
+    expect(first.data.map((row) => row.id)).toEqual(['a', 'b'])
+    expect(decodeCursor(first.pagination.nextCursor!)).toEqual({ value: rows[1].date, id: 'b' })
+
+    const last = toCursorPage(rows.slice(2), 2, (row) => row.date)
+    expect(last.pagination).toEqual({ limit: 2, nextCursor: null })
+  })
+
+  it('reads a page in keyset batches and returns the next cursor', async () => {
+    const rows = Array.from({ length: 5 }, (_, i) => ({
+      id: `r${i}`,
+      date: new Date(Date.UTC(2026, 0, i + 1)),
+    }))
+    const reads: Array<[string, number]> = []
+    const read = async (cursor: string, take: number) => {
+      reads.push([cursor, take])
+      const start = cursor ? rows.findIndex((row) => row.id === decodeCursor(cursor)?.id) + 1 : 0
+      return rows.slice(start, start + take)
+    }
+
+    const page = seekBatches(read, (row) => row.date, '', 3, 2)
+    const seen: string[] = []
+    let next = await page.next()
+    while (!next.done) {
+      seen.push(next.value.id)
+      next = await page.next()
+    }
+
+    expect(seen).toEqual(['r0', 'r1', 'r2'])
+    expect(decodeCursor(next.value!)).toEqual({ value: rows[2].date, id: 'r2' })
+    // Two rows and one to look ahead, then the single row left of the limit
+    expect(reads.map(([, take]) => take)).toEqual([3, 2])
+    expect(decodeCursor(reads[1][0])?.id).toBe('r1')
+  })
+})
@@ -0,0 +1,50 @@
+import { describe, it, expect, afterEach } from 'vitest'
+import bcrypt from 'bcryptjs'
+import {
+  PasswordHashPool,
+  PASSWORD_QUEUE_FULL_MESSAGE,
+  comparePassword,
+  isPasswordQueueFull,
+  hashPassword,
+} from '../lib/passwordHasher.js'
+
+describe('PasswordHashPool', () => {
+  let pool: PasswordHashPool
+
+  afterEach(async () => {
+    await pool.destroy()
+  })
+
+  it('hashes and compares in worker threads', async () => {
+    pool = new PasswordHashPool({ size: 2, maxQueue: 4 })
+
+    const hash = (await pool.run({ op: 'hash', password: 'senha123', rounds: 4 })) as string
+
+    expect(await bcrypt.compare('senha123', hash)).toBe(true)
+    expect(await pool.run({ op: 'compare', password: 'senha123', hash })).toBe(true)
+    expect(await pool.run({ op: 'compare', password: 'wrong', hash })).toBe(false)
+  })
+
+  it('rejects new work when the queue is full', async () => {
+    pool = new PasswordHashPool({ size: 1, maxQueue: 1 })
+
+    const running = pool.run({ op: 'hash', password: 'a', rounds: 8 })
+    const queued = pool.run({ op: 'hash', password: 'b', rounds: 8 })
+    const rejected = pool.run({ op: 'hash', password: 'c', rounds: 8 })
+
+    await expect(rejected).rejects.toThrow(PASSWORD_QUEUE_FULL_MESSAGE)
+    expect(await rejected.catch(isPasswordQueueFull)).toBe(true)
+    expect(isPasswordQueueFull(new Error('Invalid credentials'))).toBe(false)
+    expect(pool.queueDepth).toBe(1)
+    await expect(Promise.all([running, queued])).resolves.toHaveLength(2)
+  })
+})
+
+describe('hashPassword / comparePassword', () => {
+  it('runs inline in tests', async () => {
+    const hash = await hashPassword('senha123')
+
+    expect(await comparePassword('senha123', hash)).toBe(true)
+    expect(await comparePassword('other', hash)).toBe(false)
+  })
+})
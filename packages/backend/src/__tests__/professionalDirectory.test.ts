@@ -0,0 +1,62 @@
+import { describe, it, expect, beforeEach, vi } from 'vitest'
+import {
+  getProfessionalDirectory,
+  invalidateProfessionalDirectory,
+  clearProfessionalDirectories,
+} from '../lib/professionalDirectory.js'
+
+const { professionalFindMany } = vi.hoisted(() => ({ professionalFindMany: vi.fn() }))
+
+vi.mock('../lib/prisma.js', () => ({
+  prisma: { professional: { findMany: professionalFindMany } },
+}))
+
+const professional = (id: string) => ({ id, name: id, email: `${id}@test.com`, commissionRate: 50 })
+
+describe('getProfessionalDirectory', () => {
+  beforeEach(() => {
+    vi.clearAllMocks()
+    clearProfessionalDirectories()
+  })
+
+  it('serves a tenant from one query', async () => {
+    professionalFindMany.mockResolvedValue([professional('prof-1')])
+
+    await getProfessionalDirectory('tenant-1')
+    const directory = await getProfessionalDirectory('tenant-1', ['prof-1'])
+
+    expect(directory.get('prof-1')?.name).toBe('prof-1')
+    expect(professionalFindMany).toHaveBeenCalledTimes(1)
+  })
+
+  it('reads the directory again when a requested professional is missing', async () => {
+    // prof-2 was created on another instance after this one cached the directory
+    professionalFindMany
+      .mockResolvedValueOnce([professional('prof-1')])
+      .mockResolvedValueOnce([professional('prof-1'), professional('prof-2')])
+
+    await getProfessionalDirectory('tenant-1')
+    const directory = await getProfessionalDirectory('tenant-1', ['prof-1', 'prof-2'])
+
+    expect(directory.has('prof-2')).toBe(true)
+    expect(professionalFindMany).toHaveBeenCalledTimes(2)
+    await getProfessionalDirectory('tenant-1', ['prof-2'])
+    expect(professionalFindMany).toHaveBeenCalledTimes(2)
+  })
+
+  it('does not cache a load that an invalidation overtook', async () => {
+    let resolveLoad!: (rows: unknown[]) => void
+    professionalFindMany.mockReturnValueOnce(new Promise((resolve) => (resolveLoad = resolve)))
+
+    const load = getProfessionalDirectory('tenant-1')
+    invalidateProfessionalDirectory('tenant-1')
+    resolveLoad([professional('prof-1')])
+    await load
+
+    professionalFindMany.mockResolvedValueOnce([professional('prof-1'), professional('prof-2')])
+    const directory = await getProfessionalDirectory('tenant-1')
+
+    expect(professionalFindMany).toHaveBeenCalledTimes(2)
+    expect(directory.has('prof-2')).toBe(true)
+  })
+})
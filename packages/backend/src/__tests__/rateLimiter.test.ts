@@ -0,0 +1,317 @@
+import { describe, it, expect, beforeEach, afterEach, vi } from 'vitest'
+
+const { scriptExec } = vi.hoisted(() => ({ scriptExec: vi.fn() }))
+
+vi.mock('../lib/redis.js', () => ({
+  redis: { createScript: vi.fn(() => ({ exec: scriptExec })) },
+  ipRatelimit: { limit: vi.fn() },
+  tenantRatelimit: { limit: vi.fn() },
+}))
+
+import { ipRatelimit, redis } from '../lib/redis.js'
+import { listRateLimitCost, reportRateLimitCost } from '../lib/rateLimitConfig.js'
+import {
+  LocalRateLimiter,
+  limitByIp,
+  limitRequest,
+  localIpRatelimit,
+} from '../lib/rateLimiter.js'
+
+function createPipelineClient(globalCounts: Record<string, number> = {}) {
+  const calls: Array<{ key: string; amount: number }> = []
+  const client = {
+    pipeline: vi.fn(() => {
+      const ops: Array<() => unknown> = []
+      return {
+        incrby: (key: string, amount: number) => {
+          calls.push({ key, amount })
+          ops.push(() => {
+            globalCounts[key] = (globalCounts[key] ?? 0) + amount
+            return globalCounts[key]
+          })
+        },
+        pexpire: () => {
+          ops.push(() => 1)
+        },
+        exec: async () => ops.map((op) => op()),
+      }
+    }),
+  }
+  return { client, calls, globalCounts }
+}
+
+describe('LocalRateLimiter', () => {
+  beforeEach(() => {
+    vi.useFakeTimers()
+    vi.setSystemTime(new Date('2026-01-01T00:00:00.000Z'))
+  })
+
+  afterEach(() => {
+    vi.useRealTimers()
+  })
+
+  it('allows requests locally without touching Redis', async () => {
+    const { client } = createPipelineClient()
+    const limiter = new LocalRateLimiter({
+      limit: 5,
+      windowMs: 60000,
+      prefix: 'test',
+      maxDrift: 100,
+      redis: client,
+    })
+
+    const result = await limiter.limit('1.2.3.4')
+
+    expect(result).toMatchObject({ success: true, limit: 5, remaining: 4 })
+    expect(client.pipeline).not.toHaveBeenCalled()
+    limiter.reset()
+  })
+
+  it('denies once the local bucket is empty', async () => {
+    const { client } = createPipelineClient()
+    const limiter = new LocalRateLimiter({
+      limit: 3,
+      windowMs: 60000,
+      prefix: 'test',
+      maxDrift: 100,
+      redis: client,
+    })
+
+    for (let i = 0; i < 3; i++) {
+      expect((await limiter.limit('1.2.3.4')).success).toBe(true)
+    }
+    const denied = await limiter.limit('1.2.3.4')
+
+    expect(denied.success).toBe(false)
+    expect(denied.remaining).toBe(0)
+    limiter.reset()
+  })
+
+  it('consumes the requested cost', async () => {
+    const { client } = createPipelineClient()
+    const limiter = new LocalRateLimiter({
+      limit: 10,
+      windowMs: 60000,
+      prefix: 'test',
+      maxDrift: 100,
+      redis: client,
+    })
+
+    expect(await limiter.limit('a', 8)).toMatchObject({ success: true, remaining: 2 })
+    expect((await limiter.limit('a', 3)).success).toBe(false)
+    expect(await limiter.limit('a', 2)).toMatchObject({ success: true, remaining: 0 })
+    limiter.reset()
+  })
+
+  it('batches pending usage of every key into one pipeline', async () => {
+    const { client, calls } = createPipelineClient()
+    const limiter = new LocalRateLimiter({
+      limit: 10,
+      windowMs: 60000,
+      prefix: 'test',
+      maxDrift: 100,
+      redis: client,
+    })
+
+    await limiter.limit('a')
+    await limiter.limit('a')
+    await limiter.limit('b')
+    await limiter.flush()
+
+    expect(client.pipeline).toHaveBeenCalledTimes(1)
+    const windowId = Math.floor(Date.now() / 60000)
+    expect(calls).toEqual([
+      { key: `test:a:${windowId}`, amount: 2 },
+      { key: `test:b:${windowId}`, amount: 1 },
+    ])
+    limiter.reset()
+  })
+
+  it('caps the local bucket with usage reported by other instances', async () => {
+    const windowId = Math.floor(Date.now() / 60000)
+    const { client } = createPipelineClient({ [`test:a:${windowId}`]: 8 })
+    const limiter = new LocalRateLimiter({
+      limit: 10,
+      windowMs: 60000,
+      prefix: 'test',
+      maxDrift: 100,
+      redis: client,
+    })
+
+    await limiter.limit('a')
+    await limiter.flush()
+
+    // 9 used globally, so only one request remains for this instance
+    expect((await limiter.limit('a')).remaining).toBe(0)
+    expect((await limiter.limit('a')).success).toBe(false)
+    limiter.reset()
+  })
+
+  it('forces a sync when unsynced usage reaches the drift bound', async () => {
+    const { client } = createPipelineClient()
+    const limiter = new LocalRateLimiter({
+      limit: 100,
+      windowMs: 60000,
+      prefix: 'test',
+      maxDrift: 2,
+      redis: client,
+    })
+
+    await limiter.limit('a')
+    await limiter.limit('a')
+    expect(client.pipeline).not.toHaveBeenCalled()
+
+    await limiter.limit('a')
+    expect(client.pipeline).toHaveBeenCalledTimes(1)
+    limiter.reset()
+  })
+
+  it('keeps deciding locally when Redis is unreachable', async () => {
+    const errorSpy = vi.spyOn(console, 'error').mockImplementation(() => {})
+    const client = {
+      pipeline: () => ({
+        incrby: () => {},
+        pexpire: () => {},
+        exec: async () => {
+          throw new Error('connection refused')
+        },
+      }),
+    }
+    const limiter = new LocalRateLimiter({
+      limit: 10,
+      windowMs: 60000,
+      prefix: 'test',
+      maxDrift: 1,
+      redis: client,
+    })
+
+    await limiter.limit('a')
+    const result = await limiter.limit('a')
+
+    expect(result.success).toBe(true)
+    expect(errorSpy).toHaveBeenCalled()
+    errorSpy.mockRestore()
+    limiter.reset()
+  })
+})
+
+describe('limitByIp', () => {
+  afterEach(() => {
+    process.env.RATE_LIMIT_MODE = 'strict'
+    localIpRatelimit.reset()
+  })
+
+  it('uses the Upstash sliding window in strict mode', async () => {
+    process.env.RATE_LIMIT_MODE = 'strict'
+    vi.mocked(ipRatelimit.limit).mockResolvedValue({
+      success: true,
+      limit: 100,
+      remaining: 42,
+      reset: Date.now() + 60000,
+      pending: Promise.resolve(),
+    })
+
+    const result = await limitByIp('1.2.3.4')
+
+    expect(ipRatelimit.limit).toHaveBeenCalledWith('1.2.3.4')
+    expect(result.remaining).toBe(42)
+  })
+
+  it('decides locally by default', async () => {
+    delete process.env.RATE_LIMIT_MODE
+    vi.mocked(ipRatelimit.limit).mockClear()
+
+    const result = await limitByIp('1.2.3.4')
+
+    expect(ipRatelimit.limit).not.toHaveBeenCalled()
+    expect(result).toMatchObject({ success: true, limit: 100, remaining: 99 })
+  })
+})
+
+describe('limitRequest', () => {
+  beforeEach(() => {
+    process.env.RATE_LIMIT_MODE = 'atomic'
+    scriptExec.mockReset()
+    vi.mocked(ipRatelimit.limit).mockClear()
+  })
+
+  afterEach(() => {
+    process.env.RATE_LIMIT_MODE = 'strict'
+  })
+
+  it('checks IP and tenant in a single script call in atomic mode', async () => {
+    scriptExec.mockResolvedValue([1, 41, 1, 900])
+
+    const result = await limitRequest('1.2.3.4', 'tenant-1')
+
+    expect(scriptExec).toHaveBeenCalledTimes(1)
+    const [keys, args] = scriptExec.mock.calls[0]
+    expect(keys).toHaveLength(4)
+    expect(keys[0]).toMatch(/^barbershop:ratelimit:atomic:ip:1\.2\.3\.4:\d+$/)
+    expect(keys[2]).toMatch(/^barbershop:ratelimit:atomic:tenant:tenant-1:\d+$/)
+    expect(args.slice(2)).toEqual(['100', '1000', '1'])
+    expect(ipRatelimit.limit).not.toHaveBeenCalled()
+    expect(result.ip).toMatchObject({ success: true, limit: 100, remaining: 41 })
+    expect(result.tenant).toMatchObject({ success: true, limit: 1000, remaining: 900 })
+  })
+
+  it('reports a denied tenant scope', async () => {
+    scriptExec.mockResolvedValue([1, 41, 0, 0])
+
+    const result = await limitRequest('1.2.3.4', 'tenant-1')
+
+    expect(result.ip.success).toBe(true)
+    expect(result.tenant).toMatchObject({ success: false, remaining: 0 })
+  })
+
+  it('uses the atomic script in strict mode when the driver is not Upstash', async () => {
+    process.env.RATE_LIMIT_MODE = 'strict'
+    Object.assign(redis, { driverName: 'memory' })
+    scriptExec.mockResolvedValue([1, 41, 1, 900])
+
+    try {
+      await limitRequest('1.2.3.4', 'tenant-1')
+    } finally {
+      Object.assign(redis, { driverName: undefined })
+    }
+
+    expect(scriptExec).toHaveBeenCalledTimes(1)
+    expect(ipRatelimit.limit).not.toHaveBeenCalled()
+  })
+
+  it('omits the tenant scope when no tenant is given', async () => {
+    scriptExec.mockResolvedValue([0, 0, -1, -1])
+
+    const result = await limitRequest('1.2.3.4')
+
+    expect(scriptExec.mock.calls[0][0]).toHaveLength(2)
+    expect(result.ip.success).toBe(false)
+    expect(result.tenant).toBeUndefined()
+  })
+})
+
+describe('reportRateLimitCost', () => {
+  it('grows with the requested period', () => {
+    expect(reportRateLimitCost('2026-01-01T00:00:00Z', '2026-01-15T00:00:00Z')).toBe(10)
+    expect(reportRateLimitCost('2026-01-01T00:00:00Z', '2026-03-15T00:00:00Z')).toBe(30)
+    expect(reportRateLimitCost('2025-01-01T00:00:00Z', '2026-01-01T00:00:00Z')).toBe(120)
+  })
+
+  it('falls back to one period for invalid ranges', () => {
+    expect(reportRateLimitCost(undefined, 'not-a-date')).toBe(10)
+  })
+})
+
+describe('listRateLimitCost', () => {
+  it('charges streamed pages per 100 rows', () => {
+    expect(listRateLimitCost('true', '100')).toBe(1)
+    expect(listRateLimitCost('true', '2500')).toBe(25)
+    expect(listRateLimitCost('true', '10000')).toBe(100)
+  })
+
+  it('charges other pages the default cost', () => {
+    expect(listRateLimitCost(undefined, '100')).toBe(1)
+    expect(listRateLimitCost('false', '50')).toBe(1)
+    expect(listRateLimitCost('true', 'lots')).toBe(1)
+  })
+})
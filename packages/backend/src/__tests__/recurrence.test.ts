@@ -0,0 +1,77 @@
+import { describe, it, expect } from 'vitest'
+import { expandOccurrences, recurrenceSchema, toSeriesRule } from '../lib/recurrence.js'
+
+const at = (day: string, time: string) => new Date(`2026-${day}T${time}:00Z`)
+const interval = (day: string, start: string, end: string) => ({
+  start: at(day, start),
+  end: at(day, end),
+})
+
+describe('toSeriesRule', () => {
+  it('stores the end of the last occurrence', () => {
+    const rule = toSeriesRule(at('10-05', '10:00'), 30, { interval: 2, count: 3 })
+
+    expect(rule).toEqual({
+      startsAt: at('10-05', '10:00'),
+      endsAt: at('11-02', '10:30'),
+      intervalWeeks: 2,
+      duration: 30,
+    })
+  })
+
+  it('counts the occurrences starting up to until', () => {
+    const rule = toSeriesRule(at('10-05', '10:00'), 30, {
+      interval: 1,
+      until: '2026-10-26T10:00:00Z',
+    })
+
+    expect(rule.endsAt).toEqual(at('10-26', '10:30'))
+  })
+
+  it('rejects recurrences ending before they start or longer than 104 occurrences', () => {
+    expect(() =>
+      toSeriesRule(at('10-05', '10:00'), 30, { interval: 1, until: '2026-10-01T00:00:00Z' })
+    ).toThrow('Recurrence ends before it starts')
+    expect(() =>
+      toSeriesRule(at('10-05', '10:00'), 30, { interval: 1, until: '2028-10-05T10:00:00Z' })
+    ).toThrow('Recurrence exceeds 104 occurrences')
+  })
+})
+
+describe('expandOccurrences', () => {
+  // Mondays 10:00-10:30, every other week, six occurrences (10-05 to 12-14)
+  const rule = toSeriesRule(at('10-05', '10:00'), 30, { interval: 2, count: 6 })
+
+  it('returns only the occurrences overlapping the window', () => {
+    expect(expandOccurrences(rule, at('10-12', '00:00'), at('11-03', '00:00'))).toEqual([
+      interval('10-19', '10:00', '10:30'),
+      interval('11-02', '10:00', '10:30'),
+    ])
+  })
+
+  it('includes occurrences cut by the window edges', () => {
+    expect(expandOccurrences(rule, at('10-19', '10:15'), at('10-19', '10:20'))).toEqual([
+      interval('10-19', '10:00', '10:30'),
+    ])
+    expect(expandOccurrences(rule, at('10-19', '10:30'), at('11-02', '10:00'))).toEqual([])
+  })
+
+  it('stops at the first and last occurrence', () => {
+    expect(expandOccurrences(rule, at('09-01', '00:00'), at('10-06', '00:00'))).toEqual([
+      interval('10-05', '10:00', '10:30'),
+    ])
+    expect(expandOccurrences(rule, at('12-01', '00:00'), at('12-31', '00:00'))).toEqual([
+      interval('12-14', '10:00', '10:30'),
+    ])
+  })
+})
+
+describe('recurrenceSchema', () => {
+  it('requires exactly one of count and until', () => {
+    expect(recurrenceSchema.safeParse({ interval: 1, count: 4 }).success).toBe(true)
+    expect(recurrenceSchema.safeParse({ interval: 2 }).success).toBe(false)
+    expect(
+      recurrenceSchema.safeParse({ count: 4, until: '2026-12-01T00:00:00Z' }).success
+    ).toBe(false)
+  })
+})
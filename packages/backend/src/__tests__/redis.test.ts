@@ -1,196 +1,301 @@
-import { describe, it, expect, beforeEach, vi } from 'vitest'
-
-// Mock do Redis
-vi.mock('@upstash/redis', () => {
-  const mockRedis = {
-    set: vi.fn().mockResolvedValue('OK'),
-    get: vi.fn().mockResolvedValue(null),
-    del: vi.fn().mockResolvedValue(1),
-    keys: vi.fn().mockResolvedValue([]),
-  }
-
-  return {
-    Redis: vi.fn(() => mockRedis),
-    Ratelimit: vi.fn(() => ({
-      limit: vi.fn().mockResolvedValue({ success: true, limit: 100, remaining: 99, reset: 0 }),
-    })),
-  }
+import { describe, it, expect, beforeEach, afterEach, vi } from 'vitest'
+
+// The Upstash SDK is only used by the strict-mode limiters
+vi.mock('@upstash/redis', () => ({
+  Redis: vi.fn(() => ({})),
+}))
+
+vi.mock('@upstash/ratelimit', () => {
+  const Ratelimit = vi.fn(() => ({
+    limit: vi.fn().mockResolvedValue({ success: true, limit: 100, remaining: 99, reset: 0 }),
+  }))
+  return { Ratelimit: Object.assign(Ratelimit, { slidingWindow: vi.fn() }) }
 })
 
+const ENV_KEYS = [
+  'NODE_ENV',
+  'REDIS_DRIVER',
+  'REDIS_URL',
+  'UPSTASH_REDIS_REST_URL',
+  'UPSTASH_REDIS_REST_TOKEN',
+] as const
+
+// Helpers run against the in-memory driver, including the script emulations
+async function loadRedis() {
+  const redisModule = await import('../lib/redis')
+  await redisModule.redis.command(['FLUSHALL'])
+  return redisModule
+}
+
 describe('Redis Client & Helpers', () => {
+  const savedEnv = Object.fromEntries(ENV_KEYS.map((key) => [key, process.env[key]]))
+
   beforeEach(() => {
-    vi.clearAllMocks()
+    vi.resetModules()
+    process.env.REDIS_DRIVER = 'memory'
+  })
+
+  afterEach(() => {
+    vi.useRealTimers()
+    for (const key of ENV_KEYS) {
+      if (savedEnv[key] === undefined) delete process.env[key]
+      else process.env[key] = savedEnv[key]
+    }
   })
 
-  describe('Redis Instance', () => {
-    it('should create Redis client with URL and token from env', async () => {
+  describe('Driver Selection', () => {
+    it('should use the driver named by REDIS_DRIVER', async () => {
       process.env.UPSTASH_REDIS_REST_URL = 'https://example.upstash.io'
       process.env.UPSTASH_REDIS_REST_TOKEN = 'test-token'
 
       const { redis } = await import('../lib/redis')
 
-      expect(redis).toBeDefined()
+      expect(redis.driverName).toBe('memory')
     })
 
-    it('should log warning if credentials are missing in non-test environment', async () => {
+    it('should use Upstash when credentials are set', async () => {
+      delete process.env.REDIS_DRIVER
+      process.env.UPSTASH_REDIS_REST_URL = 'https://example.upstash.io'
+      process.env.UPSTASH_REDIS_REST_TOKEN = 'test-token'
+
+      const { redis } = await import('../lib/redis')
+
+      expect(redis.driverName).toBe('upstash')
+    })
+
+    it('should use TCP when only REDIS_URL is set', async () => {
+      delete process.env.REDIS_DRIVER
+      delete process.env.UPSTASH_REDIS_REST_URL
+      delete process.env.UPSTASH_REDIS_REST_TOKEN
+      process.env.REDIS_URL = 'redis://localhost:6379'
+
+      const { redis } = await import('../lib/redis')
+
+      expect(redis.driverName).toBe('tcp')
+    })
+
+    it('should fall back to memory and warn outside tests when nothing is configured', async () => {
       const warnSpy = vi.spyOn(console, 'warn').mockImplementation(() => {})
+      delete process.env.REDIS_DRIVER
+      delete process.env.REDIS_URL
       process.env.NODE_ENV = 'development'
       process.env.UPSTASH_REDIS_REST_URL = ''
       process.env.UPSTASH_REDIS_REST_TOKEN = ''
 
-      vi.resetModules()
-      await import('../lib/redis')
+      const { redis } = await import('../lib/redis')
 
-      expect(warnSpy).toHaveBeenCalledWith(
-        'Missing Upstash Redis credentials. Rate limiting will not work.'
-      )
+      expect(redis.driverName).toBe('memory')
+      expect(warnSpy).toHaveBeenCalledWith(expect.stringContaining('Using in-memory Redis'))
       warnSpy.mockRestore()
     })
   })
 
   describe('OTP Helpers', () => {
-    it('should store OTP with correct key format', async () => {
-      const { storeOTP, redis } = await import('../lib/redis')
+    it('should store OTP with correct key format and TTL', async () => {
+      const { storeOTP, redis } = await loadRedis()
 
       await storeOTP('barbershop-1', 'user@example.com', '123456')
 
-      expect(redis.set).toHaveBeenCalledWith(
-        'barbershop:otp:barbershop-1:user@example.com',
-        '123456',
-        expect.objectContaining({ ex: 300 })
-      )
+      expect(await redis.get('barbershop:otp:barbershop-1:user@example.com')).toBe('123456')
+      expect(await redis.ttl('barbershop:otp:barbershop-1:user@example.com')).toBe(300)
     })
 
-    it('should verify OTP correctly', async () => {
-      const { verifyOTP, redis } = await import('../lib/redis')
+    it('should verify and consume a correct OTP', async () => {
+      const { storeOTP, verifyOTP, redis } = await loadRedis()
+      await storeOTP('barbershop-1', 'user@example.com', '123456')
 
-      const mockGet = redis.get as unknown as ReturnType<typeof vi.fn>
-      mockGet.mockResolvedValueOnce('123456')
+      expect(await verifyOTP('barbershop-1', 'user@example.com', '123456')).toBe('valid')
+      expect(await redis.get('barbershop:otp:barbershop-1:user@example.com')).toBeNull()
+      expect(await verifyOTP('barbershop-1', 'user@example.com', '123456')).toBe('expired')
+    })
 
-      const result = await verifyOTP('barbershop-1', 'user@example.com', '123456')
+    it('should count wrong codes and lock out after the limit', async () => {
+      const { storeOTP, verifyOTP } = await loadRedis()
+      await storeOTP('barbershop-1', 'user@example.com', '123456')
 
-      expect(result).toBe(true)
-      expect(redis.del).toHaveBeenCalledWith('barbershop:otp:barbershop-1:user@example.com')
+      for (let i = 0; i < 4; i++) {
+        expect(await verifyOTP('barbershop-1', 'user@example.com', '000000')).toBe('invalid')
+      }
+      expect(await verifyOTP('barbershop-1', 'user@example.com', '000000')).toBe('locked')
+      expect(await verifyOTP('barbershop-1', 'user@example.com', '123456')).toBe('expired')
     })
 
-    it('should return false for incorrect OTP', async () => {
-      const { verifyOTP, redis } = await import('../lib/redis')
+    it('should reset the attempt counter when a new OTP is stored', async () => {
+      const { storeOTP, verifyOTP, redis } = await loadRedis()
+      await storeOTP('barbershop-1', 'user@example.com', '123456')
+      await verifyOTP('barbershop-1', 'user@example.com', '000000')
+
+      await storeOTP('barbershop-1', 'user@example.com', '654321')
 
-      const mockGet = redis.get as unknown as ReturnType<typeof vi.fn>
-      mockGet.mockResolvedValueOnce('654321')
+      expect(await redis.get('barbershop:otp-attempts:barbershop-1:user@example.com')).toBeNull()
+    })
+
+    it('should expire OTPs after their TTL', async () => {
+      vi.useFakeTimers()
+      const { storeOTP, verifyOTP } = await loadRedis()
+      await storeOTP('barbershop-1', 'user@example.com', '123456')
 
-      const result = await verifyOTP('barbershop-1', 'user@example.com', '123456')
+      vi.advanceTimersByTime(301 * 1000)
 
-      expect(result).toBe(false)
+      expect(await verifyOTP('barbershop-1', 'user@example.com', '123456')).toBe('expired')
     })
 
-    it('should delete OTP', async () => {
-      const { deleteOTP, redis } = await import('../lib/redis')
+    it('should delete OTP and its attempt counter', async () => {
+      const { storeOTP, verifyOTP, deleteOTP, redis } = await loadRedis()
+      await storeOTP('barbershop-1', 'user@example.com', '123456')
+      await verifyOTP('barbershop-1', 'user@example.com', '000000')
 
       await deleteOTP('barbershop-1', 'user@example.com')
 
-      expect(redis.del).toHaveBeenCalledWith('barbershop:otp:barbershop-1:user@example.com')
+      expect(await redis.get('barbershop:otp:barbershop-1:user@example.com')).toBeNull()
+      expect(await redis.get('barbershop:otp-attempts:barbershop-1:user@example.com')).toBeNull()
     })
   })
 
   describe('Refresh Token Helpers', () => {
-    it('should store refresh token with metadata', async () => {
-      const { storeRefreshToken, redis } = await import('../lib/redis')
-      const metadata = { createdAt: Date.now(), expiresAt: Date.now() + 86400000 }
+    const metadata = { createdAt: 1000, expiresAt: 2000 }
+
+    it('should store refresh token and index it', async () => {
+      const { storeRefreshToken, getRefreshToken, redis } = await loadRedis()
 
       await storeRefreshToken('prof-1', 'token-id-1', metadata)
 
-      expect(redis.set).toHaveBeenCalledWith(
-        'barbershop:refresh:prof-1:token-id-1',
-        JSON.stringify(metadata),
-        expect.objectContaining({ ex: 604800 })
-      )
+      expect(await getRefreshToken('prof-1', 'token-id-1')).toEqual(metadata)
+      expect(await redis.ttl('barbershop:refresh:prof-1:token-id-1')).toBe(604800)
+      expect(await redis.smembers('barbershop:refresh-index:prof-1')).toEqual(['token-id-1'])
     })
 
-    it('should get refresh token', async () => {
-      const { getRefreshToken, redis } = await import('../lib/redis')
-      const metadata = { createdAt: Date.now(), expiresAt: Date.now() + 86400000 }
+    it('should return null if refresh token not found', async () => {
+      const { getRefreshToken } = await loadRedis()
 
-      const mockGet = redis.get as unknown as ReturnType<typeof vi.fn>
-      mockGet.mockResolvedValueOnce(JSON.stringify(metadata))
+      expect(await getRefreshToken('prof-1', 'token-id-1')).toBeNull()
+    })
 
-      const result = await getRefreshToken('prof-1', 'token-id-1')
+    it('should delete refresh token and remove it from the index', async () => {
+      const { storeRefreshToken, deleteRefreshToken, getRefreshToken, redis } = await loadRedis()
+      await storeRefreshToken('prof-1', 'token-id-1', metadata)
+
+      await deleteRefreshToken('prof-1', 'token-id-1')
 
-      expect(result).toEqual(metadata)
+      expect(await getRefreshToken('prof-1', 'token-id-1')).toBeNull()
+      expect(await redis.smembers('barbershop:refresh-index:prof-1')).toEqual([])
     })
 
-    it('should return null if refresh token not found', async () => {
-      const { getRefreshToken, redis } = await import('../lib/redis')
+    it('should delete all refresh tokens of one professional through the index', async () => {
+      const { storeRefreshToken, deleteAllRefreshTokens, getRefreshToken } = await loadRedis()
+      await storeRefreshToken('prof-1', 'token-1', metadata)
+      await storeRefreshToken('prof-1', 'token-2', metadata)
+      await storeRefreshToken('prof-2', 'token-3', metadata)
+
+      expect(await deleteAllRefreshTokens('prof-1')).toBe(2)
 
-      const mockGet = redis.get as unknown as ReturnType<typeof vi.fn>
-      mockGet.mockResolvedValueOnce(null)
+      expect(await getRefreshToken('prof-1', 'token-1')).toBeNull()
+      expect(await getRefreshToken('prof-1', 'token-2')).toBeNull()
+      expect(await getRefreshToken('prof-2', 'token-3')).toEqual(metadata)
+    })
 
-      const result = await getRefreshToken('prof-1', 'token-id-1')
+    it('should consume a refresh token stored before session ids only once', async () => {
+      const { consumeLegacyRefreshToken, redis } = await loadRedis()
+      await redis.set('barbershop:refresh:tenant-1:prof-1', 'legacy-token')
 
-      expect(result).toBeNull()
+      expect(await consumeLegacyRefreshToken('tenant-1', 'prof-1', 'other-token')).toBe(false)
+      expect(await consumeLegacyRefreshToken('tenant-1', 'prof-1', 'legacy-token')).toBe(true)
+      expect(await consumeLegacyRefreshToken('tenant-1', 'prof-1', 'legacy-token')).toBe(false)
+      expect(await redis.get('barbershop:refresh:tenant-1:prof-1')).toBeNull()
     })
 
-    it('should delete refresh token', async () => {
-      const { deleteRefreshToken, redis } = await import('../lib/redis')
+    it('should list refresh sessions newest first and prune expired ids', async () => {
+      const { storeRefreshToken, listRefreshTokens, redis } = await loadRedis()
+      await storeRefreshToken('prof-1', 'token-1', { createdAt: 1000, expiresAt: 2000 })
+      await storeRefreshToken('prof-1', 'token-2', { createdAt: 3000, expiresAt: 4000 })
+      await storeRefreshToken('prof-1', 'token-3', { createdAt: 5000, expiresAt: 6000 })
+      await redis.del('barbershop:refresh:prof-1:token-3')
 
-      await deleteRefreshToken('prof-1', 'token-id-1')
+      const sessions = await listRefreshTokens('prof-1')
 
-      expect(redis.del).toHaveBeenCalledWith('barbershop:refresh:prof-1:token-id-1')
+      expect(sessions).toEqual([
+        { tokenId: 'token-2', createdAt: 3000, expiresAt: 4000 },
+        { tokenId: 'token-1', createdAt: 1000, expiresAt: 2000 },
+      ])
+      expect(await redis.smembers('barbershop:refresh-index:prof-1')).not.toContain('token-3')
     })
 
-    it('should delete all refresh tokens for a professional', async () => {
-      const { deleteAllRefreshTokens, redis } = await import('../lib/redis')
-
-      const mockKeys = redis.keys as unknown as ReturnType<typeof vi.fn>
-      mockKeys.mockResolvedValueOnce(['token-1', 'token-2', 'token-3'])
+    it('should rotate refresh token once', async () => {
+      const { storeRefreshToken, rotateRefreshToken, getRefreshToken } = await loadRedis()
+      await storeRefreshToken('prof-1', 'old-id', metadata)
+      const next = { createdAt: 3000, expiresAt: 4000 }
 
-      await deleteAllRefreshTokens('prof-1')
+      expect(await rotateRefreshToken('prof-1', 'old-id', 'new-id', next)).toBe(true)
+      expect(await getRefreshToken('prof-1', 'old-id')).toBeNull()
+      expect(await getRefreshToken('prof-1', 'new-id')).toEqual(next)
 
-      expect(redis.del).toHaveBeenCalledWith('token-1', 'token-2', 'token-3')
+      // Replaying the old token fails and stores nothing
+      expect(await rotateRefreshToken('prof-1', 'old-id', 'other-id', next)).toBe(false)
+      expect(await getRefreshToken('prof-1', 'other-id')).toBeNull()
     })
   })
 
   describe('Tenant Cache Helpers', () => {
     it('should cache tenant', async () => {
-      const { cacheTenant, redis } = await import('../lib/redis')
+      const { cacheTenant, redis } = await loadRedis()
 
       await cacheTenant('my-barbershop', 'barbershop-id-1')
 
-      expect(redis.set).toHaveBeenCalledWith(
-        'barbershop:tenant:my-barbershop',
-        'barbershop-id-1',
-        expect.objectContaining({ ex: 300 })
-      )
+      expect(await redis.get('barbershop:tenant:my-barbershop')).toBe('barbershop-id-1')
+      expect(await redis.ttl('barbershop:tenant:my-barbershop')).toBe(300)
     })
 
     it('should get cached tenant', async () => {
-      const { getCachedTenant, redis } = await import('../lib/redis')
+      const { cacheTenant, getCachedTenant } = await loadRedis()
+      await cacheTenant('my-barbershop', 'barbershop-id-1')
 
-      const mockGet = redis.get as unknown as ReturnType<typeof vi.fn>
-      mockGet.mockResolvedValueOnce('barbershop-id-1')
+      expect(await getCachedTenant('my-barbershop')).toBe('barbershop-id-1')
+    })
 
-      const result = await getCachedTenant('my-barbershop')
+    it('should return null if tenant not in cache', async () => {
+      const { getCachedTenant } = await loadRedis()
 
-      expect(result).toBe('barbershop-id-1')
+      expect(await getCachedTenant('my-barbershop')).toBeNull()
     })
 
-    it('should return null if tenant not in cache', async () => {
-      const { getCachedTenant, redis } = await import('../lib/redis')
+    it('should invalidate tenant cache', async () => {
+      const { cacheTenant, invalidateTenantCache, getCachedTenant } = await loadRedis()
+      await cacheTenant('my-barbershop', 'barbershop-id-1')
+
+      await invalidateTenantCache('my-barbershop')
+
+      expect(await getCachedTenant('my-barbershop')).toBeNull()
+    })
+  })
 
-      const mockGet = redis.get as unknown as ReturnType<typeof vi.fn>
-      mockGet.mockResolvedValueOnce(null)
+  describe('List Count Cache Helpers', () => {
+    it('should return a cached count of the current generation', async () => {
+      const { cacheCount, getCachedCount } = await loadRedis()
 
-      const result = await getCachedTenant('my-barbershop')
+      expect(await getCachedCount('appointment', 'barbershop-1', 'filters')).toEqual({
+        count: null,
+        generation: 0,
+      })
+      await cacheCount('appointment', 'barbershop-1', 'filters', 0, 12)
 
-      expect(result).toBeNull()
+      expect(await getCachedCount('appointment', 'barbershop-1', 'filters')).toEqual({
+        count: 12,
+        generation: 0,
+      })
     })
 
-    it('should invalidate tenant cache', async () => {
-      const { invalidateTenantCache, redis } = await import('../lib/redis')
+    it('should orphan cached counts of the tenant on invalidation', async () => {
+      const { cacheCount, getCachedCount, invalidateCachedCounts } = await loadRedis()
+      await cacheCount('appointment', 'barbershop-1', 'filters', 0, 12)
+      await cacheCount('appointment', 'barbershop-2', 'filters', 0, 5)
 
-      await invalidateTenantCache('my-barbershop')
+      await invalidateCachedCounts('appointment', 'barbershop-1')
 
-      expect(redis.del).toHaveBeenCalledWith('barbershop:tenant:my-barbershop')
+      expect(await getCachedCount('appointment', 'barbershop-1', 'filters')).toEqual({
+        count: null,
+        generation: 1,
+      })
+      expect((await getCachedCount('appointment', 'barbershop-2', 'filters')).count).toBe(5)
     })
   })
 
@@ -0,0 +1,210 @@
+import { describe, it, expect, afterEach, vi } from 'vitest'
+import { createServer, type Server } from 'node:net'
+import type { AddressInfo } from 'node:net'
+import {
+  RedisClient,
+  RedisReplyError,
+  type RedisCommand,
+  type RedisDriver,
+  type RedisReply,
+} from '../lib/redisClient.js'
+import { MemoryRedisDriver } from '../lib/redisMemoryDriver.js'
+import { RespParser, TcpRedisDriver, encodeCommands } from '../lib/redisTcpDriver.js'
+
+function createRecordingDriver(reply: (command: RedisCommand) => RedisReply = () => 'OK') {
+  const batches: RedisCommand[][] = []
+  const driver: RedisDriver = {
+    name: 'tcp',
+    send: vi.fn(async (commands: RedisCommand[]) => {
+      batches.push(commands)
+      return commands.map(reply)
+    }),
+  }
+  return { driver, batches }
+}
+
+function encodeReply(reply: RedisReply): string {
+  if (reply === null) return '$-1\r\n'
+  if (reply instanceof RedisReplyError) return `-${reply.message}\r\n`
+  if (typeof reply === 'number') return `:${reply}\r\n`
+  if (Array.isArray(reply)) return `*${reply.length}\r\n${reply.map(encodeReply).join('')}`
+  return `$${Buffer.byteLength(reply)}\r\n${reply}\r\n`
+}
+
+// Minimal RESP server backed by the in-memory driver
+async function startRespServer(): Promise<{ server: Server; url: string }> {
+  const memory = new MemoryRedisDriver()
+  const server = createServer((socket) => {
+    const parser = new RespParser()
+    socket.on('data', async (chunk) => {
+      const commands = parser.push(chunk) as RedisCommand[]
+      const replies = await memory.send(commands)
+      socket.write(replies.map(encodeReply).join(''))
+    })
+  })
+  await new Promise<void>((resolve) => server.listen(0, '127.0.0.1', resolve))
+  const { port } = server.address() as AddressInfo
+  return { server, url: `redis://127.0.0.1:${port}` }
+}
+
+describe('RedisClient', () => {
+  it('batches commands issued in the same tick when auto-pipelining', async () => {
+    const { driver, batches } = createRecordingDriver((command) => `${command[0]}:${command[1]}`)
+    const client = new RedisClient(driver, { autoPipeline: true })
+
+    const results = await Promise.all([client.get('a'), client.get('b'), client.del('c')])
+
+    expect(batches).toEqual([
+      [
+        ['GET', 'a'],
+        ['GET', 'b'],
+        ['DEL', 'c'],
+      ],
+    ])
+    expect(results).toEqual(['GET:a', 'GET:b', 'DEL:c'])
+  })
+
+  it('sends each command on its own without auto-pipelining', async () => {
+    const { driver, batches } = createRecordingDriver()
+    const client = new RedisClient(driver)
+
+    await Promise.all([client.get('a'), client.get('b')])
+
+    expect(batches).toHaveLength(2)
+  })
+
+  it('rejects only the failed command of a batch', async () => {
+    const { driver } = createRecordingDriver((command) =>
+      command[1] === 'bad' ? new RedisReplyError('WRONGTYPE boom') : 'value'
+    )
+    const client = new RedisClient(driver, { autoPipeline: true })
+
+    const [good, bad] = await Promise.allSettled([client.get('good'), client.get('bad')])
+
+    expect(good).toEqual({ status: 'fulfilled', value: 'value' })
+    expect(bad).toMatchObject({ status: 'rejected', reason: expect.any(RedisReplyError) })
+  })
+
+  it('builds SET options', async () => {
+    const { driver, batches } = createRecordingDriver()
+    const client = new RedisClient(driver)
+
+    await client.set('k', 'v', { ex: 10, nx: true })
+
+    expect(batches[0]).toEqual([['SET', 'k', 'v', 'EX', 10, 'NX']])
+  })
+
+  it('falls back to EVAL when the script is not cached', async () => {
+    const { driver, batches } = createRecordingDriver((command) =>
+      command[0] === 'EVALSHA' ? new RedisReplyError('NOSCRIPT No matching script') : 7
+    )
+    const client = new RedisClient(driver)
+    const script = client.createScript<number>('return 7', () => 7)
+
+    expect(await script.exec(['k'], ['a'])).toBe(7)
+    expect(batches.map((batch) => batch[0][0])).toEqual(['EVALSHA', 'EVAL'])
+    expect(batches[0][0]).toEqual(['EVALSHA', script.sha1, 1, 'k', 'a'])
+  })
+
+  it('runs the emulation on the in-memory driver', async () => {
+    const client = new RedisClient(new MemoryRedisDriver())
+    const script = client.createScript<number>('unused', (call, keys, args) =>
+      Number(call('INCRBY', keys[0], args[0]))
+    )
+
+    expect(await script.exec(['counter'], ['5'])).toBe(5)
+    expect(await client.get('counter')).toBe('5')
+  })
+})
+
+describe('MemoryRedisDriver', () => {
+  afterEach(() => {
+    vi.useRealTimers()
+  })
+
+  it('honours TTLs', async () => {
+    vi.useFakeTimers()
+    const client = new RedisClient(new MemoryRedisDriver())
+
+    await client.set('k', 'v', { px: 1000 })
+    await client.incrby('n', 1)
+    await client.pexpire('n', 500)
+
+    vi.advanceTimersByTime(600)
+    expect(await client.get('k')).toBe('v')
+    expect(await client.get('n')).toBeNull()
+
+    vi.advanceTimersByTime(500)
+    expect(await client.get('k')).toBeNull()
+    expect(await client.ttl('k')).toBe(-2)
+  })
+
+  it('keeps the TTL on INCRBY and respects NX', async () => {
+    const client = new RedisClient(new MemoryRedisDriver())
+
+    await client.set('n', 1, { ex: 60 })
+    await client.incrby('n', 2)
+
+    expect(await client.get('n')).toBe('3')
+    expect(await client.ttl('n')).toBe(60)
+    expect(await client.set('n', 9, { nx: true })).toBe(false)
+  })
+
+  it('reports type errors like Redis', async () => {
+    const client = new RedisClient(new MemoryRedisDriver())
+    await client.sadd('set', 'a')
+
+    await expect(client.get('set')).rejects.toThrow(/WRONGTYPE/)
+  })
+
+  it('rejects a pipeline with a failed command', async () => {
+    const client = new RedisClient(new MemoryRedisDriver())
+    await client.set('k', 'not-a-number')
+
+    await expect(client.pipeline().incrby('k', 1).exec()).rejects.toThrow(/not an integer/)
+  })
+})
+
+describe('RESP', () => {
+  it('encodes commands as arrays of bulk strings', () => {
+    expect(encodeCommands([['SET', 'k', 'olá']]).toString()).toBe(
+      '*3\r\n$3\r\nSET\r\n$1\r\nk\r\n$4\r\nolá\r\n'
+    )
+  })
+
+  it('parses replies split across chunks', () => {
+    const parser = new RespParser()
+
+    expect(parser.push(Buffer.from('+OK\r\n:4\r\n$5\r\nhel'))).toEqual(['OK', 4])
+    expect(parser.push(Buffer.from('lo\r\n*2\r\n$-1\r\n-ERR x\r'))).toEqual(['hello'])
+    expect(parser.push(Buffer.from('\n'))).toEqual([[null, new RedisReplyError('ERR x')]])
+  })
+})
+
+describe('TcpRedisDriver', () => {
+  let server: Server | undefined
+  let driver: TcpRedisDriver | undefined
+
+  afterEach(async () => {
+    driver?.close()
+    await new Promise((resolve) => (server ? server.close(resolve) : resolve(undefined)))
+  })
+
+  it('round-trips auto-pipelined commands over one connection', async () => {
+    const started = await startRespServer()
+    server = started.server
+    driver = new TcpRedisDriver({ url: started.url })
+    const client = new RedisClient(driver, { autoPipeline: true })
+
+    const [set, value, missing] = await Promise.all([
+      client.set('k', 'v', { ex: 60 }),
+      client.get('k'),
+      client.get('missing'),
+    ])
+
+    expect(set).toBe(true)
+    expect(value).toBe('v')
+    expect(missing).toBeNull()
+    expect(await client.pipeline().incrby('n', 2).incrby('n', 3).exec()).toEqual([2, 5])
+  })
+})
@@ -0,0 +1,37 @@
+import { describe, it, expect } from 'vitest'
+import { splitOnWholeDays, utcDay } from '../lib/rollup.js'
+
+const at = (iso: string) => new Date(iso)
+
+describe('utcDay', () => {
+  it('truncates to the start of the UTC day', () => {
+    expect(utcDay(at('2026-03-10T23:59:59.999Z'))).toEqual(at('2026-03-10T00:00:00.000Z'))
+    expect(utcDay(at('2026-03-11T00:00:00.000Z'))).toEqual(at('2026-03-11T00:00:00.000Z'))
+  })
+})
+
+describe('splitOnWholeDays', () => {
+  it('reads a range of whole days from rollups only', () => {
+    expect(splitOnWholeDays(at('2026-01-01T00:00:00Z'), at('2026-12-31T23:59:59.999Z'))).toEqual({
+      days: { gte: at('2026-01-01T00:00:00Z'), lt: at('2027-01-01T00:00:00Z') },
+      edges: [],
+    })
+  })
+
+  it('scans the partial days at both edges', () => {
+    expect(splitOnWholeDays(at('2026-01-01T12:00:00Z'), at('2026-01-31T23:59:59Z'))).toEqual({
+      days: { gte: at('2026-01-02T00:00:00Z'), lt: at('2026-01-31T00:00:00Z') },
+      edges: [
+        { gte: at('2026-01-01T12:00:00Z'), lt: at('2026-01-02T00:00:00Z') },
+        { gte: at('2026-01-31T00:00:00Z'), lte: at('2026-01-31T23:59:59Z') },
+      ],
+    })
+  })
+
+  it('scans ranges that hold no whole day', () => {
+    const from = at('2026-01-01T12:00:00Z')
+    const to = at('2026-01-02T11:00:00Z')
+
+    expect(splitOnWholeDays(from, to)).toEqual({ days: null, edges: [{ gte: from, lte: to }] })
+  })
+})
@@ -29,6 +29,9 @@ vi.mock('../lib/redis.js', () => ({
   deleteRefreshToken: vi.fn(),
   deleteAllRefreshTokens: vi.fn(),
   invalidateTenantCache: vi.fn(),
+  getCachedCount: vi.fn(),
+  cacheCount: vi.fn(),
+  invalidateCachedCounts: vi.fn(),
 }))
 
 describe('Serialization Hook', () => {
@@ -93,6 +96,11 @@ describe('Serialization Hook', () => {
         ],
       })
     )
+
+    app.get('/api/test-unschematized', async () => ({
+      amount: new Decimal('7.25'),
+      createdAt: new Date('2025-01-15T10:20:30.000Z'),
+    }))
   })
 
   afterEach(async () => {
@@ -119,4 +127,15 @@ describe('Serialization Hook', () => {
     expect(body.items[0].price).toBe(5)
     expect(body.items[0].issuedAt).toBe('2025-01-10T08:00:00.000Z')
   })
+
+  it('falls back to the deep walk for /api routes without a response schema', async () => {
+    const response = await app.inject({
+      method: 'GET',
+      url: '/api/test-unschematized',
+      headers: { 'x-tenant-slug': 'valid-tenant' },
+    })
+
+    expect(response.statusCode).toBe(200)
+    expect(response.json()).toEqual({ amount: 7.25, createdAt: '2025-01-15T10:20:30.000Z' })
+  })
 })
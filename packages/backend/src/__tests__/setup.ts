@@ -1,9 +1,14 @@
 import { beforeAll, afterAll, beforeEach, afterEach } from 'vitest'
 
+// Modules that use the real Redis facade never reach the network in tests
+process.env.REDIS_DRIVER = 'memory'
+
 beforeAll(async () => {
   // Global setup before all tests
   process.env.NODE_ENV = 'test'
   process.env.JWT_SECRET = 'test-jwt-secret-minimum-32-characters-long'
+  // Route tests assert on the Upstash limiters; the local engine has its own tests
+  process.env.RATE_LIMIT_MODE = 'strict'
 })
 
 afterAll(async () => {
@@ -0,0 +1,87 @@
+import { describe, it, expect, beforeAll, afterAll, vi } from 'vitest'
+import type { Prisma, PrismaClient } from '@prisma/client'
+import type { ClientRepository } from '../repositories/clientRepository.js'
+
+// Counts the statements Prisma sends for a tenant-scoped write against a real, migrated
+// Postgres: TEST_DATABASE_URL=postgresql://... pnpm test writes. Skipped otherwise.
+const databaseUrl = process.env.TEST_DATABASE_URL
+
+// The repositories run on a client that emits every statement as an event
+vi.mock('../lib/prisma.js', async () => {
+  const { PrismaClient } = await import('@prisma/client')
+  return {
+    prisma: new PrismaClient({
+      datasourceUrl: process.env.TEST_DATABASE_URL,
+      log: [{ emit: 'event', level: 'query' }],
+    }),
+  }
+})
+
+const TRANSACTION_CONTROL = /^\s*(BEGIN|COMMIT|ROLLBACK)/i
+
+describe.skipIf(!databaseUrl)('Tenant-scoped write statements (Postgres)', () => {
+  let prisma: PrismaClient
+  let clientRepository: ClientRepository
+  const statements: string[] = []
+  const ids = { barbershopId: '', scopedClientId: '', checkedClientId: '', activeClientId: '' }
+
+  async function countStatements(run: () => Promise<unknown>): Promise<number> {
+    statements.length = 0
+    await run()
+    return statements.filter((query) => !TRANSACTION_CONTROL.test(query)).length
+  }
+
+  beforeAll(async () => {
+    ;({ prisma } = await import('../lib/prisma.js'))
+    ;({ clientRepository } = await import('../repositories/clientRepository.js'))
+    const logged = prisma as unknown as PrismaClient<Prisma.PrismaClientOptions, 'query'>
+    logged.$on('query', (event) => statements.push(event.query))
+
+    const barbershop = await prisma.barbershop.create({
+      data: { name: 'Statements Test', slug: `statements-${Date.now()}` },
+    })
+    const connect = { barbershop: { connect: { id: barbershop.id } } }
+    const [scoped, checked, active] = await Promise.all([
+      prisma.client.create({ data: { ...connect, name: 'Scoped', phone: '5500000001' } }),
+      prisma.client.create({ data: { ...connect, name: 'Checked', phone: '5500000002' } }),
+      prisma.client.create({ data: { ...connect, name: 'Active', phone: '5500000003' } }),
+    ])
+    Object.assign(ids, {
+      barbershopId: barbershop.id,
+      scopedClientId: scoped.id,
+      checkedClientId: checked.id,
+      activeClientId: active.id,
+    })
+  })
+
+  afterAll(async () => {
+    if (ids.barbershopId) await prisma.barbershop.delete({ where: { id: ids.barbershopId } })
+    await prisma.$disconnect()
+  })
+
+  it('soft deletes in one statement instead of findFirst + update', async () => {
+    const { barbershopId } = ids
+    const scoped = await countStatements(() =>
+      clientRepository.delete(ids.scopedClientId, barbershopId)
+    )
+    // The pattern the repositories used before
+    const checked = await countStatements(async () => {
+      const where = { id: ids.checkedClientId, barbershopId, isActive: true }
+      const existing = await prisma.client.findFirst({ where })
+      if (!existing) throw new Error('Client not found')
+      await prisma.client.update({ where: { id: existing.id }, data: { isActive: false } })
+    })
+
+    // One UPDATE ... RETURNING instead of a SELECT and an UPDATE
+    expect(checked).toBe(2)
+    expect(scoped).toBe(1)
+  })
+
+  it('does not write a client of another tenant', async () => {
+    await expect(clientRepository.delete(ids.activeClientId, 'other-tenant')).rejects.toThrow(
+      'Client not found'
+    )
+    const client = await prisma.client.findUnique({ where: { id: ids.activeClientId } })
+    expect(client?.isActive).toBe(true)
+  })
+})
@@ -99,13 +99,21 @@ export async function buildApp(options: AppOptions = {}): Promise<FastifyInstanc
   app.addHook('onRequest', tenantMiddleware)
   app.addHook('onRequest', authMiddleware)
   app.addHook('onRequest', rateLimitMiddleware)
-  app.addHook('preSerialization', async (request, _reply, payload) => {
-    const path = (request.url ?? '/').split('?')[0]
-    if (!path.startsWith('/api')) {
-      return payload
-    }
 
-    return serializeResponse(payload)
+  // Response schemas compile into a serializer per route and status code (fast-json-stringify),
+  // which already writes Decimal as a number for `type: 'number'` fields and Date as an ISO
+  // string for string fields, in the same pass that builds the JSON. Values outside the schema
+  // (`additionalProperties`) are the services' job (serializeAppointmentWithRelations & co.).
+  // Only /api routes without a response schema still get the generic deep copy.
+  app.addHook('onRoute', (route) => {
+    if (!route.url.startsWith('/api') || route.schema?.response) {
+      return
+    }
+    const hooks = route.preSerialization ?? []
+    route.preSerialization = [
+      ...(Array.isArray(hooks) ? hooks : [hooks]),
+      async (_request, _reply, payload: unknown) => serializeResponse(payload),
+    ]
   })
 
   // Health check endpoint (public, no tenant required)
@@ -1,6 +1,7 @@
 import { describe, it, expect, beforeEach, afterEach, vi } from 'vitest'
 import type { FastifyInstance } from 'fastify'
 import type { AuthenticatedUser } from '../../types/index.js'
+import { Prisma } from '@prisma/client'
 import { Decimal } from '@prisma/client/runtime/library'
 
 const redisMock = {
@@ -39,6 +40,9 @@ vi.mock('../../lib/redis.js', () => ({
   deleteRefreshToken: vi.fn(),
   deleteAllRefreshTokens: vi.fn(),
   invalidateTenantCache: vi.fn(),
+  getCachedCount: vi.fn(),
+  cacheCount: vi.fn(),
+  invalidateCachedCounts: vi.fn(),
 }))
 
 const appointmentFindFirst = vi.fn()
@@ -46,10 +50,42 @@ const appointmentUpdate = vi.fn()
 const appointmentFindMany = vi.fn()
 const appointmentCount = vi.fn()
 const appointmentCreate = vi.fn()
+const appointmentCreateManyAndReturn = vi.fn()
+const appointmentFindUnique = vi.fn()
+const appointmentUpdateMany = vi.fn()
+const appointmentFindFirstOrThrow = vi.fn()
+const professionalRollupUpsert = vi.fn()
+// No series unless a test books one
+const seriesFindMany = vi.fn().mockResolvedValue([])
+const seriesFindFirst = vi.fn()
+const seriesCreate = vi.fn()
+const seriesUpdate = vi.fn()
+const executeRaw = vi.fn()
+const queryRaw = vi.fn()
+// Interactive transactions run their callback against the same mocks
+const transaction = vi.fn((callback: (tx: unknown) => unknown) =>
+  callback({
+    $executeRaw: executeRaw,
+    $queryRaw: queryRaw,
+    appointment: {
+      create: appointmentCreate,
+      findMany: appointmentFindMany,
+      findUnique: appointmentFindUnique,
+      createManyAndReturn: appointmentCreateManyAndReturn,
+      updateMany: appointmentUpdateMany,
+      findFirstOrThrow: appointmentFindFirstOrThrow,
+    },
+    appointmentSeries: { findMany: seriesFindMany, create: seriesCreate },
+    professionalDailyRollup: { upsert: professionalRollupUpsert },
+  })
+)
 
 const professionalFindFirst = vi.fn()
+const professionalFindMany = vi.fn()
 const clientFindFirst = vi.fn()
+const clientFindMany = vi.fn()
 const serviceFindFirst = vi.fn()
+const serviceFindMany = vi.fn()
 
 vi.mock('../../lib/prisma.js', () => ({
   prisma: {
@@ -60,18 +96,27 @@ vi.mock('../../lib/prisma.js', () => ({
       update: appointmentUpdate,
       create: appointmentCreate,
     },
+    appointmentSeries: {
+      findMany: seriesFindMany,
+      findFirst: seriesFindFirst,
+      update: seriesUpdate,
+    },
     professional: {
       findFirst: professionalFindFirst,
+      findMany: professionalFindMany,
     },
     client: {
       findFirst: clientFindFirst,
+      findMany: clientFindMany,
     },
     service: {
       findFirst: serviceFindFirst,
+      findMany: serviceFindMany,
     },
     barbershop: {
       findUnique: vi.fn(),
     },
+    $transaction: transaction,
   },
 }))
 
@@ -184,136 +229,321 @@ describe('Appointment Controller', () => {
     })
   })
 
-  describe('Create Appointment', () => {
-    it('creates appointment without conflict', async () => {
+  describe('List Appointments Projection', () => {
+    it('selects lean relations and no pushSubscription by default', async () => {
       const token = makeToken('ADMIN')
-      const professional = {
-        id: 'prof-1',
-        barbershopId: 'tenant-id',
-        name: 'Barber 1',
-        email: 'barber@test.com',
-        passwordHash: 'hash',
-        commissionRate: new Decimal('20'),
-        role: 'BARBER' as const,
-        isActive: true,
-        createdAt: new Date(),
-        updatedAt: new Date(),
-      }
-      const client = {
-        id: 'client-1',
-        barbershopId: 'tenant-id',
-        name: 'Client 1',
-        phone: '123456',
-        pushSubscription: null,
-        isActive: true,
-        createdAt: new Date(),
-        updatedAt: new Date(),
-      }
-      const service = {
-        id: 'service-1',
-        barbershopId: 'tenant-id',
-        name: 'Haircut',
-        price: new Decimal('50'),
-        duration: 30,
-        isActive: true,
-        createdAt: new Date(),
-        updatedAt: new Date(),
-      }
+      appointmentFindMany.mockResolvedValue([])
+      appointmentCount.mockResolvedValue(0)
 
-      professionalFindFirst.mockResolvedValue(professional)
-      clientFindFirst.mockResolvedValue(client)
-      serviceFindFirst.mockResolvedValue(service)
-      appointmentFindMany.mockResolvedValue([]) // No conflicts
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/appointments',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+      })
 
-      const newAppointment = {
+      expect(response.statusCode).toBe(200)
+      const { select } = appointmentFindMany.mock.calls[0][0]
+      expect(select).toMatchObject({ id: true, date: true, price: true, service: true })
+      expect(select.client.select).not.toHaveProperty('pushSubscription')
+      expect(select.professional.select).not.toHaveProperty('passwordHash')
+    })
+
+    it('maps fields and include to a sparse select', async () => {
+      const token = makeToken('ADMIN')
+      appointmentFindMany.mockResolvedValue([
+        {
+          id: 'apt-1',
+          date: new Date('2025-01-10T10:00:00Z'),
+          status: 'CONFIRMED',
+          client: { id: 'client-1', name: 'João' },
+          service: { id: 'service-1', barbershopId: 'tenant-id', price: new Decimal('35') },
+        },
+      ])
+      appointmentCount.mockResolvedValue(1)
+
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/appointments?fields=status,client.name&include=service',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+      })
+
+      expect(response.statusCode).toBe(200)
+      expect(appointmentFindMany.mock.calls[0][0].select).toEqual({
+        id: true,
+        date: true,
+        status: true,
+        service: true,
+        client: { select: { id: true, name: true } },
+      })
+      expect(response.json().data[0]).toEqual({
         id: 'apt-1',
-        barbershopId: 'tenant-id',
+        date: '2025-01-10T10:00:00.000Z',
+        status: 'CONFIRMED',
+        client: { id: 'client-1', name: 'João' },
+        service: { id: 'service-1', barbershopId: 'tenant-id', price: 35 },
+      })
+    })
+
+    it('rejects unknown fields', async () => {
+      const token = makeToken('ADMIN')
+
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/appointments?fields=status,client.passwordHash',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+      })
+
+      expect(response.statusCode).toBe(400)
+      expect(appointmentFindMany).not.toHaveBeenCalled()
+    })
+  })
+
+  describe('List Appointments Normalized', () => {
+    it('keeps foreign keys in rows and side-loads each entity once', async () => {
+      const token = makeToken('ADMIN')
+      const row = (id: string, clientId: string) => ({
+        id,
+        date: new Date('2025-01-10T10:00:00Z'),
+        status: 'CONFIRMED',
         professionalId: 'prof-1',
-        clientId: 'client-1',
+        createdById: 'prof-1',
+        clientId,
         serviceId: 'service-1',
-        createdById: 'user-1',
-        date: new Date('2025-12-25T10:00:00Z'),
-        status: 'PENDING',
-        price: new Decimal('50'),
-        commissionValue: null,
-        notes: null,
-        createdAt: new Date(),
-        updatedAt: new Date(),
-        professional,
-        client,
-        service,
-        createdBy: professional,
-      }
-      appointmentCreate.mockResolvedValue(newAppointment)
+      })
+      appointmentFindMany.mockResolvedValue([row('apt-1', 'client-1'), row('apt-2', 'client-2')])
+      appointmentCount.mockResolvedValue(2)
+      professionalFindMany.mockResolvedValue([
+        { id: 'prof-1', name: 'Carlos', commissionRate: new Decimal('50') },
+      ])
+      clientFindMany.mockResolvedValue([
+        { id: 'client-1', name: 'João' },
+        { id: 'client-2', name: 'Maria' },
+      ])
+      serviceFindMany.mockResolvedValue([
+        { id: 'service-1', name: 'Corte', price: new Decimal('35') },
+      ])
 
       const response = await app.inject({
-        method: 'POST',
-        url: '/api/appointments',
+        method: 'GET',
+        url: '/api/appointments?format=normalized&fields=status',
         headers: {
           Authorization: `Bearer ${token}`,
           'x-tenant-slug': 'barbearia-teste',
         },
-        payload: {
+      })
+
+      expect(response.statusCode).toBe(200)
+      const { select } = appointmentFindMany.mock.calls[0][0]
+      expect(select).toEqual({
+        id: true,
+        date: true,
+        status: true,
+        professionalId: true,
+        createdById: true,
+        clientId: true,
+        serviceId: true,
+      })
+      expect(professionalFindMany).toHaveBeenCalledTimes(1)
+      expect(professionalFindMany.mock.calls[0][0].where).toEqual({
+        barbershopId: 'tenant-id',
+        id: { in: ['prof-1'] },
+      })
+      expect(professionalFindMany.mock.calls[0][0].select).not.toHaveProperty('passwordHash')
+      expect(clientFindMany.mock.calls[0][0].where.id).toEqual({ in: ['client-1', 'client-2'] })
+
+      const body = response.json()
+      expect(body.data[0]).not.toHaveProperty('client')
+      expect(body.data[0].clientId).toBe('client-1')
+      expect(body.included).toEqual({
+        professionals: { 'prof-1': { id: 'prof-1', name: 'Carlos', commissionRate: 50 } },
+        clients: {
+          'client-1': { id: 'client-1', name: 'João' },
+          'client-2': { id: 'client-2', name: 'Maria' },
+        },
+        services: { 'service-1': { id: 'service-1', name: 'Corte', price: 35 } },
+      })
+    })
+  })
+
+  describe('List Appointments Streaming', () => {
+    it('streams pages above 100 rows from keyset batches without counting', async () => {
+      const token = makeToken('ADMIN')
+      appointmentFindMany.mockResolvedValue([
+        {
+          id: 'apt-1',
+          date: new Date('2025-01-10T10:00:00Z'),
+          status: 'CONFIRMED',
+          price: new Decimal('35'),
+        },
+      ])
+
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/appointments?stream=true&limit=250&fields=status,price',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+      })
+
+      expect(response.statusCode).toBe(200)
+      expect(appointmentFindMany).toHaveBeenCalledTimes(1)
+      expect(appointmentFindMany.mock.calls[0][0]).toMatchObject({
+        take: 251,
+        orderBy: [{ date: 'asc' }, { id: 'asc' }],
+      })
+      expect(appointmentCount).not.toHaveBeenCalled()
+      expect(response.json()).toEqual({
+        data: [{ id: 'apt-1', date: '2025-01-10T10:00:00.000Z', status: 'CONFIRMED', price: 35 }],
+        pagination: { limit: 250, nextCursor: null },
+      })
+    })
+
+    it('keeps the limit at 100 without stream and rejects totals when streaming', async () => {
+      const token = makeToken('ADMIN')
+      const headers = { Authorization: `Bearer ${token}`, 'x-tenant-slug': 'barbearia-teste' }
+
+      const unstreamed = await app.inject({
+        method: 'GET',
+        url: '/api/appointments?limit=250',
+        headers,
+      })
+      const withTotal = await app.inject({
+        method: 'GET',
+        url: '/api/appointments?stream=true&withTotal=exact',
+        headers,
+      })
+
+      expect(unstreamed.statusCode).toBe(400)
+      expect(withTotal.statusCode).toBe(400)
+      expect(appointmentFindMany).not.toHaveBeenCalled()
+    })
+  })
+
+  describe('Export Appointments', () => {
+    it('exports the filtered appointments as NDJSON with relation names only', async () => {
+      const token = makeToken('ADMIN')
+      appointmentFindMany.mockResolvedValue([
+        {
+          id: 'apt-1',
+          date: new Date('2025-01-10T10:00:00Z'),
+          endsAt: new Date('2025-01-10T10:30:00Z'),
+          status: 'COMPLETED',
           professionalId: 'prof-1',
           clientId: 'client-1',
           serviceId: 'service-1',
-          date: '2025-12-25T10:00:00Z',
+          price: new Decimal('35'),
+          commissionValue: new Decimal('17.5'),
+          notes: null,
+          professional: { id: 'prof-1', name: 'Carlos' },
+          client: { id: 'client-1', name: 'João' },
+          service: { id: 'service-1', name: 'Corte' },
+        },
+      ])
+
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/appointments/export?status=COMPLETED',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
         },
       })
 
-      expect(response.statusCode).toBe(201)
-      expect(appointmentCreate).toHaveBeenCalled()
+      expect(response.statusCode).toBe(200)
+      expect(response.headers['content-type']).toBe('application/x-ndjson; charset=utf-8')
+      const { where, select, take } = appointmentFindMany.mock.calls[0][0]
+      expect(where).toMatchObject({ barbershopId: 'tenant-id', status: 'COMPLETED' })
+      expect(take).toBe(501)
+      expect(select.client).toEqual({ select: { id: true, name: true } })
+      expect(select).not.toHaveProperty('createdBy')
+      expect(response.payload.split('\n').map((line) => line && JSON.parse(line))).toEqual([
+        {
+          id: 'apt-1',
+          date: '2025-01-10T10:00:00.000Z',
+          endsAt: '2025-01-10T10:30:00.000Z',
+          status: 'COMPLETED',
+          professionalId: 'prof-1',
+          professionalName: 'Carlos',
+          clientId: 'client-1',
+          clientName: 'João',
+          serviceId: 'service-1',
+          serviceName: 'Corte',
+          price: 35,
+          commissionValue: 17.5,
+          notes: null,
+        },
+        '',
+      ])
     })
 
-    it('returns 409 when there is a scheduling conflict', async () => {
+    it('rejects unknown export formats', async () => {
       const token = makeToken('ADMIN')
-      const professional = {
-        id: 'prof-1',
-        barbershopId: 'tenant-id',
-        name: 'Barber 1',
-        email: 'barber@test.com',
-        passwordHash: 'hash',
-        commissionRate: new Decimal('20'),
-        role: 'BARBER' as const,
-        isActive: true,
-        createdAt: new Date(),
-        updatedAt: new Date(),
-      }
-      const client = {
-        id: 'client-1',
-        barbershopId: 'tenant-id',
-        name: 'Client 1',
-        phone: '123456',
-        pushSubscription: null,
-        isActive: true,
-        createdAt: new Date(),
-        updatedAt: new Date(),
-      }
-      const service = {
-        id: 'service-1',
-        barbershopId: 'tenant-id',
-        name: 'Haircut',
-        price: new Decimal('50'),
-        duration: 30,
-        isActive: true,
-        createdAt: new Date(),
-        updatedAt: new Date(),
-      }
 
-      professionalFindFirst.mockResolvedValue(professional)
-      clientFindFirst.mockResolvedValue(client)
-      serviceFindFirst.mockResolvedValue(service)
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/appointments/export?format=xlsx',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+      })
 
-      // Mock a conflicting appointment (not CANCELLED)
-      const conflictingAppointment = {
-        id: 'apt-existing',
-        date: new Date('2025-12-25T10:00:00Z'),
-        status: 'CONFIRMED',
-        service: { duration: 60 },
-      }
-      appointmentFindMany.mockResolvedValue([conflictingAppointment])
+      expect(response.statusCode).toBe(400)
+      expect(appointmentFindMany).not.toHaveBeenCalled()
+    })
+  })
 
-      const response = await app.inject({
+  describe('Create Appointment', () => {
+    const professional = {
+      id: 'prof-1',
+      barbershopId: 'tenant-id',
+      name: 'Barber 1',
+      email: 'barber@test.com',
+      commissionRate: new Decimal('20'),
+      role: 'BARBER' as const,
+      isActive: true,
+      createdAt: new Date(),
+      updatedAt: new Date(),
+    }
+    const client = {
+      id: 'client-1',
+      barbershopId: 'tenant-id',
+      name: 'Client 1',
+      phone: '123456',
+      isActive: true,
+      createdAt: new Date(),
+      updatedAt: new Date(),
+    }
+    const service = {
+      id: 'service-1',
+      barbershopId: 'tenant-id',
+      name: 'Haircut',
+      price: new Decimal('50'),
+      duration: 30,
+      isActive: true,
+      createdAt: new Date(),
+      updatedAt: new Date(),
+    }
+    const bookingCheck = {
+      price: new Decimal('50'),
+      duration: 30,
+      professionalExists: true,
+      clientExists: true,
+      conflict: false,
+    }
+
+    const book = (token: string, date = '2025-12-25T10:00:00Z') =>
+      app.inject({
         method: 'POST',
         url: '/api/appointments',
         headers: {
@@ -324,60 +554,13 @@ describe('Appointment Controller', () => {
           professionalId: 'prof-1',
           clientId: 'client-1',
           serviceId: 'service-1',
-          date: '2025-12-25T10:15:00Z',
+          date,
         },
       })
 
-      expect(response.statusCode).toBe(409)
-      expect(response.json()).toHaveProperty('error')
-      expect(response.json().error).toContain('conflict')
-    })
-
-    it('ignores CANCELLED appointments when checking conflicts', async () => {
+    it('creates appointment without conflict', async () => {
       const token = makeToken('ADMIN')
-      const professional = {
-        id: 'prof-1',
-        barbershopId: 'tenant-id',
-        name: 'Barber 1',
-        email: 'barber@test.com',
-        passwordHash: 'hash',
-        commissionRate: new Decimal('20'),
-        role: 'BARBER' as const,
-        isActive: true,
-        createdAt: new Date(),
-        updatedAt: new Date(),
-      }
-      const client = {
-        id: 'client-1',
-        barbershopId: 'tenant-id',
-        name: 'Client 1',
-        phone: '123456',
-        pushSubscription: null,
-        isActive: true,
-        createdAt: new Date(),
-        updatedAt: new Date(),
-      }
-      const service = {
-        id: 'service-1',
-        barbershopId: 'tenant-id',
-        name: 'Haircut',
-        price: new Decimal('50'),
-        duration: 30,
-        isActive: true,
-        createdAt: new Date(),
-        updatedAt: new Date(),
-      }
-
-      professionalFindFirst.mockResolvedValue(professional)
-      clientFindFirst.mockResolvedValue(client)
-      serviceFindFirst.mockResolvedValue(service)
-
-      // Verify that CANCELLED appointments are excluded from conflict check
-      appointmentFindMany.mockImplementation((args) => {
-        // Check that the where clause excludes CANCELLED status
-        expect(args.where.status).toEqual({ notIn: ['CANCELLED'] })
-        return []
-      })
+      queryRaw.mockResolvedValue([bookingCheck])
 
       const newAppointment = {
         id: 'apt-1',
@@ -387,6 +570,7 @@ describe('Appointment Controller', () => {
         serviceId: 'service-1',
         createdById: 'user-1',
         date: new Date('2025-12-25T10:00:00Z'),
+        endsAt: new Date('2025-12-25T10:30:00Z'),
         status: 'PENDING',
         price: new Decimal('50'),
         commissionValue: null,
@@ -400,22 +584,385 @@ describe('Appointment Controller', () => {
       }
       appointmentCreate.mockResolvedValue(newAppointment)
 
-      const response = await app.inject({
+      const response = await book(token)
+
+      expect(response.statusCode).toBe(201)
+      expect(appointmentCreate).toHaveBeenCalledWith(
+        expect.objectContaining({
+          data: expect.objectContaining({
+            date: new Date('2025-12-25T10:00:00Z'),
+            endsAt: new Date('2025-12-25T10:30:00Z'),
+            price: new Decimal('50'),
+          }),
+        })
+      )
+      // No separate lookups: references are validated by the booking statement
+      expect(professionalFindFirst).not.toHaveBeenCalled()
+      expect(clientFindFirst).not.toHaveBeenCalled()
+      expect(serviceFindFirst).not.toHaveBeenCalled()
+    })
+
+    it('locks the professional before checking conflicts inside one transaction', async () => {
+      const token = makeToken('ADMIN')
+      queryRaw.mockResolvedValue([bookingCheck])
+      appointmentCreate.mockResolvedValue({
+        id: 'apt-1',
+        date: new Date('2025-12-25T10:00:00Z'),
+        price: new Decimal('50'),
+        commissionValue: null,
+        professional,
+        client,
+        service,
+        createdBy: professional,
+      })
+
+      const response = await book(token)
+
+      expect(response.statusCode).toBe(201)
+      expect(transaction).toHaveBeenCalledTimes(1)
+      const [lockSql, lockKeys] = executeRaw.mock.calls[0]
+      expect(lockSql.join('?')).toContain('pg_advisory_xact_lock')
+      expect(lockKeys).toEqual(['tenant-id:prof-1'])
+      expect(executeRaw.mock.invocationCallOrder[0]).toBeLessThan(
+        queryRaw.mock.invocationCallOrder[0]
+      )
+      // CANCELLED appointments never block a slot
+      expect(queryRaw.mock.calls[0][0].join('?')).toContain(`a."status" <> 'CANCELLED'`)
+    })
+
+    it('returns 409 when there is a scheduling conflict', async () => {
+      const token = makeToken('ADMIN')
+      queryRaw.mockResolvedValue([{ ...bookingCheck, conflict: true }])
+
+      const response = await book(token, '2025-12-25T10:15:00Z')
+
+      expect(response.statusCode).toBe(409)
+      expect(response.json()).toHaveProperty('error')
+      expect(response.json().error).toContain('conflict')
+      expect(appointmentCreate).not.toHaveBeenCalled()
+    })
+
+    it('returns 404 when a referenced entity does not exist', async () => {
+      const token = makeToken('ADMIN')
+      queryRaw.mockResolvedValue([{ ...bookingCheck, price: null, duration: null }])
+
+      const response = await book(token)
+
+      expect(response.statusCode).toBe(404)
+      expect(response.json().error).toBe('Service not found')
+      expect(appointmentCreate).not.toHaveBeenCalled()
+    })
+
+    it('returns 409 when the overlap constraint rejects a concurrent booking', async () => {
+      const token = makeToken('ADMIN')
+      queryRaw.mockResolvedValue([bookingCheck])
+      appointmentCreate.mockRejectedValue(
+        new Prisma.PrismaClientUnknownRequestError(
+          'conflicting key value violates exclusion constraint "appointments_no_overlap"',
+          { clientVersion: 'test' }
+        )
+      )
+
+      const response = await book(token)
+
+      expect(response.statusCode).toBe(409)
+      expect(response.json().error).toContain('conflicting')
+    })
+  })
+
+  describe('Bulk Create', () => {
+    const bulk = (token: string, appointments: object[]) =>
+      app.inject({
         method: 'POST',
-        url: '/api/appointments',
+        url: '/api/appointments/bulk',
         headers: {
           Authorization: `Bearer ${token}`,
           'x-tenant-slug': 'barbearia-teste',
         },
+        payload: { appointments },
+      })
+
+    const item = (date: string, overrides: object = {}) => ({
+      professionalId: 'prof-1',
+      clientId: 'client-1',
+      serviceId: 'service-1',
+      date,
+      ...overrides,
+    })
+
+    beforeEach(() => {
+      professionalFindMany.mockResolvedValue([{ id: 'prof-1', name: 'Barber 1' }])
+      clientFindMany.mockResolvedValue([{ id: 'client-1' }])
+      serviceFindMany.mockResolvedValue([
+        { id: 'service-1', price: new Decimal('50'), duration: 30 },
+      ])
+    })
+
+    it('validates references once per entity type and reports each item', async () => {
+      const token = makeToken('ADMIN')
+      // Already booked 11:00-11:30
+      appointmentFindMany.mockResolvedValue([
+        {
+          professionalId: 'prof-1',
+          date: new Date('2025-12-25T11:00:00Z'),
+          endsAt: new Date('2025-12-25T11:30:00Z'),
+        },
+      ])
+      appointmentCreateManyAndReturn.mockImplementation(({ data }) =>
+        data.map((row: { professionalId: string; date: Date }, i: number) => ({
+          id: `apt-${i + 1}`,
+          professionalId: row.professionalId,
+          date: row.date,
+        }))
+      )
+
+      const response = await bulk(token, [
+        item('2025-12-25T10:00:00Z'),
+        item('2025-12-25T10:15:00Z'), // overlaps the previous item
+        item('2025-12-25T11:15:00Z'), // overlaps the booked appointment
+        item('2025-12-25T09:00:00Z', { serviceId: 'missing' }),
+        item('2025-12-25T11:30:00Z'),
+      ])
+
+      expect(response.statusCode).toBe(200)
+      const body = response.json()
+      expect(body.created).toBe(2)
+      expect(body.failed).toBe(3)
+      expect(body.results).toEqual([
+        { index: 0, status: 'created', id: 'apt-1' },
+        { index: 1, status: 'failed', error: expect.stringContaining('conflicting') },
+        { index: 2, status: 'failed', error: expect.stringContaining('conflicting') },
+        { index: 3, status: 'failed', error: 'Service not found' },
+        { index: 4, status: 'created', id: 'apt-2' },
+      ])
+      expect(professionalFindMany).toHaveBeenCalledTimes(1)
+      expect(clientFindMany).toHaveBeenCalledTimes(1)
+      expect(serviceFindMany).toHaveBeenCalledTimes(1)
+      expect(serviceFindMany).toHaveBeenCalledWith({
+        where: { barbershopId: 'tenant-id', isActive: true, id: { in: ['service-1', 'missing'] } },
+        select: { id: true, price: true, duration: true },
+      })
+      expect(appointmentFindMany).toHaveBeenCalledTimes(1)
+      expect(appointmentCreateManyAndReturn).toHaveBeenCalledTimes(1)
+      expect(appointmentCreateManyAndReturn.mock.calls[0][0].data).toHaveLength(2)
+      expect(appointmentCreate).not.toHaveBeenCalled()
+    })
+
+    it('skips the insert when no item can be booked', async () => {
+      const token = makeToken('ADMIN')
+      professionalFindMany.mockResolvedValue([])
+
+      const response = await bulk(token, [item('2025-12-25T10:00:00Z')])
+
+      expect(response.statusCode).toBe(200)
+      expect(response.json().results).toEqual([
+        { index: 0, status: 'failed', error: 'Professional not found' },
+      ])
+      expect(transaction).not.toHaveBeenCalled()
+    })
+
+    it('rejects batches larger than 500', async () => {
+      const token = makeToken('ADMIN')
+
+      const response = await bulk(
+        token,
+        Array.from({ length: 501 }, () => item('2025-12-25T10:00:00Z'))
+      )
+
+      expect(response.statusCode).toBe(400)
+    })
+  })
+
+  describe('Recurring Series', () => {
+    const headers = (token: string) => ({
+      Authorization: `Bearer ${token}`,
+      'x-tenant-slug': 'barbearia-teste',
+    })
+    // Mondays 10:00-10:30, four weeks
+    const series = {
+      id: 'series-1',
+      barbershopId: 'tenant-id',
+      professionalId: 'prof-1',
+      clientId: 'client-1',
+      serviceId: 'service-1',
+      createdById: 'user-1',
+      startsAt: new Date('2025-12-01T10:00:00Z'),
+      endsAt: new Date('2025-12-22T10:30:00Z'),
+      intervalWeeks: 1,
+      count: 4,
+      duration: 30,
+      price: new Decimal('50'),
+      notes: null,
+      isActive: true,
+      createdAt: new Date(),
+      updatedAt: new Date(),
+    }
+
+    const createSeries = (token: string, recurrence: object = { interval: 1, count: 4 }) =>
+      app.inject({
+        method: 'POST',
+        url: '/api/appointments/series',
+        headers: headers(token),
         payload: {
           professionalId: 'prof-1',
           clientId: 'client-1',
           serviceId: 'service-1',
-          date: '2025-12-25T10:00:00Z',
+          date: '2025-12-01T10:00:00Z',
+          recurrence,
         },
       })
 
+    beforeEach(() => {
+      professionalFindFirst.mockResolvedValue({ id: 'prof-1' })
+      clientFindFirst.mockResolvedValue({ id: 'client-1' })
+      serviceFindFirst.mockResolvedValue({
+        id: 'service-1',
+        price: new Decimal('50'),
+        duration: 30,
+      })
+      seriesCreate.mockResolvedValue(series)
+    })
+
+    it('creates a series checking only what is booked within its span', async () => {
+      const token = makeToken('ADMIN')
+      // A Wednesday booking inside the span does not hit any Monday occurrence
+      appointmentFindMany.mockResolvedValue([
+        {
+          professionalId: 'prof-1',
+          date: new Date('2025-12-10T10:00:00Z'),
+          endsAt: new Date('2025-12-10T10:30:00Z'),
+        },
+      ])
+
+      const response = await createSeries(token)
+
       expect(response.statusCode).toBe(201)
+      expect(response.json()).toMatchObject({ id: 'series-1', price: 50, intervalWeeks: 1 })
+      expect(appointmentFindMany.mock.calls[0][0].where).toMatchObject({
+        date: { lt: new Date('2025-12-22T10:30:00Z') },
+        endsAt: { gt: new Date('2025-12-01T10:00:00Z') },
+      })
+      expect(seriesCreate).toHaveBeenCalledWith({
+        data: expect.objectContaining({
+          startsAt: new Date('2025-12-01T10:00:00Z'),
+          endsAt: new Date('2025-12-22T10:30:00Z'),
+          count: 4,
+        }),
+      })
+      // Occurrences are not stored
+      expect(appointmentCreate).not.toHaveBeenCalled()
+      expect(appointmentCreateManyAndReturn).not.toHaveBeenCalled()
+    })
+
+    it('returns 409 when a later occurrence overlaps a booked appointment', async () => {
+      const token = makeToken('ADMIN')
+      appointmentFindMany.mockResolvedValue([
+        {
+          professionalId: 'prof-1',
+          date: new Date('2025-12-15T10:15:00Z'),
+          endsAt: new Date('2025-12-15T10:45:00Z'),
+        },
+      ])
+
+      const response = await createSeries(token)
+
+      expect(response.statusCode).toBe(409)
+      expect(seriesCreate).not.toHaveBeenCalled()
+    })
+
+    it('rejects recurrences longer than 104 occurrences', async () => {
+      const token = makeToken('ADMIN')
+
+      const response = await createSeries(token, { interval: 1, until: '2030-01-01T00:00:00Z' })
+
+      expect(response.statusCode).toBe(400)
+      expect(seriesCreate).not.toHaveBeenCalled()
+    })
+
+    it('materializes an occurrence as a pending appointment', async () => {
+      const token = makeToken('ADMIN')
+      seriesFindFirst.mockResolvedValue(series)
+      appointmentFindUnique.mockResolvedValue(null)
+      appointmentCreate.mockResolvedValue({
+        id: 'apt-1',
+        date: new Date('2025-12-08T10:00:00Z'),
+        status: 'PENDING',
+        price: new Decimal('50'),
+        commissionValue: null,
+      })
+
+      const response = await app.inject({
+        method: 'POST',
+        url: '/api/appointments/series/series-1/occurrences',
+        headers: headers(token),
+        payload: { occurrence: '2025-12-08T10:00:00Z' },
+      })
+
+      expect(response.statusCode).toBe(201)
+      expect(appointmentCreate).toHaveBeenCalledWith(
+        expect.objectContaining({
+          data: expect.objectContaining({
+            date: new Date('2025-12-08T10:00:00Z'),
+            endsAt: new Date('2025-12-08T10:30:00Z'),
+            seriesOccurrence: new Date('2025-12-08T10:00:00Z'),
+            status: 'PENDING',
+          }),
+        })
+      )
+    })
+
+    it('returns 404 for a start that is not an occurrence of the series', async () => {
+      const token = makeToken('ADMIN')
+      seriesFindFirst.mockResolvedValue(series)
+
+      const response = await app.inject({
+        method: 'POST',
+        url: '/api/appointments/series/series-1/occurrences',
+        headers: headers(token),
+        payload: { occurrence: '2025-12-29T10:00:00Z' },
+      })
+
+      expect(response.statusCode).toBe(404)
+      expect(transaction).not.toHaveBeenCalled()
+    })
+
+    it('expands occurrences of the list window, skipping materialized ones', async () => {
+      const token = makeToken('ADMIN')
+      appointmentFindMany.mockResolvedValue([])
+      appointmentCount.mockResolvedValue(0)
+      seriesFindMany.mockResolvedValueOnce([
+        { ...series, appointments: [{ seriesOccurrence: new Date('2025-12-08T10:00:00Z') }] },
+      ])
+
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/appointments?expand=occurrences&startDate=2025-12-05T00:00:00Z&endDate=2026-01-01T00:00:00Z',
+        headers: headers(token),
+      })
+
+      expect(response.statusCode).toBe(200)
+      expect(response.json().occurrences).toEqual([
+        expect.objectContaining({
+          seriesId: 'series-1',
+          date: '2025-12-15T10:00:00.000Z',
+          status: 'PENDING',
+          price: 50,
+        }),
+        expect.objectContaining({ date: '2025-12-22T10:00:00.000Z' }),
+      ])
+    })
+
+    it('requires a date window to expand occurrences', async () => {
+      const token = makeToken('ADMIN')
+
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/appointments?expand=occurrences',
+        headers: headers(token),
+      })
+
+      expect(response.statusCode).toBe(400)
+      expect(seriesFindMany).not.toHaveBeenCalled()
     })
   })
 
@@ -585,7 +1132,8 @@ describe('Appointment Controller', () => {
 
       appointmentFindFirst.mockResolvedValue(appointment)
       professionalFindFirst.mockResolvedValue(professional)
-      appointmentUpdate.mockResolvedValue({
+      appointmentUpdateMany.mockResolvedValue({ count: 1 })
+      appointmentFindFirstOrThrow.mockResolvedValue({
         ...appointment,
         status: 'COMPLETED',
         commissionValue: new Decimal('10'),
@@ -602,12 +1150,124 @@ describe('Appointment Controller', () => {
       })
 
       expect(response.statusCode).toBe(200)
+      expect(transaction).toHaveBeenCalledTimes(1)
+      expect(appointmentUpdateMany).toHaveBeenCalledWith({
+        where: { id: 'apt-1', barbershopId: 'tenant-id', status: 'CONFIRMED' },
+        data: { status: 'COMPLETED', commissionValue: 10 }, // 20% of 50
+      })
+      expect(appointmentUpdate).not.toHaveBeenCalled()
+    })
+
+    it('adds the completed appointment to the professional daily rollup', async () => {
+      const token = makeToken('ADMIN')
+      const date = new Date('2023-01-15T14:30:00Z')
+      const appointment = {
+        id: 'apt-1',
+        barbershopId: 'tenant-id',
+        professionalId: 'prof-1',
+        clientId: 'client-1',
+        serviceId: 'service-1',
+        date,
+        status: 'CONFIRMED',
+        price: new Decimal('50'),
+        commissionValue: null,
+      }
+
+      appointmentFindFirst.mockResolvedValue(appointment)
+      professionalFindFirst.mockResolvedValue({ id: 'prof-1', commissionRate: new Decimal('20') })
+      appointmentUpdateMany.mockResolvedValue({ count: 1 })
+      appointmentFindFirstOrThrow.mockResolvedValue({
+        ...appointment,
+        status: 'COMPLETED',
+        commissionValue: new Decimal('10'),
+      })
+
+      await app.inject({
+        method: 'PATCH',
+        url: '/api/appointments/apt-1/status',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+        payload: { status: 'COMPLETED' },
+      })
+
+      expect(professionalRollupUpsert).toHaveBeenCalledTimes(1)
+      const [upsert] = professionalRollupUpsert.mock.calls[0]
+      expect(upsert.where).toEqual({
+        barbershopId_day_professionalId: {
+          barbershopId: 'tenant-id',
+          day: new Date('2023-01-15T00:00:00Z'),
+          professionalId: 'prof-1',
+        },
+      })
+      expect(upsert.update.appointments).toEqual({ increment: 1 })
+      expect(upsert.update.commissions.increment.toString()).toBe('10')
+    })
+
+    it('rejects the completion when the status changed since it was read', async () => {
+      const token = makeToken('ADMIN')
+      const appointment = {
+        id: 'apt-1',
+        barbershopId: 'tenant-id',
+        professionalId: 'prof-1',
+        status: 'CONFIRMED',
+        price: new Decimal('50'),
+      }
+
+      // A concurrent request cancels the appointment between the read and the completion
+      appointmentFindFirst.mockResolvedValue(appointment)
+      professionalFindFirst.mockResolvedValue({ id: 'prof-1', commissionRate: new Decimal('20') })
+      appointmentUpdateMany.mockResolvedValue({ count: 0 })
+
+      const response = await app.inject({
+        method: 'PATCH',
+        url: '/api/appointments/apt-1/status',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+        payload: { status: 'COMPLETED' },
+      })
+
+      expect(response.statusCode).toBe(409)
+      expect(professionalRollupUpsert).not.toHaveBeenCalled()
+    })
+
+    it('does not cancel an appointment a concurrent request completed', async () => {
+      const token = makeToken('ADMIN')
+      const appointment = {
+        id: 'apt-1',
+        barbershopId: 'tenant-id',
+        professionalId: 'prof-1',
+        status: 'CONFIRMED',
+        price: new Decimal('50'),
+      }
+
+      // Read as CONFIRMED, but completed (and rolled up) before the cancellation is written
+      appointmentFindFirst.mockResolvedValue(appointment)
+      appointmentUpdate.mockRejectedValueOnce(
+        new Prisma.PrismaClientKnownRequestError('Record to update not found.', {
+          code: 'P2025',
+          clientVersion: 'test',
+        })
+      )
+
+      const response = await app.inject({
+        method: 'PATCH',
+        url: '/api/appointments/apt-1/status',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+        payload: { status: 'CANCELLED' },
+      })
+
+      expect(response.statusCode).toBe(409)
       expect(appointmentUpdate).toHaveBeenCalledWith(
         expect.objectContaining({
-          data: expect.objectContaining({
-            status: 'COMPLETED',
-            commissionValue: 10, // 20% of 50
-          }),
+          where: { id: 'apt-1', barbershopId: 'tenant-id', status: 'CONFIRMED' },
+          data: { status: 'CANCELLED' },
         })
       )
     })
@@ -647,6 +1307,7 @@ describe('Appointment Controller', () => {
       expect(response.statusCode).toBe(204)
       expect(appointmentUpdate).toHaveBeenCalledWith(
         expect.objectContaining({
+          where: { id: 'apt-1', barbershopId: 'tenant-id', status: 'PENDING' },
           data: { status: 'CANCELLED' },
         })
       )
@@ -23,6 +23,14 @@ const tenantRatelimitMock = {
 }
 
 const getCachedTenant = vi.fn().mockResolvedValue('tenant-id')
+const storeRefreshToken = vi.fn()
+const rotateRefreshToken = vi.fn()
+const deleteRefreshToken = vi.fn()
+const deleteAllRefreshTokens = vi.fn()
+const listRefreshTokens = vi.fn()
+const consumeLegacyRefreshToken = vi.fn()
+const deleteLegacyRefreshToken = vi.fn()
+const verifyOTP = vi.fn()
 
 vi.mock('../../lib/redis.js', () => ({
   redis: redisMock,
@@ -34,12 +42,16 @@ vi.mock('../../lib/redis.js', () => ({
   storeOTP: vi.fn(async (barbershopId: string, email: string, code: string) =>
     redisMock.setex(`barbershop:otp:${barbershopId}:${email}`, code, { ex: 300 })
   ),
-  verifyOTP: vi.fn(),
+  verifyOTP,
   deleteOTP: vi.fn(),
-  storeRefreshToken: vi.fn(),
+  storeRefreshToken,
   getRefreshToken: vi.fn(),
-  deleteRefreshToken: vi.fn(),
-  deleteAllRefreshTokens: vi.fn(),
+  deleteRefreshToken,
+  deleteAllRefreshTokens,
+  listRefreshTokens,
+  rotateRefreshToken,
+  consumeLegacyRefreshToken,
+  deleteLegacyRefreshToken,
   invalidateTenantCache: vi.fn(),
 }))
 
@@ -104,10 +116,11 @@ describe('Auth Controller', () => {
       email: 'admin@example.com',
       role: 'ADMIN',
     })
-    expect(redisMock.setex).toHaveBeenCalledWith(
-      'barbershop:refresh:tenant-id:prof-1',
-      604800,
-      expect.any(String)
+    const { jti } = app.jwt.decode<{ jti: string }>(body.refreshToken)!
+    expect(storeRefreshToken).toHaveBeenCalledWith(
+      'prof-1',
+      jti,
+      expect.objectContaining({ createdAt: expect.any(Number), expiresAt: expect.any(Number) })
     )
   })
 
@@ -164,7 +177,7 @@ describe('Auth Controller', () => {
       barbershopId: 'tenant-id',
     })
 
-    redisMock.get.mockResolvedValueOnce('123456')
+    verifyOTP.mockResolvedValueOnce('valid')
 
     const response = await app.inject({
       method: 'POST',
@@ -190,7 +203,7 @@ describe('Auth Controller', () => {
       barbershopId: 'tenant-id',
     })
 
-    redisMock.get.mockResolvedValueOnce('999999')
+    verifyOTP.mockResolvedValueOnce('invalid')
 
     const response = await app.inject({
       method: 'POST',
@@ -200,6 +213,21 @@ describe('Auth Controller', () => {
     })
 
     expect(response.statusCode).toBe(401)
+    expect(verifyOTP).toHaveBeenCalledWith('tenant-id', 'admin@example.com', '123456')
+  })
+
+  it('should return 429 once the OTP is locked out', async () => {
+    verifyOTP.mockResolvedValueOnce('locked')
+
+    const response = await app.inject({
+      method: 'POST',
+      url: '/api/auth/verify-otp',
+      headers: { 'x-tenant-slug': 'barbearia-teste' },
+      payload: { email: 'admin@example.com', otp: '123456' },
+    })
+
+    expect(response.statusCode).toBe(429)
+    expect(professionalFindFirst).not.toHaveBeenCalled()
   })
 
   it('should refresh token when refresh token is valid and stored', async () => {
@@ -209,8 +237,8 @@ describe('Auth Controller', () => {
       barbershopId: 'tenant-id',
       role: 'ADMIN',
     }
-    const refreshToken = app.jwt.sign(payload, { expiresIn: '7d' })
-    redisMock.get.mockResolvedValueOnce(refreshToken)
+    const refreshToken = app.jwt.sign(payload, { expiresIn: '7d', jti: 'token-1' })
+    rotateRefreshToken.mockResolvedValueOnce(true)
 
     const response = await app.inject({
       method: 'POST',
@@ -220,7 +248,12 @@ describe('Auth Controller', () => {
     })
 
     expect(response.statusCode).toBe(200)
-    expect(response.json().accessToken).toBeDefined()
+    const body = response.json()
+    expect(body.accessToken).toBeDefined()
+    expect(body.refreshToken).toBeDefined()
+    const { jti } = app.jwt.decode<{ jti: string }>(body.refreshToken)!
+    expect(jti).not.toBe('token-1')
+    expect(rotateRefreshToken).toHaveBeenCalledWith('prof-1', 'token-1', jti, expect.any(Object))
   })
 
   it('should reject refresh when token is not stored', async () => {
@@ -230,8 +263,8 @@ describe('Auth Controller', () => {
       barbershopId: 'tenant-id',
       role: 'ADMIN',
     }
-    const refreshToken = app.jwt.sign(payload, { expiresIn: '7d' })
-    redisMock.get.mockResolvedValueOnce(null)
+    const refreshToken = app.jwt.sign(payload, { expiresIn: '7d', jti: 'token-1' })
+    rotateRefreshToken.mockResolvedValueOnce(false)
 
     const response = await app.inject({
       method: 'POST',
@@ -243,6 +276,34 @@ describe('Auth Controller', () => {
     expect(response.statusCode).toBe(401)
   })
 
+  it('should move a refresh token issued before session ids to a new session once', async () => {
+    const payload: AuthenticatedUser = {
+      id: 'prof-1',
+      email: 'admin@example.com',
+      barbershopId: 'tenant-id',
+      role: 'ADMIN',
+    }
+    const legacyToken = app.jwt.sign(payload, { expiresIn: '7d' })
+    consumeLegacyRefreshToken.mockResolvedValueOnce(true).mockResolvedValueOnce(false)
+
+    const refresh = () =>
+      app.inject({
+        method: 'POST',
+        url: '/api/auth/refresh',
+        headers: { 'x-tenant-slug': 'barbearia-teste' },
+        payload: { refreshToken: legacyToken },
+      })
+    const response = await refresh()
+
+    expect(response.statusCode).toBe(200)
+    expect(consumeLegacyRefreshToken).toHaveBeenCalledWith('tenant-id', 'prof-1', legacyToken)
+    const { jti } = app.jwt.decode<{ jti: string }>(response.json().refreshToken)!
+    expect(storeRefreshToken).toHaveBeenCalledWith('prof-1', jti, expect.any(Object))
+    expect(rotateRefreshToken).not.toHaveBeenCalled()
+
+    expect((await refresh()).statusCode).toBe(401)
+  })
+
   it('should logout and revoke refresh token', async () => {
     const payload: AuthenticatedUser = {
       id: 'prof-1',
@@ -263,6 +324,65 @@ describe('Auth Controller', () => {
 
     expect(response.statusCode).toBe(200)
 
-    expect(redisMock.del).toHaveBeenCalledWith('barbershop:refresh:tenant-id:prof-1')
+    expect(deleteAllRefreshTokens).toHaveBeenCalledWith('prof-1')
+    expect(deleteLegacyRefreshToken).toHaveBeenCalledWith('tenant-id', 'prof-1')
+  })
+
+  it('should revoke only the current session when the refresh cookie is present', async () => {
+    const payload: AuthenticatedUser = {
+      id: 'prof-1',
+      email: 'admin@example.com',
+      barbershopId: 'tenant-id',
+      role: 'ADMIN',
+    }
+    const accessToken = app.jwt.sign(payload, { expiresIn: '15m' })
+    const refreshToken = app.jwt.sign(payload, { expiresIn: '7d', jti: 'token-1' })
+
+    const response = await app.inject({
+      method: 'POST',
+      url: '/api/auth/logout',
+      headers: {
+        Authorization: `Bearer ${accessToken}`,
+        'x-tenant-slug': 'barbearia-teste',
+      },
+      cookies: { refreshToken },
+    })
+
+    expect(response.statusCode).toBe(200)
+    expect(deleteRefreshToken).toHaveBeenCalledWith('prof-1', 'token-1')
+    expect(deleteAllRefreshTokens).not.toHaveBeenCalled()
+  })
+
+  it('should list active sessions', async () => {
+    const payload: AuthenticatedUser = {
+      id: 'prof-1',
+      email: 'admin@example.com',
+      barbershopId: 'tenant-id',
+      role: 'ADMIN',
+    }
+    const accessToken = app.jwt.sign(payload, { expiresIn: '15m' })
+    listRefreshTokens.mockResolvedValueOnce([
+      { tokenId: 'token-1', createdAt: 1767225600000, expiresAt: 1767830400000 },
+    ])
+
+    const response = await app.inject({
+      method: 'GET',
+      url: '/api/auth/sessions',
+      headers: {
+        Authorization: `Bearer ${accessToken}`,
+        'x-tenant-slug': 'barbearia-teste',
+      },
+    })
+
+    expect(response.statusCode).toBe(200)
+    expect(response.json().data).toEqual([
+      {
+        id: 'token-1',
+        createdAt: '2026-01-01T00:00:00.000Z',
+        expiresAt: '2026-01-08T00:00:00.000Z',
+        current: false,
+      },
+    ])
+    expect(listRefreshTokens).toHaveBeenCalledWith('prof-1')
   })
 })
@@ -38,6 +38,9 @@ vi.mock('../../lib/redis.js', () => ({
   deleteRefreshToken: vi.fn(),
   deleteAllRefreshTokens: vi.fn(),
   invalidateTenantCache: vi.fn(),
+  getCachedCount: vi.fn(),
+  cacheCount: vi.fn(),
+  invalidateCachedCounts: vi.fn(),
 }))
 
 const clientFindFirst = vi.fn()
@@ -150,7 +153,7 @@ describe('Client Controller', () => {
 
     expect(response.statusCode).toBe(204)
     expect(clientUpdate).toHaveBeenCalledWith({
-      where: { id: 'client-1' },
+      where: { id: 'client-1', barbershopId: 'tenant-id', isActive: true },
       data: { isActive: false },
     })
   })
@@ -39,6 +39,9 @@ vi.mock('../../lib/redis.js', () => ({
   deleteRefreshToken: vi.fn(),
   deleteAllRefreshTokens: vi.fn(),
   invalidateTenantCache: vi.fn(),
+  getCachedCount: vi.fn(),
+  cacheCount: vi.fn(),
+  invalidateCachedCounts: vi.fn(),
 }))
 
 const professionalFindFirst = vi.fn()
@@ -46,6 +49,10 @@ const professionalUpdate = vi.fn()
 const professionalFindMany = vi.fn()
 const professionalCount = vi.fn()
 const professionalCreate = vi.fn()
+const serviceFindFirst = vi.fn()
+const appointmentFindMany = vi.fn()
+// No series unless a test books one
+const seriesFindMany = vi.fn().mockResolvedValue([])
 
 vi.mock('../../lib/prisma.js', () => ({
   prisma: {
@@ -56,6 +63,15 @@ vi.mock('../../lib/prisma.js', () => ({
       update: professionalUpdate,
       create: professionalCreate,
     },
+    service: {
+      findFirst: serviceFindFirst,
+    },
+    appointment: {
+      findMany: appointmentFindMany,
+    },
+    appointmentSeries: {
+      findMany: seriesFindMany,
+    },
     barbershop: {
       findUnique: vi.fn(),
     },
@@ -192,8 +208,179 @@ describe('Professional Controller', () => {
 
     expect(response.statusCode).toBe(204)
     expect(professionalUpdate).toHaveBeenCalledWith({
-      where: { id: 'prof-1' },
+      where: { id: 'prof-1', barbershopId: 'tenant-id', isActive: true },
       data: { isActive: false },
     })
   })
+
+  describe('Availability', () => {
+    const service = { id: 'service-1', barbershopId: 'tenant-id', duration: 30, isActive: true }
+
+    it('returns free intervals of a professional from one range query', async () => {
+      const token = makeToken('ADMIN')
+      serviceFindFirst.mockResolvedValue(service)
+      professionalFindMany.mockResolvedValue([{ id: 'prof-1', name: 'Barber 1' }])
+      appointmentFindMany.mockResolvedValue([
+        {
+          professionalId: 'prof-1',
+          date: new Date('2026-10-19T10:00:00Z'),
+          endsAt: new Date('2026-10-19T11:00:00Z'),
+        },
+        {
+          professionalId: 'prof-1',
+          date: new Date('2026-10-19T11:15:00Z'),
+          endsAt: new Date('2026-10-19T12:00:00Z'),
+        },
+      ])
+
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/professionals/prof-1/availability?from=2026-10-19T09:00:00Z&to=2026-10-19T13:00:00Z&serviceId=service-1',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+      })
+
+      expect(response.statusCode).toBe(200)
+      expect(response.json()).toEqual({
+        from: '2026-10-19T09:00:00.000Z',
+        to: '2026-10-19T13:00:00.000Z',
+        serviceId: 'service-1',
+        duration: 30,
+        professionalId: 'prof-1',
+        slots: [
+          { start: '2026-10-19T09:00:00.000Z', end: '2026-10-19T10:00:00.000Z' },
+          { start: '2026-10-19T12:00:00.000Z', end: '2026-10-19T13:00:00.000Z' },
+        ],
+      })
+      expect(appointmentFindMany).toHaveBeenCalledTimes(1)
+      expect(appointmentFindMany).toHaveBeenCalledWith({
+        where: {
+          barbershopId: 'tenant-id',
+          professionalId: { in: ['prof-1'] },
+          status: { notIn: ['CANCELLED'] },
+          date: { lt: new Date('2026-10-19T13:00:00Z') },
+          endsAt: { gt: new Date('2026-10-19T09:00:00Z') },
+        },
+        select: { professionalId: true, date: true, endsAt: true },
+        orderBy: { date: 'asc' },
+      })
+    })
+
+    it('treats unmaterialized series occurrences as busy', async () => {
+      const token = makeToken('ADMIN')
+      serviceFindFirst.mockResolvedValue(service)
+      professionalFindMany.mockResolvedValue([{ id: 'prof-1', name: 'Barber 1' }])
+      appointmentFindMany.mockResolvedValue([])
+      // Weekly at 10:00 since two weeks ago, for a year: only this Monday's occurrence counts
+      seriesFindMany.mockResolvedValueOnce([
+        {
+          id: 'series-1',
+          professionalId: 'prof-1',
+          clientId: 'client-1',
+          serviceId: 'service-1',
+          price: new Decimal('50'),
+          startsAt: new Date('2026-10-05T10:00:00Z'),
+          endsAt: new Date('2027-09-27T10:30:00Z'),
+          intervalWeeks: 1,
+          duration: 30,
+          appointments: [],
+        },
+      ])
+
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/professionals/prof-1/availability?from=2026-10-19T09:00:00Z&to=2026-10-19T13:00:00Z&serviceId=service-1',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+      })
+
+      expect(response.statusCode).toBe(200)
+      expect(response.json().slots).toEqual([
+        { start: '2026-10-19T09:00:00.000Z', end: '2026-10-19T10:00:00.000Z' },
+        { start: '2026-10-19T10:30:00.000Z', end: '2026-10-19T13:00:00.000Z' },
+      ])
+      expect(seriesFindMany.mock.calls[0][0].where).toMatchObject({
+        startsAt: { lt: new Date('2026-10-19T13:00:00Z') },
+        endsAt: { gt: new Date('2026-10-19T09:00:00Z') },
+      })
+    })
+
+    it('returns 404 for an unknown professional', async () => {
+      const token = makeToken('ADMIN')
+      serviceFindFirst.mockResolvedValue(service)
+      professionalFindMany.mockResolvedValue([])
+
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/professionals/missing/availability?from=2026-10-19T09:00:00Z&to=2026-10-19T13:00:00Z&serviceId=service-1',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+      })
+
+      expect(response.statusCode).toBe(404)
+      expect(appointmentFindMany).not.toHaveBeenCalled()
+    })
+
+    it('splits one query across several professionals', async () => {
+      const token = makeToken('ADMIN')
+      serviceFindFirst.mockResolvedValue(service)
+      professionalFindMany.mockResolvedValue([
+        { id: 'prof-1', name: 'Barber 1' },
+        { id: 'prof-2', name: 'Barber 2' },
+      ])
+      appointmentFindMany.mockResolvedValue([
+        {
+          professionalId: 'prof-2',
+          date: new Date('2026-10-19T09:00:00Z'),
+          endsAt: new Date('2026-10-19T12:45:00Z'),
+        },
+      ])
+
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/professionals/availability?from=2026-10-19T09:00:00Z&to=2026-10-19T13:00:00Z&serviceId=service-1&professionalIds=prof-1,prof-2',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+      })
+
+      expect(response.statusCode).toBe(200)
+      expect(response.json().data).toEqual([
+        {
+          professionalId: 'prof-1',
+          name: 'Barber 1',
+          slots: [{ start: '2026-10-19T09:00:00.000Z', end: '2026-10-19T13:00:00.000Z' }],
+        },
+        { professionalId: 'prof-2', name: 'Barber 2', slots: [] },
+      ])
+      expect(professionalFindMany).toHaveBeenCalledWith(
+        expect.objectContaining({
+          where: { barbershopId: 'tenant-id', isActive: true, id: { in: ['prof-1', 'prof-2'] } },
+        })
+      )
+      expect(appointmentFindMany).toHaveBeenCalledTimes(1)
+    })
+
+    it('rejects windows longer than 31 days', async () => {
+      const token = makeToken('ADMIN')
+
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/professionals/availability?from=2026-10-01T00:00:00Z&to=2026-12-01T00:00:00Z&serviceId=service-1',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+      })
+
+      expect(response.statusCode).toBe(400)
+    })
+  })
 })
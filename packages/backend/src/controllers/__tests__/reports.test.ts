@@ -43,15 +43,20 @@ vi.mock('../../lib/redis.js', () => ({
 
 // Mock Prisma
 const transactionGroupBy = vi.fn()
+const rollupGroupBy = vi.fn()
 const appointmentAggregate = vi.fn()
 const appointmentGroupBy = vi.fn()
 const professionalFindMany = vi.fn()
+const professionalRollupGroupBy = vi.fn()
 
 vi.mock('../../lib/prisma.js', () => ({
   prisma: {
     transaction: {
       groupBy: transactionGroupBy,
     },
+    transactionDailyRollup: {
+      groupBy: rollupGroupBy,
+    },
     appointment: {
       aggregate: appointmentAggregate,
       groupBy: appointmentGroupBy,
@@ -59,6 +64,9 @@ vi.mock('../../lib/prisma.js', () => ({
     professional: {
       findMany: professionalFindMany,
     },
+    professionalDailyRollup: {
+      groupBy: professionalRollupGroupBy,
+    },
     barbershop: {
       findUnique: vi.fn(),
     },
@@ -76,6 +84,8 @@ describe('Report Controller', () => {
 
   beforeEach(async () => {
     vi.clearAllMocks()
+    const { clearProfessionalDirectories } = await import('../../lib/professionalDirectory.js')
+    clearProfessionalDirectories()
     getCachedTenant.mockResolvedValue('tenant-id')
     ipRatelimitMock.limit.mockResolvedValue({
       success: true,
@@ -158,9 +168,14 @@ describe('Report Controller', () => {
     it('returns financial summary on success', async () => {
       const token = makeToken('ADMIN')
 
+      // Jan 1-30 are whole days read from the rollups; Jan 31 ends at 23:59:59 and is scanned
+      rollupGroupBy.mockResolvedValue([
+        { type: 'INCOME', category: 'Services', _sum: { amount: 900, count: 9 } },
+        { type: 'EXPENSE', category: 'Supplies', _sum: { amount: 200, count: 2 } },
+        { type: 'EXPENSE', category: 'Refunds', _sum: { amount: 0, count: 0 } },
+      ])
       transactionGroupBy.mockResolvedValue([
-        { type: 'INCOME', category: 'Services', _sum: { amount: 1000 }, _count: { _all: 10 } },
-        { type: 'EXPENSE', category: 'Supplies', _sum: { amount: 200 }, _count: { _all: 2 } },
+        { type: 'INCOME', category: 'Services', _sum: { amount: 100 }, _count: { _all: 1 } },
       ])
       appointmentAggregate.mockResolvedValue({
         _sum: { price: 1500, commissionValue: 500 },
@@ -182,10 +197,19 @@ describe('Report Controller', () => {
 
       expect(response.statusCode).toBe(200)
       const body = JSON.parse(response.payload)
-      expect(body.income.total).toBe(1000)
-      expect(body.expenses.total).toBe(200)
+      expect(body.income).toEqual({ total: 1000, count: 10, byCategory: { Services: 1000 } })
+      expect(body.expenses).toEqual({ total: 200, count: 2, byCategory: { Supplies: 200 } })
       expect(body.net).toBe(800)
       expect(body.appointments.totalRevenue).toBe(1500)
+      expect(rollupGroupBy.mock.calls[0][0].where).toEqual({
+        barbershopId: 'tenant-id',
+        day: { gte: new Date('2023-01-01T00:00:00Z'), lt: new Date('2023-01-31T00:00:00Z') },
+      })
+      expect(transactionGroupBy).toHaveBeenCalledTimes(1)
+      expect(transactionGroupBy.mock.calls[0][0].where).toEqual({
+        barbershopId: 'tenant-id',
+        date: { gte: new Date('2023-01-31T00:00:00Z'), lte: new Date('2023-01-31T23:59:59Z') },
+      })
     })
   })
 
@@ -207,11 +231,18 @@ describe('Report Controller', () => {
     it('returns commission report on success', async () => {
       const token = makeToken('ADMIN')
 
+      // Jan 1-30 are whole days read from the rollups; Jan 31 ends at 23:59:59 and is scanned
+      professionalRollupGroupBy.mockResolvedValue([
+        {
+          professionalId: 'prof-1',
+          _sum: { appointments: 4, revenue: 400, commissions: 200 },
+        },
+      ])
       appointmentGroupBy.mockResolvedValue([
         {
           professionalId: 'prof-1',
-          _sum: { price: 500, commissionValue: 250 },
-          _count: { _all: 5 },
+          _sum: { price: 100, commissionValue: 50 },
+          _count: { _all: 1 },
         },
       ])
       professionalFindMany.mockResolvedValue([
@@ -239,8 +270,62 @@ describe('Report Controller', () => {
       expect(response.statusCode).toBe(200)
       const body = JSON.parse(response.payload)
       expect(body.professionals).toHaveLength(1)
-      expect(body.professionals[0].name).toBe('Barber Joe')
+      expect(body.professionals[0]).toMatchObject({
+        name: 'Barber Joe',
+        appointmentsCompleted: 5,
+        totalRevenue: 500,
+        totalCommissions: 250,
+      })
       expect(body.totals.totalCommissions).toBe(250)
+      expect(professionalRollupGroupBy.mock.calls[0][0].where).toEqual({
+        barbershopId: 'tenant-id',
+        day: { gte: new Date('2023-01-01T00:00:00Z'), lt: new Date('2023-01-31T00:00:00Z') },
+      })
+      expect(appointmentGroupBy).toHaveBeenCalledTimes(1)
+      expect(appointmentGroupBy.mock.calls[0][0].where).toEqual({
+        barbershopId: 'tenant-id',
+        status: 'COMPLETED',
+        date: { gte: new Date('2023-01-31T00:00:00Z'), lte: new Date('2023-01-31T23:59:59Z') },
+      })
+    })
+
+    it('joins names from the cached professional directory', async () => {
+      const token = makeToken('ADMIN')
+
+      professionalRollupGroupBy.mockResolvedValue([
+        {
+          professionalId: 'prof-1',
+          _sum: { appointments: 2, revenue: 200, commissions: 100 },
+        },
+      ])
+      appointmentGroupBy.mockResolvedValue([])
+      professionalFindMany.mockResolvedValue([
+        {
+          id: 'prof-1',
+          name: 'Barber Joe',
+          email: 'joe@test.com',
+          commissionRate: { toNumber: () => 0.5 },
+        },
+      ])
+
+      for (let i = 0; i < 2; i++) {
+        const response = await app.inject({
+          method: 'GET',
+          url: '/api/reports/commissions',
+          query: {
+            dateFrom: '2023-01-01T00:00:00Z',
+            dateTo: '2023-01-31T00:00:00Z',
+          },
+          headers: {
+            Authorization: `Bearer ${token}`,
+            'x-tenant-slug': 'barbearia-teste',
+          },
+        })
+
+        expect(response.statusCode).toBe(200)
+        expect(JSON.parse(response.payload).professionals[0].name).toBe('Barber Joe')
+      }
+      expect(professionalFindMany).toHaveBeenCalledTimes(1)
     })
   })
 })
@@ -1,6 +1,7 @@
 import { describe, it, expect, beforeEach, afterEach, vi } from 'vitest'
 import type { FastifyInstance } from 'fastify'
 import type { AuthenticatedUser } from '../../types/index.js'
+import { Prisma } from '@prisma/client'
 import { Decimal } from '@prisma/client/runtime/library'
 
 const redisMock = {
@@ -39,6 +40,9 @@ vi.mock('../../lib/redis.js', () => ({
   deleteRefreshToken: vi.fn(),
   deleteAllRefreshTokens: vi.fn(),
   invalidateTenantCache: vi.fn(),
+  getCachedCount: vi.fn(),
+  cacheCount: vi.fn(),
+  invalidateCachedCounts: vi.fn(),
 }))
 
 const serviceFindFirst = vi.fn()
@@ -142,7 +146,6 @@ describe('Service Controller', () => {
       createdAt: new Date(),
       updatedAt: new Date(),
     }
-    serviceFindFirst.mockResolvedValue(existing)
     serviceUpdate.mockResolvedValue({ ...existing, isActive: false })
 
     const response = await app.inject({
@@ -156,8 +159,30 @@ describe('Service Controller', () => {
 
     expect(response.statusCode).toBe(204)
     expect(serviceUpdate).toHaveBeenCalledWith({
-      where: { id: 'service-1' },
+      where: { id: 'service-1', barbershopId: 'tenant-id', isActive: true },
       data: { isActive: false },
     })
   })
+
+  it('returns 404 when the write matches no active service of the tenant', async () => {
+    const token = makeToken('ADMIN', { id: 'admin-1' })
+    serviceUpdate.mockRejectedValue(
+      new Prisma.PrismaClientKnownRequestError('Record to update not found.', {
+        code: 'P2025',
+        clientVersion: 'test',
+      })
+    )
+
+    const response = await app.inject({
+      method: 'DELETE',
+      url: '/api/services/other-tenant-service',
+      headers: {
+        Authorization: `Bearer ${token}`,
+        'x-tenant-slug': 'barbearia-teste',
+      },
+    })
+
+    expect(response.statusCode).toBe(404)
+    expect(serviceFindFirst).not.toHaveBeenCalled()
+  })
 })
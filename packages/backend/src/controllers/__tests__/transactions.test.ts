@@ -1,6 +1,8 @@
 import { describe, it, expect, beforeEach, afterEach, vi } from 'vitest'
 import type { FastifyInstance } from 'fastify'
 import type { AuthenticatedUser } from '../../types/index.js'
+import { Decimal } from '@prisma/client/runtime/library'
+import { decodeCursor, encodeCursor } from '../../lib/pagination.js'
 
 const redisMock = {
   setex: vi.fn().mockResolvedValue('OK'),
@@ -22,6 +24,8 @@ const tenantRatelimitMock = {
 }
 
 const getCachedTenant = vi.fn().mockResolvedValue('tenant-id')
+const getCachedCount = vi.fn()
+const cacheCount = vi.fn()
 
 vi.mock('../../lib/redis.js', () => ({
   redis: redisMock,
@@ -38,18 +42,32 @@ vi.mock('../../lib/redis.js', () => ({
   deleteRefreshToken: vi.fn(),
   deleteAllRefreshTokens: vi.fn(),
   invalidateTenantCache: vi.fn(),
+  getCachedCount,
+  cacheCount,
+  invalidateCachedCounts: vi.fn(),
 }))
 
 const transactionFindMany = vi.fn()
 const transactionCount = vi.fn()
 const transactionFindUnique = vi.fn()
+const transactionUpdate = vi.fn()
+const queryRaw = vi.fn()
+const rollupUpsert = vi.fn()
+
+const txMock = {
+  $queryRaw: queryRaw,
+  transaction: { update: transactionUpdate },
+  transactionDailyRollup: { upsert: rollupUpsert },
+}
 
 vi.mock('../../lib/prisma.js', () => ({
   prisma: {
+    $transaction: vi.fn((fn: (tx: typeof txMock) => unknown) => fn(txMock)),
     transaction: {
       findMany: transactionFindMany,
       count: transactionCount,
       findUnique: transactionFindUnique,
+      update: transactionUpdate,
     },
     barbershop: {
       findUnique: vi.fn(),
@@ -168,4 +186,289 @@ describe('Transaction Controller', () => {
 
     expect(response.statusCode).toBe(200)
   })
+  it('pages by cursor without counting', async () => {
+    const token = makeToken('ADMIN')
+    const rows = ['tx-3', 'tx-2', 'tx-1'].map((id, index) => ({
+      id,
+      barbershopId: 'tenant-id',
+      createdById: 'user-1',
+      amount: new Decimal('50'),
+      type: 'INCOME',
+      category: 'Serviço',
+      description: null,
+      date: new Date(Date.UTC(2026, 0, 3 - index)),
+      paymentMethod: null,
+      createdAt: new Date(),
+      updatedAt: new Date(),
+    }))
+    transactionFindMany.mockResolvedValue(rows)
+
+    const response = await app.inject({
+      method: 'GET',
+      url: '/api/transactions?limit=2&cursor=',
+      headers: {
+        Authorization: `Bearer ${token}`,
+        'x-tenant-slug': 'barbearia-teste',
+      },
+    })
+
+    expect(response.statusCode).toBe(200)
+    const body = JSON.parse(response.payload)
+    expect(body.data.map((tx: { id: string }) => tx.id)).toEqual(['tx-3', 'tx-2'])
+    expect(decodeCursor(body.pagination.nextCursor)).toEqual({ value: rows[1].date, id: 'tx-2' })
+    expect(transactionCount).not.toHaveBeenCalled()
+    expect(transactionFindMany).toHaveBeenCalledWith(
+      expect.objectContaining({ take: 3, orderBy: [{ date: 'desc' }, { id: 'desc' }] })
+    )
+  })
+
+  it('seeks past the cursor position', async () => {
+    const token = makeToken('ADMIN')
+    const date = new Date('2026-01-02T00:00:00.000Z')
+    transactionFindMany.mockResolvedValue([])
+
+    const response = await app.inject({
+      method: 'GET',
+      url: `/api/transactions?limit=2&cursor=${encodeCursor({ value: date, id: 'tx-2' })}`,
+      headers: {
+        Authorization: `Bearer ${token}`,
+        'x-tenant-slug': 'barbearia-teste',
+      },
+    })
+
+    expect(response.statusCode).toBe(200)
+    expect(JSON.parse(response.payload).pagination).toEqual({ limit: 2, nextCursor: null })
+    expect(transactionFindMany.mock.calls[0][0].where).toEqual({
+      barbershopId: 'tenant-id',
+      AND: { OR: [{ date: { lt: date } }, { date, id: { lt: 'tx-2' } }] },
+    })
+  })
+
+  it('rejects an invalid cursor', async () => {
+    const token = makeToken('ADMIN')
+
+    const response = await app.inject({
+      method: 'GET',
+      url: '/api/transactions?cursor=garbage',
+      headers: {
+        Authorization: `Bearer ${token}`,
+        'x-tenant-slug': 'barbearia-teste',
+      },
+    })
+
+    expect(response.statusCode).toBe(400)
+    expect(transactionFindMany).not.toHaveBeenCalled()
+  })
+  it('serves an estimated total from the count cache', async () => {
+    const token = makeToken('ADMIN')
+    transactionFindMany.mockResolvedValue([])
+    getCachedCount.mockResolvedValue({ count: 42, generation: 3 })
+
+    const response = await app.inject({
+      method: 'GET',
+      url: '/api/transactions?limit=20&withTotal=estimate&type=INCOME',
+      headers: {
+        Authorization: `Bearer ${token}`,
+        'x-tenant-slug': 'barbearia-teste',
+      },
+    })
+
+    expect(response.statusCode).toBe(200)
+    expect(JSON.parse(response.payload).pagination).toEqual({
+      page: 1,
+      limit: 20,
+      total: 42,
+      totalPages: 3,
+      estimated: true,
+    })
+    expect(transactionCount).not.toHaveBeenCalled()
+  })
+
+  it('counts and caches the total on an estimate miss', async () => {
+    const token = makeToken('ADMIN')
+    transactionFindMany.mockResolvedValue([])
+    transactionCount.mockResolvedValue(7)
+    getCachedCount.mockResolvedValue({ count: null, generation: 3 })
+    cacheCount.mockResolvedValue(undefined)
+
+    const response = await app.inject({
+      method: 'GET',
+      url: '/api/transactions?withTotal=estimate',
+      headers: {
+        Authorization: `Bearer ${token}`,
+        'x-tenant-slug': 'barbearia-teste',
+      },
+    })
+
+    expect(response.statusCode).toBe(200)
+    expect(JSON.parse(response.payload).pagination.total).toBe(7)
+    expect(cacheCount).toHaveBeenCalledWith('transaction', 'tenant-id', expect.any(String), 3, 7)
+  })
+
+  it('skips the count and reports hasMore without a total', async () => {
+    const token = makeToken('ADMIN')
+    transactionFindMany.mockResolvedValue([{ id: 'tx-1' }, { id: 'tx-2' }, { id: 'tx-3' }])
+
+    const response = await app.inject({
+      method: 'GET',
+      url: '/api/transactions?limit=2&withTotal=false',
+      headers: {
+        Authorization: `Bearer ${token}`,
+        'x-tenant-slug': 'barbearia-teste',
+      },
+    })
+
+    expect(response.statusCode).toBe(200)
+    const body = JSON.parse(response.payload)
+    expect(body.data).toHaveLength(2)
+    expect(body.pagination).toEqual({ page: 1, limit: 2, hasMore: true })
+    expect(transactionCount).not.toHaveBeenCalled()
+    expect(transactionFindMany).toHaveBeenCalledWith(expect.objectContaining({ take: 3 }))
+  })
+
+  it('exports every matching transaction as CSV in keyset batches', async () => {
+    const token = makeToken('ADMIN')
+    transactionFindMany.mockResolvedValue([
+      {
+        id: 'tx-1',
+        barbershopId: 'tenant-id',
+        createdById: 'user-1',
+        amount: new Decimal('50.00'),
+        type: 'INCOME',
+        category: 'Serviço',
+        description: 'Corte, barba',
+        date: new Date('2026-01-02T10:00:00.000Z'),
+        paymentMethod: 'PIX',
+        createdAt: new Date(),
+        updatedAt: new Date(),
+        createdBy: { id: 'user-1', name: 'Carlos' },
+      },
+    ])
+
+    const response = await app.inject({
+      method: 'GET',
+      url: '/api/transactions/export?format=csv&type=INCOME',
+      headers: {
+        Authorization: `Bearer ${token}`,
+        'x-tenant-slug': 'barbearia-teste',
+      },
+    })
+
+    expect(response.statusCode).toBe(200)
+    expect(response.headers['content-type']).toBe('text/csv; charset=utf-8')
+    expect(response.headers['content-disposition']).toBe(
+      'attachment; filename="transactions.csv"'
+    )
+    expect(response.payload).toBe(
+      'id,date,type,category,description,amount,paymentMethod,createdById,createdByName\r\n' +
+        'tx-1,2026-01-02T10:00:00.000Z,INCOME,Serviço,"Corte, barba",50,PIX,user-1,Carlos\r\n'
+    )
+    expect(transactionFindMany).toHaveBeenCalledTimes(1)
+    expect(transactionFindMany.mock.calls[0][0]).toMatchObject({
+      where: { barbershopId: 'tenant-id', type: 'INCOME' },
+      take: 501,
+      orderBy: [{ date: 'desc' }, { id: 'desc' }],
+    })
+    expect(transactionCount).not.toHaveBeenCalled()
+  })
+
+  describe('daily rollups', () => {
+    const before = {
+      barbershopId: 'tenant-id',
+      date: new Date('2026-01-02T10:00:00.000Z'),
+      type: 'INCOME',
+      category: 'Serviço',
+      amount: new Decimal('50'),
+    }
+    const updated = (data: Record<string, unknown>) => ({
+      ...before,
+      id: 'tx-1',
+      createdById: 'user-1',
+      description: null,
+      paymentMethod: null,
+      createdAt: new Date(),
+      updatedAt: new Date(),
+      ...data,
+    })
+    const upserts = () =>
+      rollupUpsert.mock.calls.map(([args]) => ({
+        key: args.where.barbershopId_day_type_category,
+        amount: args.update.amount.increment.toString(),
+        count: args.update.count.increment,
+      }))
+
+    it('moves an updated transaction between rollups in the same transaction', async () => {
+      const token = makeToken('ADMIN')
+      queryRaw.mockResolvedValue([before])
+      transactionUpdate.mockResolvedValue(
+        updated({ amount: new Decimal('80'), category: 'Produtos' })
+      )
+
+      const response = await app.inject({
+        method: 'PUT',
+        url: '/api/transactions/tx-1',
+        payload: { amount: 80, category: 'Produtos' },
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+      })
+
+      expect(response.statusCode).toBe(200)
+      const day = new Date('2026-01-02T00:00:00.000Z')
+      expect(upserts()).toEqual([
+        {
+          key: { barbershopId: 'tenant-id', day, type: 'INCOME', category: 'Produtos' },
+          amount: '80',
+          count: 1,
+        },
+        {
+          key: { barbershopId: 'tenant-id', day, type: 'INCOME', category: 'Serviço' },
+          amount: '-50',
+          count: -1,
+        },
+      ])
+    })
+
+    it('updates without locking when no rolled-up column changes', async () => {
+      const token = makeToken('ADMIN')
+      transactionUpdate.mockResolvedValue(updated({ description: 'Corte' }))
+
+      const response = await app.inject({
+        method: 'PUT',
+        url: '/api/transactions/tx-1',
+        payload: { description: 'Corte' },
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+      })
+
+      expect(response.statusCode).toBe(200)
+      expect(queryRaw).not.toHaveBeenCalled()
+      expect(rollupUpsert).not.toHaveBeenCalled()
+      expect(transactionUpdate).toHaveBeenCalledWith(
+        expect.objectContaining({ where: { id: 'tx-1', barbershopId: 'tenant-id' } })
+      )
+    })
+
+    it('returns 404 without writing when the transaction does not exist', async () => {
+      const token = makeToken('ADMIN')
+      queryRaw.mockResolvedValue([])
+
+      const response = await app.inject({
+        method: 'PUT',
+        url: '/api/transactions/missing',
+        payload: { amount: 80 },
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'x-tenant-slug': 'barbearia-teste',
+        },
+      })
+
+      expect(response.statusCode).toBe(404)
+      expect(transactionUpdate).not.toHaveBeenCalled()
+      expect(rollupUpsert).not.toHaveBeenCalled()
+    })
+  })
 })
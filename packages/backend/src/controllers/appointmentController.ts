@@ -1,6 +1,22 @@
 import type { FastifyRequest, FastifyReply } from 'fastify'
 import { appointmentService } from '../services/appointmentService.js'
+import { appointmentSeriesService } from '../services/appointmentSeriesService.js'
 import { z } from 'zod'
+import {
+  cursorQuerySchema,
+  isValidStreamQuery,
+  MAX_STREAM_LIMIT,
+  STREAM_QUERY_MESSAGE,
+  streamQuerySchema,
+  withTotalQuerySchema,
+} from '../lib/pagination.js'
+import { commaListQuerySchema, responseFormatQuerySchema } from '../lib/projection.js'
+import { EXPORT_CONTENT_TYPES, exportFormatQuerySchema } from '../lib/export.js'
+import { recurrenceSchema } from '../lib/recurrence.js'
+import {
+  APPOINTMENT_FIELD_PATHS,
+  APPOINTMENT_RELATIONS,
+} from '../repositories/appointmentRepository.js'
 
 const createAppointmentSchema = z.object({
   professionalId: z.string().min(1),
@@ -10,6 +26,21 @@ const createAppointmentSchema = z.object({
   notes: z.string().optional(),
 })
 
+// Largest batch accepted by POST /appointments/bulk
+const MAX_BULK_APPOINTMENTS = 500
+
+const bulkCreateAppointmentSchema = z.object({
+  appointments: z.array(createAppointmentSchema).min(1).max(MAX_BULK_APPOINTMENTS),
+})
+
+const createSeriesSchema = createAppointmentSchema.extend({
+  recurrence: recurrenceSchema,
+})
+
+const materializeOccurrenceSchema = z.object({
+  occurrence: z.string().datetime(),
+})
+
 const updateAppointmentSchema = z.object({
   professionalId: z.string().min(1).optional(),
   clientId: z.string().min(1).optional(),
@@ -22,14 +53,40 @@ const updateStatusSchema = z.object({
   status: z.enum(['PENDING', 'CONFIRMED', 'COMPLETED', 'CANCELLED', 'NO_SHOW']),
 })
 
-const listQuerySchema = z.object({
-  page: z.coerce.number().int().positive().default(1),
-  limit: z.coerce.number().int().positive().max(100).default(20),
+// Filters shared by the list and the export
+const listFilterFields = {
   status: z.enum(['PENDING', 'CONFIRMED', 'COMPLETED', 'CANCELLED', 'NO_SHOW']).optional(),
   professionalId: z.string().optional(),
   clientId: z.string().optional(),
   startDate: z.string().optional(),
   endDate: z.string().optional(),
+}
+
+const listQuerySchema = z
+  .object({
+    page: z.coerce.number().int().positive().default(1),
+    limit: z.coerce.number().int().positive().max(MAX_STREAM_LIMIT).default(20),
+    cursor: cursorQuerySchema,
+    withTotal: withTotalQuerySchema,
+    stream: streamQuerySchema,
+    fields: commaListQuerySchema(APPOINTMENT_FIELD_PATHS),
+    include: commaListQuerySchema(APPOINTMENT_RELATIONS),
+    format: responseFormatQuerySchema,
+    ...listFilterFields,
+    expand: z.enum(['occurrences']).optional(),
+  })
+  .refine((query) => !query.expand || (query.startDate && query.endDate), {
+    message: 'startDate and endDate are required to expand occurrences',
+    path: ['expand'],
+  })
+  .refine((query) => isValidStreamQuery(query) && !(query.stream && query.expand), {
+    message: STREAM_QUERY_MESSAGE,
+    path: ['stream'],
+  })
+
+const exportQuerySchema = z.object({
+  format: exportFormatQuerySchema,
+  ...listFilterFields,
 })
 
 const idParamSchema = z.object({
@@ -39,7 +96,18 @@ const idParamSchema = z.object({
 export class AppointmentController {
   async list(request: FastifyRequest, reply: FastifyReply) {
     try {
-      const { page, limit, ...filters } = listQuerySchema.parse(request.query)
+      const {
+        page,
+        limit,
+        cursor,
+        withTotal,
+        stream,
+        fields,
+        include,
+        format,
+        expand,
+        ...filters
+      } = listQuerySchema.parse(request.query)
       const barbershopId = request.tenantId
       const user = request.user
 
@@ -55,10 +123,23 @@ export class AppointmentController {
         return reply.status(403).send({ error: 'Tenant mismatch' })
       }
 
+      if (stream) {
+        const body = appointmentService.streamAppointments(
+          barbershopId,
+          { limit, cursor: cursor ?? '' },
+          filters,
+          { fields, include }
+        )
+        return reply.status(200).type('application/json; charset=utf-8').send(body)
+      }
+
       const result = await appointmentService.listAppointments(
         barbershopId,
-        { page, limit },
-        filters
+        { page, limit, cursor, withTotal },
+        filters,
+        { fields, include },
+        format,
+        expand
       )
       return reply.status(200).send(result)
     } catch (error) {
@@ -69,6 +150,38 @@ export class AppointmentController {
     }
   }
 
+  async export(request: FastifyRequest, reply: FastifyReply) {
+    try {
+      const { format, ...filters } = exportQuerySchema.parse(request.query)
+      const barbershopId = request.tenantId
+      const user = request.user
+
+      if (!barbershopId) {
+        return reply.status(401).send({ error: 'Tenant not identified' })
+      }
+
+      if (!user?.id) {
+        return reply.status(401).send({ error: 'Authentication required' })
+      }
+
+      if (user.barbershopId !== barbershopId) {
+        return reply.status(403).send({ error: 'Tenant mismatch' })
+      }
+
+      const body = appointmentService.exportAppointments(barbershopId, filters, format)
+      return reply
+        .status(200)
+        .type(EXPORT_CONTENT_TYPES[format])
+        .header('content-disposition', `attachment; filename="appointments.${format}"`)
+        .send(body)
+    } catch (error) {
+      if (error instanceof z.ZodError) {
+        return reply.status(400).send({ error: 'Validation failed', details: error.errors })
+      }
+      throw error
+    }
+  }
+
   async getById(request: FastifyRequest, reply: FastifyReply) {
     try {
       const { id } = idParamSchema.parse(request.params)
@@ -145,6 +258,156 @@ export class AppointmentController {
     }
   }
 
+  async bulkCreate(request: FastifyRequest, reply: FastifyReply) {
+    try {
+      const { appointments } = bulkCreateAppointmentSchema.parse(request.body)
+      const barbershopId = request.tenantId
+      const user = request.user
+
+      if (!barbershopId) {
+        return reply.status(401).send({ error: 'Tenant not identified' })
+      }
+
+      if (!user?.id) {
+        return reply.status(401).send({ error: 'Authentication required' })
+      }
+
+      if (user.barbershopId !== barbershopId) {
+        return reply.status(403).send({ error: 'Tenant mismatch' })
+      }
+
+      const result = await appointmentService.createAppointments(
+        barbershopId,
+        user.id,
+        appointments
+      )
+
+      return reply.status(200).send(result)
+    } catch (error) {
+      if (error instanceof z.ZodError) {
+        return reply.status(400).send({ error: 'Validation failed', details: error.errors })
+      }
+      if (error instanceof Error && error.message.includes('conflicting')) {
+        return reply.status(409).send({ error: error.message })
+      }
+      throw error
+    }
+  }
+
+  async createSeries(request: FastifyRequest, reply: FastifyReply) {
+    try {
+      const data = createSeriesSchema.parse(request.body)
+      const barbershopId = request.tenantId
+      const user = request.user
+
+      if (!barbershopId) {
+        return reply.status(401).send({ error: 'Tenant not identified' })
+      }
+
+      if (!user?.id) {
+        return reply.status(401).send({ error: 'Authentication required' })
+      }
+
+      if (user.barbershopId !== barbershopId) {
+        return reply.status(403).send({ error: 'Tenant mismatch' })
+      }
+
+      const series = await appointmentSeriesService.createSeries({
+        ...data,
+        barbershopId,
+        createdById: user.id,
+      })
+
+      return reply.status(201).send(series)
+    } catch (error) {
+      if (error instanceof z.ZodError) {
+        return reply.status(400).send({ error: 'Validation failed', details: error.errors })
+      }
+      if (error instanceof Error && error.message.startsWith('Recurrence')) {
+        return reply.status(400).send({ error: error.message })
+      }
+      if (error instanceof Error && error.message.includes('not found')) {
+        return reply.status(404).send({ error: error.message })
+      }
+      if (error instanceof Error && error.message.includes('conflicting')) {
+        return reply.status(409).send({ error: error.message })
+      }
+      throw error
+    }
+  }
+
+  async materializeOccurrence(request: FastifyRequest, reply: FastifyReply) {
+    try {
+      const { id } = idParamSchema.parse(request.params)
+      const { occurrence } = materializeOccurrenceSchema.parse(request.body)
+      const barbershopId = request.tenantId
+      const user = request.user
+
+      if (!barbershopId) {
+        return reply.status(401).send({ error: 'Tenant not identified' })
+      }
+
+      if (!user?.id) {
+        return reply.status(401).send({ error: 'Authentication required' })
+      }
+
+      if (user.barbershopId !== barbershopId) {
+        return reply.status(403).send({ error: 'Tenant mismatch' })
+      }
+
+      const { appointment, created } = await appointmentSeriesService.materializeOccurrence(
+        id,
+        barbershopId,
+        user.id,
+        occurrence
+      )
+
+      return reply.status(created ? 201 : 200).send(appointment)
+    } catch (error) {
+      if (error instanceof z.ZodError) {
+        return reply.status(400).send({ error: 'Validation failed', details: error.errors })
+      }
+      if (error instanceof Error && error.message.includes('not found')) {
+        return reply.status(404).send({ error: error.message })
+      }
+      if (error instanceof Error && error.message.includes('conflicting')) {
+        return reply.status(409).send({ error: error.message })
+      }
+      throw error
+    }
+  }
+
+  async deleteSeries(request: FastifyRequest, reply: FastifyReply) {
+    try {
+      const { id } = idParamSchema.parse(request.params)
+      const barbershopId = request.tenantId
+      const user = request.user
+
+      if (!barbershopId) {
+        return reply.status(401).send({ error: 'Tenant not identified' })
+      }
+
+      if (!user?.id) {
+        return reply.status(401).send({ error: 'Authentication required' })
+      }
+
+      if (user.barbershopId !== barbershopId) {
+        return reply.status(403).send({ error: 'Tenant mismatch' })
+      }
+
+      await appointmentSeriesService.deleteSeries(id, barbershopId)
+      return reply.status(204).send()
+    } catch (error) {
+      if (error instanceof z.ZodError) {
+        return reply.status(400).send({ error: 'Validation failed', details: error.errors })
+      }
+      if (error instanceof Error && error.message.includes('not found')) {
+        return reply.status(404).send({ error: error.message })
+      }
+      throw error
+    }
+  }
+
   async update(request: FastifyRequest, reply: FastifyReply) {
     try {
       const { id } = idParamSchema.parse(request.params)
@@ -215,6 +478,9 @@ export class AppointmentController {
       if (error instanceof Error && error.message.includes('not found')) {
         return reply.status(404).send({ error: error.message })
       }
+      if (error instanceof Error && error.message.includes('conflicting')) {
+        return reply.status(409).send({ error: error.message })
+      }
       if (error instanceof Error && error.message.includes('Invalid status transition')) {
         return reply.status(400).send({ error: error.message })
       }
@@ -249,6 +515,9 @@ export class AppointmentController {
       if (error instanceof Error && error.message.includes('not found')) {
         return reply.status(404).send({ error: error.message })
       }
+      if (error instanceof Error && error.message.includes('conflicting')) {
+        return reply.status(409).send({ error: error.message })
+      }
       if (error instanceof Error && error.message.includes('Invalid status transition')) {
         return reply.status(400).send({ error: error.message })
       }
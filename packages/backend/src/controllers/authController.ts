@@ -12,6 +12,29 @@ import {
   type RefreshInput,
 } from '../schemas/auth.schema.js'
 import { ZodError } from 'zod'
+import { isPasswordQueueFull, sendPasswordQueueFull } from '../lib/passwordHasher.js'
+
+const OTP_LOCKED_MESSAGE = 'Too many invalid attempts, request a new OTP'
+
+type RefreshTokenPayload = AuthenticatedUser & { jti?: string }
+
+function setRefreshTokenCookie(reply: FastifyReply, refreshToken: string): void {
+  reply.setCookie('refreshToken', refreshToken, {
+    httpOnly: true,
+    secure: process.env.NODE_ENV === 'production',
+    sameSite: 'strict',
+    maxAge: 604800, // 7 days
+  })
+}
+
+function getRefreshTokenId(request: FastifyRequest, refreshToken?: string): string | null {
+  if (!refreshToken) return null
+  try {
+    return request.server.jwt.verify<RefreshTokenPayload>(refreshToken).jti ?? null
+  } catch {
+    return null
+  }
+}
 
 export class AuthController {
   async login(request: FastifyRequest, reply: FastifyReply) {
@@ -46,18 +69,15 @@ export class AuthController {
         barbershopId,
         role: professional.role,
       }
-      const refreshToken = request.server.jwt.sign(refreshTokenPayload, { expiresIn: '7d' })
-
-      // Store refresh token in Redis
-      await authService.saveRefreshToken(professional.id, barbershopId, refreshToken)
+      // Store the refresh session in Redis; its id travels as the token's `jti`
+      const tokenId = await authService.createRefreshSession(professional.id)
+      const refreshToken = request.server.jwt.sign(refreshTokenPayload, {
+        expiresIn: '7d',
+        jti: tokenId,
+      })
 
       // Set HTTP-only cookie
-      reply.setCookie('refreshToken', refreshToken, {
-        httpOnly: true,
-        secure: process.env.NODE_ENV === 'production',
-        sameSite: 'strict',
-        maxAge: 604800, // 7 days
-      })
+      setRefreshTokenCookie(reply, refreshToken)
 
       return reply.status(200).send({
         accessToken,
@@ -71,6 +91,7 @@ export class AuthController {
       if (error instanceof Error && error.message.includes('Invalid credentials')) {
         return reply.status(401).send({ error: 'Invalid credentials' })
       }
+      if (isPasswordQueueFull(error)) return sendPasswordQueueFull(reply)
       throw error
     }
   }
@@ -85,9 +106,9 @@ export class AuthController {
       }
 
       // Verify refresh token
-      let payload: AuthenticatedUser
+      let payload: RefreshTokenPayload
       try {
-        payload = request.server.jwt.verify<AuthenticatedUser>(refreshToken)
+        payload = request.server.jwt.verify<RefreshTokenPayload>(refreshToken)
       } catch {
         return reply.status(401).send({ error: 'Invalid refresh token' })
       }
@@ -96,9 +117,12 @@ export class AuthController {
         return reply.status(401).send({ error: 'Invalid refresh token' })
       }
 
-      // Check if token exists in Redis
-      const stored = await authService.getRefreshToken(payload.id, barbershopId)
-      if (!stored || stored !== refreshToken) {
+      // Rotate: the presented token is consumed and replaced in one Redis call. Tokens
+      // issued before sessions had ids carry no jti and are moved to a new session once.
+      const newTokenId = payload.jti
+        ? await authService.rotateRefreshSession(payload.id, payload.jti)
+        : await authService.migrateLegacyRefreshSession(payload.id, barbershopId, refreshToken)
+      if (!newTokenId) {
         return reply.status(401).send({ error: 'Refresh token expired or revoked' })
       }
 
@@ -110,8 +134,14 @@ export class AuthController {
         role: payload.role,
       }
       const newAccessToken = request.server.jwt.sign(newAccessTokenPayload, { expiresIn: '15m' })
+      const newRefreshToken = request.server.jwt.sign(newAccessTokenPayload, {
+        expiresIn: '7d',
+        jti: newTokenId,
+      })
+
+      setRefreshTokenCookie(reply, newRefreshToken)
 
-      return reply.status(200).send({ accessToken: newAccessToken })
+      return reply.status(200).send({ accessToken: newAccessToken, refreshToken: newRefreshToken })
     } catch (error) {
       if (error instanceof ZodError) {
         return reply.status(400).send({ error: 'Validation failed', details: error.errors })
@@ -128,8 +158,14 @@ export class AuthController {
       return reply.status(401).send({ error: 'Not authenticated' })
     }
 
-    // Remove refresh token from Redis
-    await authService.deleteRefreshToken(userId, barbershopId)
+    // Revoke the session in the refresh token cookie, or every session when it is absent
+    // (or predates session ids)
+    const tokenId = getRefreshTokenId(request, request.cookies?.refreshToken)
+    if (tokenId) {
+      await authService.revokeRefreshSession(userId, tokenId)
+    } else {
+      await authService.revokeAllRefreshSessions(userId, barbershopId)
+    }
 
     // Clear cookie
     reply.clearCookie('refreshToken')
@@ -137,6 +173,26 @@ export class AuthController {
     return reply.status(200).send({ message: 'Logged out successfully' })
   }
 
+  async listSessions(request: FastifyRequest, reply: FastifyReply) {
+    const userId = request.user?.id
+
+    if (!userId) {
+      return reply.status(401).send({ error: 'Not authenticated' })
+    }
+
+    const sessions = await authService.listRefreshSessions(userId)
+    const currentTokenId = getRefreshTokenId(request, request.cookies?.refreshToken)
+
+    return reply.status(200).send({
+      data: sessions.map((session) => ({
+        id: session.tokenId,
+        createdAt: new Date(session.createdAt).toISOString(),
+        expiresAt: new Date(session.expiresAt).toISOString(),
+        current: session.tokenId === currentTokenId,
+      })),
+    })
+  }
+
   async requestOTP(request: FastifyRequest, reply: FastifyReply) {
     try {
       const data = otpRequestSchema.parse(request.body) as OtpRequestInput
@@ -169,9 +225,13 @@ export class AuthController {
         return reply.status(401).send({ error: 'Tenant not identified' })
       }
 
-      const valid = await authService.verifyOTP(data.email, barbershopId, data.otp)
+      const result = await authService.verifyOTP(data.email, barbershopId, data.otp)
+
+      if (result === 'locked') {
+        return reply.status(429).send({ error: OTP_LOCKED_MESSAGE })
+      }
 
-      if (!valid) {
+      if (result !== 'valid') {
         return reply.status(401).send({ error: 'Invalid OTP' })
       }
 
@@ -188,16 +248,10 @@ export class AuthController {
       }
 
       const accessToken = request.server.jwt.sign(payload, { expiresIn: '15m' })
-      const refreshToken = request.server.jwt.sign(payload, { expiresIn: '7d' })
-
-      await authService.saveRefreshToken(professional.id, barbershopId, refreshToken)
+      const tokenId = await authService.createRefreshSession(professional.id)
+      const refreshToken = request.server.jwt.sign(payload, { expiresIn: '7d', jti: tokenId })
 
-      reply.setCookie('refreshToken', refreshToken, {
-        httpOnly: true,
-        secure: process.env.NODE_ENV === 'production',
-        sameSite: 'strict',
-        maxAge: 604800, // 7 days
-      })
+      setRefreshTokenCookie(reply, refreshToken)
 
       return reply.status(200).send({
         accessToken,
@@ -1,6 +1,7 @@
 import type { FastifyRequest, FastifyReply } from 'fastify'
 import { clientService } from '../services/clientService.js'
 import { z } from 'zod'
+import { cursorQuerySchema, withTotalQuerySchema } from '../lib/pagination.js'
 
 const createClientSchema = z.object({
   name: z.string().min(1, 'Name is required'),
@@ -17,6 +18,8 @@ const updateClientSchema = z.object({
 const listQuerySchema = z.object({
   page: z.coerce.number().int().positive().default(1),
   limit: z.coerce.number().int().positive().max(100).default(20),
+  cursor: cursorQuerySchema,
+  withTotal: withTotalQuerySchema,
 })
 
 const idParamSchema = z.object({
@@ -26,7 +29,7 @@ const idParamSchema = z.object({
 export class ClientController {
   async list(request: FastifyRequest, reply: FastifyReply) {
     try {
-      const { page, limit } = listQuerySchema.parse(request.query)
+      const { page, limit, cursor, withTotal } = listQuerySchema.parse(request.query)
       const barbershopId = request.tenantId
       const user = request.user
 
@@ -42,7 +45,7 @@ export class ClientController {
         return reply.status(403).send({ error: 'Tenant mismatch' })
       }
 
-      const result = await clientService.listClients(barbershopId, { page, limit })
+      const result = await clientService.listClients(barbershopId, { page, limit, cursor, withTotal })
       return reply.status(200).send(result)
     } catch (error) {
       if (error instanceof z.ZodError) {
@@ -1,6 +1,10 @@
 import type { FastifyRequest, FastifyReply } from 'fastify'
 import { professionalService } from '../services/professionalService.js'
+import { availabilityService } from '../services/availabilityService.js'
 import { z } from 'zod'
+import { cursorQuerySchema, withTotalQuerySchema } from '../lib/pagination.js'
+import { isPasswordQueueFull, sendPasswordQueueFull } from '../lib/passwordHasher.js'
+import { availabilityQuerySchema } from '../lib/availability.js'
 
 // Validation schemas
 const createProfessionalSchema = z.object({
@@ -22,6 +26,16 @@ const updateProfessionalSchema = z.object({
 const listQuerySchema = z.object({
   page: z.coerce.number().int().positive().default(1),
   limit: z.coerce.number().int().positive().max(100).default(20),
+  cursor: cursorQuerySchema,
+  withTotal: withTotalQuerySchema,
+})
+
+const professionalIdsQuerySchema = z.object({
+  // Comma-separated; all active professionals when omitted
+  professionalIds: z
+    .string()
+    .transform((value) => [...new Set(value.split(',').map((id) => id.trim()))].filter(Boolean))
+    .optional(),
 })
 
 const idParamSchema = z.object({
@@ -31,7 +45,7 @@ const idParamSchema = z.object({
 export class ProfessionalController {
   async list(request: FastifyRequest, reply: FastifyReply) {
     try {
-      const { page, limit } = listQuerySchema.parse(request.query)
+      const { page, limit, cursor, withTotal } = listQuerySchema.parse(request.query)
       const barbershopId = request.tenantId
       const user = request.user
 
@@ -47,7 +61,12 @@ export class ProfessionalController {
         return reply.status(403).send({ error: 'Tenant mismatch' })
       }
 
-      const result = await professionalService.listProfessionals(barbershopId, { page, limit })
+      const result = await professionalService.listProfessionals(barbershopId, {
+        page,
+        limit,
+        cursor,
+        withTotal,
+      })
 
       const data = result.data.map(
         ({ passwordHash: _passwordHash, ...professional }) => professional
@@ -99,6 +118,76 @@ export class ProfessionalController {
     }
   }
 
+  async availability(request: FastifyRequest, reply: FastifyReply) {
+    try {
+      const { id } = idParamSchema.parse(request.params)
+      const query = availabilityQuerySchema.parse(request.query)
+      const barbershopId = request.tenantId
+      const user = request.user
+
+      if (!barbershopId) {
+        return reply.status(401).send({ error: 'Tenant not identified' })
+      }
+
+      if (!user?.id) {
+        return reply.status(401).send({ error: 'Authentication required' })
+      }
+
+      if (user.barbershopId !== barbershopId) {
+        return reply.status(403).send({ error: 'Tenant mismatch' })
+      }
+
+      const availability = await availabilityService.getAvailability(id, barbershopId, query)
+
+      return reply.status(200).send(availability)
+    } catch (error) {
+      if (error instanceof z.ZodError) {
+        return reply.status(400).send({ error: 'Validation failed', details: error.errors })
+      }
+      if (error instanceof Error && error.message.includes('not found')) {
+        return reply.status(404).send({ error: error.message })
+      }
+      throw error
+    }
+  }
+
+  async availabilityForMany(request: FastifyRequest, reply: FastifyReply) {
+    try {
+      const query = availabilityQuerySchema.parse(request.query)
+      const { professionalIds } = professionalIdsQuerySchema.parse(request.query)
+      const barbershopId = request.tenantId
+      const user = request.user
+
+      if (!barbershopId) {
+        return reply.status(401).send({ error: 'Tenant not identified' })
+      }
+
+      if (!user?.id) {
+        return reply.status(401).send({ error: 'Authentication required' })
+      }
+
+      if (user.barbershopId !== barbershopId) {
+        return reply.status(403).send({ error: 'Tenant mismatch' })
+      }
+
+      const availability = await availabilityService.getAvailabilityForMany(
+        barbershopId,
+        query,
+        professionalIds
+      )
+
+      return reply.status(200).send(availability)
+    } catch (error) {
+      if (error instanceof z.ZodError) {
+        return reply.status(400).send({ error: 'Validation failed', details: error.errors })
+      }
+      if (error instanceof Error && error.message.includes('not found')) {
+        return reply.status(404).send({ error: error.message })
+      }
+      throw error
+    }
+  }
+
   async create(request: FastifyRequest, reply: FastifyReply) {
     try {
       const data = createProfessionalSchema.parse(request.body)
@@ -139,6 +228,7 @@ export class ProfessionalController {
       if (error instanceof Error && error.message.includes('Email already registered')) {
         return reply.status(409).send({ error: error.message })
       }
+      if (isPasswordQueueFull(error)) return sendPasswordQueueFull(reply)
       throw error
     }
   }
@@ -209,6 +299,7 @@ export class ProfessionalController {
       if (error instanceof Error && error.message.includes('Email already in use')) {
         return reply.status(409).send({ error: error.message })
       }
+      if (isPasswordQueueFull(error)) return sendPasswordQueueFull(reply)
       throw error
     }
   }
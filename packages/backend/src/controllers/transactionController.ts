@@ -1,6 +1,16 @@
 import type { FastifyRequest, FastifyReply } from 'fastify'
 import { transactionService } from '../services/transactionService.js'
 import { z } from 'zod'
+import {
+  cursorQuerySchema,
+  isValidStreamQuery,
+  MAX_STREAM_LIMIT,
+  STREAM_QUERY_MESSAGE,
+  streamQuerySchema,
+  withTotalQuerySchema,
+} from '../lib/pagination.js'
+import { responseFormatQuerySchema } from '../lib/projection.js'
+import { EXPORT_CONTENT_TYPES, exportFormatQuerySchema } from '../lib/export.js'
 
 const createTransactionSchema = z.object({
   amount: z.number().positive('Amount must be positive'),
@@ -20,13 +30,29 @@ const updateTransactionSchema = z.object({
   paymentMethod: z.enum(['CASH', 'CREDIT_CARD', 'DEBIT_CARD', 'PIX']).optional(),
 })
 
-const listQuerySchema = z.object({
-  page: z.coerce.number().int().positive().default(1),
-  limit: z.coerce.number().int().positive().max(100).default(20),
+// Filters shared by the list and the export
+const listFilterFields = {
   type: z.enum(['INCOME', 'EXPENSE']).optional(),
   category: z.string().optional(),
   startDate: z.string().optional(),
   endDate: z.string().optional(),
+}
+
+const listQuerySchema = z
+  .object({
+    page: z.coerce.number().int().positive().default(1),
+    limit: z.coerce.number().int().positive().max(MAX_STREAM_LIMIT).default(20),
+    cursor: cursorQuerySchema,
+    withTotal: withTotalQuerySchema,
+    stream: streamQuerySchema,
+    format: responseFormatQuerySchema,
+    ...listFilterFields,
+  })
+  .refine(isValidStreamQuery, { message: STREAM_QUERY_MESSAGE, path: ['stream'] })
+
+const exportQuerySchema = z.object({
+  format: exportFormatQuerySchema,
+  ...listFilterFields,
 })
 
 const idParamSchema = z.object({
@@ -36,7 +62,8 @@ const idParamSchema = z.object({
 export class TransactionController {
   async list(request: FastifyRequest, reply: FastifyReply) {
     try {
-      const { page, limit, ...filters } = listQuerySchema.parse(request.query)
+      const { page, limit, cursor, withTotal, stream, format, ...filters } =
+        listQuerySchema.parse(request.query)
       const barbershopId = request.tenantId
       const user = request.user
 
@@ -52,10 +79,20 @@ export class TransactionController {
         return reply.status(403).send({ error: 'Tenant mismatch' })
       }
 
+      if (stream) {
+        const body = transactionService.streamTransactions(
+          barbershopId,
+          { limit, cursor: cursor ?? '' },
+          filters
+        )
+        return reply.status(200).type('application/json; charset=utf-8').send(body)
+      }
+
       const result = await transactionService.listTransactions(
         barbershopId,
-        { page, limit },
-        filters
+        { page, limit, cursor, withTotal },
+        filters,
+        format
       )
       return reply.status(200).send(result)
     } catch (error) {
@@ -66,6 +103,38 @@ export class TransactionController {
     }
   }
 
+  async export(request: FastifyRequest, reply: FastifyReply) {
+    try {
+      const { format, ...filters } = exportQuerySchema.parse(request.query)
+      const barbershopId = request.tenantId
+      const user = request.user
+
+      if (!barbershopId) {
+        return reply.status(401).send({ error: 'Tenant not identified' })
+      }
+
+      if (!user?.id) {
+        return reply.status(401).send({ error: 'Authentication required' })
+      }
+
+      if (user.barbershopId !== barbershopId) {
+        return reply.status(403).send({ error: 'Tenant mismatch' })
+      }
+
+      const body = transactionService.exportTransactions(barbershopId, filters, format)
+      return reply
+        .status(200)
+        .type(EXPORT_CONTENT_TYPES[format])
+        .header('content-disposition', `attachment; filename="transactions.${format}"`)
+        .send(body)
+    } catch (error) {
+      if (error instanceof z.ZodError) {
+        return reply.status(400).send({ error: 'Validation failed', details: error.errors })
+      }
+      throw error
+    }
+  }
+
   async getById(request: FastifyRequest, reply: FastifyReply) {
     try {
       const { id } = idParamSchema.parse(request.params)
@@ -0,0 +1,19 @@
+import type { Prisma } from '@prisma/client'
+
+/**
+ * Takes the booking lock of each professional for the rest of the transaction. Bookings,
+ * batches and series of the same professional queue on it; keys are locked in sorted order
+ * so two callers locking several professionals cannot deadlock. Transaction-scoped, so it
+ * is released on commit or rollback and is safe behind pgBouncer in transaction mode.
+ */
+export async function lockProfessionals(
+  tx: Prisma.TransactionClient,
+  barbershopId: string,
+  professionalIds: readonly string[]
+): Promise<void> {
+  const lockKeys = professionalIds.map((id) => `${barbershopId}:${id}`).sort()
+  await tx.$executeRaw`
+    SELECT pg_advisory_xact_lock(hashtextextended(key, 0))
+    FROM unnest(${lockKeys}::text[]) AS key
+  `
+}
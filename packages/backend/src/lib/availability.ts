@@ -0,0 +1,113 @@
+import { z } from 'zod'
+
+export interface Interval {
+  start: Date
+  end: Date
+}
+
+// Longest window a single availability request may cover
+export const MAX_AVAILABILITY_DAYS = 31
+
+const DAY_MS = 24 * 60 * 60 * 1000
+
+/**
+ * `?from=&to=&serviceId=` of the availability endpoints: an ISO window of at most
+ * `MAX_AVAILABILITY_DAYS` days and the service whose duration the slots must fit.
+ */
+export const availabilityQuerySchema = z
+  .object({
+    from: z.coerce.date(),
+    to: z.coerce.date(),
+    serviceId: z.string().min(1, 'serviceId is required'),
+  })
+  .refine((query) => query.to > query.from, { message: 'to must be after from', path: ['to'] })
+  .refine((query) => query.to.getTime() - query.from.getTime() <= MAX_AVAILABILITY_DAYS * DAY_MS, {
+    message: `Window must not exceed ${MAX_AVAILABILITY_DAYS} days`,
+    path: ['to'],
+  })
+
+/**
+ * Free intervals of `[from, to)` at least `durationMinutes` long, given the busy intervals
+ * sorted by start (as they come from the `date` index). One sweep merges overlapping busy
+ * intervals and emits the gaps between them, so a month of bookings costs O(n).
+ *
+ * A booking fits anywhere in a returned interval that leaves `durationMinutes` before its end.
+ */
+export function freeIntervals(
+  busy: readonly Interval[],
+  from: Date,
+  to: Date,
+  durationMinutes: number
+): Interval[] {
+  const minLength = durationMinutes * 60 * 1000
+  const free: Interval[] = []
+  let cursor = from.getTime()
+  const end = to.getTime()
+
+  const emit = (gapEnd: number) => {
+    if (gapEnd - cursor >= minLength) {
+      free.push({ start: new Date(cursor), end: new Date(gapEnd) })
+    }
+  }
+
+  for (const interval of busy) {
+    const busyStart = interval.start.getTime()
+    const busyEnd = interval.end.getTime()
+    if (busyEnd <= cursor) continue
+    if (busyStart >= end) break
+    if (busyStart > cursor) emit(busyStart)
+    cursor = Math.max(cursor, busyEnd)
+    if (cursor >= end) return free
+  }
+
+  emit(end)
+  return free
+}
+
+/**
+ * Splits candidate intervals, sorted by start, into those that can be booked around `busy`
+ * (also sorted by start) and those that cannot. Candidates are also checked against each
+ * other: of two overlapping candidates the one starting first is accepted. A single sweep
+ * over both lists, O(n + m).
+ */
+export function scheduleIntervals<T extends Interval>(
+  busy: readonly Interval[],
+  candidates: readonly T[]
+): { accepted: T[]; rejected: T[] } {
+  const merged = mergeIntervals(busy)
+  const accepted: T[] = []
+  const rejected: T[] = []
+  let next = 0
+  let acceptedEnd = -Infinity
+
+  for (const candidate of candidates) {
+    const start = candidate.start.getTime()
+    const end = candidate.end.getTime()
+    while (next < merged.length && merged[next].end.getTime() <= start) next++
+    const overlapsBusy = next < merged.length && merged[next].start.getTime() < end
+    if (overlapsBusy || start < acceptedEnd) {
+      rejected.push(candidate)
+    } else {
+      accepted.push(candidate)
+      acceptedEnd = end
+    }
+  }
+
+  return { accepted, rejected }
+}
+
+/**
+ * Merges overlapping or touching intervals sorted by start, so their ends increase too.
+ */
+function mergeIntervals(sorted: readonly Interval[]): Interval[] {
+  const merged: Interval[] = []
+  for (const interval of sorted) {
+    const last = merged[merged.length - 1]
+    if (last && interval.start <= last.end) {
+      if (interval.end > last.end) last.end = interval.end
+    } else {
+      merged.push({ start: interval.start, end: interval.end })
+    }
+  }
+  return merged
+}
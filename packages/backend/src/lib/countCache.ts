@@ -0,0 +1,64 @@
+import { createHash } from 'node:crypto'
+import {
+  cacheCount,
+  getCachedCount,
+  invalidateCachedCounts,
+  type CountedModel,
+} from './redis.js'
+import { incrementCounter } from './metrics.js'
+import type { ListTotal, TotalMode } from './pagination.js'
+
+function filterKey(where: object): string {
+  return createHash('sha1').update(JSON.stringify(where)).digest('base64url')
+}
+
+/**
+ * Total of a list in the requested mode. `estimate` reuses the count cached for the same
+ * tenant and filters until a write to the model invalidates it; on a miss (or when Redis
+ * is unavailable) it counts and fills the cache.
+ */
+export async function countTotal(
+  mode: TotalMode,
+  model: CountedModel,
+  barbershopId: string,
+  where: object,
+  count: () => Promise<number>
+): Promise<ListTotal | null> {
+  if (mode === 'false') return null
+  if (mode === 'exact') return { total: await count(), estimated: false }
+
+  const key = filterKey(where)
+  let generation: number | null = null
+  try {
+    const cached = await getCachedCount(model, barbershopId, key)
+    if (cached.count !== null) {
+      incrementCounter('count.cache.hit')
+      return { total: cached.count, estimated: true }
+    }
+    generation = cached.generation
+  } catch (error) {
+    console.error('Count cache lookup failed:', error)
+  }
+
+  incrementCounter('count.cache.miss')
+  const total = await count()
+  if (generation !== null) {
+    // Tagged with the generation read before counting: a concurrent write orphans it
+    cacheCount(model, barbershopId, key, generation, total).catch((error) => {
+      console.error('Count cache store failed:', error)
+    })
+  }
+  return { total, estimated: false }
+}
+
+/**
+ * Called after every write that can change a list total of the tenant. Failures are logged
+ * only: the write already happened and stale entries expire on their own.
+ */
+export async function invalidateCounts(model: CountedModel, barbershopId: string): Promise<void> {
+  try {
+    await invalidateCachedCounts(model, barbershopId)
+  } catch (error) {
+    console.error('Count cache invalidation failed:', error)
+  }
+}
@@ -0,0 +1,65 @@
+import { Readable } from 'node:stream'
+import { z } from 'zod'
+import { STREAM_CHUNK_SIZE } from './jsonStream.js'
+
+export const exportFormatQuerySchema = z.enum(['ndjson', 'csv']).default('ndjson')
+
+export type ExportFormat = z.infer<typeof exportFormatQuerySchema>
+
+export const EXPORT_CONTENT_TYPES: Record<ExportFormat, string> = {
+  ndjson: 'application/x-ndjson; charset=utf-8',
+  csv: 'text/csv; charset=utf-8',
+}
+
+export type ExportValue = string | number | boolean | null
+
+// Output columns in order: the NDJSON key / CSV header, and how to read it from a row
+export type ExportColumns<T> = Record<string, (row: T) => ExportValue>
+
+// Leading characters spreadsheets evaluate as a formula
+const FORMULA_PREFIX = /^[=+\-@\t\r]/
+
+/**
+ * One RFC 4180 field: quoted when it holds a delimiter, quote or line break. Text that a
+ * spreadsheet would run as a formula is prefixed with `'`; numbers are written as they are.
+ */
+export function csvField(value: ExportValue): string {
+  if (value === null) return ''
+  if (typeof value !== 'string') return String(value)
+  const text = FORMULA_PREFIX.test(value) ? `'${value}` : value
+  return /[",\r\n]/.test(text) ? `"${text.replaceAll('"', '""')}"` : text
+}
+
+/**
+ * Streams `rows` as NDJSON (one object per line) or CSV (a header line, then one line per
+ * row), converting each row as it is produced and writing in chunks of about
+ * `STREAM_CHUNK_SIZE`. Like `streamJsonList`, rows are pulled only as the socket drains, so an
+ * export of any size holds one read batch and one chunk.
+ */
+export function streamExport<T>(
+  rows: AsyncIterable<T>,
+  columns: ExportColumns<T>,
+  format: ExportFormat
+): Readable {
+  const entries = Object.entries(columns)
+  const record = (row: T) =>
+    Object.fromEntries(entries.map(([name, value]) => [name, value(row)]))
+  const line =
+    format === 'csv'
+      ? (row: T) => `${entries.map(([, value]) => csvField(value(row))).join(',')}\r\n`
+      : (row: T) => `${JSON.stringify(record(row))}\n`
+
+  async function* chunks(): AsyncGenerator<string> {
+    let chunk = format === 'csv' ? `${entries.map(([name]) => csvField(name)).join(',')}\r\n` : ''
+    for await (const row of rows) {
+      chunk += line(row)
+      if (chunk.length >= STREAM_CHUNK_SIZE) {
+        yield chunk
+        chunk = ''
+      }
+    }
+    if (chunk) yield chunk
+  }
+
+  return Readable.from(chunks(), { objectMode: false })
+}
@@ -0,0 +1,41 @@
+import { Readable } from 'node:stream'
+
+// Serialized rows are buffered up to this size before being written to the response
+export const STREAM_CHUNK_SIZE = 16 * 1024
+
+/**
+ * Streams `{"data":[...], ...trailer}` while `rows` are produced: each row is converted and
+ * stringified on its own and written in chunks of about `STREAM_CHUNK_SIZE`, so the response
+ * never holds more than the batch being read plus one chunk. `trailer` receives the
+ * generator's return value (e.g. the next cursor) once the rows are exhausted. `Readable.from`
+ * pulls rows only when the socket drains, so slow clients apply backpressure to the reads.
+ *
+ * The status line is sent before the first row: an error while reading aborts the
+ * response instead of turning it into an error response.
+ */
+export function streamJsonList<T, R>(
+  rows: AsyncGenerator<T, R>,
+  toJson: (row: T) => string,
+  trailer: (result: R) => Record<string, unknown>
+): Readable {
+  async function* chunks(): AsyncGenerator<string> {
+    let chunk = '{"data":['
+    let separator = ''
+    for (;;) {
+      const next = await rows.next()
+      if (next.done) {
+        const tail = JSON.stringify(trailer(next.value))
+        yield `${chunk}]${tail === '{}' ? '}' : `,${tail.slice(1)}`}`
+        return
+      }
+      chunk += separator + toJson(next.value)
+      separator = ','
+      if (chunk.length >= STREAM_CHUNK_SIZE) {
+        yield chunk
+        chunk = ''
+      }
+    }
+  }
+
+  return Readable.from(chunks(), { objectMode: false })
+}
@@ -0,0 +1,64 @@
+export interface LruCacheOptions {
+  maxEntries: number
+  ttlMs: number
+}
+
+export interface LruCacheEntry<V> {
+  value: V
+  expiresAt: number
+}
+
+/**
+ * Small in-process LRU cache with per-entry TTL.
+ * Relies on Map insertion order: the first key is always the least recently used.
+ */
+export class LruCache<K, V> {
+  private readonly entries = new Map<K, LruCacheEntry<V>>()
+
+  constructor(private readonly options: LruCacheOptions) {}
+
+  get size(): number {
+    return this.entries.size
+  }
+
+  /**
+   * Returns the raw entry (value + expiry) and marks it as recently used.
+   * Expired entries are evicted and reported as missing.
+   */
+  getEntry(key: K): LruCacheEntry<V> | undefined {
+    const entry = this.entries.get(key)
+    if (!entry) return undefined
+
+    if (entry.expiresAt <= Date.now()) {
+      this.entries.delete(key)
+      return undefined
+    }
+
+    // Move to the most recently used position
+    this.entries.delete(key)
+    this.entries.set(key, entry)
+    return entry
+  }
+
+  get(key: K): V | undefined {
+    return this.getEntry(key)?.value
+  }
+
+  set(key: K, value: V, ttlMs: number = this.options.ttlMs): void {
+    this.entries.delete(key)
+    this.entries.set(key, { value, expiresAt: Date.now() + ttlMs })
+
+    while (this.entries.size > this.options.maxEntries) {
+      const oldestKey = this.entries.keys().next().value as K
+      this.entries.delete(oldestKey)
+    }
+  }
+
+  delete(key: K): boolean {
+    return this.entries.delete(key)
+  }
+
+  clear(): void {
+    this.entries.clear()
+  }
+}
@@ -0,0 +1,66 @@
+/**
+ * Minimal in-process metrics registry.
+ * Values are per instance (serverless containers each keep their own counters).
+ */
+const counters = new Map<string, number>()
+
+export interface TimingStats {
+  count: number
+  totalMs: number
+  maxMs: number
+}
+
+const timings = new Map<string, TimingStats>()
+
+export function incrementCounter(name: string, by = 1): void {
+  counters.set(name, (counters.get(name) ?? 0) + by)
+}
+
+export function getCounter(name: string): number {
+  return counters.get(name) ?? 0
+}
+
+export function recordTiming(name: string, ms: number): void {
+  const stats = timings.get(name)
+  if (stats) {
+    stats.count++
+    stats.totalMs += ms
+    stats.maxMs = Math.max(stats.maxMs, ms)
+  } else {
+    timings.set(name, { count: 1, totalMs: ms, maxMs: ms })
+  }
+}
+
+/**
+ * Runs `fn` and records how long it took (also when it throws).
+ */
+export async function timeAsync<T>(name: string, fn: () => Promise<T>): Promise<T> {
+  const start = performance.now()
+  try {
+    return await fn()
+  } finally {
+    recordTiming(name, performance.now() - start)
+  }
+}
+
+export interface MetricsSnapshot {
+  counters: Record<string, number>
+  timings: Record<string, TimingStats & { avgMs: number }>
+}
+
+export function getMetricsSnapshot(): MetricsSnapshot {
+  return {
+    counters: Object.fromEntries(counters),
+    timings: Object.fromEntries(
+      [...timings].map(([name, stats]) => [name, { ...stats, avgMs: stats.totalMs / stats.count }])
+    ),
+  }
+}
+
+/**
+ * Resets all metrics (used by tests).
+ */
+export function resetMetrics(): void {
+  counters.clear()
+  timings.clear()
+}
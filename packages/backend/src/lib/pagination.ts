@@ -0,0 +1,220 @@
+import { z } from 'zod'
+
+export type SortOrder = 'asc' | 'desc'
+
+/**
+ * Position of the last row of a page: its sort key plus the id as tiebreaker.
+ */
+export interface CursorPosition {
+  value: Date
+  id: string
+}
+
+/**
+ * How a list computes its total: `exact` runs COUNT(*), `estimate` serves it from the count
+ * cache when possible and `false` skips it.
+ */
+export type TotalMode = 'exact' | 'estimate' | 'false'
+
+export interface ListTotal {
+  total: number
+  // true when served from the count cache
+  estimated: boolean
+}
+
+export interface OffsetPagination {
+  page: number
+  limit: number
+  total?: number
+  totalPages?: number
+  estimated?: boolean
+  // Only without a total
+  hasMore?: boolean
+}
+
+export interface CursorPagination {
+  limit: number
+  nextCursor: string | null
+  total?: number
+  estimated?: boolean
+}
+
+export const withTotalQuerySchema = z.enum(['exact', 'estimate', 'false']).optional()
+
+// Largest `limit` of a page built in memory
+export const MAX_PAGE_LIMIT = 100
+
+// Largest `limit` of a streamed cursor page (`?stream=true`); memory is bound by the batch
+export const MAX_STREAM_LIMIT = 10_000
+
+// Rows read from Postgres per keyset batch of a streamed page
+export const STREAM_BATCH_SIZE = 500
+
+/**
+ * `?stream=true` writes a cursor page to the response row by row instead of building it.
+ */
+export const streamQuerySchema = z
+  .enum(['true', 'false'])
+  .optional()
+  .transform((value) => value === 'true')
+
+/**
+ * Refinement of a list query: limits above `MAX_PAGE_LIMIT` need a streamed page, which has no
+ * total (`withTotal`) and no side-loaded `included` (`format=normalized`).
+ */
+export function isValidStreamQuery(query: {
+  limit: number
+  stream: boolean
+  withTotal?: TotalMode
+  format?: string
+}): boolean {
+  if (!query.stream) return query.limit <= MAX_PAGE_LIMIT
+  return (query.withTotal ?? 'false') === 'false' && query.format !== 'normalized'
+}
+
+export const STREAM_QUERY_MESSAGE = `limit above ${MAX_PAGE_LIMIT} requires stream=true, which cannot be combined with withTotal or format=normalized`
+
+/**
+ * Offset pages count exactly unless told otherwise; cursor pages (infinite scroll) skip it.
+ */
+export function resolveTotalMode(params: { cursor?: string; withTotal?: TotalMode }): TotalMode {
+  return params.withTotal ?? (params.cursor === undefined ? 'exact' : 'false')
+}
+
+function totalFields(
+  total: ListTotal | null,
+  limit: number
+): Pick<OffsetPagination, 'total' | 'totalPages' | 'estimated'> {
+  if (!total) return {}
+  return {
+    total: total.total,
+    totalPages: Math.ceil(total.total / limit),
+    ...(total.estimated && { estimated: true }),
+  }
+}
+
+export function encodeCursor(position: CursorPosition): string {
+  return Buffer.from(JSON.stringify([position.value.toISOString(), position.id])).toString(
+    'base64url'
+  )
+}
+
+/**
+ * Returns null for anything that is not a cursor produced by `encodeCursor`.
+ */
+export function decodeCursor(cursor: string): CursorPosition | null {
+  try {
+    const decoded: unknown = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'))
+    if (!Array.isArray(decoded) || decoded.length !== 2) return null
+    const [value, id] = decoded
+    if (typeof value !== 'string' || typeof id !== 'string' || !id) return null
+    const date = new Date(value)
+    return Number.isNaN(date.getTime()) ? null : { value: date, id }
+  } catch {
+    return null
+  }
+}
+
+/**
+ * `?cursor=` query parameter: empty starts cursor mode at the first page, anything else
+ * must be a `nextCursor` from a previous response.
+ */
+export const cursorQuerySchema = z
+  .string()
+  .refine((cursor) => cursor === '' || decodeCursor(cursor) !== null, 'Invalid cursor')
+  .optional()
+
+/**
+ * Where clause selecting the rows after `cursor` in `(field, id)` order. Combined with an
+ * index on the sort key this is a seek, so every page costs the same as the first one.
+ */
+export function seekWhere<W>(field: string, order: SortOrder, cursor: string): W | undefined {
+  const position = decodeCursor(cursor)
+  if (!position) return undefined
+  const op = order === 'asc' ? 'gt' : 'lt'
+  return {
+    OR: [
+      { [field]: { [op]: position.value } },
+      { [field]: position.value, id: { [op]: position.id } },
+    ],
+  } as W
+}
+
+/**
+ * Order by the sort key with the id as tiebreaker, as `seekWhere` expects.
+ */
+export function seekOrderBy<O>(field: string, order: SortOrder): O[] {
+  return [{ [field]: order }, { id: order }] as O[]
+}
+
+/**
+ * Cuts a `take: limit + 1` result down to one page and builds the cursor of the next one.
+ */
+export function toCursorPage<T extends { id: string }>(
+  rows: T[],
+  limit: number,
+  sortKey: (row: T) => Date,
+  total: ListTotal | null = null
+): { data: T[]; pagination: CursorPagination } {
+  const data = rows.length > limit ? rows.slice(0, limit) : rows
+  const last = data[data.length - 1]
+  const nextCursor =
+    rows.length > limit && last ? encodeCursor({ value: sortKey(last), id: last.id }) : null
+  const { totalPages: _totalPages, ...totals } = totalFields(total, limit)
+  return { data, pagination: { limit, nextCursor, ...totals } }
+}
+
+/**
+ * Builds an offset page. Without a total the rows come from `take: limit + 1` and the extra
+ * row only tells whether there is another page.
+ */
+export function toOffsetPage<T>(
+  rows: T[],
+  page: number,
+  limit: number,
+  total: ListTotal | null
+): { data: T[]; pagination: OffsetPagination } {
+  if (total) {
+    return { data: rows, pagination: { page, limit, ...totalFields(total, limit) } }
+  }
+  return {
+    data: rows.slice(0, limit),
+    pagination: { page, limit, hasMore: rows.length > limit },
+  }
+}
+
+/**
+ * `take` for an offset page: one extra row when there is no total to derive `hasMore` from.
+ */
+export function offsetTake(limit: number, withTotal: TotalMode): number {
+  return withTotal === 'false' ? limit + 1 : limit
+}
+
+/**
+ * Reads up to `limit` rows after `cursor` ('' for the first page) in keyset batches of
+ * `batchSize` and yields them one by one, so only one batch is held in memory. `read` gets
+ * the cursor of each batch and the rows to take (one more than it keeps, to see whether
+ * another batch follows). Returns the next page's cursor, null after the last row. With an
+ * infinite `limit` it reads every row (exports).
+ */
+export async function* seekBatches<T extends { id: string }>(
+  read: (cursor: string, take: number) => Promise<T[]>,
+  sortKey: (row: T) => Date,
+  cursor: string,
+  limit: number,
+  batchSize: number
+): AsyncGenerator<T, string | null> {
+  let position = cursor
+  let remaining = limit
+  while (remaining > 0) {
+    const take = Math.min(batchSize, remaining)
+    const rows = await read(position, take + 1)
+    const batch = rows.length > take ? rows.slice(0, take) : rows
+    yield* batch
+    if (rows.length <= take) return null
+    remaining -= take
+    const last = batch[batch.length - 1]
+    position = encodeCursor({ value: sortKey(last), id: last.id })
+  }
+  return position
+}
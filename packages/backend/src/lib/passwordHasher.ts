@@ -0,0 +1,233 @@
+import { Worker } from 'node:worker_threads'
+import { createRequire } from 'node:module'
+import { availableParallelism } from 'node:os'
+import bcrypt from 'bcryptjs'
+import type { FastifyReply } from 'fastify'
+import { incrementCounter } from './metrics.js'
+
+// bcryptjs is pure JavaScript: one hash/compare at cost 10 blocks a thread for tens of
+// milliseconds, so it runs in a small worker pool instead of on the event loop.
+
+const BCRYPT_ROUNDS = 10
+
+export const PASSWORD_QUEUE_FULL_MESSAGE = 'Too many password operations in progress'
+
+/**
+ * Whether `error` is the rejection of a hash/compare refused by a saturated pool.
+ */
+export function isPasswordQueueFull(error: unknown): boolean {
+  return error instanceof Error && error.message === PASSWORD_QUEUE_FULL_MESSAGE
+}
+
+/**
+ * Answers a request whose password operation was refused: 429, retry in a second.
+ */
+export function sendPasswordQueueFull(reply: FastifyReply): FastifyReply {
+  return reply.header('Retry-After', '1').status(429).send({
+    error: 'Too Many Requests',
+    message: 'Server is busy. Please try again shortly.',
+  })
+}
+
+type PasswordOperation =
+  | { op: 'hash'; password: string; rounds: number }
+  | { op: 'compare'; password: string; hash: string }
+
+interface Task {
+  id: number
+  operation: PasswordOperation
+  resolve: (value: string | boolean) => void
+  reject: (error: Error) => void
+}
+
+interface PoolWorker {
+  worker: Worker
+  task: Task | null
+}
+
+// Evaluated as CommonJS inside each worker; bcryptjs is resolved by the parent
+const WORKER_SOURCE = `
+const { parentPort, workerData } = require('node:worker_threads')
+const bcrypt = require(workerData.bcryptPath)
+
+parentPort.on('message', async ({ id, operation }) => {
+  try {
+    const result =
+      operation.op === 'hash'
+        ? await bcrypt.hash(operation.password, operation.rounds)
+        : await bcrypt.compare(operation.password, operation.hash)
+    parentPort.postMessage({ id, result })
+  } catch (error) {
+    parentPort.postMessage({ id, error: error instanceof Error ? error.message : String(error) })
+  }
+})
+`
+
+export interface PasswordHashPoolOptions {
+  size: number
+  // Max operations waiting for a free worker before new ones are rejected
+  maxQueue: number
+}
+
+/**
+ * Bounded worker_threads pool for bcrypt hash/compare.
+ * Workers are started lazily and never keep the process alive.
+ */
+export class PasswordHashPool {
+  private readonly workers: PoolWorker[] = []
+  private readonly queue: Task[] = []
+  private nextId = 0
+
+  constructor(private readonly options: PasswordHashPoolOptions) {}
+
+  get queueDepth(): number {
+    return this.queue.length
+  }
+
+  run(operation: PasswordOperation): Promise<string | boolean> {
+    const idle = this.getIdleWorker()
+
+    if (!idle && this.queue.length >= this.options.maxQueue) {
+      incrementCounter('bcrypt.rejected')
+      return Promise.reject(new Error(PASSWORD_QUEUE_FULL_MESSAGE))
+    }
+
+    return new Promise((resolve, reject) => {
+      const task: Task = { id: this.nextId++, operation, resolve, reject }
+      if (idle) {
+        this.dispatch(idle, task)
+      } else {
+        this.queue.push(task)
+      }
+    })
+  }
+
+  async destroy(): Promise<void> {
+    const workers = this.workers.splice(0)
+    await Promise.all(workers.map(({ worker }) => worker.terminate()))
+  }
+
+  private getIdleWorker(): PoolWorker | null {
+    const idle = this.workers.find((entry) => !entry.task)
+    if (idle) return idle
+
+    if (this.workers.length < this.options.size) {
+      return this.spawn()
+    }
+
+    return null
+  }
+
+  private spawn(): PoolWorker {
+    const worker = new Worker(WORKER_SOURCE, {
+      eval: true,
+      workerData: { bcryptPath: createRequire(import.meta.url).resolve('bcryptjs') },
+    })
+    worker.unref()
+
+    const entry: PoolWorker = { worker, task: null }
+
+    worker.on('message', (message: { id: number; result?: string | boolean; error?: string }) => {
+      const task = entry.task
+      if (!task || task.id !== message.id) return
+
+      entry.task = null
+      if (message.error !== undefined) {
+        task.reject(new Error(message.error))
+      } else {
+        task.resolve(message.result as string | boolean)
+      }
+      this.drain(entry)
+    })
+
+    worker.on('error', (error) => {
+      // Fail the in-flight task and replace the worker on the next run
+      entry.task?.reject(error)
+      entry.task = null
+      this.remove(entry)
+    })
+
+    worker.on('exit', () => {
+      entry.task?.reject(new Error('Password worker exited'))
+      entry.task = null
+      this.remove(entry)
+    })
+
+    this.workers.push(entry)
+    return entry
+  }
+
+  private remove(entry: PoolWorker): void {
+    const index = this.workers.indexOf(entry)
+    if (index === -1) return
+
+    this.workers.splice(index, 1)
+    const next = this.queue.shift()
+    if (next) {
+      this.dispatch(this.spawn(), next)
+    }
+  }
+
+  private dispatch(entry: PoolWorker, task: Task): void {
+    entry.task = task
+    entry.worker.ref()
+    entry.worker.postMessage({ id: task.id, operation: task.operation })
+  }
+
+  private drain(entry: PoolWorker): void {
+    const next = this.queue.shift()
+    if (next) {
+      this.dispatch(entry, next)
+    } else {
+      entry.worker.unref()
+    }
+  }
+}
+
+function readNonNegativeInt(name: string, fallback: number): number {
+  const value = parseInt(process.env[name] || '', 10)
+  return Number.isFinite(value) && value >= 0 ? value : fallback
+}
+
+// BCRYPT_POOL_SIZE=0 runs bcrypt on the main thread (previous behaviour)
+const BCRYPT_POOL_SIZE = readNonNegativeInt(
+  'BCRYPT_POOL_SIZE',
+  Math.max(1, Math.min(4, availableParallelism() - 1))
+)
+const BCRYPT_MAX_QUEUE = readNonNegativeInt('BCRYPT_MAX_QUEUE', 32)
+
+let pool: PasswordHashPool | null = null
+
+function getPool(): PasswordHashPool | null {
+  // Tests run bcrypt inline so they don't depend on worker startup
+  if (BCRYPT_POOL_SIZE === 0 || process.env.NODE_ENV === 'test') {
+    return null
+  }
+
+  pool ??= new PasswordHashPool({ size: BCRYPT_POOL_SIZE, maxQueue: BCRYPT_MAX_QUEUE })
+  return pool
+}
+
+/**
+ * Hashes a password off the main thread.
+ * Rejects with PASSWORD_QUEUE_FULL_MESSAGE when the pool is saturated.
+ */
+export async function hashPassword(password: string): Promise<string> {
+  const workers = getPool()
+  if (!workers) {
+    return bcrypt.hash(password, BCRYPT_ROUNDS)
+  }
+  return (await workers.run({ op: 'hash', password, rounds: BCRYPT_ROUNDS })) as string
+}
+
+/**
+ * Compares a password with a bcrypt hash off the main thread.
+ * Rejects with PASSWORD_QUEUE_FULL_MESSAGE when the pool is saturated.
+ */
+export async function comparePassword(password: string, hash: string): Promise<boolean> {
+  const workers = getPool()
+  if (!workers) {
+    return bcrypt.compare(password, hash)
+  }
+  return (await workers.run({ op: 'compare', password, hash })) as boolean
+}
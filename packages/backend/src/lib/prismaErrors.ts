@@ -0,0 +1,40 @@
+import { Prisma } from '@prisma/client'
+
+/**
+ * Awaits a single-statement, tenant-scoped write (its `where` filters by id *and*
+ * barbershopId). Prisma reports a missing or foreign record as P2025, which becomes
+ * `Error(message)` so callers keep the usual "not found" handling.
+ */
+export async function orNotFound<T>(write: Promise<T>, message: string): Promise<T> {
+  try {
+    return await write
+  } catch (error) {
+    if (error instanceof Prisma.PrismaClientKnownRequestError && error.code === 'P2025') {
+      throw new Error(message)
+    }
+    throw error
+  }
+}
+
+/**
+ * Awaits a write guarded by a Postgres exclusion constraint. A violation (SQLSTATE 23P01)
+ * reaches Prisma as an unmapped database error and becomes `Error(message)`.
+ */
+export async function orConflict<T>(
+  write: Promise<T>,
+  constraint: string,
+  message: string
+): Promise<T> {
+  try {
+    return await write
+  } catch (error) {
+    if (
+      (error instanceof Prisma.PrismaClientKnownRequestError ||
+        error instanceof Prisma.PrismaClientUnknownRequestError) &&
+      (error.message.includes('23P01') || error.message.includes(constraint))
+    ) {
+      throw new Error(message)
+    }
+    throw error
+  }
+}
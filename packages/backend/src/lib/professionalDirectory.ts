@@ -0,0 +1,84 @@
+import type { Decimal } from '@prisma/client/runtime/library'
+import { prisma } from './prisma.js'
+import { LruCache } from './lruCache.js'
+import { SingleFlight } from './singleFlight.js'
+import { incrementCounter } from './metrics.js'
+
+export interface DirectoryEntry {
+  id: string
+  name: string
+  email: string
+  commissionRate: Decimal
+}
+
+export type ProfessionalDirectory = Map<string, DirectoryEntry>
+
+// Writes on this instance invalidate at once; other instances see them when the entry expires
+const DIRECTORY_TTL_MS = 60 * 1000 // 1 minute
+const DIRECTORY_MAX_TENANTS = 1000
+
+const directories = new LruCache<string, ProfessionalDirectory>({
+  maxEntries: DIRECTORY_MAX_TENANTS,
+  ttlMs: DIRECTORY_TTL_MS,
+})
+
+// Only one load per tenant is in flight per process
+const directoryLoads = new SingleFlight<string, ProfessionalDirectory>('professional.directory')
+
+// Bumped by every invalidation, so a load that overlaps one does not cache what it read
+const generations = new Map<string, number>()
+
+async function loadDirectory(barbershopId: string): Promise<ProfessionalDirectory> {
+  const generation = generations.get(barbershopId) ?? 0
+  const professionals = await prisma.professional.findMany({
+    where: { barbershopId },
+    select: { id: true, name: true, email: true, commissionRate: true },
+  })
+  const directory: ProfessionalDirectory = new Map(professionals.map((p) => [p.id, p]))
+  if ((generations.get(barbershopId) ?? 0) === generation) {
+    directories.set(barbershopId, directory)
+  }
+  return directory
+}
+
+/**
+ * Every professional of a tenant by id, deactivated ones included since reports cover their
+ * past work. Served from an in-process cache filled with one query per tenant. When one of
+ * `ids` is missing (a professional created on another instance within the TTL), the
+ * directory is read again once, so callers never lose rows to a stale cache.
+ */
+export async function getProfessionalDirectory(
+  barbershopId: string,
+  ids: string[] = []
+): Promise<ProfessionalDirectory> {
+  const cached = directories.get(barbershopId)
+  if (cached && ids.every((id) => cached.has(id))) {
+    incrementCounter('professional.directory.hit')
+    return cached
+  }
+  if (!cached) {
+    const loaded = await directoryLoads.run(barbershopId, () => loadDirectory(barbershopId))
+    if (ids.every((id) => loaded.has(id))) return loaded
+  }
+
+  incrementCounter('professional.directory.stale')
+  invalidateProfessionalDirectory(barbershopId)
+  // Not through the single flight: the load in flight may predate the missing professional
+  return loadDirectory(barbershopId)
+}
+
+/**
+ * Drops a tenant's directory (call after professional changes).
+ */
+export function invalidateProfessionalDirectory(barbershopId: string): void {
+  generations.set(barbershopId, (generations.get(barbershopId) ?? 0) + 1)
+  directories.delete(barbershopId)
+}
+
+/**
+ * Clears every directory (used by tests).
+ */
+export function clearProfessionalDirectories(): void {
+  directories.clear()
+  generations.clear()
+}
@@ -0,0 +1,53 @@
+import { z } from 'zod'
+
+/**
+ * Comma-separated query parameter restricted to `allowed` values (`?fields=id,date`).
+ * An empty string yields an empty list; duplicates are dropped.
+ */
+export function commaListQuerySchema<T extends string>(allowed: readonly T[]) {
+  const allowedSet = new Set<string>(allowed)
+  return z
+    .string()
+    .transform((value, ctx) => {
+      const items = [
+        ...new Set(
+          value
+            .split(',')
+            .map((item) => item.trim())
+            .filter(Boolean)
+        ),
+      ]
+      const unknown = items.filter((item) => !allowedSet.has(item))
+      if (unknown.length > 0) {
+        ctx.addIssue({ code: z.ZodIssueCode.custom, message: `Unknown: ${unknown.join(', ')}` })
+        return z.NEVER
+      }
+      return items as T[]
+    })
+    .optional()
+}
+
+/**
+ * `{ a: true, b: true }` select for Prisma from a list of column names.
+ */
+export function selectOf<T extends string>(fields: readonly T[]): Record<T, true> {
+  return Object.fromEntries(fields.map((field) => [field, true])) as Record<T, true>
+}
+
+/**
+ * List response shape: `nested` embeds related entities in every row, `normalized` keeps only
+ * foreign keys in rows and side-loads each distinct entity once under `included`.
+ */
+export const responseFormatQuerySchema = z.enum(['nested', 'normalized']).default('nested')
+
+export type ResponseFormat = z.infer<typeof responseFormatQuerySchema>
+
+// Side-loaded entities by collection name, then by id
+export type IncludedEntities = Record<string, Record<string, object>>
+
+/**
+ * Indexes rows by id for an `included` collection.
+ */
+export function indexById<T extends { id: string }>(rows: T[]): Record<string, T> {
+  return Object.fromEntries(rows.map((row) => [row.id, row]))
+}
@@ -0,0 +1,77 @@
+import { MAX_PAGE_LIMIT, MAX_STREAM_LIMIT } from './pagination.js'
+
+// Shared rate limit settings (used by the Upstash limiters and the local engine)
+export const RATE_LIMIT_WINDOW_SECONDS = 60
+
+// 100 requests per 60 seconds per IP
+export const IP_RATE_LIMIT = 100
+
+// 1000 requests per 60 seconds per tenant
+export const TENANT_RATE_LIMIT = 1000
+
+// Tenant rate limit tokens consumed per request, by route class.
+// Routes declare their cost next to their schema via `config.rateLimitCost`.
+export const RATE_LIMIT_COST = {
+  default: 1,
+  // Per started 31-day period of the requested range
+  report: 10,
+  // Up to 500 bookings checked and inserted in one request
+  bulk: 20,
+  // Unbounded streaming export of every matching row
+  export: 50,
+} as const
+
+const MAX_REPORT_PERIODS = 12
+
+/**
+ * Cost of a date-range report: grows with the number of months it aggregates.
+ * Invalid ranges cost one period (validation rejects them later).
+ */
+export function reportRateLimitCost(dateFrom: unknown, dateTo: unknown): number {
+  const from = new Date(String(dateFrom)).getTime()
+  const to = new Date(String(dateTo)).getTime()
+  if (!Number.isFinite(from) || !Number.isFinite(to) || to <= from) {
+    return RATE_LIMIT_COST.report
+  }
+
+  const periods = Math.ceil((to - from) / (31 * 24 * 60 * 60 * 1000))
+  return RATE_LIMIT_COST.report * Math.min(periods, MAX_REPORT_PERIODS)
+}
+
+/**
+ * Cost of a list request: a streamed page (`stream=true`, up to 10000 rows) costs one token
+ * per `MAX_PAGE_LIMIT` rows, what reading it page by page would. Other pages cost the default.
+ */
+export function listRateLimitCost(stream: unknown, limit: unknown): number {
+  const rows = Number(limit)
+  if (String(stream) !== 'true' || !Number.isFinite(rows) || rows <= 0) {
+    return RATE_LIMIT_COST.default
+  }
+  return Math.ceil(Math.min(rows, MAX_STREAM_LIMIT) / MAX_PAGE_LIMIT)
+}
+
+export type RateLimitMode = 'local' | 'strict' | 'atomic'
+
+/**
+ * RATE_LIMIT_MODE=strict uses the Upstash sliding windows on every request.
+ * RATE_LIMIT_MODE=atomic checks IP and tenant in a single Redis script call.
+ * Anything else (default) decides locally and reconciles with Redis in batches.
+ */
+export function getRateLimitMode(): RateLimitMode {
+  const mode = process.env.RATE_LIMIT_MODE
+  return mode === 'strict' || mode === 'atomic' ? mode : 'local'
+}
+
+// Upstash analytics adds extra writes per request, so it is opt-in
+export const RATE_LIMIT_ANALYTICS = process.env.RATE_LIMIT_ANALYTICS === 'true'
+
+function readPositiveInt(name: string, fallback: number): number {
+  const value = parseInt(process.env[name] || '', 10)
+  return Number.isFinite(value) && value > 0 ? value : fallback
+}
+
+// How often pending local usage is pushed to Redis
+export const RATE_LIMIT_SYNC_INTERVAL_MS = readPositiveInt('RATE_LIMIT_SYNC_INTERVAL_MS', 1000)
+
+// Error bound: max requests a key may consume locally before a sync is forced
+export const RATE_LIMIT_MAX_DRIFT = readPositiveInt('RATE_LIMIT_MAX_DRIFT', 10)
@@ -0,0 +1,396 @@
+import { redis, ipRatelimit, tenantRatelimit } from './redis.js'
+import type { RedisCall } from './redisClient.js'
+import {
+  IP_RATE_LIMIT,
+  TENANT_RATE_LIMIT,
+  RATE_LIMIT_WINDOW_SECONDS,
+  RATE_LIMIT_SYNC_INTERVAL_MS,
+  RATE_LIMIT_MAX_DRIFT,
+  getRateLimitMode,
+  type RateLimitMode,
+} from './rateLimitConfig.js'
+
+export interface RateLimitResult {
+  success: boolean
+  limit: number
+  remaining: number
+  reset: number
+}
+
+// Subset of the Redis client used for reconciliation
+interface PipelineClient {
+  pipeline(): {
+    incrby(key: string, increment: number): unknown
+    pexpire(key: string, milliseconds: number): unknown
+    exec(): Promise<unknown[]>
+  }
+}
+
+export interface LocalRateLimiterOptions {
+  limit: number
+  windowMs: number
+  prefix: string
+  maxDrift?: number
+  syncIntervalMs?: number
+  redis?: PipelineClient
+}
+
+interface Bucket {
+  tokens: number
+  refilledAt: number
+  // Tokens consumed locally that Redis has not seen yet
+  pending: number
+  windowId: number
+}
+
+/**
+ * Per-process token buckets that decide allow/deny without a network hop.
+ *
+ * Usage is pushed to Redis in batches (one pipeline for every key with pending usage)
+ * into fixed-window counters. The global count returned by Redis caps the local
+ * bucket, so all instances converge on the shared limit. Each instance may over-admit
+ * at most `maxDrift` requests per key between syncs: once a key reaches that much
+ * unsynced usage, the request waits for a sync before deciding.
+ */
+export class LocalRateLimiter {
+  private readonly buckets = new Map<string, Bucket>()
+  private readonly maxDrift: number
+  private readonly syncIntervalMs: number
+  private flushing: Promise<void> | null = null
+  private timer: ReturnType<typeof setInterval> | null = null
+
+  constructor(private readonly options: LocalRateLimiterOptions) {
+    this.maxDrift = options.maxDrift ?? RATE_LIMIT_MAX_DRIFT
+    this.syncIntervalMs = options.syncIntervalMs ?? RATE_LIMIT_SYNC_INTERVAL_MS
+  }
+
+  /**
+   * Consumes `cost` tokens for a key (expensive routes cost more than one).
+   */
+  async limit(key: string, cost = 1): Promise<RateLimitResult> {
+    const now = Date.now()
+    const bucket = this.getBucket(key, now)
+
+    if (bucket.pending >= this.maxDrift) {
+      await this.flush()
+    }
+
+    const windowEnd = (bucket.windowId + 1) * this.options.windowMs
+
+    if (bucket.tokens < cost) {
+      return { success: false, limit: this.options.limit, remaining: 0, reset: windowEnd }
+    }
+
+    bucket.tokens -= cost
+    bucket.pending += cost
+    this.ensureTimer()
+
+    return {
+      success: true,
+      limit: this.options.limit,
+      remaining: Math.floor(bucket.tokens),
+      reset: windowEnd,
+    }
+  }
+
+  /**
+   * Pushes pending usage to Redis in a single pipeline and applies the global counts.
+   */
+  flush(): Promise<void> {
+    if (!this.flushing) {
+      this.flushing = this.doFlush().finally(() => {
+        this.flushing = null
+      })
+    }
+    return this.flushing
+  }
+
+  /**
+   * Drops all local state (used by tests).
+   */
+  reset(): void {
+    this.buckets.clear()
+    if (this.timer) {
+      clearInterval(this.timer)
+      this.timer = null
+    }
+  }
+
+  private getBucket(key: string, now: number): Bucket {
+    const windowId = Math.floor(now / this.options.windowMs)
+    let bucket = this.buckets.get(key)
+
+    if (!bucket) {
+      bucket = { tokens: this.options.limit, refilledAt: now, pending: 0, windowId }
+      this.buckets.set(key, bucket)
+      return bucket
+    }
+
+    // Continuous refill: `limit` tokens per window
+    const refill = ((now - bucket.refilledAt) / this.options.windowMs) * this.options.limit
+    bucket.tokens = Math.min(this.options.limit, bucket.tokens + refill)
+    bucket.refilledAt = now
+
+    if (bucket.windowId !== windowId) {
+      // Usage not yet synced belongs to a closed window; the error is bounded by maxDrift
+      bucket.windowId = windowId
+      bucket.pending = 0
+    }
+
+    return bucket
+  }
+
+  private ensureTimer(): void {
+    if (this.timer) return
+    this.timer = setInterval(() => {
+      this.flush().catch(() => {})
+    }, this.syncIntervalMs)
+    // Never keep the process alive just to sync rate limits
+    this.timer.unref?.()
+  }
+
+  private redisKey(key: string, windowId: number): string {
+    return `${this.options.prefix}:${key}:${windowId}`
+  }
+
+  private async doFlush(): Promise<void> {
+    const batch: Array<{ bucket: Bucket; windowId: number; amount: number; redisKey: string }> = []
+
+    for (const [key, bucket] of this.buckets) {
+      if (bucket.pending > 0) {
+        batch.push({
+          bucket,
+          windowId: bucket.windowId,
+          amount: bucket.pending,
+          redisKey: this.redisKey(key, bucket.windowId),
+        })
+        bucket.pending = 0
+      } else if (bucket.tokens >= this.options.limit) {
+        // Idle and full - nothing to remember
+        this.buckets.delete(key)
+      }
+    }
+
+    if (batch.length === 0) return
+
+    const client: PipelineClient = this.options.redis ?? redis
+    const pipeline = client.pipeline()
+    for (const item of batch) {
+      pipeline.incrby(item.redisKey, item.amount)
+      pipeline.pexpire(item.redisKey, this.options.windowMs * 2)
+    }
+
+    try {
+      const results = await pipeline.exec()
+
+      batch.forEach((item, index) => {
+        const globalUsed = Number(results[index * 2])
+        if (!Number.isFinite(globalUsed) || item.bucket.windowId !== item.windowId) return
+
+        // Other instances consumed part of the shared budget
+        item.bucket.tokens = Math.min(
+          item.bucket.tokens,
+          Math.max(0, this.options.limit - globalUsed)
+        )
+      })
+    } catch (error) {
+      // Fail open: local decisions keep working while Redis is unreachable
+      console.error('Rate limit reconciliation failed:', error)
+    }
+  }
+}
+
+const WINDOW_MS = RATE_LIMIT_WINDOW_SECONDS * 1000
+
+export const localIpRatelimit = new LocalRateLimiter({
+  limit: IP_RATE_LIMIT,
+  windowMs: WINDOW_MS,
+  prefix: 'barbershop:ratelimit:local:ip',
+})
+
+export const localTenantRatelimit = new LocalRateLimiter({
+  limit: TENANT_RATE_LIMIT,
+  windowMs: WINDOW_MS,
+  prefix: 'barbershop:ratelimit:local:tenant',
+})
+
+// Sliding window (weighted previous + current fixed window) for IP and tenant in one call.
+// KEYS: ip current, ip previous[, tenant current, tenant previous]
+// ARGV: window ms, ms elapsed in the current window, ip limit, tenant limit, tenant cost
+// Returns: { ip allowed, ip remaining, tenant allowed (-1 when absent), tenant remaining }
+const ATOMIC_LIMIT_SCRIPT = `
+local window = tonumber(ARGV[1])
+local weight = (window - tonumber(ARGV[2])) / window
+
+local function used(current, previous)
+  local c = tonumber(redis.call('GET', current) or '0')
+  local p = tonumber(redis.call('GET', previous) or '0')
+  return math.floor(p * weight) + c
+end
+
+local function consume(key, amount)
+  redis.call('INCRBY', key, amount)
+  redis.call('PEXPIRE', key, window * 2)
+end
+
+local ipLimit = tonumber(ARGV[3])
+local ipUsed = used(KEYS[1], KEYS[2])
+if ipUsed >= ipLimit then
+  return { 0, 0, -1, -1 }
+end
+consume(KEYS[1], 1)
+local ipRemaining = ipLimit - ipUsed - 1
+
+if #KEYS < 4 then
+  return { 1, ipRemaining, -1, -1 }
+end
+
+local tenantLimit = tonumber(ARGV[4])
+local tenantCost = tonumber(ARGV[5])
+local tenantUsed = used(KEYS[3], KEYS[4])
+if tenantUsed + tenantCost > tenantLimit then
+  return { 1, ipRemaining, 0, math.max(tenantLimit - tenantUsed, 0) }
+end
+consume(KEYS[3], tenantCost)
+return { 1, ipRemaining, 1, tenantLimit - tenantUsed - tenantCost }
+`
+
+const ATOMIC_IP_PREFIX = 'barbershop:ratelimit:atomic:ip'
+const ATOMIC_TENANT_PREFIX = 'barbershop:ratelimit:atomic:tenant'
+
+// Port of ATOMIC_LIMIT_SCRIPT for drivers without Lua (in-memory)
+function emulateAtomicLimit(
+  call: RedisCall,
+  keys: string[],
+  args: string[]
+): [number, number, number, number] {
+  const window = Number(args[0])
+  const weight = (window - Number(args[1])) / window
+  const used = (current: string, previous: string) =>
+    Math.floor(Number(call('GET', previous) ?? 0) * weight) + Number(call('GET', current) ?? 0)
+  const consume = (key: string, amount: number) => {
+    call('INCRBY', key, amount)
+    call('PEXPIRE', key, window * 2)
+  }
+
+  const ipLimit = Number(args[2])
+  const ipUsed = used(keys[0], keys[1])
+  if (ipUsed >= ipLimit) return [0, 0, -1, -1]
+  consume(keys[0], 1)
+  const ipRemaining = ipLimit - ipUsed - 1
+
+  if (keys.length < 4) return [1, ipRemaining, -1, -1]
+
+  const tenantLimit = Number(args[3])
+  const tenantCost = Number(args[4])
+  const tenantUsed = used(keys[2], keys[3])
+  if (tenantUsed + tenantCost > tenantLimit) {
+    return [1, ipRemaining, 0, Math.max(tenantLimit - tenantUsed, 0)]
+  }
+  consume(keys[2], tenantCost)
+  return [1, ipRemaining, 1, tenantLimit - tenantUsed - tenantCost]
+}
+
+// Created lazily so importing this module never touches Redis
+let atomicLimitScript: ReturnType<typeof redis.createScript<number[]>> | null = null
+
+export interface RequestRateLimits {
+  ip: RateLimitResult
+  // Only present when a tenant was checked
+  tenant?: RateLimitResult
+}
+
+async function limitAtomically(
+  clientIp: string,
+  tenantId: string | undefined,
+  cost: number
+): Promise<RequestRateLimits> {
+  const now = Date.now()
+  const windowId = Math.floor(now / WINDOW_MS)
+  const reset = (windowId + 1) * WINDOW_MS
+
+  const keys = [
+    `${ATOMIC_IP_PREFIX}:${clientIp}:${windowId}`,
+    `${ATOMIC_IP_PREFIX}:${clientIp}:${windowId - 1}`,
+  ]
+  if (tenantId) {
+    keys.push(
+      `${ATOMIC_TENANT_PREFIX}:${tenantId}:${windowId}`,
+      `${ATOMIC_TENANT_PREFIX}:${tenantId}:${windowId - 1}`
+    )
+  }
+
+  atomicLimitScript ??= redis.createScript<number[]>(ATOMIC_LIMIT_SCRIPT, emulateAtomicLimit)
+  const [ipAllowed, ipRemaining, tenantAllowed, tenantRemaining] = await atomicLimitScript.exec(
+    keys,
+    [WINDOW_MS, now - windowId * WINDOW_MS, IP_RATE_LIMIT, TENANT_RATE_LIMIT, cost].map(String)
+  )
+
+  const result: RequestRateLimits = {
+    ip: { success: ipAllowed === 1, limit: IP_RATE_LIMIT, remaining: ipRemaining, reset },
+  }
+  if (tenantAllowed !== -1) {
+    result.tenant = {
+      success: tenantAllowed === 1,
+      limit: TENANT_RATE_LIMIT,
+      remaining: tenantRemaining,
+      reset,
+    }
+  }
+  return result
+}
+
+/**
+ * The Upstash sliding windows speak the Upstash REST API only; with the TCP or in-memory
+ * driver, strict mode falls back to the atomic script.
+ */
+function resolveRateLimitMode(): RateLimitMode {
+  const mode = getRateLimitMode()
+  const upstashLimiters = redis.driverName !== 'tcp' && redis.driverName !== 'memory'
+  return mode === 'strict' && !upstashLimiters ? 'atomic' : mode
+}
+
+/**
+ * Rate limits by client IP using the configured mode.
+ */
+export async function limitByIp(clientIp: string): Promise<RateLimitResult> {
+  if (resolveRateLimitMode() === 'strict') {
+    return ipRatelimit.limit(clientIp)
+  }
+  return localIpRatelimit.limit(clientIp)
+}
+
+/**
+ * Rate limits by tenant using the configured mode, consuming `cost` tokens.
+ */
+export async function limitByTenant(tenantId: string, cost = 1): Promise<RateLimitResult> {
+  if (resolveRateLimitMode() === 'strict') {
+    return cost === 1
+      ? tenantRatelimit.limit(tenantId)
+      : tenantRatelimit.limit(tenantId, { rate: cost })
+  }
+  return localTenantRatelimit.limit(tenantId, cost)
+}
+
+/**
+ * Checks the IP and (optionally) the tenant limit for one request.
+ * The tenant is only checked when the IP check passes and consumes `cost` tokens;
+ * the IP limit always counts one request. In atomic mode both checks happen in a
+ * single Redis round trip.
+ */
+export async function limitRequest(
+  clientIp: string,
+  tenantId?: string,
+  cost = 1
+): Promise<RequestRateLimits> {
+  if (resolveRateLimitMode() === 'atomic') {
+    return limitAtomically(clientIp, tenantId, cost)
+  }
+
+  const ip = await limitByIp(clientIp)
+  if (!ip.success || !tenantId) {
+    return { ip }
+  }
+
+  return { ip, tenant: await limitByTenant(tenantId, cost) }
+}
@@ -0,0 +1,86 @@
+import { z } from 'zod'
+import type { Interval } from './availability.js'
+
+const MINUTE_MS = 60 * 1000
+export const WEEK_MS = 7 * 24 * 60 * MINUTE_MS
+
+// Longest series that can be booked; its occurrences are never stored up front
+export const MAX_SERIES_OCCURRENCES = 104
+
+/**
+ * How a series repeats: every `interval` weeks (1 = weekly, 2 = biweekly) until a date or
+ * for a number of occurrences, like an RRULE with FREQ=WEEKLY and UNTIL or COUNT.
+ */
+export const recurrenceSchema = z
+  .object({
+    interval: z.union([z.literal(1), z.literal(2)]).default(1),
+    count: z.number().int().min(1).max(MAX_SERIES_OCCURRENCES).optional(),
+    until: z.string().datetime().optional(),
+  })
+  .refine((rule) => (rule.count === undefined) !== (rule.until === undefined), {
+    message: 'Exactly one of count or until is required',
+  })
+
+export type Recurrence = z.infer<typeof recurrenceSchema>
+
+/**
+ * The stored shape of a series: first start, end of the last occurrence, period and length.
+ */
+export interface SeriesRule {
+  startsAt: Date
+  endsAt: Date
+  intervalWeeks: number
+  duration: number
+}
+
+/**
+ * Resolves a recurrence starting at `startsAt` into a series rule. Throws when `until` is
+ * before the start, the series would exceed `MAX_SERIES_OCCURRENCES` or an occurrence would
+ * last a week or more (occurrences of a series never overlap each other).
+ */
+export function toSeriesRule(startsAt: Date, duration: number, recurrence: Recurrence): SeriesRule {
+  if (duration * MINUTE_MS >= WEEK_MS) {
+    throw new Error('Recurrence needs a service shorter than a week')
+  }
+  const period = recurrence.interval * WEEK_MS
+  const count =
+    recurrence.count ??
+    Math.floor((new Date(recurrence.until as string).getTime() - startsAt.getTime()) / period) + 1
+  if (count < 1) throw new Error('Recurrence ends before it starts')
+  if (count > MAX_SERIES_OCCURRENCES) {
+    throw new Error(`Recurrence exceeds ${MAX_SERIES_OCCURRENCES} occurrences`)
+  }
+  const lastStart = startsAt.getTime() + (count - 1) * period
+  return {
+    startsAt,
+    endsAt: new Date(lastStart + duration * MINUTE_MS),
+    intervalWeeks: recurrence.interval,
+    duration,
+  }
+}
+
+/**
+ * Occurrences of a series overlapping `[from, to)`. The first and last candidate indexes are
+ * computed directly, so the cost is the number of occurrences in the window, not in the
+ * series. Occurrences repeat in stored (UTC) time.
+ */
+export function expandOccurrences(series: SeriesRule, from: Date, to: Date): Interval[] {
+  const period = series.intervalWeeks * WEEK_MS
+  const length = series.duration * MINUTE_MS
+  const start = series.startsAt.getTime()
+  const last = Math.round((series.endsAt.getTime() - length - start) / period)
+
+  // Occurrence k overlaps when start + k * period < to and start + k * period + length > from
+  const first = Math.max(0, Math.floor((from.getTime() - length - start) / period) + 1)
+  const end = Math.min(last, Math.ceil((to.getTime() - start) / period) - 1)
+
+  const occurrences: Interval[] = []
+  for (let k = first; k <= end; k++) {
+    const occurrenceStart = start + k * period
+    occurrences.push({
+      start: new Date(occurrenceStart),
+      end: new Date(occurrenceStart + length),
+    })
+  }
+  return occurrences
+}
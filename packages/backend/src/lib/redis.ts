@@ -1,99 +1,389 @@
 import { Redis } from '@upstash/redis'
 import { Ratelimit } from '@upstash/ratelimit'
+import {
+  IP_RATE_LIMIT,
+  RATE_LIMIT_ANALYTICS,
+  RATE_LIMIT_WINDOW_SECONDS,
+  TENANT_RATE_LIMIT,
+} from './rateLimitConfig.js'
+import { RedisClient, type RedisDriver, type RedisDriverName } from './redisClient.js'
+import { MemoryRedisDriver } from './redisMemoryDriver.js'
+import { TcpRedisDriver } from './redisTcpDriver.js'
+import { UpstashRestDriver } from './redisUpstashDriver.js'
+
+const upstashUrl = process.env.UPSTASH_REDIS_REST_URL || ''
+const upstashToken = process.env.UPSTASH_REDIS_REST_TOKEN || ''
+
+/**
+ * REDIS_DRIVER picks the backend explicitly (upstash | tcp | memory). Without it, Upstash
+ * credentials select Upstash, REDIS_URL selects TCP, and nothing selects the in-memory driver.
+ */
+function resolveRedisDriverName(): RedisDriverName {
+  const driver = process.env.REDIS_DRIVER
+  if (driver === 'upstash' || driver === 'tcp' || driver === 'memory') return driver
+  if (upstashUrl && upstashToken) return 'upstash'
+  if (process.env.REDIS_URL) return 'tcp'
 
-if (!process.env.UPSTASH_REDIS_REST_URL || !process.env.UPSTASH_REDIS_REST_TOKEN) {
   if (process.env.NODE_ENV !== 'test') {
-    console.warn('Missing Upstash Redis credentials. Rate limiting will not work.')
+    console.warn(
+      'No Redis configured (UPSTASH_REDIS_REST_URL/TOKEN or REDIS_URL). Using in-memory Redis; state is not shared between instances.'
+    )
   }
+  return 'memory'
 }
 
-export const redis = new Redis({
-  url: process.env.UPSTASH_REDIS_REST_URL || '',
-  token: process.env.UPSTASH_REDIS_REST_TOKEN || '',
-})
+function createRedisDriver(name: RedisDriverName): RedisDriver {
+  switch (name) {
+    case 'upstash':
+      return new UpstashRestDriver({ url: upstashUrl, token: upstashToken })
+    case 'tcp':
+      return new TcpRedisDriver({ url: process.env.REDIS_URL || 'redis://localhost:6379' })
+    case 'memory':
+      return new MemoryRedisDriver()
+  }
+}
+
+const driver = createRedisDriver(resolveRedisDriverName())
+
+// Network drivers batch every command issued in the same tick into one round trip
+export const redis = new RedisClient(driver, { autoPipeline: driver.name !== 'memory' })
+
+// The Upstash sliding-window limiters (RATE_LIMIT_MODE=strict) talk to Upstash directly
+const upstashRedis = new Redis({ url: upstashUrl, token: upstashToken })
 
 // Rate limiter: 100 requests per 60 seconds per IP
 export const ipRatelimit = new Ratelimit({
-  redis,
-  limiter: Ratelimit.slidingWindow(100, '60 s'),
-  analytics: true,
+  redis: upstashRedis,
+  limiter: Ratelimit.slidingWindow(IP_RATE_LIMIT, `${RATE_LIMIT_WINDOW_SECONDS} s` as const),
+  analytics: RATE_LIMIT_ANALYTICS,
   prefix: 'barbershop:ratelimit:ip',
 })
 
 // Tenant rate limiter: 1000 requests per minute per tenant
 export const tenantRatelimit = new Ratelimit({
-  redis,
-  limiter: Ratelimit.slidingWindow(1000, '60 s'),
-  analytics: true,
+  redis: upstashRedis,
+  limiter: Ratelimit.slidingWindow(TENANT_RATE_LIMIT, `${RATE_LIMIT_WINDOW_SECONDS} s` as const),
+  analytics: RATE_LIMIT_ANALYTICS,
   prefix: 'barbershop:ratelimit:tenant',
 })
 
 // OTP storage helpers
+// The code and its failed-attempt counter live in separate keys so verification is one
+// atomic script call: a match consumes the code, a miss counts towards the lockout.
 const OTP_TTL = 300 // 5 minutes in seconds
 const OTP_PREFIX = 'barbershop:otp'
+const OTP_ATTEMPTS_PREFIX = 'barbershop:otp-attempts'
+const OTP_MAX_ATTEMPTS = Math.max(1, parseInt(process.env.OTP_MAX_ATTEMPTS || '', 10) || 5)
+
+export type OtpVerifyResult = 'valid' | 'invalid' | 'expired' | 'locked'
+
+function otpKey(barbershopId: string, email: string): string {
+  return `${OTP_PREFIX}:${barbershopId}:${email}`
+}
+
+function otpAttemptsKey(barbershopId: string, email: string): string {
+  return `${OTP_ATTEMPTS_PREFIX}:${barbershopId}:${email}`
+}
+
+// KEYS: otp, attempts | ARGV: code, max attempts, ttl
+// Returns 1 (valid, code consumed), 0 (invalid), -1 (expired or missing), -2 (locked out)
+const verifyOTPScript = redis.createScript<number>(
+  `
+local stored = redis.call('GET', KEYS[1])
+if not stored then
+  return -1
+end
+if stored == ARGV[1] then
+  redis.call('DEL', KEYS[1], KEYS[2])
+  return 1
+end
+local attempts = redis.call('INCR', KEYS[2])
+if attempts == 1 then
+  redis.call('EXPIRE', KEYS[2], ARGV[3])
+end
+if attempts >= tonumber(ARGV[2]) then
+  redis.call('DEL', KEYS[1], KEYS[2])
+  return -2
+end
+return 0
+`,
+  (call, keys, args) => {
+    const stored = call('GET', keys[0])
+    if (stored === null) return -1
+    if (stored === args[0]) {
+      call('DEL', keys[0], keys[1])
+      return 1
+    }
+    const attempts = call('INCR', keys[1])
+    if (attempts === 1) call('EXPIRE', keys[1], args[2])
+    if (Number(attempts) >= Number(args[1])) {
+      call('DEL', keys[0], keys[1])
+      return -2
+    }
+    return 0
+  }
+)
+
+const OTP_VERIFY_RESULTS: Record<number, OtpVerifyResult> = {
+  1: 'valid',
+  0: 'invalid',
+  [-1]: 'expired',
+  [-2]: 'locked',
+}
 
 export async function storeOTP(barbershopId: string, email: string, code: string): Promise<void> {
-  const key = `${OTP_PREFIX}:${barbershopId}:${email}`
-  await redis.set(key, code, { ex: OTP_TTL })
+  // A new code starts with a clean attempt counter
+  const pipeline = redis.pipeline()
+  pipeline.set(otpKey(barbershopId, email), code, { ex: OTP_TTL })
+  pipeline.del(otpAttemptsKey(barbershopId, email))
+  await pipeline.exec()
 }
 
+/**
+ * Checks and consumes an OTP in one round trip.
+ * After OTP_MAX_ATTEMPTS wrong codes the OTP is discarded and a new one must be requested.
+ */
 export async function verifyOTP(
   barbershopId: string,
   email: string,
   code: string
-): Promise<boolean> {
-  const key = `${OTP_PREFIX}:${barbershopId}:${email}`
-  const storedCodeRaw = await redis.get(key)
-  const storedCode = storedCodeRaw === null ? null : String(storedCodeRaw)
-
-  if (storedCode === code) {
-    await redis.del(key) // Delete after successful verification
-    return true
-  }
-
-  return false
+): Promise<OtpVerifyResult> {
+  const status = await verifyOTPScript.exec(
+    [otpKey(barbershopId, email), otpAttemptsKey(barbershopId, email)],
+    [code, String(OTP_MAX_ATTEMPTS), String(OTP_TTL)]
+  )
+  return OTP_VERIFY_RESULTS[status] ?? 'invalid'
 }
 
 export async function deleteOTP(barbershopId: string, email: string): Promise<void> {
-  const key = `${OTP_PREFIX}:${barbershopId}:${email}`
-  await redis.del(key)
+  await redis.del(otpKey(barbershopId, email), otpAttemptsKey(barbershopId, email))
 }
 
 // Refresh token storage helpers
+// One key per session plus a per-professional SET index of token ids, so listing and
+// revoking sessions never scans the keyspace.
 const REFRESH_TOKEN_TTL = 60 * 60 * 24 * 7 // 7 days in seconds
 const REFRESH_TOKEN_PREFIX = 'barbershop:refresh'
+const REFRESH_INDEX_PREFIX = 'barbershop:refresh-index'
+
+export interface RefreshTokenMetadata {
+  createdAt: number
+  expiresAt: number
+}
+
+export interface RefreshTokenSession extends RefreshTokenMetadata {
+  tokenId: string
+}
+
+function refreshTokenKey(professionalId: string, tokenId: string): string {
+  return `${REFRESH_TOKEN_PREFIX}:${professionalId}:${tokenId}`
+}
+
+function refreshIndexKey(professionalId: string): string {
+  return `${REFRESH_INDEX_PREFIX}:${professionalId}`
+}
+
+function parseRefreshMetadata(data: unknown): RefreshTokenMetadata | null {
+  if (!data) return null
+  if (typeof data === 'string') return JSON.parse(data)
+  return data as RefreshTokenMetadata
+}
+
+// KEYS: index | ARGV: token key prefix
+// Deletes every indexed token and the index; returns how many sessions were revoked
+const revokeAllRefreshTokensScript = redis.createScript<number>(
+  `
+local ids = redis.call('SMEMBERS', KEYS[1])
+for _, id in ipairs(ids) do
+  redis.call('DEL', ARGV[1] .. id)
+end
+redis.call('DEL', KEYS[1])
+return #ids
+`,
+  (call, keys, args) => {
+    const ids = call('SMEMBERS', keys[0]) as string[]
+    ids.forEach((id) => call('DEL', args[0] + id))
+    call('DEL', keys[0])
+    return ids.length
+  }
+)
+
+// KEYS: index | ARGV: token key prefix
+// Returns { id1, metadata1, id2, metadata2, ... } and prunes ids whose key expired
+const listRefreshTokensScript = redis.createScript<string[]>(
+  `
+local ids = redis.call('SMEMBERS', KEYS[1])
+local result = {}
+for _, id in ipairs(ids) do
+  local metadata = redis.call('GET', ARGV[1] .. id)
+  if metadata then
+    table.insert(result, id)
+    table.insert(result, metadata)
+  else
+    redis.call('SREM', KEYS[1], id)
+  end
+end
+return result
+`,
+  (call, keys, args) => {
+    const result: string[] = []
+    for (const id of call('SMEMBERS', keys[0]) as string[]) {
+      const metadata = call('GET', args[0] + id)
+      if (metadata !== null) {
+        result.push(id, String(metadata))
+      } else {
+        call('SREM', keys[0], id)
+      }
+    }
+    return result
+  }
+)
+
+// KEYS: index, old token key, new token key | ARGV: old id, new id, metadata, ttl
+// Returns 0 without changes when the old token was already used or revoked
+const rotateRefreshTokenScript = redis.createScript<number>(
+  `
+if redis.call('DEL', KEYS[2]) == 0 then
+  redis.call('SREM', KEYS[1], ARGV[1])
+  return 0
+end
+redis.call('SREM', KEYS[1], ARGV[1])
+redis.call('SET', KEYS[3], ARGV[3], 'EX', ARGV[4])
+redis.call('SADD', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+`,
+  (call, keys, args) => {
+    const deleted = call('DEL', keys[1])
+    call('SREM', keys[0], args[0])
+    if (deleted === 0) return 0
+    call('SET', keys[2], args[2], 'EX', args[3])
+    call('SADD', keys[0], args[1])
+    call('EXPIRE', keys[0], args[3])
+    return 1
+  }
+)
 
 export async function storeRefreshToken(
   professionalId: string,
   tokenId: string,
-  metadata: { createdAt: number; expiresAt: number }
+  metadata: RefreshTokenMetadata
 ): Promise<void> {
-  const key = `${REFRESH_TOKEN_PREFIX}:${professionalId}:${tokenId}`
-  await redis.set(key, JSON.stringify(metadata), { ex: REFRESH_TOKEN_TTL })
+  const indexKey = refreshIndexKey(professionalId)
+  const pipeline = redis.pipeline()
+  pipeline.set(refreshTokenKey(professionalId, tokenId), JSON.stringify(metadata), {
+    ex: REFRESH_TOKEN_TTL,
+  })
+  pipeline.sadd(indexKey, tokenId)
+  // The index lives as long as its newest session
+  pipeline.expire(indexKey, REFRESH_TOKEN_TTL)
+  await pipeline.exec()
 }
 
 export async function getRefreshToken(
   professionalId: string,
   tokenId: string
-): Promise<{ createdAt: number; expiresAt: number } | null> {
-  const key = `${REFRESH_TOKEN_PREFIX}:${professionalId}:${tokenId}`
-  const data = await redis.get(key)
-  if (!data) return null
-  if (typeof data === 'string') return JSON.parse(data)
-  return data as { createdAt: number; expiresAt: number }
+): Promise<RefreshTokenMetadata | null> {
+  const data = await redis.get(refreshTokenKey(professionalId, tokenId))
+  return parseRefreshMetadata(data)
 }
 
 export async function deleteRefreshToken(professionalId: string, tokenId: string): Promise<void> {
-  const key = `${REFRESH_TOKEN_PREFIX}:${professionalId}:${tokenId}`
-  await redis.del(key)
+  const pipeline = redis.pipeline()
+  pipeline.del(refreshTokenKey(professionalId, tokenId))
+  pipeline.srem(refreshIndexKey(professionalId), tokenId)
+  await pipeline.exec()
 }
 
-export async function deleteAllRefreshTokens(professionalId: string): Promise<void> {
-  const pattern = `${REFRESH_TOKEN_PREFIX}:${professionalId}:*`
-  const keys = await redis.keys(pattern)
-  if (keys.length > 0) {
-    await redis.del(...keys)
+/**
+ * Revokes every session of a professional in one round trip.
+ */
+export async function deleteAllRefreshTokens(professionalId: string): Promise<number> {
+  return revokeAllRefreshTokensScript.exec(
+    [refreshIndexKey(professionalId)],
+    [`${REFRESH_TOKEN_PREFIX}:${professionalId}:`]
+  )
+}
+
+/**
+ * Lists active sessions of a professional in one round trip.
+ */
+export async function listRefreshTokens(professionalId: string): Promise<RefreshTokenSession[]> {
+  const flat = await listRefreshTokensScript.exec(
+    [refreshIndexKey(professionalId)],
+    [`${REFRESH_TOKEN_PREFIX}:${professionalId}:`]
+  )
+
+  const sessions: RefreshTokenSession[] = []
+  for (let i = 0; i < flat.length; i += 2) {
+    const metadata = parseRefreshMetadata(flat[i + 1])
+    if (metadata) {
+      sessions.push({ tokenId: String(flat[i]), ...metadata })
+    }
   }
+  return sessions.sort((a, b) => b.createdAt - a.createdAt)
+}
+
+/**
+ * Replaces a refresh token with a new one in one round trip.
+ * Returns false (and stores nothing) when the old token was already used or revoked.
+ */
+export async function rotateRefreshToken(
+  professionalId: string,
+  oldTokenId: string,
+  newTokenId: string,
+  metadata: RefreshTokenMetadata
+): Promise<boolean> {
+  const rotated = await rotateRefreshTokenScript.exec(
+    [
+      refreshIndexKey(professionalId),
+      refreshTokenKey(professionalId, oldTokenId),
+      refreshTokenKey(professionalId, newTokenId),
+    ],
+    [oldTokenId, newTokenId, JSON.stringify(metadata), String(REFRESH_TOKEN_TTL)]
+  )
+  return rotated === 1
+}
+
+// Sessions issued before per-session keys: one key per professional holding the whole token.
+// They expire at most 7 days after the deploy that introduced the new keys.
+function legacyRefreshTokenKey(barbershopId: string, professionalId: string): string {
+  return `${REFRESH_TOKEN_PREFIX}:${barbershopId}:${professionalId}`
+}
+
+// KEYS: legacy session key | ARGV: presented token
+// Deletes the session and returns 1 when it still holds the presented token
+const consumeLegacyRefreshTokenScript = redis.createScript<number>(
+  `
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+`,
+  (call, keys, args) => (call('GET', keys[0]) === args[0] ? Number(call('DEL', keys[0])) : 0)
+)
+
+/**
+ * Consumes a refresh token issued before sessions had ids (no `jti`), so it can be exchanged
+ * for a session once. Returns false when it is not the token stored for the professional.
+ */
+export async function consumeLegacyRefreshToken(
+  barbershopId: string,
+  professionalId: string,
+  refreshToken: string
+): Promise<boolean> {
+  const consumed = await consumeLegacyRefreshTokenScript.exec(
+    [legacyRefreshTokenKey(barbershopId, professionalId)],
+    [refreshToken]
+  )
+  return consumed === 1
+}
+
+export async function deleteLegacyRefreshToken(
+  barbershopId: string,
+  professionalId: string
+): Promise<void> {
+  await redis.del(legacyRefreshTokenKey(barbershopId, professionalId))
 }
 
 // Tenant cache helpers
@@ -107,7 +397,7 @@ export async function cacheTenant(slug: string, tenantId: string): Promise<void>
 
 export async function getCachedTenant(slug: string): Promise<string | null> {
   const key = `${TENANT_CACHE_PREFIX}:${slug}`
-  return await redis.get<string>(key)
+  return await redis.get(key)
 }
 
 export async function invalidateTenantCache(slug: string): Promise<void> {
@@ -115,4 +405,65 @@ export async function invalidateTenantCache(slug: string): Promise<void> {
   await redis.del(key)
 }
 
+// List count cache helpers. Entries are tagged with the per-tenant, per-model generation that
+// was current when they were computed; a write bumps the generation, orphaning every entry.
+const COUNT_CACHE_TTL = 60 * 5 // 5 minutes
+// Must outlive the entries, otherwise an expired generation restarts at 0 and revives them
+const COUNT_GENERATION_TTL = 60 * 60 * 24 // 1 day
+const COUNT_CACHE_PREFIX = 'barbershop:count'
+const COUNT_GENERATION_PREFIX = 'barbershop:count-gen'
+
+export type CountedModel = 'appointment' | 'transaction' | 'client' | 'professional' | 'service'
+
+export interface CachedCount {
+  // null on a miss or when the entry predates the current generation
+  count: number | null
+  generation: number
+}
+
+function countGenerationKey(model: CountedModel, barbershopId: string): string {
+  return `${COUNT_GENERATION_PREFIX}:${model}:${barbershopId}`
+}
+
+function countKey(model: CountedModel, barbershopId: string, filterKey: string): string {
+  return `${COUNT_CACHE_PREFIX}:${model}:${barbershopId}:${filterKey}`
+}
+
+export async function getCachedCount(
+  model: CountedModel,
+  barbershopId: string,
+  filterKey: string
+): Promise<CachedCount> {
+  const [generationReply, entryReply] = await redis
+    .pipeline()
+    .get(countGenerationKey(model, barbershopId))
+    .get(countKey(model, barbershopId, filterKey))
+    .exec()
+  const generation = Number(generationReply ?? 0)
+  if (typeof entryReply !== 'string') return { count: null, generation }
+
+  const [entryGeneration, count] = entryReply.split(':').map(Number)
+  return { count: entryGeneration === generation ? count : null, generation }
+}
+
+export async function cacheCount(
+  model: CountedModel,
+  barbershopId: string,
+  filterKey: string,
+  generation: number,
+  count: number
+): Promise<void> {
+  await redis.set(countKey(model, barbershopId, filterKey), `${generation}:${count}`, {
+    ex: COUNT_CACHE_TTL,
+  })
+}
+
+export async function invalidateCachedCounts(
+  model: CountedModel,
+  barbershopId: string
+): Promise<void> {
+  const key = countGenerationKey(model, barbershopId)
+  await redis.pipeline().incrby(key, 1).expire(key, COUNT_GENERATION_TTL).exec()
+}
+
 export default redis
@@ -0,0 +1,263 @@
+import { createHash } from 'node:crypto'
+
+// Small Redis facade shared by the tenant cache, OTP, refresh tokens and rate limiting.
+// Drivers only know how to send a batch of raw commands; everything else lives here.
+
+export type RedisDriverName = 'upstash' | 'tcp' | 'memory'
+
+export type RedisArg = string | number
+export type RedisCommand = RedisArg[]
+export type RedisReply = string | number | null | RedisReply[] | RedisReplyError
+
+/**
+ * Error reply for a single command (e.g. WRONGTYPE, NOSCRIPT).
+ */
+export class RedisReplyError extends Error {
+  constructor(message: string) {
+    super(message)
+    this.name = 'RedisReplyError'
+  }
+}
+
+// Synchronous command executor handed to script emulations (the in-memory `redis.call`)
+export type RedisCall = (...command: RedisCommand) => RedisReply
+
+/**
+ * JavaScript port of a Lua script, used by drivers that cannot run Lua (in-memory).
+ * It must be synchronous so it stays atomic, just like the script on a real server.
+ */
+export type ScriptEmulator<T> = (call: RedisCall, keys: string[], args: string[]) => T
+
+export interface RedisDriver {
+  readonly name: RedisDriverName
+  /**
+   * Sends commands in one round trip. A failed command yields a RedisReplyError in its slot;
+   * transport failures reject the whole batch.
+   */
+  send(commands: RedisCommand[]): Promise<RedisReply[]>
+  /**
+   * Runs a script's emulation instead of its Lua source (in-memory driver only).
+   */
+  runScript?<T>(emulate: ScriptEmulator<T>, keys: string[], args: string[]): T
+}
+
+export interface SetOptions {
+  ex?: number
+  px?: number
+  // Only set the key if it does not exist
+  nx?: boolean
+}
+
+function setCommand(key: string, value: RedisArg, options?: SetOptions): RedisCommand {
+  const command: RedisCommand = ['SET', key, value]
+  if (options?.ex !== undefined) command.push('EX', options.ex)
+  if (options?.px !== undefined) command.push('PX', options.px)
+  if (options?.nx) command.push('NX')
+  return command
+}
+
+function unwrap<T>(reply: RedisReply): T {
+  if (reply instanceof RedisReplyError) throw reply
+  return reply as T
+}
+
+/**
+ * Explicit batch: commands are sent together when `exec` is called.
+ * Like the Upstash SDK, `exec` rejects if any command failed.
+ */
+export class RedisPipeline {
+  private readonly commands: RedisCommand[] = []
+
+  constructor(private readonly driver: RedisDriver) {}
+
+  get length(): number {
+    return this.commands.length
+  }
+
+  get(key: string): this {
+    return this.push(['GET', key])
+  }
+
+  set(key: string, value: RedisArg, options?: SetOptions): this {
+    return this.push(setCommand(key, value, options))
+  }
+
+  del(...keys: string[]): this {
+    return this.push(['DEL', ...keys])
+  }
+
+  incrby(key: string, increment: number): this {
+    return this.push(['INCRBY', key, increment])
+  }
+
+  expire(key: string, seconds: number): this {
+    return this.push(['EXPIRE', key, seconds])
+  }
+
+  pexpire(key: string, milliseconds: number): this {
+    return this.push(['PEXPIRE', key, milliseconds])
+  }
+
+  sadd(key: string, ...members: string[]): this {
+    return this.push(['SADD', key, ...members])
+  }
+
+  srem(key: string, ...members: string[]): this {
+    return this.push(['SREM', key, ...members])
+  }
+
+  async exec<T extends unknown[] = unknown[]>(): Promise<T> {
+    if (this.commands.length === 0) return [] as unknown as T
+    const replies = await this.driver.send(this.commands)
+    return replies.map(unwrap) as T
+  }
+
+  private push(command: RedisCommand): this {
+    this.commands.push(command)
+    return this
+  }
+}
+
+/**
+ * Lua script run with EVALSHA (falling back to EVAL on NOSCRIPT), or through its
+ * emulation on drivers without Lua.
+ */
+export class RedisScript<T> {
+  readonly sha1: string
+
+  constructor(
+    private readonly client: RedisClient,
+    readonly source: string,
+    private readonly emulate: ScriptEmulator<T>
+  ) {
+    this.sha1 = createHash('sha1').update(source).digest('hex')
+  }
+
+  async exec(keys: string[], args: string[]): Promise<T> {
+    const { driver } = this.client
+    if (driver.runScript) {
+      return driver.runScript(this.emulate, keys, args)
+    }
+
+    try {
+      return await this.client.command<T>(['EVALSHA', this.sha1, keys.length, ...keys, ...args])
+    } catch (error) {
+      if (!(error instanceof RedisReplyError) || !error.message.startsWith('NOSCRIPT')) {
+        throw error
+      }
+      // EVAL also caches the script, so later calls hit EVALSHA
+      return this.client.command<T>(['EVAL', this.source, keys.length, ...keys, ...args])
+    }
+  }
+}
+
+export interface RedisClientOptions {
+  // Batch commands issued in the same tick into one round trip
+  autoPipeline?: boolean
+}
+
+interface QueuedCommand {
+  command: RedisCommand
+  resolve: (reply: RedisReply) => void
+  reject: (error: Error) => void
+}
+
+/**
+ * Driver-agnostic client. With auto-pipelining, every command issued during the
+ * current tick (across concurrent requests) shares a single round trip.
+ */
+export class RedisClient {
+  private queue: QueuedCommand[] = []
+  private readonly autoPipeline: boolean
+
+  constructor(
+    readonly driver: RedisDriver,
+    options: RedisClientOptions = {}
+  ) {
+    this.autoPipeline = options.autoPipeline ?? false
+  }
+
+  get driverName(): RedisDriverName {
+    return this.driver.name
+  }
+
+  async command<T = RedisReply>(command: RedisCommand): Promise<T> {
+    if (!this.autoPipeline) {
+      const [reply] = await this.driver.send([command])
+      return unwrap<T>(reply)
+    }
+
+    const reply = await new Promise<RedisReply>((resolve, reject) => {
+      this.queue.push({ command, resolve, reject })
+      if (this.queue.length === 1) {
+        process.nextTick(() => this.flushQueue())
+      }
+    })
+    return unwrap<T>(reply)
+  }
+
+  ping(): Promise<string> {
+    return this.command<string>(['PING'])
+  }
+
+  get(key: string): Promise<string | null> {
+    return this.command<string | null>(['GET', key])
+  }
+
+  /**
+   * Returns true when the value was written (false only when `nx` blocked it).
+   */
+  async set(key: string, value: RedisArg, options?: SetOptions): Promise<boolean> {
+    return (await this.command(setCommand(key, value, options))) !== null
+  }
+
+  del(...keys: string[]): Promise<number> {
+    return this.command<number>(['DEL', ...keys])
+  }
+
+  ttl(key: string): Promise<number> {
+    return this.command<number>(['TTL', key])
+  }
+
+  incrby(key: string, increment: number): Promise<number> {
+    return this.command<number>(['INCRBY', key, increment])
+  }
+
+  expire(key: string, seconds: number): Promise<number> {
+    return this.command<number>(['EXPIRE', key, seconds])
+  }
+
+  pexpire(key: string, milliseconds: number): Promise<number> {
+    return this.command<number>(['PEXPIRE', key, milliseconds])
+  }
+
+  sadd(key: string, ...members: string[]): Promise<number> {
+    return this.command<number>(['SADD', key, ...members])
+  }
+
+  srem(key: string, ...members: string[]): Promise<number> {
+    return this.command<number>(['SREM', key, ...members])
+  }
+
+  smembers(key: string): Promise<string[]> {
+    return this.command<string[]>(['SMEMBERS', key])
+  }
+
+  pipeline(): RedisPipeline {
+    return new RedisPipeline(this.driver)
+  }
+
+  createScript<T>(source: string, emulate: ScriptEmulator<T>): RedisScript<T> {
+    return new RedisScript(this, source, emulate)
+  }
+
+  private flushQueue(): void {
+    const batch = this.queue
+    this.queue = []
+
+    this.driver.send(batch.map((item) => item.command)).then(
+      (replies) => batch.forEach((item, index) => item.resolve(replies[index] ?? null)),
+      (error: Error) => batch.forEach((item) => item.reject(error))
+    )
+  }
+}
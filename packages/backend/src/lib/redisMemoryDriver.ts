@@ -0,0 +1,192 @@
+import {
+  RedisReplyError,
+  type RedisCommand,
+  type RedisDriver,
+  type RedisReply,
+  type ScriptEmulator,
+} from './redisClient.js'
+
+interface Entry {
+  value: string | Set<string>
+  // Epoch ms; null = no TTL
+  expiresAt: number | null
+}
+
+const WRONGTYPE = 'WRONGTYPE Operation against a key holding the wrong kind of value'
+const NOT_INTEGER = 'ERR value is not an integer or out of range'
+// Expired keys are dropped lazily on access, plus a full sweep every N writes
+const SWEEP_EVERY_WRITES = 1000
+
+function toInteger(value: string | undefined): number {
+  const parsed = Number(value)
+  if (value === undefined || !Number.isSafeInteger(parsed)) {
+    throw new RedisReplyError(NOT_INTEGER)
+  }
+  return parsed
+}
+
+/**
+ * In-process Redis stand-in that honours TTLs. State is per process, so it is meant
+ * for local development, tests and offline benchmarks - not for multiple instances.
+ * Scripts run through their JavaScript emulation.
+ */
+export class MemoryRedisDriver implements RedisDriver {
+  readonly name = 'memory' as const
+  private readonly store = new Map<string, Entry>()
+  private writes = 0
+
+  async send(commands: RedisCommand[]): Promise<RedisReply[]> {
+    return commands.map((command) => {
+      try {
+        return this.execute(command)
+      } catch (error) {
+        if (error instanceof RedisReplyError) return error
+        throw error
+      }
+    })
+  }
+
+  runScript<T>(emulate: ScriptEmulator<T>, keys: string[], args: string[]): T {
+    return emulate((...command) => this.execute(command), keys, args)
+  }
+
+  /**
+   * Executes one command synchronously; error replies are thrown as RedisReplyError.
+   */
+  execute(command: RedisCommand): RedisReply {
+    const [rawName, ...rawArgs] = command
+    const name = String(rawName).toUpperCase()
+    const args = rawArgs.map(String)
+    const now = Date.now()
+
+    switch (name) {
+      case 'PING':
+        return 'PONG'
+      case 'GET':
+        return this.getString(args[0], now)
+      case 'SET':
+        return this.set(args, now)
+      case 'DEL':
+        return args.filter((key) => this.getEntry(key, now) && this.store.delete(key)).length
+      case 'EXISTS':
+        return args.filter((key) => this.getEntry(key, now)).length
+      case 'INCR':
+        return this.incrby(args[0], 1, now)
+      case 'INCRBY':
+        return this.incrby(args[0], toInteger(args[1]), now)
+      case 'EXPIRE':
+        return this.expire(args[0], toInteger(args[1]) * 1000, now)
+      case 'PEXPIRE':
+        return this.expire(args[0], toInteger(args[1]), now)
+      case 'TTL':
+      case 'PTTL': {
+        const entry = this.getEntry(args[0], now)
+        if (!entry) return -2
+        if (entry.expiresAt === null) return -1
+        const ms = entry.expiresAt - now
+        return name === 'TTL' ? Math.ceil(ms / 1000) : ms
+      }
+      case 'SADD': {
+        const set = this.getSet(args[0], now, true)!
+        const before = set.size
+        args.slice(1).forEach((member) => set.add(member))
+        return set.size - before
+      }
+      case 'SREM': {
+        const set = this.getSet(args[0], now, false)
+        if (!set) return 0
+        const removed = args.slice(1).filter((member) => set.delete(member)).length
+        if (set.size === 0) this.store.delete(args[0])
+        return removed
+      }
+      case 'SMEMBERS':
+        return [...(this.getSet(args[0], now, false) ?? [])]
+      case 'SCARD':
+        return this.getSet(args[0], now, false)?.size ?? 0
+      case 'FLUSHALL':
+        this.store.clear()
+        return 'OK'
+      case 'EVAL':
+      case 'EVALSHA':
+        throw new RedisReplyError('ERR the memory driver runs scripts through their emulation')
+      default:
+        throw new RedisReplyError(`ERR unknown command '${name}'`)
+    }
+  }
+
+  private getEntry(key: string, now: number): Entry | undefined {
+    const entry = this.store.get(key)
+    if (entry && entry.expiresAt !== null && entry.expiresAt <= now) {
+      this.store.delete(key)
+      return undefined
+    }
+    return entry
+  }
+
+  private getString(key: string, now: number): string | null {
+    const entry = this.getEntry(key, now)
+    if (!entry) return null
+    if (typeof entry.value !== 'string') throw new RedisReplyError(WRONGTYPE)
+    return entry.value
+  }
+
+  private getSet(key: string, now: number, create: boolean): Set<string> | undefined {
+    const entry = this.getEntry(key, now)
+    if (entry) {
+      if (!(entry.value instanceof Set)) throw new RedisReplyError(WRONGTYPE)
+      return entry.value
+    }
+    if (!create) return undefined
+    const set = new Set<string>()
+    this.write(key, { value: set, expiresAt: null })
+    return set
+  }
+
+  private set(args: string[], now: number): RedisReply {
+    const [key, value, ...options] = args
+    let expiresAt: number | null = null
+    let nx = false
+
+    for (let i = 0; i < options.length; i++) {
+      const option = options[i].toUpperCase()
+      if (option === 'EX') expiresAt = now + toInteger(options[++i]) * 1000
+      else if (option === 'PX') expiresAt = now + toInteger(options[++i])
+      else if (option === 'NX') nx = true
+      else throw new RedisReplyError('ERR syntax error')
+    }
+
+    if (nx && this.getEntry(key, now)) return null
+    this.write(key, { value, expiresAt })
+    return 'OK'
+  }
+
+  private incrby(key: string, increment: number, now: number): number {
+    const current = this.getString(key, now)
+    const value = (current === null ? 0 : toInteger(current)) + increment
+    const entry = this.getEntry(key, now)
+    // INCRBY keeps the existing TTL
+    this.write(key, { value: String(value), expiresAt: entry?.expiresAt ?? null })
+    return value
+  }
+
+  private expire(key: string, ms: number, now: number): number {
+    const entry = this.getEntry(key, now)
+    if (!entry) return 0
+    entry.expiresAt = now + ms
+    return 1
+  }
+
+  private write(key: string, entry: Entry): void {
+    this.store.set(key, entry)
+    if (++this.writes % SWEEP_EVERY_WRITES === 0) {
+      this.sweep()
+    }
+  }
+
+  private sweep(): void {
+    const now = Date.now()
+    for (const key of this.store.keys()) {
+      this.getEntry(key, now)
+    }
+  }
+}
@@ -0,0 +1,240 @@
+import { connect as connectTcp, type Socket } from 'node:net'
+import { connect as connectTls } from 'node:tls'
+import {
+  RedisReplyError,
+  type RedisCommand,
+  type RedisDriver,
+  type RedisReply,
+} from './redisClient.js'
+
+const CRLF = '\r\n'
+
+/**
+ * Encodes commands as RESP arrays of bulk strings.
+ */
+export function encodeCommands(commands: RedisCommand[]): Buffer {
+  let out = ''
+  for (const command of commands) {
+    out += `*${command.length}${CRLF}`
+    for (const arg of command) {
+      const value = String(arg)
+      out += `$${Buffer.byteLength(value)}${CRLF}${value}${CRLF}`
+    }
+  }
+  return Buffer.from(out)
+}
+
+// Marker for "need more bytes"
+const INCOMPLETE = Symbol('incomplete')
+
+/**
+ * Incremental RESP2 reply parser.
+ */
+export class RespParser {
+  private buffer = Buffer.alloc(0)
+  private offset = 0
+
+  /**
+   * Appends data and returns every reply that is now complete.
+   */
+  push(chunk: Buffer): RedisReply[] {
+    this.buffer =
+      this.offset < this.buffer.length
+        ? Buffer.concat([this.buffer.subarray(this.offset), chunk])
+        : chunk
+    this.offset = 0
+
+    const replies: RedisReply[] = []
+    for (;;) {
+      const start = this.offset
+      const reply = this.parse()
+      if (reply === INCOMPLETE) {
+        this.offset = start
+        return replies
+      }
+      replies.push(reply)
+    }
+  }
+
+  private readLine(): string | typeof INCOMPLETE {
+    const end = this.buffer.indexOf(CRLF, this.offset)
+    if (end === -1) return INCOMPLETE
+    const line = this.buffer.toString('utf8', this.offset, end)
+    this.offset = end + 2
+    return line
+  }
+
+  private parse(): RedisReply | typeof INCOMPLETE {
+    if (this.offset >= this.buffer.length) return INCOMPLETE
+    const type = String.fromCharCode(this.buffer[this.offset++])
+    const line = this.readLine()
+    if (line === INCOMPLETE) return INCOMPLETE
+
+    switch (type) {
+      case '+':
+        return line
+      case '-':
+        return new RedisReplyError(line)
+      case ':':
+        return Number(line)
+      case '$': {
+        const length = Number(line)
+        if (length < 0) return null
+        if (this.offset + length + 2 > this.buffer.length) return INCOMPLETE
+        const value = this.buffer.toString('utf8', this.offset, this.offset + length)
+        this.offset += length + 2
+        return value
+      }
+      case '*': {
+        const length = Number(line)
+        if (length < 0) return null
+        const items: RedisReply[] = []
+        for (let i = 0; i < length; i++) {
+          const item = this.parse()
+          if (item === INCOMPLETE) return INCOMPLETE
+          items.push(item)
+        }
+        return items
+      }
+      default:
+        throw new Error(`Unexpected RESP type byte: ${JSON.stringify(type)}`)
+    }
+  }
+}
+
+interface PendingReply {
+  resolve: (reply: RedisReply) => void
+  reject: (error: Error) => void
+}
+
+export interface TcpRedisOptions {
+  // redis://[user:password@]host:port[/db], or rediss:// for TLS
+  url: string
+  connectTimeoutMs?: number
+}
+
+/**
+ * Plain TCP (RESP) driver with a single lazily opened connection. Each batch is written
+ * with one socket write; replies are matched to commands in order.
+ */
+export class TcpRedisDriver implements RedisDriver {
+  readonly name = 'tcp' as const
+  private socket: Socket | null = null
+  private connecting: Promise<Socket> | null = null
+  private readonly pending: PendingReply[] = []
+  private readonly url: URL
+
+  constructor(private readonly options: TcpRedisOptions) {
+    this.url = new URL(options.url)
+  }
+
+  async send(commands: RedisCommand[]): Promise<RedisReply[]> {
+    const socket = await this.connect()
+    return this.write(socket, commands)
+  }
+
+  /**
+   * Closes the connection; pending commands are rejected.
+   */
+  close(): void {
+    this.socket?.destroy()
+    this.socket = null
+  }
+
+  private write(socket: Socket, commands: RedisCommand[]): Promise<RedisReply[]> {
+    const replies = commands.map(
+      () =>
+        new Promise<RedisReply>((resolve, reject) => {
+          this.pending.push({ resolve, reject })
+        })
+    )
+    // Keep the process alive only while replies are outstanding
+    socket.ref()
+    socket.write(encodeCommands(commands))
+    return Promise.all(replies)
+  }
+
+  private connect(): Promise<Socket> {
+    if (this.socket) return Promise.resolve(this.socket)
+    this.connecting ??= this.open().finally(() => {
+      this.connecting = null
+    })
+    return this.connecting
+  }
+
+  private async open(): Promise<Socket> {
+    const { hostname, port, protocol } = this.url
+    const tls = protocol === 'rediss:'
+    const options = { host: hostname, port: Number(port) || 6379 }
+
+    const socket = await new Promise<Socket>((resolve, reject) => {
+      const onError = (error: Error) => reject(error)
+      const connected = tls
+        ? connectTls({ ...options, servername: hostname }, () => resolve(connected))
+        : connectTcp(options, () => resolve(connected))
+      connected.once('error', onError)
+      connected.setTimeout(this.options.connectTimeoutMs ?? 5000, () => {
+        connected.destroy(new Error(`Redis connection to ${hostname}:${options.port} timed out`))
+      })
+      connected.once(tls ? 'secureConnect' : 'connect', () => {
+        connected.off('error', onError)
+        connected.setTimeout(0)
+      })
+    })
+
+    socket.setNoDelay(true)
+    this.attach(socket)
+
+    const handshake: RedisCommand[] = []
+    if (this.url.password) {
+      const username = decodeURIComponent(this.url.username)
+      const password = decodeURIComponent(this.url.password)
+      handshake.push(username ? ['AUTH', username, password] : ['AUTH', password])
+    }
+    const db = Number(this.url.pathname.slice(1))
+    if (db > 0) {
+      handshake.push(['SELECT', db])
+    }
+
+    if (handshake.length > 0) {
+      const failed = (await this.write(socket, handshake)).find(
+        (reply) => reply instanceof RedisReplyError
+      )
+      if (failed) {
+        socket.destroy()
+        throw failed
+      }
+    }
+
+    this.socket = socket
+    return socket
+  }
+
+  private attach(socket: Socket): void {
+    const parser = new RespParser()
+
+    socket.on('data', (chunk: Buffer) => {
+      let replies: RedisReply[]
+      try {
+        replies = parser.push(chunk)
+      } catch (error) {
+        socket.destroy(error as Error)
+        return
+      }
+      for (const reply of replies) {
+        this.pending.shift()?.resolve(reply)
+      }
+      if (this.pending.length === 0) socket.unref()
+    })
+
+    socket.on('error', () => {
+      // Reported through 'close'
+    })
+
+    socket.on('close', () => {
+      if (this.socket === socket) this.socket = null
+      const error = new Error('Redis connection closed')
+      this.pending.splice(0).forEach((item) => item.reject(error))
+    })
+  }
+}
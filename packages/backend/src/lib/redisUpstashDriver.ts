@@ -0,0 +1,45 @@
+import {
+  RedisReplyError,
+  type RedisCommand,
+  type RedisDriver,
+  type RedisReply,
+} from './redisClient.js'
+
+export interface UpstashRestOptions {
+  url: string
+  token: string
+}
+
+type PipelineEntry = { result: RedisReply } | { error: string }
+
+/**
+ * Upstash REST driver: every batch is one HTTPS request to the `/pipeline` endpoint.
+ */
+export class UpstashRestDriver implements RedisDriver {
+  readonly name = 'upstash' as const
+  private readonly endpoint: string
+
+  constructor(private readonly options: UpstashRestOptions) {
+    this.endpoint = `${options.url.replace(/\/$/, '')}/pipeline`
+  }
+
+  async send(commands: RedisCommand[]): Promise<RedisReply[]> {
+    const response = await fetch(this.endpoint, {
+      method: 'POST',
+      headers: {
+        Authorization: `Bearer ${this.options.token}`,
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(commands.map((command) => command.map(String))),
+    })
+
+    if (!response.ok) {
+      throw new Error(`Upstash request failed with status ${response.status}`)
+    }
+
+    const entries = (await response.json()) as PipelineEntry[]
+    return entries.map((entry) =>
+      'error' in entry ? new RedisReplyError(entry.error) : entry.result
+    )
+  }
+}
@@ -0,0 +1,37 @@
+const DAY_MS = 24 * 60 * 60 * 1000
+
+/**
+ * Start of the UTC day holding `date`: the day a row is rolled up under.
+ */
+export function utcDay(date: Date): Date {
+  return new Date(Math.floor(date.getTime() / DAY_MS) * DAY_MS)
+}
+
+// Prisma date filters of the parts of a report range
+export type DayFilter = { gte: Date; lt: Date }
+export type EdgeFilter = { gte: Date; lt: Date } | { gte: Date; lte: Date }
+
+export interface RollupSplit {
+  // Whole UTC days inside the range, read from the daily rollups (null when there are none)
+  days: DayFilter | null
+  // The partial days before and after them, scanned row by row
+  edges: EdgeFilter[]
+}
+
+/**
+ * Splits the inclusive range `[from, to]` of a report into the whole UTC days it covers and
+ * the partial days at its edges. A day is whole when its first and last millisecond are both
+ * in the range, so `00:00:00.000` to `23:59:59.999` reads the day from its rollup.
+ */
+export function splitOnWholeDays(from: Date, to: Date): RollupSplit {
+  const firstDay = utcDay(new Date(from.getTime() + DAY_MS - 1))
+  const endDay = utcDay(new Date(to.getTime() + 1))
+  if (firstDay >= endDay) {
+    return { days: null, edges: [{ gte: from, lte: to }] }
+  }
+
+  const edges: EdgeFilter[] = []
+  if (from < firstDay) edges.push({ gte: from, lt: firstDay })
+  if (endDay <= to) edges.push({ gte: endDay, lte: to })
+  return { days: { gte: firstDay, lt: endDay }, edges }
+}
@@ -1,7 +1,8 @@
 import { Decimal } from '@prisma/client/runtime/library'
 
 /**
- * Recursively converts Prisma Decimal values to numbers for JSON serialization
+ * Recursively converts Prisma Decimal values to numbers for JSON serialization. Only used for
+ * /api routes without a response schema; the others rely on their compiled serializers.
  */
 export function serializeResponse<T>(obj: T): unknown {
   if (obj === null || obj === undefined) {
@@ -97,6 +98,18 @@ export function serializeTransaction<T extends { amount: Decimal }>(
   }
 }
 
+/**
+ * Serializes AppointmentSeries or one of its computed occurrences: price Decimal → number
+ */
+export function serializeAppointmentSeries<T extends { price: Decimal }>(
+  series: T
+): Omit<T, 'price'> & { price: number } {
+  return {
+    ...series,
+    price: series.price.toNumber(),
+  }
+}
+
 // =============================================================================
 // Composite serializers for entities with nested Decimal relations
 // =============================================================================
@@ -166,3 +179,68 @@ export function serializeTransactionWithRelations<T extends TransactionWithRelat
       : transaction.createdBy,
   }
 }
+
+// Sparse rows from `?fields=` projections: any column may be missing
+interface AppointmentProjectionRow {
+  price?: Decimal
+  commissionValue?: Decimal | null
+  professional?: object | null
+  createdBy?: object | null
+  service?: object | null
+}
+
+/**
+ * Converts the listed Decimal columns a row actually has
+ */
+export function decimalsToNumbers(row: object, keys: string[]): Record<string, unknown> {
+  const copy: Record<string, unknown> = { ...row }
+  for (const key of keys) {
+    const value = copy[key]
+    if (value instanceof Decimal) copy[key] = value.toNumber()
+  }
+  return copy
+}
+
+/**
+ * Serializes an Appointment projection, converting only the Decimal columns it selected
+ */
+export function serializeAppointmentProjection(
+  appointment: AppointmentProjectionRow
+): Record<string, unknown> {
+  const serialized = decimalsToNumbers(appointment, ['price', 'commissionValue'])
+  if (appointment.professional) {
+    serialized.professional = decimalsToNumbers(appointment.professional, ['commissionRate'])
+  }
+  if (appointment.createdBy) {
+    serialized.createdBy = decimalsToNumbers(appointment.createdBy, ['commissionRate'])
+  }
+  if (appointment.service) {
+    serialized.service = decimalsToNumbers(appointment.service, ['price'])
+  }
+  return serialized
+}
+
+// Decimal columns of the entities side-loaded by normalized list responses
+const INCLUDED_DECIMAL_COLUMNS: Record<string, string[]> = {
+  professionals: ['commissionRate'],
+  services: ['price'],
+}
+
+/**
+ * Serializes an `included` map; each entity is converted once however many rows refer to it
+ */
+export function serializeIncluded(
+  included: Record<string, Record<string, object>>
+): Record<string, Record<string, Record<string, unknown>>> {
+  return Object.fromEntries(
+    Object.entries(included).map(([collection, entities]) => [
+      collection,
+      Object.fromEntries(
+        Object.entries(entities).map(([id, entity]) => [
+          id,
+          decimalsToNumbers(entity, INCLUDED_DECIMAL_COLUMNS[collection] ?? []),
+        ])
+      ),
+    ])
+  )
+}
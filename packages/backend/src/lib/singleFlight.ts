@@ -0,0 +1,30 @@
+import { incrementCounter } from './metrics.js'
+
+/**
+ * Request coalescing: concurrent callers for the same key share one in-flight promise.
+ * Counters `<name>.executed` and `<name>.coalesced` are recorded in the metrics registry.
+ */
+export class SingleFlight<K, V> {
+  private readonly inFlight = new Map<K, Promise<V>>()
+
+  constructor(private readonly name: string) {}
+
+  has(key: K): boolean {
+    return this.inFlight.has(key)
+  }
+
+  run(key: K, fn: () => Promise<V>): Promise<V> {
+    const existing = this.inFlight.get(key)
+    if (existing) {
+      incrementCounter(`${this.name}.coalesced`)
+      return existing
+    }
+
+    incrementCounter(`${this.name}.executed`)
+    const promise = fn().finally(() => {
+      this.inFlight.delete(key)
+    })
+    this.inFlight.set(key, promise)
+    return promise
+  }
+}
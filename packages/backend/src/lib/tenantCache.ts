@@ -0,0 +1,118 @@
+import { prisma } from './prisma.js'
+import { getCachedTenant, cacheTenant, invalidateTenantCache } from './redis.js'
+import { LruCache } from './lruCache.js'
+import { SingleFlight } from './singleFlight.js'
+import { incrementCounter } from './metrics.js'
+
+export type TenantResolution =
+  | { status: 'active'; tenantId: string }
+  | { status: 'not_found' }
+  | { status: 'inactive' }
+
+// Local tier sits in front of the Redis tier (5 min TTL), so keep it short:
+// other instances only see an invalidation once their local entry expires.
+const LOCAL_TENANT_TTL_MS = 30 * 1000 // 30 seconds
+// Unknown/inactive slugs are cached briefly so bogus slugs don't reach Postgres
+const NEGATIVE_TENANT_TTL_MS = 10 * 1000 // 10 seconds
+const LOCAL_TENANT_MAX_ENTRIES = 1000
+// XFetch beta: > 1 favours earlier refreshes, < 1 later ones
+const EARLY_REFRESH_BETA = 1
+
+const localTenants = new LruCache<string, TenantResolution>({
+  maxEntries: LOCAL_TENANT_MAX_ENTRIES,
+  ttlMs: LOCAL_TENANT_TTL_MS,
+})
+
+// Only one Redis/database lookup per slug is in flight per process
+const tenantLookups = new SingleFlight<string, TenantResolution>('tenant.lookup')
+
+// Moving average of how long a full lookup takes (drives early refresh)
+let lookupCostMs = 0
+
+/**
+ * Probabilistic early expiration (XFetch): the closer an entry is to expiry and the
+ * more expensive a lookup is, the more likely a request triggers a background refresh.
+ */
+function shouldRefreshEarly(expiresAt: number): boolean {
+  return Date.now() - lookupCostMs * EARLY_REFRESH_BETA * Math.log(Math.random()) >= expiresAt
+}
+
+async function fetchTenant(slug: string): Promise<TenantResolution> {
+  const startedAt = Date.now()
+
+  const cachedTenantId = await getCachedTenant(slug)
+  let resolution: TenantResolution
+
+  if (cachedTenantId) {
+    incrementCounter('tenant.cache.redis_hit')
+    resolution = { status: 'active', tenantId: cachedTenantId }
+  } else {
+    // Cache miss - query database
+    incrementCounter('tenant.cache.db_lookup')
+    const barbershop = await prisma.barbershop.findUnique({
+      where: { slug },
+      select: { id: true, isActive: true },
+    })
+
+    if (!barbershop) {
+      resolution = { status: 'not_found' }
+    } else if (!barbershop.isActive) {
+      resolution = { status: 'inactive' }
+    } else {
+      // Cache the tenant for future requests
+      await cacheTenant(slug, barbershop.id)
+      resolution = { status: 'active', tenantId: barbershop.id }
+    }
+  }
+
+  localTenants.set(
+    slug,
+    resolution,
+    resolution.status === 'active' ? LOCAL_TENANT_TTL_MS : NEGATIVE_TENANT_TTL_MS
+  )
+  lookupCostMs = lookupCostMs * 0.8 + (Date.now() - startedAt) * 0.2
+
+  return resolution
+}
+
+function lookupTenant(slug: string): Promise<TenantResolution> {
+  return tenantLookups.run(slug, () => fetchTenant(slug))
+}
+
+/**
+ * Resolves a tenant slug using in-process LRU → Redis → database.
+ */
+export async function resolveTenant(slug: string): Promise<TenantResolution> {
+  const local = localTenants.getEntry(slug)
+  if (local) {
+    incrementCounter('tenant.cache.local_hit')
+
+    // Refresh hot entries in the background before they expire
+    if (!tenantLookups.has(slug) && shouldRefreshEarly(local.expiresAt)) {
+      incrementCounter('tenant.cache.early_refresh')
+      lookupTenant(slug).catch((error) => {
+        console.error('Background tenant refresh failed:', error)
+      })
+    }
+
+    return local.value
+  }
+
+  return lookupTenant(slug)
+}
+
+/**
+ * Drops a slug from both cache tiers (call after tenant changes).
+ */
+export async function invalidateTenant(slug: string): Promise<void> {
+  localTenants.delete(slug)
+  await invalidateTenantCache(slug)
+}
+
+/**
+ * Clears the in-process tier (used by tests).
+ */
+export function clearLocalTenantCache(): void {
+  localTenants.clear()
+  lookupCostMs = 0
+}
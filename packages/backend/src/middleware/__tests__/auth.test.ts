@@ -0,0 +1,99 @@
+import { describe, it, expect, beforeEach, afterEach } from 'vitest'
+import Fastify, { type FastifyInstance } from 'fastify'
+import jwt from '@fastify/jwt'
+import { authMiddleware, requireAuth, clearVerifiedTokenCache } from '../auth'
+import { getCounter, resetMetrics } from '../../lib/metrics'
+
+async function buildAuthApp(): Promise<FastifyInstance> {
+  const app = Fastify({ logger: false })
+  await app.register(jwt, { secret: 'test-secret-key-min-32-chars-long!!' })
+  app.addHook('onRequest', authMiddleware)
+  app.get('/protected', { preHandler: requireAuth }, async (request) => ({ id: request.user.id }))
+  // Reports the role it was given, then changes it
+  app.get('/demote', { preHandler: requireAuth }, async (request) => {
+    const { role } = request.user
+    request.user.role = 'BARBER'
+    return { role }
+  })
+  return app
+}
+
+describe('JWT verification', () => {
+  let app: FastifyInstance
+  let token: string
+
+  beforeEach(async () => {
+    clearVerifiedTokenCache()
+    resetMetrics()
+    app = await buildAuthApp()
+    token = app.jwt.sign(
+      { id: 'user-1', email: 'user@example.com', barbershopId: 'tenant-id', role: 'ADMIN' },
+      { expiresIn: '15m' }
+    )
+  })
+
+  afterEach(async () => {
+    await app.close()
+  })
+
+  it('verifies the token once per request', async () => {
+    const response = await app.inject({
+      method: 'GET',
+      url: '/protected',
+      headers: { authorization: `Bearer ${token}` },
+    })
+
+    expect(response.statusCode).toBe(200)
+    expect(response.json()).toEqual({ id: 'user-1' })
+    expect(getCounter('auth.token_cache.miss')).toBe(1)
+    expect(getCounter('auth.token_cache.hit')).toBe(0)
+  })
+
+  it('reuses verified tokens across requests', async () => {
+    for (let i = 0; i < 3; i++) {
+      const response = await app.inject({
+        method: 'GET',
+        url: '/protected',
+        headers: { authorization: `Bearer ${token}` },
+      })
+      expect(response.json()).toEqual({ id: 'user-1' })
+    }
+
+    expect(getCounter('auth.token_cache.miss')).toBe(1)
+    expect(getCounter('auth.token_cache.hit')).toBe(2)
+  })
+
+  it('does not share changes to request.user between requests', async () => {
+    // The first request caches the payload, the others are served from the cache
+    for (let i = 0; i < 3; i++) {
+      const response = await app.inject({
+        method: 'GET',
+        url: '/demote',
+        headers: { authorization: `Bearer ${token}` },
+      })
+      expect(response.json()).toEqual({ role: 'ADMIN' })
+    }
+
+    expect(getCounter('auth.token_cache.hit')).toBe(2)
+  })
+
+  it('rejects invalid tokens without caching them', async () => {
+    for (let i = 0; i < 2; i++) {
+      const response = await app.inject({
+        method: 'GET',
+        url: '/protected',
+        headers: { authorization: `Bearer ${token}tampered` },
+      })
+      expect(response.statusCode).toBe(401)
+    }
+
+    expect(getCounter('auth.token_cache.hit')).toBe(0)
+  })
+
+  it('rejects requests without a token', async () => {
+    const response = await app.inject({ method: 'GET', url: '/protected' })
+
+    expect(response.statusCode).toBe(401)
+    expect(response.json()).toEqual({ error: 'Authentication required' })
+  })
+})
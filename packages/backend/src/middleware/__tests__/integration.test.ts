@@ -2,6 +2,7 @@ import { describe, it, expect, beforeEach, vi, afterEach } from 'vitest'
 import { buildApp } from '../../app.js'
 import { prisma } from '../../lib/prisma.js'
 import { ipRatelimit, tenantRatelimit, getCachedTenant, cacheTenant } from '../../lib/redis.js'
+import { clearLocalTenantCache } from '../../lib/tenantCache.js'
 
 type RateLimitResult = Awaited<ReturnType<typeof ipRatelimit.limit>>
 type BarbershopRecord = Awaited<ReturnType<typeof prisma.barbershop.findUnique>>
@@ -32,6 +33,9 @@ vi.mock('../../lib/redis.js', () => ({
   deleteRefreshToken: vi.fn(),
   deleteAllRefreshTokens: vi.fn(),
   invalidateTenantCache: vi.fn(),
+  getCachedCount: vi.fn(),
+  cacheCount: vi.fn(),
+  invalidateCachedCounts: vi.fn(),
 }))
 
 describe('Middleware Integration Tests', () => {
@@ -39,6 +43,7 @@ describe('Middleware Integration Tests', () => {
 
   beforeEach(async () => {
     vi.clearAllMocks()
+    clearLocalTenantCache()
     vi.mocked(ipRatelimit.limit).mockResolvedValue({
       success: true,
       limit: 100,
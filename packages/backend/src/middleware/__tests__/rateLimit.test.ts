@@ -1,9 +1,12 @@
 import { describe, it, expect, beforeEach, vi } from 'vitest'
-import type { FastifyRequest, FastifyReply } from 'fastify'
+import Fastify, { type FastifyInstance, type FastifyRequest, type FastifyReply } from 'fastify'
 import { rateLimitMiddleware } from '../rateLimit'
+import { RATE_LIMIT_COST } from '../../lib/rateLimitConfig'
 
 // Mock dependencies
 vi.mock('../../lib/redis', () => ({
+  // No driver name: strict mode goes to the Upstash limiters below
+  redis: {},
   ipRatelimit: {
     limit: vi.fn(),
   },
@@ -12,8 +15,29 @@ vi.mock('../../lib/redis', () => ({
   },
 }))
 
+// Route modules are registered only to read their config; no query runs
+vi.mock('../../lib/prisma', () => ({ prisma: {} }))
+
 import { ipRatelimit, tenantRatelimit } from '../../lib/redis'
 
+/**
+ * The `config` that a routes plugin declares for one of its routes.
+ */
+async function routeConfig(
+  plugin: (app: FastifyInstance) => Promise<void>,
+  method: string,
+  url: string
+): Promise<unknown> {
+  const app = Fastify()
+  let config: unknown
+  app.addHook('onRoute', (route) => {
+    if (route.method === method && route.url === url) config = route.config
+  })
+  await app.register(plugin)
+  await app.close()
+  return config
+}
+
 describe('rateLimitMiddleware', () => {
   let mockRequest: Partial<FastifyRequest>
   let mockReply: Partial<FastifyReply>
@@ -296,4 +320,105 @@ describe('rateLimitMiddleware', () => {
       })
     })
   })
+
+  describe('Route cost', () => {
+    it('should consume the route cost from the tenant limit', async () => {
+      vi.mocked(ipRatelimit.limit).mockResolvedValue({
+        success: true,
+        limit: 100,
+        remaining: 99,
+        reset: Date.now() + 60000,
+        pending: Promise.resolve(),
+      })
+      vi.mocked(tenantRatelimit.limit).mockResolvedValue({
+        success: true,
+        limit: 1000,
+        remaining: 960,
+        reset: Date.now() + 60000,
+        pending: Promise.resolve(),
+      })
+
+      mockRequest = {
+        url: '/api/reports/summary',
+        headers: {},
+        ip: '192.168.1.1',
+        tenantId: 'barbershop-1',
+        routeOptions: { config: { rateLimitCost: () => 40 } },
+      } as unknown as Partial<FastifyRequest>
+
+      await rateLimitMiddleware(mockRequest as FastifyRequest, mockReply as FastifyReply)
+
+      expect(ipRatelimit.limit).toHaveBeenCalledWith('192.168.1.1')
+      expect(tenantRatelimit.limit).toHaveBeenCalledWith('barbershop-1', { rate: 40 })
+      expect(headerMock).toHaveBeenCalledWith('X-RateLimit-Remaining', '960')
+    })
+
+    it('should charge bulk bookings the bulk cost', async () => {
+      vi.mocked(ipRatelimit.limit).mockResolvedValue({
+        success: true,
+        limit: 100,
+        remaining: 99,
+        reset: Date.now() + 60000,
+        pending: Promise.resolve(),
+      })
+      vi.mocked(tenantRatelimit.limit).mockResolvedValue({
+        success: true,
+        limit: 1000,
+        remaining: 980,
+        reset: Date.now() + 60000,
+        pending: Promise.resolve(),
+      })
+      const { appointmentRoutes } = await import('../../routes/appointments')
+
+      mockRequest = {
+        url: '/api/appointments/bulk',
+        headers: {},
+        ip: '192.168.1.1',
+        tenantId: 'barbershop-1',
+        routeOptions: {
+          config: await routeConfig(appointmentRoutes, 'POST', '/appointments/bulk'),
+        },
+      } as unknown as Partial<FastifyRequest>
+
+      await rateLimitMiddleware(mockRequest as FastifyRequest, mockReply as FastifyReply)
+
+      expect(tenantRatelimit.limit).toHaveBeenCalledWith('barbershop-1', {
+        rate: RATE_LIMIT_COST.bulk,
+      })
+    })
+
+    it('should charge exports the export cost', async () => {
+      vi.mocked(ipRatelimit.limit).mockResolvedValue({
+        success: true,
+        limit: 100,
+        remaining: 99,
+        reset: Date.now() + 60000,
+        pending: Promise.resolve(),
+      })
+      vi.mocked(tenantRatelimit.limit).mockResolvedValue({
+        success: true,
+        limit: 1000,
+        remaining: 950,
+        reset: Date.now() + 60000,
+        pending: Promise.resolve(),
+      })
+      const { transactionRoutes } = await import('../../routes/transactions')
+
+      mockRequest = {
+        url: '/api/transactions/export',
+        headers: {},
+        ip: '192.168.1.1',
+        tenantId: 'barbershop-1',
+        routeOptions: {
+          config: await routeConfig(transactionRoutes, 'GET', '/transactions/export'),
+        },
+      } as unknown as Partial<FastifyRequest>
+
+      await rateLimitMiddleware(mockRequest as FastifyRequest, mockReply as FastifyReply)
+
+      expect(tenantRatelimit.limit).toHaveBeenCalledWith('barbershop-1', {
+        rate: RATE_LIMIT_COST.export,
+      })
+    })
+  })
 })
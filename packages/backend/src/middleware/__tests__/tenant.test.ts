@@ -14,10 +14,13 @@ vi.mock('../../lib/prisma', () => ({
 vi.mock('../../lib/redis', () => ({
   getCachedTenant: vi.fn(),
   cacheTenant: vi.fn(),
+  invalidateTenantCache: vi.fn(),
 }))
 
 import { prisma } from '../../lib/prisma'
-import { getCachedTenant, cacheTenant } from '../../lib/redis'
+import { getCachedTenant, cacheTenant, invalidateTenantCache } from '../../lib/redis'
+import { clearLocalTenantCache, invalidateTenant } from '../../lib/tenantCache'
+import { getCounter, resetMetrics } from '../../lib/metrics'
 
 type BarbershopRecord = Awaited<ReturnType<typeof prisma.barbershop.findUnique>>
 
@@ -30,6 +33,8 @@ describe('tenantMiddleware', () => {
   beforeEach(() => {
     // Reset mocks
     vi.clearAllMocks()
+    clearLocalTenantCache()
+    resetMetrics()
 
     // Setup mock reply
     statusMock = vi.fn().mockReturnThis()
@@ -231,4 +236,112 @@ describe('tenantMiddleware', () => {
       expect(sendMock).not.toHaveBeenCalled()
     })
   })
+
+  describe('Local tenant cache tier', () => {
+    it('should serve repeated lookups from memory without hitting Redis', async () => {
+      vi.mocked(getCachedTenant).mockResolvedValue('barbershop-1')
+
+      for (let i = 0; i < 3; i++) {
+        mockRequest = { url: '/api/professionals', headers: { 'x-tenant-slug': 'hot-shop' } }
+        await tenantMiddleware(mockRequest as FastifyRequest, mockReply as FastifyReply)
+        expect(mockRequest.tenantId).toBe('barbershop-1')
+      }
+
+      expect(getCachedTenant).toHaveBeenCalledTimes(1)
+    })
+
+    it('should negatively cache unknown slugs', async () => {
+      vi.mocked(getCachedTenant).mockResolvedValue(null)
+      vi.mocked(prisma.barbershop.findUnique).mockResolvedValue(null)
+
+      for (let i = 0; i < 3; i++) {
+        mockRequest = { url: '/api/professionals', headers: { 'x-tenant-slug': 'bogus-slug' } }
+        await tenantMiddleware(mockRequest as FastifyRequest, mockReply as FastifyReply)
+      }
+
+      expect(statusMock).toHaveBeenCalledTimes(3)
+      expect(statusMock).toHaveBeenCalledWith(404)
+      expect(prisma.barbershop.findUnique).toHaveBeenCalledTimes(1)
+    })
+
+    it('should negatively cache inactive slugs', async () => {
+      vi.mocked(getCachedTenant).mockResolvedValue(null)
+      vi.mocked(prisma.barbershop.findUnique).mockResolvedValue({
+        id: 'barbershop-3',
+        isActive: false,
+      } as BarbershopRecord)
+
+      for (let i = 0; i < 2; i++) {
+        mockRequest = { url: '/api/professionals', headers: { 'x-tenant-slug': 'closed-shop' } }
+        await tenantMiddleware(mockRequest as FastifyRequest, mockReply as FastifyReply)
+      }
+
+      expect(prisma.barbershop.findUnique).toHaveBeenCalledTimes(1)
+      expect(cacheTenant).not.toHaveBeenCalled()
+    })
+
+    it('should drop both tiers when a tenant is invalidated', async () => {
+      vi.mocked(getCachedTenant).mockResolvedValue('barbershop-1')
+
+      mockRequest = { url: '/api/professionals', headers: { 'x-tenant-slug': 'hot-shop' } }
+      await tenantMiddleware(mockRequest as FastifyRequest, mockReply as FastifyReply)
+
+      await invalidateTenant('hot-shop')
+      expect(invalidateTenantCache).toHaveBeenCalledWith('hot-shop')
+
+      mockRequest = { url: '/api/professionals', headers: { 'x-tenant-slug': 'hot-shop' } }
+      await tenantMiddleware(mockRequest as FastifyRequest, mockReply as FastifyReply)
+
+      expect(getCachedTenant).toHaveBeenCalledTimes(2)
+    })
+  })
+
+  describe('Lookup coalescing', () => {
+    it('should run a single lookup for concurrent requests on a cold slug', async () => {
+      let resolveCache: (value: string | null) => void = () => {}
+      vi.mocked(getCachedTenant).mockReturnValue(
+        new Promise((resolve) => {
+          resolveCache = resolve
+        })
+      )
+      vi.mocked(prisma.barbershop.findUnique).mockResolvedValue({
+        id: 'barbershop-5',
+        isActive: true,
+      } as BarbershopRecord)
+
+      const requests = Array.from({ length: 5 }, () => ({
+        url: '/api/professionals',
+        headers: { 'x-tenant-slug': 'busy-shop' },
+      })) as Partial<FastifyRequest>[]
+
+      const pending = requests.map((req) =>
+        tenantMiddleware(req as FastifyRequest, mockReply as FastifyReply)
+      )
+      resolveCache(null)
+      await Promise.all(pending)
+
+      expect(getCachedTenant).toHaveBeenCalledTimes(1)
+      expect(prisma.barbershop.findUnique).toHaveBeenCalledTimes(1)
+      expect(cacheTenant).toHaveBeenCalledTimes(1)
+      expect(requests.every((req) => req.tenantId === 'barbershop-5')).toBe(true)
+      expect(getCounter('tenant.lookup.executed')).toBe(1)
+      expect(getCounter('tenant.lookup.coalesced')).toBe(4)
+    })
+
+    it('should start a new lookup once the previous one settled', async () => {
+      vi.mocked(getCachedTenant).mockRejectedValueOnce(new Error('Redis unavailable'))
+
+      mockRequest = { url: '/api/professionals', headers: { 'x-tenant-slug': 'flaky-shop' } }
+      await expect(
+        tenantMiddleware(mockRequest as FastifyRequest, mockReply as FastifyReply)
+      ).rejects.toThrow('Redis unavailable')
+
+      vi.mocked(getCachedTenant).mockResolvedValue('barbershop-6')
+      mockRequest = { url: '/api/professionals', headers: { 'x-tenant-slug': 'flaky-shop' } }
+      await tenantMiddleware(mockRequest as FastifyRequest, mockReply as FastifyReply)
+
+      expect(mockRequest.tenantId).toBe('barbershop-6')
+      expect(getCounter('tenant.lookup.executed')).toBe(2)
+    })
+  })
 })
@@ -1,20 +1,93 @@
+import { createHash } from 'node:crypto'
 import type { FastifyRequest, FastifyReply } from 'fastify'
 import type { AuthenticatedUser } from '../types/index.js'
+import { LruCache } from '../lib/lruCache.js'
+import { incrementCounter } from '../lib/metrics.js'
+
+// Access tokens live 15 minutes; entries never outlive the token's own `exp`
+const VERIFIED_TOKEN_MAX_TTL_MS = 15 * 60 * 1000
+const VERIFIED_TOKEN_MAX_ENTRIES = 5000
+
+type VerifiedPayload = AuthenticatedUser & { exp?: number }
+
+// Process-wide: token hash -> verified payload (skips HMAC + JSON parsing for hot clients)
+const verifiedTokens = new LruCache<string, VerifiedPayload>({
+  maxEntries: VERIFIED_TOKEN_MAX_ENTRIES,
+  ttlMs: VERIFIED_TOKEN_MAX_TTL_MS,
+})
+
+// Per-request memo: authMiddleware and requireAuth share one verification
+const requestVerifications = new WeakMap<FastifyRequest, Promise<AuthenticatedUser | null>>()
+
+function getBearerToken(request: FastifyRequest): string | null {
+  const header = request.headers.authorization
+  if (!header) return null
+
+  const [scheme, token] = header.split(' ')
+  return scheme?.toLowerCase() === 'bearer' && token ? token : null
+}
+
+async function verify(request: FastifyRequest): Promise<AuthenticatedUser | null> {
+  const token = getBearerToken(request)
+  if (!token) return null
+
+  const tokenHash = createHash('sha256').update(token).digest('base64url')
+  const cached = verifiedTokens.get(tokenHash)
+  if (cached) {
+    incrementCounter('auth.token_cache.hit')
+    // A copy per request, so a handler that changes request.user does not change the cache
+    request.user = { ...cached }
+    return request.user
+  }
+
+  try {
+    const payload = await request.jwtVerify<VerifiedPayload>()
+    incrementCounter('auth.token_cache.miss')
+
+    const ttlMs = payload.exp
+      ? Math.min(payload.exp * 1000 - Date.now(), VERIFIED_TOKEN_MAX_TTL_MS)
+      : VERIFIED_TOKEN_MAX_TTL_MS
+    if (ttlMs > 0) {
+      // Cached apart from request.user, which the handlers of this request may change
+      verifiedTokens.set(tokenHash, { ...payload }, ttlMs)
+    }
+
+    return payload
+  } catch {
+    return null
+  }
+}
+
+/**
+ * Verifies the request's bearer token at most once per request.
+ * Sets `request.user` and resolves to it, or resolves to null when the token is
+ * missing or invalid.
+ */
+export function verifyRequestToken(request: FastifyRequest): Promise<AuthenticatedUser | null> {
+  let verification = requestVerifications.get(request)
+  if (!verification) {
+    verification = verify(request)
+    requestVerifications.set(request, verification)
+  }
+  return verification
+}
+
+/**
+ * Clears the verified-token cache (used by tests).
+ */
+export function clearVerifiedTokenCache(): void {
+  verifiedTokens.clear()
+}
 
 /**
  * Middleware that attempts JWT verification but doesn't block on failure.
  * Use for routes where authentication is optional or will be checked in the controller.
  */
 export async function authMiddleware(request: FastifyRequest, _reply: FastifyReply): Promise<void> {
-  try {
-    // Verify JWT token
-    await request.jwtVerify()
-    // JWT payload is now available as request.user
-  } catch {
-    // Token verification failed - user is not authenticated
-    // Don't reply here, let the route handler decide what to do
-    // Some routes are public, others require auth
-  }
+  // JWT payload is available as request.user when the token is valid.
+  // Don't reply here, let the route handler decide what to do
+  // Some routes are public, others require auth
+  await verifyRequestToken(request)
 }
 
 /**
@@ -23,9 +96,9 @@ export async function authMiddleware(request: FastifyRequest, _reply: FastifyRep
  * Returns 401 if no valid token is present.
  */
 export async function requireAuth(request: FastifyRequest, reply: FastifyReply): Promise<void> {
-  try {
-    await request.jwtVerify()
-  } catch {
+  // Reuses the verification done by the global authMiddleware hook
+  const user = await verifyRequestToken(request)
+  if (!user) {
     return reply.status(401).send({ error: 'Authentication required' })
   }
 }
@@ -1,8 +1,17 @@
 import type { FastifyRequest, FastifyReply } from 'fastify'
-import { ipRatelimit, tenantRatelimit } from '../lib/redis.js'
+import { limitRequest } from '../lib/rateLimiter.js'
 
 const PUBLIC_ROUTES = ['/health', '/docs', '/']
 
+/**
+ * Tenant tokens consumed by the matched route (`config.rateLimitCost`, default 1).
+ */
+function getRateLimitCost(request: FastifyRequest): number {
+  const configured = request.routeOptions?.config?.rateLimitCost
+  const cost = typeof configured === 'function' ? configured(request) : configured
+  return cost && cost > 0 ? Math.ceil(cost) : 1
+}
+
 export async function rateLimitMiddleware(
   request: FastifyRequest,
   reply: FastifyReply
@@ -28,8 +37,13 @@ export async function rateLimitMiddleware(
     request.ip ||
     'unknown'
 
-  // Rate limit by IP
-  const ipLimit = await ipRatelimit.limit(clientIp)
+  // Rate limit by IP and tenant (if tenant is available); heavy routes cost more tenant tokens.
+  // Decided locally by default; RATE_LIMIT_MODE=atomic uses a single Redis script call.
+  const { ip: ipLimit, tenant: tenantLimit } = await limitRequest(
+    clientIp,
+    request.tenantId,
+    getRateLimitCost(request)
+  )
 
   if (!ipLimit.success) {
     setRateLimitHeaders(ipLimit)
@@ -42,10 +56,7 @@ export async function rateLimitMiddleware(
 
   let activeLimit = ipLimit
 
-  // Rate limit by tenant (if tenant is available)
-  if (request.tenantId) {
-    const tenantLimit = await tenantRatelimit.limit(request.tenantId)
-
+  if (tenantLimit) {
     if (!tenantLimit.success) {
       setRateLimitHeaders(tenantLimit)
       reply.status(429).send({
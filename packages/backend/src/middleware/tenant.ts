@@ -1,6 +1,5 @@
 import type { FastifyRequest, FastifyReply } from 'fastify'
-import { prisma } from '../lib/prisma.js'
-import { getCachedTenant, cacheTenant } from '../lib/redis.js'
+import { resolveTenant } from '../lib/tenantCache.js'
 
 const PUBLIC_ROUTES = ['/health', '/docs', '/']
 
@@ -26,38 +25,25 @@ export async function tenantMiddleware(
     })
   }
 
-  // Try to get tenant from cache first
-  let tenantId = await getCachedTenant(tenantSlug)
+  // Resolve tenant through the local LRU, Redis and finally the database
+  const tenant = await resolveTenant(tenantSlug)
 
-  if (!tenantId) {
-    // Cache miss - query database
-    const barbershop = await prisma.barbershop.findUnique({
-      where: { slug: tenantSlug },
-      select: { id: true, isActive: true },
+  if (tenant.status === 'not_found') {
+    return reply.status(404).send({
+      error: 'Tenant not found',
+      message: `Barbershop with slug "${tenantSlug}" does not exist`,
     })
+  }
 
-    if (!barbershop) {
-      return reply.status(404).send({
-        error: 'Tenant not found',
-        message: `Barbershop with slug "${tenantSlug}" does not exist`,
-      })
-    }
-
-    if (!barbershop.isActive) {
-      return reply.status(404).send({
-        error: 'Tenant not found',
-        message: `Barbershop with slug "${tenantSlug}" is inactive`,
-      })
-    }
-
-    tenantId = barbershop.id
-
-    // Cache the tenant for future requests
-    await cacheTenant(tenantSlug, tenantId)
+  if (tenant.status === 'inactive') {
+    return reply.status(404).send({
+      error: 'Tenant not found',
+      message: `Barbershop with slug "${tenantSlug}" is inactive`,
+    })
   }
 
   // Inject tenant info into request
-  request.tenantId = tenantId
+  request.tenantId = tenant.tenantId
   request.tenantSlug = tenantSlug
 
   // Note: RLS policies will use application-level filtering via barbershopId
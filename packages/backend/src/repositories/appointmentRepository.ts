@@ -1,6 +1,34 @@
 import { prisma } from '../lib/prisma.js'
-import type { Prisma, Appointment, AppointmentStatus } from '@prisma/client'
-import { addMinutes, subMinutes } from 'date-fns'
+import { orConflict, orNotFound } from '../lib/prismaErrors.js'
+import { countTotal, invalidateCounts } from '../lib/countCache.js'
+import type { Prisma, Appointment, AppointmentSeries, AppointmentStatus } from '@prisma/client'
+import { indexById, selectOf, type IncludedEntities } from '../lib/projection.js'
+import { lockProfessionals } from '../lib/advisoryLock.js'
+import { expandOccurrences, WEEK_MS } from '../lib/recurrence.js'
+import { professionalRollupRepository } from './professionalRollupRepository.js'
+import {
+  offsetTake,
+  resolveTotalMode,
+  seekBatches,
+  seekOrderBy,
+  seekWhere,
+  STREAM_BATCH_SIZE,
+  toCursorPage,
+  toOffsetPage,
+  type CursorPagination,
+  type OffsetPagination,
+  type TotalMode,
+} from '../lib/pagination.js'
+
+// Exclusion constraint rejecting overlapping non-cancelled appointments of a professional
+const OVERLAP_CONSTRAINT = 'appointments_no_overlap'
+
+export const APPOINTMENT_CONFLICT_MESSAGE =
+  'Professional has a conflicting appointment at this time'
+
+// A guarded write found the appointment in another status than the one it was checked against
+export const APPOINTMENT_STATUS_CHANGED_MESSAGE =
+  'Appointment status was changed by a conflicting request'
 
 const professionalPublicSelect = {
   id: true,
@@ -14,19 +42,164 @@ const professionalPublicSelect = {
   updatedAt: true,
 } as const
 
+// Default client projection: pushSubscription is a JSON blob only notifications need
+const clientPublicSelect = {
+  id: true,
+  barbershopId: true,
+  name: true,
+  phone: true,
+  isActive: true,
+  createdAt: true,
+  updatedAt: true,
+} as const
+
+const appointmentInclude = {
+  professional: { select: professionalPublicSelect },
+  createdBy: { select: professionalPublicSelect },
+  client: { select: clientPublicSelect },
+  service: true,
+} as const
+
+export const APPOINTMENT_FIELDS = [
+  'id',
+  'barbershopId',
+  'professionalId',
+  'clientId',
+  'serviceId',
+  'createdById',
+  'date',
+  'endsAt',
+  'status',
+  'price',
+  'commissionValue',
+  'notes',
+  'createdAt',
+  'updatedAt',
+] as const
+
+export const APPOINTMENT_RELATIONS = ['professional', 'createdBy', 'client', 'service'] as const
+
+export type AppointmentRelation = (typeof APPOINTMENT_RELATIONS)[number]
+
+const PROFESSIONAL_FIELDS = Object.keys(professionalPublicSelect)
+
+// Columns of each relation when the caller does not name any
+const DEFAULT_RELATION_FIELDS: Record<AppointmentRelation, readonly string[]> = {
+  professional: PROFESSIONAL_FIELDS,
+  createdBy: PROFESSIONAL_FIELDS,
+  client: Object.keys(clientPublicSelect),
+  service: [
+    'id',
+    'barbershopId',
+    'name',
+    'price',
+    'duration',
+    'isActive',
+    'createdAt',
+    'updatedAt',
+  ],
+}
+
+// Fields a caller may pick per relation (`?fields=client.name`)
+const RELATION_FIELDS: Record<AppointmentRelation, readonly string[]> = {
+  ...DEFAULT_RELATION_FIELDS,
+  client: [...DEFAULT_RELATION_FIELDS.client, 'pushSubscription'],
+}
+
+// Foreign key of each relation; normalized responses keep it in the row
+export const APPOINTMENT_FOREIGN_KEYS = {
+  professional: 'professionalId',
+  createdBy: 'createdById',
+  client: 'clientId',
+  service: 'serviceId',
+} as const
+
+/**
+ * Columns to side-load for a relation: the named `relation.column` paths plus `id`, else the
+ * default projection.
+ */
+function relationColumns(relation: AppointmentRelation, fields?: string[]): string[] {
+  const prefix = `${relation}.`
+  const named = (fields ?? [])
+    .filter((path) => path.startsWith(prefix))
+    .map((path) => path.slice(prefix.length))
+  return named.length > 0 ? ['id', ...named] : [...DEFAULT_RELATION_FIELDS[relation]]
+}
+
+// Values accepted by `?fields=`: appointment columns and `relation.column`
+export const APPOINTMENT_FIELD_PATHS = [
+  ...APPOINTMENT_FIELDS,
+  ...APPOINTMENT_RELATIONS.flatMap((relation) =>
+    RELATION_FIELDS[relation].map((field) => `${relation}.${field}`)
+  ),
+]
+
+export interface AppointmentProjection {
+  // Appointment columns and `relation.column` paths; all columns when undefined
+  fields?: string[]
+  // Relations to embed with their default projection; all when undefined
+  include?: AppointmentRelation[]
+}
+
+/**
+ * Prisma `select` for a projection. `id` and `date` (the sort and cursor key) are always
+ * selected; naming a `relation.column` embeds that relation with only the named columns.
+ */
+export function buildAppointmentSelect(projection: AppointmentProjection = {}) {
+  const { fields, include } = projection
+  const select: Record<string, unknown> = {}
+
+  const columns = fields?.filter((field) => !field.includes('.'))
+  for (const column of columns ? ['id', 'date', ...columns] : APPOINTMENT_FIELDS) {
+    select[column] = true
+  }
+
+  const relations = new Set<AppointmentRelation>(include ?? APPOINTMENT_RELATIONS)
+  const relationColumns = new Map<AppointmentRelation, string[]>()
+  for (const path of fields ?? []) {
+    const [relation, column] = path.split('.') as [AppointmentRelation, string | undefined]
+    if (!column) continue
+    relations.add(relation)
+    relationColumns.set(relation, [...(relationColumns.get(relation) ?? ['id']), column])
+  }
+
+  for (const relation of relations) {
+    const columns = relationColumns.get(relation)
+    select[relation] = columns ? { select: selectOf(columns) } : appointmentInclude[relation]
+  }
+
+  return select as Prisma.AppointmentSelect
+}
+
 export interface PaginationParams {
   page: number
   limit: number
+  // Set (possibly empty) for keyset pagination; `page` is then ignored
+  cursor?: string
+  withTotal?: TotalMode
 }
 
-export interface AppointmentListResult {
-  data: Appointment[]
-  pagination: {
-    page: number
-    limit: number
-    total: number
-    totalPages: number
+type RelationRow = Record<string, unknown>
+
+/**
+ * Appointment row shaped by a projection; only `id` and `date` are always present.
+ */
+export type ProjectedAppointment = Pick<Appointment, 'id' | 'date'> &
+  Partial<Appointment> & {
+    professional?: RelationRow
+    createdBy?: RelationRow
+    client?: RelationRow
+    service?: RelationRow
   }
+
+// A select built at runtime loses Prisma's static row type
+function findProjected(args: Prisma.AppointmentFindManyArgs): Promise<ProjectedAppointment[]> {
+  return prisma.appointment.findMany(args) as unknown as Promise<ProjectedAppointment[]>
+}
+
+export interface AppointmentListResult {
+  data: ProjectedAppointment[]
+  pagination: OffsetPagination | CursorPagination
 }
 
 export interface ListFilters {
@@ -37,139 +210,587 @@ export interface ListFilters {
   endDate?: string
 }
 
+function listWhere(barbershopId: string, filters?: ListFilters): Prisma.AppointmentWhereInput {
+  return {
+    barbershopId,
+    ...(filters?.status && { status: filters.status }),
+    ...(filters?.professionalId && { professionalId: filters.professionalId }),
+    ...(filters?.clientId && { clientId: filters.clientId }),
+    ...(filters?.startDate &&
+      filters?.endDate && {
+        date: {
+          gte: new Date(filters.startDate),
+          lte: new Date(filters.endDate),
+        },
+      }),
+  }
+}
+
+export interface BookingInput {
+  barbershopId: string
+  professionalId: string
+  clientId: string
+  serviceId: string
+  createdById: string
+  date: Date
+  notes: string | null
+}
+
+export interface BusyInterval {
+  professionalId: string
+  date: Date
+  endsAt: Date
+}
+
+/**
+ * Occurrence of a series that has no appointment row yet, computed from the series.
+ */
+export interface SeriesOccurrence extends BusyInterval {
+  seriesId: string
+  clientId: string
+  serviceId: string
+  price: Prisma.Decimal
+}
+
+export interface OccurrenceFilters {
+  professionalIds?: string[]
+  clientId?: string
+}
+
+const byStart = (a: BusyInterval, b: BusyInterval) => a.date.getTime() - b.date.getTime()
+
+// Reference and overlap checks of a booking, answered by one statement
+interface BookingCheck {
+  price: Prisma.Decimal | null
+  duration: number | null
+  professionalExists: boolean
+  clientExists: boolean
+  conflict: boolean
+}
+
 export class AppointmentRepository {
   async findById(id: string, barbershopId: string): Promise<Appointment | null> {
     return prisma.appointment.findFirst({
       where: { id, barbershopId },
-      include: {
-        professional: { select: professionalPublicSelect },
-        createdBy: { select: professionalPublicSelect },
-        client: true,
-        service: true,
-      },
+      include: appointmentInclude,
     })
   }
 
   async list(
     barbershopId: string,
     params: PaginationParams,
-    filters?: ListFilters
+    filters?: ListFilters,
+    projection?: AppointmentProjection
   ): Promise<AppointmentListResult> {
     const { page, limit } = params
     const skip = (page - 1) * limit
+    const where = listWhere(barbershopId, filters)
+    const select = buildAppointmentSelect(projection)
 
-    const where: Prisma.AppointmentWhereInput = {
-      barbershopId,
-      ...(filters?.status && { status: filters.status }),
-      ...(filters?.professionalId && { professionalId: filters.professionalId }),
-      ...(filters?.clientId && { clientId: filters.clientId }),
-      ...(filters?.startDate &&
-        filters?.endDate && {
-          date: {
-            gte: new Date(filters.startDate),
-            lte: new Date(filters.endDate),
+    const withTotal = resolveTotalMode(params)
+    const countAll = () =>
+      countTotal(withTotal, 'appointment', barbershopId, where, () =>
+        prisma.appointment.count({ where })
+      )
+
+    if (params.cursor !== undefined) {
+      const [rows, total] = await Promise.all([
+        findProjected({
+          where: {
+            ...where,
+            AND: params.cursor
+              ? seekWhere<Prisma.AppointmentWhereInput>('date', 'asc', params.cursor)
+              : undefined,
           },
+          take: limit + 1,
+          orderBy: seekOrderBy<Prisma.AppointmentOrderByWithRelationInput>('date', 'asc'),
+          select,
         }),
+        countAll(),
+      ])
+      return toCursorPage(rows, limit, (row) => row.date, total)
     }
 
-    const [data, total] = await Promise.all([
-      prisma.appointment.findMany({
+    const [rows, total] = await Promise.all([
+      findProjected({
         where,
         skip,
-        take: limit,
+        take: offsetTake(limit, withTotal),
         orderBy: { date: 'asc' },
-        include: {
-          professional: { select: professionalPublicSelect },
-          createdBy: { select: professionalPublicSelect },
-          client: true,
-          service: true,
-        },
+        select,
       }),
-      prisma.appointment.count({ where }),
+      countAll(),
     ])
 
-    return { data, pagination: { page, limit, total, totalPages: Math.ceil(total / limit) } }
+    return toOffsetPage(rows, page, limit, total)
+  }
+
+  /**
+   * Rows of the cursor page `list` would return, read in keyset batches and yielded as they
+   * arrive; the generator returns the next page's cursor. For streamed responses, whose
+   * `limit` may be far larger than a page built in memory.
+   */
+  streamList(
+    barbershopId: string,
+    params: { limit: number; cursor: string },
+    filters?: ListFilters,
+    projection?: AppointmentProjection,
+    batchSize = STREAM_BATCH_SIZE
+  ): AsyncGenerator<ProjectedAppointment, string | null> {
+    const where = listWhere(barbershopId, filters)
+    const select = buildAppointmentSelect(projection)
+    return seekBatches(
+      (cursor, take) =>
+        findProjected({
+          where: {
+            ...where,
+            AND: cursor
+              ? seekWhere<Prisma.AppointmentWhereInput>('date', 'asc', cursor)
+              : undefined,
+          },
+          take,
+          orderBy: seekOrderBy<Prisma.AppointmentOrderByWithRelationInput>('date', 'asc'),
+          select,
+        }),
+      (row) => row.date,
+      params.cursor,
+      params.limit,
+      batchSize
+    )
   }
 
+  /**
+   * Side-loads the relations of a page: one query per entity type for the distinct ids,
+   * instead of joining the same professional or service into every row.
+   */
+  async loadIncluded(
+    barbershopId: string,
+    rows: ProjectedAppointment[],
+    relations: readonly AppointmentRelation[],
+    fields?: string[]
+  ): Promise<IncludedEntities> {
+    const distinctIds = (...from: AppointmentRelation[]): string[] => {
+      const ids = from.flatMap((relation) =>
+        rows.map((row) => row[APPOINTMENT_FOREIGN_KEYS[relation]])
+      )
+      return [...new Set(ids.filter((id): id is string => Boolean(id)))]
+    }
+    const columnsOf = (...from: AppointmentRelation[]) =>
+      selectOf([...new Set(from.flatMap((relation) => relationColumns(relation, fields)))])
+
+    // professional and createdBy share one collection
+    const professionalRelations = relations.filter(
+      (relation) => relation === 'professional' || relation === 'createdBy'
+    )
+    const professionalIds = distinctIds(...professionalRelations)
+    const clientIds = relations.includes('client') ? distinctIds('client') : []
+    const serviceIds = relations.includes('service') ? distinctIds('service') : []
+
+    const [professionals, clients, services] = await Promise.all([
+      professionalIds.length > 0
+        ? prisma.professional.findMany({
+            where: { barbershopId, id: { in: professionalIds } },
+            select: columnsOf(...professionalRelations),
+          })
+        : [],
+      clientIds.length > 0
+        ? prisma.client.findMany({
+            where: { barbershopId, id: { in: clientIds } },
+            select: columnsOf('client'),
+          })
+        : [],
+      serviceIds.length > 0
+        ? prisma.service.findMany({
+            where: { barbershopId, id: { in: serviceIds } },
+            select: columnsOf('service'),
+          })
+        : [],
+    ])
+
+    // Selects built at runtime lose Prisma's static row type; `id` is always selected
+    type IdRow = { id: string }
+    return {
+      ...(professionalRelations.length > 0 && {
+        professionals: indexById(professionals as unknown as IdRow[]),
+      }),
+      ...(relations.includes('client') && { clients: indexById(clients as unknown as IdRow[]) }),
+      ...(relations.includes('service') && {
+        services: indexById(services as unknown as IdRow[]),
+      }),
+    }
+  }
+
+  /**
+   * Whether the professional has a non-cancelled appointment or series occurrence overlapping
+   * `[date, endsAt)`. A range query on the stored end times, served by the (professionalId,
+   * endsAt) index, next to the series overlapping the same window.
+   */
   async checkConflict(
     barbershopId: string,
     professionalId: string,
     date: Date,
-    duration: number,
+    endsAt: Date,
     excludeId?: string
   ): Promise<boolean> {
-    const appointmentStart = new Date(date)
-    const appointmentEnd = addMinutes(appointmentStart, duration)
+    const [conflict, occurrences] = await Promise.all([
+      prisma.appointment.findFirst({
+        where: {
+          barbershopId,
+          professionalId,
+          status: { notIn: ['CANCELLED'] },
+          id: excludeId ? { not: excludeId } : undefined,
+          date: { lt: endsAt },
+          endsAt: { gt: date },
+        },
+        select: { id: true },
+      }),
+      this.findSeriesOccurrences(barbershopId, date, endsAt, {
+        professionalIds: [professionalId],
+      }),
+    ])
+    return conflict !== null || occurrences.length > 0
+  }
 
-    const conflicts = await prisma.appointment.findMany({
+  /**
+   * Occurrences of active series overlapping `[from, to)` that are not stored as appointments,
+   * ordered by start. Only the series overlapping the window are read (by their stored first
+   * start and last end) and expanded within the window, so a two-year series costs no more
+   * than a one-week one. Occurrences materialized as appointments (moved or cancelled ones
+   * included) are skipped; the appointment row stands in for them.
+   */
+  async findSeriesOccurrences(
+    barbershopId: string,
+    from: Date,
+    to: Date,
+    filters: OccurrenceFilters = {},
+    db: Prisma.TransactionClient = prisma
+  ): Promise<SeriesOccurrence[]> {
+    const series = await db.appointmentSeries.findMany({
       where: {
         barbershopId,
-        professionalId,
-        status: { notIn: ['CANCELLED'] },
-        id: excludeId ? { not: excludeId } : undefined,
-        date: {
-          gte: subMinutes(appointmentStart, 480), // 8 hour lookback
-          lte: addMinutes(appointmentEnd, 480), // 8 hour lookahead
+        isActive: true,
+        ...(filters.professionalIds && { professionalId: { in: filters.professionalIds } }),
+        ...(filters.clientId && { clientId: filters.clientId }),
+        startsAt: { lt: to },
+        endsAt: { gt: from },
+      },
+      select: {
+        id: true,
+        professionalId: true,
+        clientId: true,
+        serviceId: true,
+        price: true,
+        startsAt: true,
+        endsAt: true,
+        intervalWeeks: true,
+        duration: true,
+        // Occurrences last less than a week, so one overlapping the window starts after this
+        appointments: {
+          where: { seriesOccurrence: { gt: new Date(from.getTime() - WEEK_MS), lt: to } },
+          select: { seriesOccurrence: true },
         },
       },
-      include: { service: true },
     })
 
-    return conflicts.some((apt) => {
-      const existingEnd = addMinutes(apt.date, apt.service.duration)
-      return appointmentStart < existingEnd && appointmentEnd > apt.date
+    const occurrences: SeriesOccurrence[] = []
+    for (const { appointments, ...rule } of series) {
+      const materialized = new Set(appointments.map((row) => row.seriesOccurrence?.getTime()))
+      for (const { start, end } of expandOccurrences(rule, from, to)) {
+        if (materialized.has(start.getTime())) continue
+        occurrences.push({
+          seriesId: rule.id,
+          professionalId: rule.professionalId,
+          clientId: rule.clientId,
+          serviceId: rule.serviceId,
+          price: rule.price,
+          date: start,
+          endsAt: end,
+        })
+      }
+    }
+    return occurrences.sort(byStart)
+  }
+
+  /**
+   * Non-cancelled appointments and unmaterialized series occurrences of the given
+   * professionals overlapping `[from, to)`, ordered by start: one range query on the
+   * (professionalId, date) / (professionalId, endsAt) indexes plus the series in the window.
+   */
+  async findBusyIntervals(
+    barbershopId: string,
+    professionalIds: string[],
+    from: Date,
+    to: Date,
+    db: Prisma.TransactionClient = prisma
+  ): Promise<BusyInterval[]> {
+    const [appointments, occurrences] = await Promise.all([
+      db.appointment.findMany({
+        where: {
+          barbershopId,
+          professionalId: { in: professionalIds },
+          status: { notIn: ['CANCELLED'] },
+          date: { lt: to },
+          endsAt: { gt: from },
+        },
+        select: { professionalId: true, date: true, endsAt: true },
+        orderBy: { date: 'asc' },
+      }),
+      this.findSeriesOccurrences(barbershopId, from, to, { professionalIds }, db),
+    ])
+    if (occurrences.length === 0) return appointments
+    return [
+      ...appointments,
+      ...occurrences.map(({ professionalId, date, endsAt }) => ({ professionalId, date, endsAt })),
+    ].sort(byStart)
+  }
+
+  /**
+   * Creates an appointment without racing concurrent bookings of the same professional.
+   * Inside one transaction: a transaction-scoped advisory lock on (tenant, professional)
+   * queues competing bookings, a single statement validates professional, client and
+   * service and checks for overlapping appointments, series occurrences in the slot are
+   * checked next, then the row is inserted.
+   */
+  async book(input: BookingInput): Promise<Appointment> {
+    const { barbershopId, professionalId, clientId, serviceId, createdById, date } = input
+    const start = date.toISOString()
+
+    const appointment = await prisma.$transaction(async (tx) => {
+      await lockProfessionals(tx, barbershopId, [professionalId])
+
+      // Runs after the lock is granted, so its snapshot sees every booking committed before
+      const [check] = await tx.$queryRaw<BookingCheck[]>`
+        SELECT
+          s."price",
+          s."duration",
+          EXISTS (
+            SELECT 1 FROM "professionals" p
+            WHERE p."barbershopId" = ${barbershopId} AND p."id" = ${professionalId} AND p."isActive"
+          ) AS "professionalExists",
+          EXISTS (
+            SELECT 1 FROM "clients" c
+            WHERE c."barbershopId" = ${barbershopId} AND c."id" = ${clientId} AND c."isActive"
+          ) AS "clientExists",
+          COALESCE(EXISTS (
+            SELECT 1 FROM "appointments" a
+            WHERE a."barbershopId" = ${barbershopId}
+              AND a."professionalId" = ${professionalId}
+              AND a."status" <> 'CANCELLED'
+              AND a."date" < ${start}::timestamp + s."duration" * INTERVAL '1 minute'
+              AND a."endsAt" > ${start}::timestamp
+          ), false) AS "conflict"
+        FROM (SELECT 1) AS booking
+        LEFT JOIN "services" s
+          ON s."barbershopId" = ${barbershopId} AND s."id" = ${serviceId} AND s."isActive"
+      `
+
+      if (!check.professionalExists) throw new Error('Professional not found')
+      if (!check.clientExists) throw new Error('Client not found')
+      if (check.price === null || check.duration === null) throw new Error('Service not found')
+      if (check.conflict) throw new Error(APPOINTMENT_CONFLICT_MESSAGE)
+
+      const endsAt = new Date(date.getTime() + check.duration * 60 * 1000)
+      const occurrences = await this.findSeriesOccurrences(
+        barbershopId,
+        date,
+        endsAt,
+        { professionalIds: [professionalId] },
+        tx
+      )
+      if (occurrences.length > 0) throw new Error(APPOINTMENT_CONFLICT_MESSAGE)
+
+      return orConflict(
+        tx.appointment.create({
+          data: {
+            date,
+            endsAt,
+            notes: input.notes,
+            // Price snapshot
+            price: check.price,
+            status: 'PENDING',
+            barbershop: { connect: { id: barbershopId } },
+            professional: {
+              connect: { barbershopId_id: { barbershopId, id: professionalId } },
+            },
+            client: { connect: { barbershopId_id: { barbershopId, id: clientId } } },
+            service: { connect: { barbershopId_id: { barbershopId, id: serviceId } } },
+            createdBy: { connect: { barbershopId_id: { barbershopId, id: createdById } } },
+          },
+          include: appointmentInclude,
+        }),
+        OVERLAP_CONSTRAINT,
+        APPOINTMENT_CONFLICT_MESSAGE
+      )
     })
+
+    await invalidateCounts('appointment', barbershopId)
+    return appointment
   }
 
-  async create(data: Prisma.AppointmentCreateInput): Promise<Appointment> {
-    return prisma.appointment.create({
-      data,
-      include: {
-        professional: { select: professionalPublicSelect },
-        createdBy: { select: professionalPublicSelect },
-        client: true,
-        service: true,
-      },
+  /**
+   * Inserts a batch of appointments without racing other bookings. Every professional of the
+   * batch is locked first; `schedule` then picks the rows that fit around what is already
+   * booked in `[from, to)` (series occurrences included) and they are inserted with one
+   * statement. Returns id, professional and start of each inserted row.
+   */
+  async bookMany(
+    barbershopId: string,
+    professionalIds: string[],
+    window: { from: Date; to: Date },
+    schedule: (busy: BusyInterval[]) => Prisma.AppointmentCreateManyInput[]
+  ): Promise<Pick<Appointment, 'id' | 'professionalId' | 'date'>[]> {
+    const created = await prisma.$transaction(async (tx) => {
+      await lockProfessionals(tx, barbershopId, professionalIds)
+      const busy = await this.findBusyIntervals(
+        barbershopId,
+        professionalIds,
+        window.from,
+        window.to,
+        tx
+      )
+      const rows = schedule(busy)
+      if (rows.length === 0) return []
+      return orConflict(
+        tx.appointment.createManyAndReturn({
+          data: rows,
+          select: { id: true, professionalId: true, date: true },
+        }),
+        OVERLAP_CONSTRAINT,
+        APPOINTMENT_CONFLICT_MESSAGE
+      )
     })
+
+    if (created.length > 0) await invalidateCounts('appointment', barbershopId)
+    return created
+  }
+
+  /**
+   * Stores one occurrence of a series as a PENDING appointment with the series' price and
+   * duration, so it can be confirmed or modified like any other. Idempotent: the row of an
+   * occurrence that was already materialized is returned with `created: false`.
+   */
+  async materializeOccurrence(
+    series: AppointmentSeries,
+    occurrence: Date,
+    createdById: string
+  ): Promise<{ appointment: Appointment; created: boolean }> {
+    const { barbershopId } = series
+
+    const result = await prisma.$transaction(async (tx) => {
+      await lockProfessionals(tx, barbershopId, [series.professionalId])
+      const existing = await tx.appointment.findUnique({
+        where: {
+          seriesId_seriesOccurrence: { seriesId: series.id, seriesOccurrence: occurrence },
+        },
+        include: appointmentInclude,
+      })
+      if (existing) return { appointment: existing, created: false }
+
+      const appointment = await orConflict(
+        tx.appointment.create({
+          data: {
+            date: occurrence,
+            endsAt: new Date(occurrence.getTime() + series.duration * 60 * 1000),
+            seriesOccurrence: occurrence,
+            notes: series.notes,
+            price: series.price,
+            status: 'PENDING',
+            barbershop: { connect: { id: barbershopId } },
+            series: { connect: { barbershopId_id: { barbershopId, id: series.id } } },
+            professional: {
+              connect: { barbershopId_id: { barbershopId, id: series.professionalId } },
+            },
+            client: { connect: { barbershopId_id: { barbershopId, id: series.clientId } } },
+            service: { connect: { barbershopId_id: { barbershopId, id: series.serviceId } } },
+            createdBy: { connect: { barbershopId_id: { barbershopId, id: createdById } } },
+          },
+          include: appointmentInclude,
+        }),
+        OVERLAP_CONSTRAINT,
+        APPOINTMENT_CONFLICT_MESSAGE
+      )
+      return { appointment, created: true }
+    })
+
+    if (result.created) await invalidateCounts('appointment', barbershopId)
+    return result
   }
 
+  async create(data: Prisma.AppointmentCreateInput): Promise<Appointment> {
+    const appointment = await orConflict(
+      prisma.appointment.create({ data, include: appointmentInclude }),
+      OVERLAP_CONSTRAINT,
+      APPOINTMENT_CONFLICT_MESSAGE
+    )
+    await invalidateCounts('appointment', appointment.barbershopId)
+    return appointment
+  }
+
+  /**
+   * Updates an appointment. With `fromStatus` (the status the change was validated against)
+   * the write only matches while the appointment still has it, so a concurrent completion
+   * or cancellation is never overwritten; a miss then throws the status-changed error.
+   */
   async update(
     id: string,
     barbershopId: string,
-    data: Prisma.AppointmentUpdateInput
+    data: Prisma.AppointmentUpdateInput,
+    fromStatus?: AppointmentStatus
   ): Promise<Appointment> {
-    const existing = await prisma.appointment.findFirst({ where: { id, barbershopId } })
-    if (!existing) {
-      throw new Error('Appointment not found')
-    }
-    return prisma.appointment.update({
-      where: { id },
-      data,
-      include: {
-        professional: { select: professionalPublicSelect },
-        createdBy: { select: professionalPublicSelect },
-        client: true,
-        service: true,
-      },
-    })
+    const appointment = await orNotFound(
+      orConflict(
+        prisma.appointment.update({
+          where: { id, barbershopId, ...(fromStatus ? { status: fromStatus } : {}) },
+          data,
+          include: appointmentInclude,
+        }),
+        OVERLAP_CONSTRAINT,
+        APPOINTMENT_CONFLICT_MESSAGE
+      ),
+      fromStatus ? APPOINTMENT_STATUS_CHANGED_MESSAGE : 'Appointment not found'
+    )
+    await invalidateCounts('appointment', barbershopId)
+    return appointment
   }
 
-  async delete(id: string, barbershopId: string): Promise<Appointment> {
-    const existing = await prisma.appointment.findFirst({ where: { id, barbershopId } })
-    if (!existing) {
-      throw new Error('Appointment not found')
+  /**
+   * Moves an appointment to COMPLETED and adds it to its professional's daily rollup in one
+   * database transaction. The update only matches while the appointment still has
+   * `fromStatus` (the status the transition was validated against), so two concurrent
+   * completions cannot both count it; the one that loses gets null.
+   */
+  async complete(
+    id: string,
+    barbershopId: string,
+    fromStatus: AppointmentStatus,
+    commissionValue?: number
+  ): Promise<Appointment | null> {
+    const appointment = await prisma.$transaction(async (tx) => {
+      const { count } = await tx.appointment.updateMany({
+        where: { id, barbershopId, status: fromStatus },
+        data: { status: 'COMPLETED', commissionValue },
+      })
+      if (count === 0) return null
+      const completed = await tx.appointment.findFirstOrThrow({
+        where: { id, barbershopId },
+        include: appointmentInclude,
+      })
+      await professionalRollupRepository.add(tx, completed)
+      return completed
+    })
+    if (appointment) {
+      await invalidateCounts('appointment', barbershopId)
     }
+    return appointment
+  }
+
+  async delete(
+    id: string,
+    barbershopId: string,
+    fromStatus: AppointmentStatus
+  ): Promise<Appointment> {
     // DELETE now means cancellation - update status to CANCELLED instead of deleting
-    return prisma.appointment.update({
-      where: { id },
-      data: { status: 'CANCELLED' },
-      include: {
-        professional: { select: professionalPublicSelect },
-        createdBy: { select: professionalPublicSelect },
-        client: true,
-        service: true,
-      },
-    })
+    return this.update(id, barbershopId, { status: 'CANCELLED' }, fromStatus)
   }
 }
 
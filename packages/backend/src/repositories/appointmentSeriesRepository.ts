@@ -0,0 +1,84 @@
+import { prisma } from '../lib/prisma.js'
+import { orNotFound } from '../lib/prismaErrors.js'
+import { lockProfessionals } from '../lib/advisoryLock.js'
+import { expandOccurrences, type SeriesRule } from '../lib/recurrence.js'
+import type { AppointmentSeries, Prisma } from '@prisma/client'
+import { APPOINTMENT_CONFLICT_MESSAGE, appointmentRepository } from './appointmentRepository.js'
+
+export interface SeriesInput extends SeriesRule {
+  barbershopId: string
+  professionalId: string
+  clientId: string
+  serviceId: string
+  createdById: string
+  count: number | null
+  price: Prisma.Decimal
+  notes: string | null
+}
+
+export class AppointmentSeriesRepository {
+  async findById(id: string, barbershopId: string): Promise<AppointmentSeries | null> {
+    return prisma.appointmentSeries.findFirst({
+      where: { id, barbershopId, isActive: true },
+    })
+  }
+
+  /**
+   * Creates a series without storing its occurrences. Under the professional's booking lock,
+   * everything booked between the first start and the last end (appointments and other
+   * series) is read once, and each busy interval is tested against the occurrences of the new
+   * series that fall inside it, so the check never expands the whole series.
+   */
+  async book(input: SeriesInput): Promise<AppointmentSeries> {
+    const { barbershopId, professionalId, startsAt, endsAt } = input
+
+    return prisma.$transaction(async (tx) => {
+      await lockProfessionals(tx, barbershopId, [professionalId])
+      const busy = await appointmentRepository.findBusyIntervals(
+        barbershopId,
+        [professionalId],
+        startsAt,
+        endsAt,
+        tx
+      )
+      const conflict = busy.some(
+        (interval) => expandOccurrences(input, interval.date, interval.endsAt).length > 0
+      )
+      if (conflict) throw new Error(APPOINTMENT_CONFLICT_MESSAGE)
+
+      return tx.appointmentSeries.create({
+        data: {
+          startsAt,
+          endsAt,
+          intervalWeeks: input.intervalWeeks,
+          count: input.count,
+          duration: input.duration,
+          // Price snapshot, copied to every occurrence
+          price: input.price,
+          notes: input.notes,
+          barbershop: { connect: { id: barbershopId } },
+          professional: { connect: { barbershopId_id: { barbershopId, id: professionalId } } },
+          client: { connect: { barbershopId_id: { barbershopId, id: input.clientId } } },
+          service: { connect: { barbershopId_id: { barbershopId, id: input.serviceId } } },
+          createdBy: { connect: { barbershopId_id: { barbershopId, id: input.createdById } } },
+        },
+      })
+    })
+  }
+
+  /**
+   * Ends a series: its remaining occurrences stop being expanded. Materialized occurrences
+   * are appointments and are left as they are.
+   */
+  async deactivate(id: string, barbershopId: string): Promise<AppointmentSeries> {
+    return orNotFound(
+      prisma.appointmentSeries.update({
+        where: { id, barbershopId, isActive: true },
+        data: { isActive: false },
+      }),
+      'Series not found'
+    )
+  }
+}
+
+export const appointmentSeriesRepository = new AppointmentSeriesRepository()
@@ -1,19 +1,30 @@
 import { prisma } from '../lib/prisma.js'
+import { orNotFound } from '../lib/prismaErrors.js'
+import { countTotal, invalidateCounts } from '../lib/countCache.js'
 import type { Prisma, Client } from '@prisma/client'
+import {
+  offsetTake,
+  resolveTotalMode,
+  seekOrderBy,
+  seekWhere,
+  toCursorPage,
+  toOffsetPage,
+  type CursorPagination,
+  type OffsetPagination,
+  type TotalMode,
+} from '../lib/pagination.js'
 
 export interface PaginationParams {
   page: number
   limit: number
+  // Set (possibly empty) for keyset pagination; `page` is then ignored
+  cursor?: string
+  withTotal?: TotalMode
 }
 
 export interface ClientListResult {
   data: Client[]
-  pagination: {
-    page: number
-    limit: number
-    total: number
-    totalPages: number
-  }
+  pagination: OffsetPagination | CursorPagination
 }
 
 export class ClientRepository {
@@ -27,6 +38,16 @@ export class ClientRepository {
     })
   }
 
+  /**
+   * Ids of the active clients among `ids`.
+   */
+  async findActive(barbershopId: string, ids: string[]): Promise<Pick<Client, 'id'>[]> {
+    return prisma.client.findMany({
+      where: { barbershopId, isActive: true, id: { in: ids } },
+      select: { id: true },
+    })
+  }
+
   async findByPhone(phone: string, barbershopId: string): Promise<Client | null> {
     return prisma.client.findFirst({
       where: {
@@ -39,54 +60,64 @@ export class ClientRepository {
   async list(barbershopId: string, params: PaginationParams): Promise<ClientListResult> {
     const { page, limit } = params
     const skip = (page - 1) * limit
+    const where: Prisma.ClientWhereInput = { barbershopId, isActive: true }
+    const withTotal = resolveTotalMode(params)
+    const countAll = () =>
+      countTotal(withTotal, 'client', barbershopId, where, () => prisma.client.count({ where }))
 
-    const [data, total] = await Promise.all([
+    if (params.cursor !== undefined) {
+      const [rows, total] = await Promise.all([
+        prisma.client.findMany({
+          where: {
+            ...where,
+            AND: params.cursor
+              ? seekWhere<Prisma.ClientWhereInput>('createdAt', 'desc', params.cursor)
+              : undefined,
+          },
+          take: limit + 1,
+          orderBy: seekOrderBy<Prisma.ClientOrderByWithRelationInput>('createdAt', 'desc'),
+        }),
+        countAll(),
+      ])
+      return toCursorPage(rows, limit, (row) => row.createdAt, total)
+    }
+
+    const [rows, total] = await Promise.all([
       prisma.client.findMany({
-        where: { barbershopId, isActive: true },
+        where,
         skip,
-        take: limit,
+        take: offsetTake(limit, withTotal),
         orderBy: { createdAt: 'desc' },
       }),
-      prisma.client.count({
-        where: { barbershopId, isActive: true },
-      }),
+      countAll(),
     ])
 
-    return {
-      data,
-      pagination: {
-        page,
-        limit,
-        total,
-        totalPages: Math.ceil(total / limit),
-      },
-    }
+    return toOffsetPage(rows, page, limit, total)
   }
 
   async create(data: Prisma.ClientCreateInput): Promise<Client> {
-    return prisma.client.create({ data })
+    const client = await prisma.client.create({ data })
+    await invalidateCounts('client', client.barbershopId)
+    return client
   }
 
   async update(id: string, barbershopId: string, data: Prisma.ClientUpdateInput): Promise<Client> {
-    const existing = await prisma.client.findFirst({ where: { id, barbershopId, isActive: true } })
-    if (!existing) {
-      throw new Error('Client not found')
-    }
-    return prisma.client.update({
-      where: { id },
-      data,
-    })
+    return orNotFound(
+      prisma.client.update({ where: { id, barbershopId, isActive: true }, data }),
+      'Client not found'
+    )
   }
 
   async delete(id: string, barbershopId: string): Promise<Client> {
-    const existing = await prisma.client.findFirst({ where: { id, barbershopId, isActive: true } })
-    if (!existing) {
-      throw new Error('Client not found')
-    }
-    return prisma.client.update({
-      where: { id },
-      data: { isActive: false },
-    })
+    const client = await orNotFound(
+      prisma.client.update({
+        where: { id, barbershopId, isActive: true },
+        data: { isActive: false },
+      }),
+      'Client not found'
+    )
+    await invalidateCounts('client', barbershopId)
+    return client
   }
 }
 
@@ -1,19 +1,31 @@
 import { prisma } from '../lib/prisma.js'
+import { orNotFound } from '../lib/prismaErrors.js'
+import { countTotal, invalidateCounts } from '../lib/countCache.js'
+import { invalidateProfessionalDirectory } from '../lib/professionalDirectory.js'
 import type { Prisma, Professional } from '@prisma/client'
+import {
+  offsetTake,
+  resolveTotalMode,
+  seekOrderBy,
+  seekWhere,
+  toCursorPage,
+  toOffsetPage,
+  type CursorPagination,
+  type OffsetPagination,
+  type TotalMode,
+} from '../lib/pagination.js'
 
 export interface PaginationParams {
   page: number
   limit: number
+  // Set (possibly empty) for keyset pagination; `page` is then ignored
+  cursor?: string
+  withTotal?: TotalMode
 }
 
 export interface ProfessionalListResult {
   data: Professional[]
-  pagination: {
-    page: number
-    limit: number
-    total: number
-    totalPages: number
-  }
+  pagination: OffsetPagination | CursorPagination
 }
 
 export class ProfessionalRepository {
@@ -27,6 +39,20 @@ export class ProfessionalRepository {
     })
   }
 
+  /**
+   * Ids and names of the active professionals, optionally restricted to `ids`.
+   */
+  async findActive(
+    barbershopId: string,
+    ids?: string[]
+  ): Promise<Pick<Professional, 'id' | 'name'>[]> {
+    return prisma.professional.findMany({
+      where: { barbershopId, isActive: true, id: ids ? { in: ids } : undefined },
+      select: { id: true, name: true },
+      orderBy: { name: 'asc' },
+    })
+  }
+
   async findByEmail(email: string, barbershopId: string): Promise<Professional | null> {
     return prisma.professional.findFirst({
       where: {
@@ -39,32 +65,48 @@ export class ProfessionalRepository {
   async list(barbershopId: string, params: PaginationParams): Promise<ProfessionalListResult> {
     const { page, limit } = params
     const skip = (page - 1) * limit
+    const where: Prisma.ProfessionalWhereInput = { barbershopId, isActive: true }
+    const withTotal = resolveTotalMode(params)
+    const countAll = () =>
+      countTotal(withTotal, 'professional', barbershopId, where, () =>
+        prisma.professional.count({ where })
+      )
 
-    const [data, total] = await Promise.all([
+    if (params.cursor !== undefined) {
+      const [rows, total] = await Promise.all([
+        prisma.professional.findMany({
+          where: {
+            ...where,
+            AND: params.cursor
+              ? seekWhere<Prisma.ProfessionalWhereInput>('createdAt', 'desc', params.cursor)
+              : undefined,
+          },
+          take: limit + 1,
+          orderBy: seekOrderBy<Prisma.ProfessionalOrderByWithRelationInput>('createdAt', 'desc'),
+        }),
+        countAll(),
+      ])
+      return toCursorPage(rows, limit, (row) => row.createdAt, total)
+    }
+
+    const [rows, total] = await Promise.all([
       prisma.professional.findMany({
-        where: { barbershopId, isActive: true },
+        where,
         skip,
-        take: limit,
+        take: offsetTake(limit, withTotal),
         orderBy: { createdAt: 'desc' },
       }),
-      prisma.professional.count({
-        where: { barbershopId, isActive: true },
-      }),
+      countAll(),
     ])
 
-    return {
-      data,
-      pagination: {
-        page,
-        limit,
-        total,
-        totalPages: Math.ceil(total / limit),
-      },
-    }
+    return toOffsetPage(rows, page, limit, total)
   }
 
   async create(data: Prisma.ProfessionalCreateInput): Promise<Professional> {
-    return prisma.professional.create({ data })
+    const professional = await prisma.professional.create({ data })
+    invalidateProfessionalDirectory(professional.barbershopId)
+    await invalidateCounts('professional', professional.barbershopId)
+    return professional
   }
 
   async update(
@@ -72,29 +114,25 @@ export class ProfessionalRepository {
     barbershopId: string,
     data: Prisma.ProfessionalUpdateInput
   ): Promise<Professional> {
-    const existing = await prisma.professional.findFirst({
-      where: { id, barbershopId, isActive: true },
-    })
-    if (!existing) {
-      throw new Error('Professional not found')
-    }
-    return prisma.professional.update({
-      where: { id },
-      data,
-    })
+    const professional = await orNotFound(
+      prisma.professional.update({ where: { id, barbershopId, isActive: true }, data }),
+      'Professional not found'
+    )
+    invalidateProfessionalDirectory(barbershopId)
+    return professional
   }
 
   async delete(id: string, barbershopId: string): Promise<Professional> {
-    const existing = await prisma.professional.findFirst({
-      where: { id, barbershopId, isActive: true },
-    })
-    if (!existing) {
-      throw new Error('Professional not found')
-    }
-    return prisma.professional.update({
-      where: { id },
-      data: { isActive: false },
-    })
+    const professional = await orNotFound(
+      prisma.professional.update({
+        where: { id, barbershopId, isActive: true },
+        data: { isActive: false },
+      }),
+      'Professional not found'
+    )
+    invalidateProfessionalDirectory(barbershopId)
+    await invalidateCounts('professional', barbershopId)
+    return professional
   }
 }
 
@@ -0,0 +1,83 @@
+import { prisma } from '../lib/prisma.js'
+import { utcDay, type DayFilter } from '../lib/rollup.js'
+import type { Prisma, PrismaClient } from '@prisma/client'
+import type { Decimal } from '@prisma/client/runtime/library'
+
+// Upper bound of a rebuild; it holds appointment writes of every tenant while it runs
+const REBUILD_TIMEOUT_MS = 10 * 60 * 1000
+
+// The columns of a completed appointment that its rollup depends on
+export interface CompletedAppointment {
+  barbershopId: string
+  professionalId: string
+  date: Date
+  price: Decimal
+  commissionValue: Decimal | null
+}
+
+export class ProfessionalRollupRepository {
+  /**
+   * Adds a just-completed appointment to its professional's day, inside the completion's
+   * own database transaction (one native upsert). COMPLETED is a final state, so an
+   * appointment is added once and never taken off.
+   */
+  async add(tx: Prisma.TransactionClient, appointment: CompletedAppointment): Promise<void> {
+    const key = {
+      barbershopId: appointment.barbershopId,
+      day: utcDay(appointment.date),
+      professionalId: appointment.professionalId,
+    }
+    const revenue = appointment.price
+    const commissions = appointment.commissionValue ?? 0
+    await tx.professionalDailyRollup.upsert({
+      where: { barbershopId_day_professionalId: key },
+      create: { ...key, appointments: 1, revenue, commissions },
+      update: {
+        appointments: { increment: 1 },
+        revenue: { increment: revenue },
+        commissions: { increment: commissions },
+      },
+    })
+  }
+
+  /**
+   * Completed appointments, revenue and commissions by professional over whole days: one
+   * range read of the primary key.
+   */
+  async sumDays(barbershopId: string, days: DayFilter, professionalId?: string) {
+    return prisma.professionalDailyRollup.groupBy({
+      by: ['professionalId'],
+      where: { barbershopId, day: days, ...(professionalId ? { professionalId } : {}) },
+      _sum: { appointments: true, revenue: true, commissions: true },
+    })
+  }
+
+  /**
+   * Recomputes the rollups of one tenant (or all of them) from the completed appointments.
+   * Appointment writes wait on the table lock until the rebuilt rows commit. Returns the
+   * number of rollup rows written.
+   */
+  async rebuild(barbershopId?: string, db: PrismaClient = prisma): Promise<number> {
+    const tenant = barbershopId ?? null
+    return db.$transaction(
+      async (tx) => {
+        await tx.$executeRaw`LOCK TABLE "appointments" IN SHARE MODE`
+        await tx.professionalDailyRollup.deleteMany({
+          where: barbershopId ? { barbershopId } : {},
+        })
+        return tx.$executeRaw`
+          INSERT INTO "professional_daily_rollups"
+            ("barbershopId", "day", "professionalId", "appointments", "revenue", "commissions")
+          SELECT "barbershopId", "date"::date, "professionalId", COUNT(*)::integer,
+            SUM("price"), COALESCE(SUM("commissionValue"), 0)
+          FROM "appointments"
+          WHERE "status" = 'COMPLETED' AND (${tenant}::text IS NULL OR "barbershopId" = ${tenant})
+          GROUP BY 1, 2, 3
+        `
+      },
+      { timeout: REBUILD_TIMEOUT_MS }
+    )
+  }
+}
+
+export const professionalRollupRepository = new ProfessionalRollupRepository()
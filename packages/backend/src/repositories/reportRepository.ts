@@ -1,23 +1,67 @@
 import { prisma } from '../lib/prisma.js'
+import { splitOnWholeDays } from '../lib/rollup.js'
+import { getProfessionalDirectory, type DirectoryEntry } from '../lib/professionalDirectory.js'
+import { transactionRollupRepository } from './transactionRollupRepository.js'
+import { professionalRollupRepository } from './professionalRollupRepository.js'
+import type { TransactionType } from '@prisma/client'
+import { Decimal } from '@prisma/client/runtime/library'
+
+export interface TransactionTotal {
+  type: TransactionType
+  category: string
+  amount: Decimal
+  count: number
+}
+
+export interface ProfessionalTotal {
+  professionalId: string
+  appointments: number
+  revenue: Decimal
+  commissions: Decimal
+  professional: DirectoryEntry
+}
 
 export class ReportRepository {
-  async getTransactionSummary(barbershopId: string, dateFrom: Date, dateTo: Date) {
-    return prisma.transaction.groupBy({
-      by: ['type', 'category'],
-      where: {
-        barbershopId,
-        date: {
-          gte: dateFrom,
-          lte: dateTo,
-        },
-      },
-      _sum: {
-        amount: true,
-      },
-      _count: {
-        _all: true,
-      },
-    })
+  /**
+   * Transaction totals by type and category over `[dateFrom, dateTo]`. Whole UTC days come
+   * from the daily rollups, so the cost follows the number of days and categories rather
+   * than of transactions; only the partial days at the edges are scanned.
+   */
+  async getTransactionSummary(
+    barbershopId: string,
+    dateFrom: Date,
+    dateTo: Date
+  ): Promise<TransactionTotal[]> {
+    const { days, edges } = splitOnWholeDays(dateFrom, dateTo)
+    const [rolledUp, scanned] = await Promise.all([
+      days ? transactionRollupRepository.sumDays(barbershopId, days) : [],
+      Promise.all(
+        edges.map((date) =>
+          prisma.transaction.groupBy({
+            by: ['type', 'category'],
+            where: { barbershopId, date },
+            _sum: { amount: true },
+            _count: { _all: true },
+          })
+        )
+      ),
+    ])
+
+    const totals = new Map<string, TransactionTotal>()
+    const parts = [
+      ...rolledUp.map((row) => ({ ...row, count: row._sum.count ?? 0 })),
+      ...scanned.flat().map((row) => ({ ...row, count: row._count._all })),
+    ]
+    for (const { type, category, _sum, count } of parts) {
+      const key = `${type}|${category}`
+      const total = totals.get(key) ?? { type, category, amount: new Decimal(0), count: 0 }
+      total.amount = total.amount.plus(_sum.amount ?? 0)
+      total.count += count
+      totals.set(key, total)
+    }
+
+    // Rollup rows of days whose transactions were all deleted or moved sum to nothing
+    return [...totals.values()].filter((total) => total.count > 0)
   }
 
   async getAppointmentsSummary(barbershopId: string, dateFrom: Date, dateTo: Date) {
@@ -40,55 +84,76 @@ export class ReportRepository {
     })
   }
 
+  /**
+   * Completed appointments, revenue and commissions by professional over `[dateFrom, dateTo]`:
+   * whole UTC days from the professionals' daily rollups, partial edge days scanned. Names
+   * come from the cached professional directory instead of a second query; it is read again
+   * if it misses one of the professionals, so no row is ever dropped.
+   */
   async getCommissionsByProfessional(
     barbershopId: string,
     dateFrom: Date,
     dateTo: Date,
     professionalId?: string
-  ) {
-    // First get aggregation by professional
-    const aggregations = await prisma.appointment.groupBy({
-      by: ['professionalId'],
-      where: {
-        barbershopId,
-        status: 'COMPLETED',
-        date: {
-          gte: dateFrom,
-          lte: dateTo,
-        },
-        ...(professionalId ? { professionalId } : {}),
-      },
-      _sum: {
-        price: true,
-        commissionValue: true,
-      },
-      _count: {
-        _all: true,
-      },
-    })
+  ): Promise<ProfessionalTotal[]> {
+    const { days, edges } = splitOnWholeDays(dateFrom, dateTo)
+    const [rolledUp, scanned] = await Promise.all([
+      days ? professionalRollupRepository.sumDays(barbershopId, days, professionalId) : [],
+      Promise.all(
+        edges.map((date) =>
+          prisma.appointment.groupBy({
+            by: ['professionalId'],
+            where: {
+              barbershopId,
+              status: 'COMPLETED',
+              date,
+              ...(professionalId ? { professionalId } : {}),
+            },
+            _sum: { price: true, commissionValue: true },
+            _count: { _all: true },
+          })
+        )
+      ),
+    ])
 
-    // Then get professional details for each result
-    const professionals = await prisma.professional.findMany({
-      where: {
-        barbershopId,
-        id: {
-          in: aggregations.map((a) => a.professionalId),
-        },
-      },
-      select: {
-        id: true,
-        name: true,
-        email: true,
-        commissionRate: true,
-      },
-    })
-
-    return aggregations.map((agg) => {
-      const professional = professionals.find((p) => p.id === agg.professionalId)
-      return {
-        ...agg,
-        professional,
+    const totals = new Map<string, Omit<ProfessionalTotal, 'professional'>>()
+    const parts = [
+      ...rolledUp.map((row) => ({
+        professionalId: row.professionalId,
+        appointments: row._sum.appointments ?? 0,
+        revenue: row._sum.revenue,
+        commissions: row._sum.commissions,
+      })),
+      ...scanned.flat().map((row) => ({
+        professionalId: row.professionalId,
+        appointments: row._count._all,
+        revenue: row._sum.price,
+        commissions: row._sum.commissionValue,
+      })),
+    ]
+    for (const part of parts) {
+      const total = totals.get(part.professionalId) ?? {
+        professionalId: part.professionalId,
+        appointments: 0,
+        revenue: new Decimal(0),
+        commissions: new Decimal(0),
       }
+      total.appointments += part.appointments
+      total.revenue = total.revenue.plus(part.revenue ?? 0)
+      total.commissions = total.commissions.plus(part.commissions ?? 0)
+      totals.set(part.professionalId, total)
+    }
+
+    // Every professional with completed work must be named: a stale directory is reloaded
+    const rows = [...totals.values()].filter((total) => total.appointments > 0)
+    const directory = await getProfessionalDirectory(
+      barbershopId,
+      rows.map((row) => row.professionalId)
+    )
+    return rows.map((row) => {
+      const professional = directory.get(row.professionalId)
+      if (!professional) throw new Error(`Professional ${row.professionalId} not in directory`)
+      return { ...row, professional }
     })
   }
 }
@@ -1,19 +1,30 @@
 import { prisma } from '../lib/prisma.js'
+import { orNotFound } from '../lib/prismaErrors.js'
+import { countTotal, invalidateCounts } from '../lib/countCache.js'
 import type { Prisma, Service } from '@prisma/client'
+import {
+  offsetTake,
+  resolveTotalMode,
+  seekOrderBy,
+  seekWhere,
+  toCursorPage,
+  toOffsetPage,
+  type CursorPagination,
+  type OffsetPagination,
+  type TotalMode,
+} from '../lib/pagination.js'
 
 export interface PaginationParams {
   page: number
   limit: number
+  // Set (possibly empty) for keyset pagination; `page` is then ignored
+  cursor?: string
+  withTotal?: TotalMode
 }
 
 export interface ServiceListResult {
   data: Service[]
-  pagination: {
-    page: number
-    limit: number
-    total: number
-    totalPages: number
-  }
+  pagination: OffsetPagination | CursorPagination
 }
 
 export class ServiceRepository {
@@ -27,35 +38,61 @@ export class ServiceRepository {
     })
   }
 
+  /**
+   * Price and duration of the active services among `ids`.
+   */
+  async findActive(
+    barbershopId: string,
+    ids: string[]
+  ): Promise<Pick<Service, 'id' | 'price' | 'duration'>[]> {
+    return prisma.service.findMany({
+      where: { barbershopId, isActive: true, id: { in: ids } },
+      select: { id: true, price: true, duration: true },
+    })
+  }
+
   async list(barbershopId: string, params: PaginationParams): Promise<ServiceListResult> {
     const { page, limit } = params
     const skip = (page - 1) * limit
+    const where: Prisma.ServiceWhereInput = { barbershopId, isActive: true }
+    const withTotal = resolveTotalMode(params)
+    const countAll = () =>
+      countTotal(withTotal, 'service', barbershopId, where, () => prisma.service.count({ where }))
+
+    if (params.cursor !== undefined) {
+      const [rows, total] = await Promise.all([
+        prisma.service.findMany({
+          where: {
+            ...where,
+            AND: params.cursor
+              ? seekWhere<Prisma.ServiceWhereInput>('createdAt', 'desc', params.cursor)
+              : undefined,
+          },
+          take: limit + 1,
+          orderBy: seekOrderBy<Prisma.ServiceOrderByWithRelationInput>('createdAt', 'desc'),
+        }),
+        countAll(),
+      ])
+      return toCursorPage(rows, limit, (row) => row.createdAt, total)
+    }
 
-    const [data, total] = await Promise.all([
+    const [rows, total] = await Promise.all([
       prisma.service.findMany({
-        where: { barbershopId, isActive: true },
+        where,
         skip,
-        take: limit,
+        take: offsetTake(limit, withTotal),
         orderBy: { createdAt: 'desc' },
       }),
-      prisma.service.count({
-        where: { barbershopId, isActive: true },
-      }),
+      countAll(),
     ])
 
-    return {
-      data,
-      pagination: {
-        page,
-        limit,
-        total,
-        totalPages: Math.ceil(total / limit),
-      },
-    }
+    return toOffsetPage(rows, page, limit, total)
   }
 
   async create(data: Prisma.ServiceCreateInput): Promise<Service> {
-    return prisma.service.create({ data })
+    const service = await prisma.service.create({ data })
+    await invalidateCounts('service', service.barbershopId)
+    return service
   }
 
   async update(
@@ -63,25 +100,22 @@ export class ServiceRepository {
     barbershopId: string,
     data: Prisma.ServiceUpdateInput
   ): Promise<Service> {
-    const existing = await prisma.service.findFirst({ where: { id, barbershopId, isActive: true } })
-    if (!existing) {
-      throw new Error('Service not found')
-    }
-    return prisma.service.update({
-      where: { id },
-      data,
-    })
+    return orNotFound(
+      prisma.service.update({ where: { id, barbershopId, isActive: true }, data }),
+      'Service not found'
+    )
   }
 
   async delete(id: string, barbershopId: string): Promise<Service> {
-    const existing = await prisma.service.findFirst({ where: { id, barbershopId, isActive: true } })
-    if (!existing) {
-      throw new Error('Service not found')
-    }
-    return prisma.service.update({
-      where: { id },
-      data: { isActive: false },
-    })
+    const service = await orNotFound(
+      prisma.service.update({
+        where: { id, barbershopId, isActive: true },
+        data: { isActive: false },
+      }),
+      'Service not found'
+    )
+    await invalidateCounts('service', barbershopId)
+    return service
   }
 }
 
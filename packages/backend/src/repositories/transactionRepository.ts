@@ -1,5 +1,25 @@
 import { prisma } from '../lib/prisma.js'
+import { orNotFound } from '../lib/prismaErrors.js'
+import { countTotal, invalidateCounts } from '../lib/countCache.js'
+import { indexById, type IncludedEntities } from '../lib/projection.js'
+import {
+  transactionRollupRepository,
+  type RolledUpTransaction,
+} from './transactionRollupRepository.js'
 import type { Prisma, Transaction, TransactionType } from '@prisma/client'
+import {
+  offsetTake,
+  resolveTotalMode,
+  seekBatches,
+  seekOrderBy,
+  seekWhere,
+  STREAM_BATCH_SIZE,
+  toCursorPage,
+  toOffsetPage,
+  type CursorPagination,
+  type OffsetPagination,
+  type TotalMode,
+} from '../lib/pagination.js'
 
 const professionalPublicSelect = {
   id: true,
@@ -13,19 +33,20 @@ const professionalPublicSelect = {
   updatedAt: true,
 } as const
 
+// The columns a rollup row is keyed or summed on, see RolledUpTransaction
+const ROLLED_UP_COLUMNS = ['date', 'type', 'category', 'amount'] as const
+
 export interface PaginationParams {
   page: number
   limit: number
+  // Set (possibly empty) for keyset pagination; `page` is then ignored
+  cursor?: string
+  withTotal?: TotalMode
 }
 
 export interface TransactionListResult {
   data: Transaction[]
-  pagination: {
-    page: number
-    limit: number
-    total: number
-    totalPages: number
-  }
+  pagination: OffsetPagination | CursorPagination
 }
 
 export interface ListFilters {
@@ -35,6 +56,21 @@ export interface ListFilters {
   endDate?: string
 }
 
+function listWhere(barbershopId: string, filters?: ListFilters): Prisma.TransactionWhereInput {
+  return {
+    barbershopId,
+    ...(filters?.type && { type: filters.type }),
+    ...(filters?.category && { category: filters.category }),
+    ...(filters?.startDate &&
+      filters?.endDate && {
+        date: {
+          gte: new Date(filters.startDate),
+          lte: new Date(filters.endDate),
+        },
+      }),
+  }
+}
+
 export class TransactionRepository {
   async findById(id: string, barbershopId: string): Promise<Transaction | null> {
     return prisma.transaction.findFirst({
@@ -46,43 +82,111 @@ export class TransactionRepository {
   async list(
     barbershopId: string,
     params: PaginationParams,
-    filters?: ListFilters
+    filters?: ListFilters,
+    // false for normalized responses, which side-load createdBy with `loadIncluded`
+    embedCreatedBy = true
   ): Promise<TransactionListResult> {
     const { page, limit } = params
     const skip = (page - 1) * limit
+    const where = listWhere(barbershopId, filters)
+    const include = embedCreatedBy ? { createdBy: { select: professionalPublicSelect } } : {}
 
-    const where: Prisma.TransactionWhereInput = {
-      barbershopId,
-      ...(filters?.type && { type: filters.type }),
-      ...(filters?.category && { category: filters.category }),
-      ...(filters?.startDate &&
-        filters?.endDate && {
-          date: {
-            gte: new Date(filters.startDate),
-            lte: new Date(filters.endDate),
+    const withTotal = resolveTotalMode(params)
+    const countAll = () =>
+      countTotal(withTotal, 'transaction', barbershopId, where, () =>
+        prisma.transaction.count({ where })
+      )
+
+    if (params.cursor !== undefined) {
+      const [rows, total] = await Promise.all([
+        prisma.transaction.findMany({
+          where: {
+            ...where,
+            AND: params.cursor
+              ? seekWhere<Prisma.TransactionWhereInput>('date', 'desc', params.cursor)
+              : undefined,
           },
+          take: limit + 1,
+          orderBy: seekOrderBy<Prisma.TransactionOrderByWithRelationInput>('date', 'desc'),
+          include,
         }),
+        countAll(),
+      ])
+      return toCursorPage(rows, limit, (row) => row.date, total)
     }
 
-    const [data, total] = await Promise.all([
+    const [rows, total] = await Promise.all([
       prisma.transaction.findMany({
         where,
         skip,
-        take: limit,
+        take: offsetTake(limit, withTotal),
         orderBy: { date: 'desc' },
-        include: { createdBy: { select: professionalPublicSelect } },
+        include,
       }),
-      prisma.transaction.count({ where }),
+      countAll(),
     ])
 
-    return { data, pagination: { page, limit, total, totalPages: Math.ceil(total / limit) } }
+    return toOffsetPage(rows, page, limit, total)
+  }
+
+  /**
+   * Rows of the cursor page `list` would return, read in keyset batches and yielded as they
+   * arrive; the generator returns the next page's cursor.
+   */
+  streamList(
+    barbershopId: string,
+    params: { limit: number; cursor: string },
+    filters?: ListFilters,
+    batchSize = STREAM_BATCH_SIZE
+  ): AsyncGenerator<Transaction, string | null> {
+    const where = listWhere(barbershopId, filters)
+    return seekBatches(
+      (cursor, take) =>
+        prisma.transaction.findMany({
+          where: {
+            ...where,
+            AND: cursor
+              ? seekWhere<Prisma.TransactionWhereInput>('date', 'desc', cursor)
+              : undefined,
+          },
+          take,
+          orderBy: seekOrderBy<Prisma.TransactionOrderByWithRelationInput>('date', 'desc'),
+          include: { createdBy: { select: professionalPublicSelect } },
+        }),
+      (row) => row.date,
+      params.cursor,
+      params.limit,
+      batchSize
+    )
+  }
+
+  /**
+   * Side-loads the creators of a page with one query for the distinct ids.
+   */
+  async loadIncluded(barbershopId: string, rows: Transaction[]): Promise<IncludedEntities> {
+    const ids = [...new Set(rows.map((row) => row.createdById))]
+    const professionals =
+      ids.length > 0
+        ? await prisma.professional.findMany({
+            where: { barbershopId, id: { in: ids } },
+            select: professionalPublicSelect,
+          })
+        : []
+    return { professionals: indexById(professionals) }
   }
 
+  // Every write moves the transaction in the daily rollups within the same database transaction
   async create(data: Prisma.TransactionCreateInput): Promise<Transaction> {
-    return prisma.transaction.create({
-      data,
-      include: { createdBy: { select: professionalPublicSelect } },
+    const transaction = await prisma.$transaction(async (tx) => {
+      const created = await tx.transaction.create({
+        data,
+        include: { createdBy: { select: professionalPublicSelect } },
+      })
+      await transactionRollupRepository.apply(tx, null, created)
+      return created
     })
+    await invalidateCounts('transaction', transaction.barbershopId)
+    return transaction
   }
 
   async update(
@@ -90,26 +194,57 @@ export class TransactionRepository {
     barbershopId: string,
     data: Prisma.TransactionUpdateInput
   ): Promise<Transaction> {
-    const existing = await prisma.transaction.findFirst({ where: { id, barbershopId } })
-    if (!existing) {
-      throw new Error('Transaction not found')
+    // A write that keeps every rolled-up column needs neither the lock nor the old version
+    if (!ROLLED_UP_COLUMNS.some((column) => data[column] !== undefined)) {
+      const transaction = await orNotFound(
+        prisma.transaction.update({
+          where: { id, barbershopId },
+          data,
+          include: { createdBy: { select: professionalPublicSelect } },
+        }),
+        'Transaction not found'
+      )
+      await invalidateCounts('transaction', barbershopId)
+      return transaction
     }
-    return prisma.transaction.update({
-      where: { id },
-      data,
-      include: { createdBy: { select: professionalPublicSelect } },
+
+    const transaction = await prisma.$transaction(async (tx) => {
+      // Locks the row so a concurrent update cannot take the same version off the rollups
+      const [before] = await tx.$queryRaw<RolledUpTransaction[]>`
+        SELECT "barbershopId", "date", "type", "category", "amount"
+        FROM "transactions"
+        WHERE "id" = ${id} AND "barbershopId" = ${barbershopId}
+        FOR UPDATE
+      `
+      if (!before) {
+        throw new Error('Transaction not found')
+      }
+      const updated = await tx.transaction.update({
+        where: { id, barbershopId },
+        data,
+        include: { createdBy: { select: professionalPublicSelect } },
+      })
+      await transactionRollupRepository.apply(tx, before, updated)
+      return updated
     })
+    await invalidateCounts('transaction', barbershopId)
+    return transaction
   }
 
   async delete(id: string, barbershopId: string): Promise<Transaction> {
-    const existing = await prisma.transaction.findFirst({ where: { id, barbershopId } })
-    if (!existing) {
-      throw new Error('Transaction not found')
-    }
-    return prisma.transaction.delete({
-      where: { id },
-      include: { createdBy: { select: professionalPublicSelect } },
+    const transaction = await prisma.$transaction(async (tx) => {
+      const deleted = await orNotFound(
+        tx.transaction.delete({
+          where: { id, barbershopId },
+          include: { createdBy: { select: professionalPublicSelect } },
+        }),
+        'Transaction not found'
+      )
+      await transactionRollupRepository.apply(tx, deleted, null)
+      return deleted
     })
+    await invalidateCounts('transaction', barbershopId)
+    return transaction
   }
 }
 
@@ -0,0 +1,123 @@
+import { prisma } from '../lib/prisma.js'
+import { utcDay, type DayFilter } from '../lib/rollup.js'
+import type { Prisma, PrismaClient, TransactionType } from '@prisma/client'
+import { Decimal } from '@prisma/client/runtime/library'
+
+// Upper bound of a rebuild; it holds transaction writes of every tenant while it runs
+const REBUILD_TIMEOUT_MS = 10 * 60 * 1000
+
+// The columns of a transaction that its rollup depends on
+export interface RolledUpTransaction {
+  barbershopId: string
+  date: Date
+  type: TransactionType
+  category: string
+  amount: Decimal
+}
+
+interface RollupDelta {
+  barbershopId: string
+  day: Date
+  type: TransactionType
+  category: string
+  amount: Decimal
+  count: number
+}
+
+const deltaKey = (delta: RollupDelta) =>
+  `${delta.barbershopId}|${delta.day.toISOString()}|${delta.type}|${delta.category}`
+
+/**
+ * What a write changes in the rollups: the removed version of a transaction comes off its
+ * day, the added one goes on. Both land in one delta when the write keeps the day, type and
+ * category; a write that changes none of the rolled-up columns yields no delta.
+ */
+function rollupDeltas(
+  removed: RolledUpTransaction | null,
+  added: RolledUpTransaction | null
+): RollupDelta[] {
+  const deltas = new Map<string, RollupDelta>()
+  const apply = (row: RolledUpTransaction, sign: 1 | -1) => {
+    const delta: RollupDelta = {
+      barbershopId: row.barbershopId,
+      day: utcDay(row.date),
+      type: row.type,
+      category: row.category,
+      amount: new Decimal(row.amount).times(sign),
+      count: sign,
+    }
+    const existing = deltas.get(deltaKey(delta))
+    if (existing) {
+      existing.amount = existing.amount.plus(delta.amount)
+      existing.count += delta.count
+    } else {
+      deltas.set(deltaKey(delta), delta)
+    }
+  }
+  if (removed) apply(removed, -1)
+  if (added) apply(added, 1)
+
+  return [...deltas.entries()]
+    .filter(([, delta]) => delta.count !== 0 || !delta.amount.isZero())
+    .sort(([a], [b]) => (a < b ? -1 : a > b ? 1 : 0))
+    .map(([, delta]) => delta)
+}
+
+export class TransactionRollupRepository {
+  /**
+   * Moves a transaction write into the daily rollups, inside the write's own database
+   * transaction. Each delta is one `INSERT ... ON CONFLICT DO UPDATE` (Prisma's native
+   * upsert), taken in key order so concurrent writes to two days cannot deadlock.
+   */
+  async apply(
+    tx: Prisma.TransactionClient,
+    removed: RolledUpTransaction | null,
+    added: RolledUpTransaction | null
+  ): Promise<void> {
+    for (const { amount, count, ...key } of rollupDeltas(removed, added)) {
+      await tx.transactionDailyRollup.upsert({
+        where: { barbershopId_day_type_category: key },
+        create: { ...key, amount, count },
+        update: { amount: { increment: amount }, count: { increment: count } },
+      })
+    }
+  }
+
+  /**
+   * Totals by type and category over whole days, read from the rollups.
+   */
+  async sumDays(barbershopId: string, days: DayFilter) {
+    return prisma.transactionDailyRollup.groupBy({
+      by: ['type', 'category'],
+      where: { barbershopId, day: days },
+      _sum: { amount: true, count: true },
+    })
+  }
+
+  /**
+   * Recomputes the rollups of one tenant (or all of them) from the transactions, e.g. after
+   * rows were imported or fixed without going through the repository. Transaction writes
+   * wait on the table lock until the rebuilt rows commit, so none is lost or counted twice.
+   * Returns the number of rollup rows written.
+   */
+  async rebuild(barbershopId?: string, db: PrismaClient = prisma): Promise<number> {
+    const tenant = barbershopId ?? null
+    return db.$transaction(
+      async (tx) => {
+        await tx.$executeRaw`LOCK TABLE "transactions" IN SHARE MODE`
+        await tx.transactionDailyRollup.deleteMany({ where: barbershopId ? { barbershopId } : {} })
+        return tx.$executeRaw`
+          INSERT INTO "transaction_daily_rollups"
+            ("barbershopId", "day", "type", "category", "amount", "count")
+          SELECT "barbershopId", "date"::date, "type", "category", SUM("amount"), COUNT(*)::integer
+          FROM "transactions"
+          WHERE ${tenant}::text IS NULL OR "barbershopId" = ${tenant}
+          GROUP BY 1, 2, 3, 4
+        `
+      },
+      { timeout: REBUILD_TIMEOUT_MS }
+    )
+  }
+}
+
+export const transactionRollupRepository = new TransactionRollupRepository()
@@ -145,4 +145,47 @@ describe('Cron Routes', () => {
       await app2.close()
     })
   })
+
+  describe('GET /api/cron/metrics', () => {
+    it('rejects request without cron secret', async () => {
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/cron/metrics',
+      })
+      expect(response.statusCode).toBe(401)
+    })
+
+    it('returns counters with valid cron secret', async () => {
+      const { incrementCounter, resetMetrics } = await import('../../lib/metrics.js')
+      resetMetrics()
+      incrementCounter('tenant.lookup.coalesced', 3)
+
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/cron/metrics',
+        headers: { 'x-cron-secret': CRON_SECRET },
+      })
+
+      expect(response.statusCode).toBe(200)
+      expect(response.json().counters).toEqual({ 'tenant.lookup.coalesced': 3 })
+    })
+
+    it('returns timing aggregates with valid cron secret', async () => {
+      const { recordTiming, resetMetrics } = await import('../../lib/metrics.js')
+      resetMetrics()
+      recordTiming('otp.verify', 4)
+      recordTiming('otp.verify', 8)
+
+      const response = await app.inject({
+        method: 'GET',
+        url: '/api/cron/metrics',
+        headers: { 'x-cron-secret': CRON_SECRET },
+      })
+
+      expect(response.statusCode).toBe(200)
+      expect(response.json().timings).toEqual({
+        'otp.verify': { count: 2, totalMs: 12, maxMs: 8, avgMs: 6 },
+      })
+    })
+  })
 })
@@ -1,6 +1,15 @@
-import type { FastifyInstance } from 'fastify'
+import type { FastifyInstance, FastifyRequest } from 'fastify'
 import { appointmentController } from '../controllers/appointmentController.js'
 import { requireAuth } from '../middleware/auth.js'
+import { RATE_LIMIT_COST, listRateLimitCost } from '../lib/rateLimitConfig.js'
+
+// Streamed pages read up to 100 times a normal page, so they consume tokens by row count
+const listRouteConfig = {
+  rateLimitCost: (request: FastifyRequest) => {
+    const { stream, limit } = request.query as { stream?: string; limit?: string }
+    return listRateLimitCost(stream, limit)
+  },
+}
 
 const errorResponseSchema = {
   type: 'object',
@@ -19,6 +28,9 @@ const paginationSchema = {
     limit: { type: 'number' },
     total: { type: 'number' },
     totalPages: { type: 'number' },
+    nextCursor: { type: 'string', nullable: true },
+    hasMore: { type: 'boolean' },
+    estimated: { type: 'boolean' },
   },
   additionalProperties: true,
 } as const
@@ -33,6 +45,7 @@ const appointmentSchema = {
     serviceId: { type: 'string' },
     createdById: { type: 'string' },
     date: { type: 'string', format: 'date-time' },
+    endsAt: { type: 'string', format: 'date-time' },
     status: { type: 'string', enum: ['PENDING', 'CONFIRMED', 'COMPLETED', 'CANCELLED', 'NO_SHOW'] },
     price: { type: 'number' },
     commissionValue: { type: 'number', nullable: true },
@@ -43,11 +56,58 @@ const appointmentSchema = {
   additionalProperties: true,
 } as const
 
+const seriesSchema = {
+  type: 'object',
+  properties: {
+    id: { type: 'string' },
+    barbershopId: { type: 'string' },
+    professionalId: { type: 'string' },
+    clientId: { type: 'string' },
+    serviceId: { type: 'string' },
+    createdById: { type: 'string' },
+    startsAt: { type: 'string', format: 'date-time' },
+    endsAt: { type: 'string', format: 'date-time' },
+    intervalWeeks: { type: 'number' },
+    count: { type: 'number', nullable: true },
+    duration: { type: 'number' },
+    price: { type: 'number' },
+    notes: { type: 'string', nullable: true },
+    isActive: { type: 'boolean' },
+    createdAt: { type: 'string', format: 'date-time' },
+    updatedAt: { type: 'string', format: 'date-time' },
+  },
+  additionalProperties: true,
+} as const
+
+const occurrenceSchema = {
+  type: 'object',
+  description: 'Occurrence of a series without an appointment row (expand=occurrences)',
+  properties: {
+    seriesId: { type: 'string' },
+    professionalId: { type: 'string' },
+    clientId: { type: 'string' },
+    serviceId: { type: 'string' },
+    date: { type: 'string', format: 'date-time' },
+    endsAt: { type: 'string', format: 'date-time' },
+    status: { type: 'string', enum: ['PENDING'] },
+    price: { type: 'number' },
+  },
+  additionalProperties: true,
+} as const
+
+const includedSchema = {
+  type: 'object',
+  description: 'Side-loaded entities by collection, then by id (format=normalized)',
+  additionalProperties: { type: 'object', additionalProperties: true },
+} as const
+
 const appointmentListSchema = {
   type: 'object',
   properties: {
     data: { type: 'array', items: appointmentSchema },
     pagination: paginationSchema,
+    included: includedSchema,
+    occurrences: { type: 'array', items: occurrenceSchema },
   },
   additionalProperties: true,
 } as const
@@ -57,6 +117,7 @@ export async function appointmentRoutes(app: FastifyInstance) {
     '/appointments',
     {
       preHandler: requireAuth,
+      config: listRouteConfig,
       schema: {
         tags: ['Appointments'],
         summary: 'List all appointments',
@@ -65,7 +126,42 @@ export async function appointmentRoutes(app: FastifyInstance) {
           type: 'object',
           properties: {
             page: { type: 'number', default: 1 },
-            limit: { type: 'number', default: 20 },
+            limit: {
+              type: 'number',
+              default: 20,
+              description: 'Rows per page: at most 100, or 10000 with stream=true',
+            },
+            cursor: {
+              type: 'string',
+              description: 'Keyset pagination: empty for the first page, then `pagination.nextCursor`',
+            },
+            withTotal: {
+              type: 'string',
+              enum: ['exact', 'estimate', 'false'],
+              description: 'Total count: exact (default for pages), estimate (cached) or false (default for cursors)',
+            },
+            stream: {
+              type: 'string',
+              enum: ['true', 'false'],
+              description:
+                'true: write a cursor page to the response row by row, reading Postgres in keyset batches (export-sized limits; no total, nested format only)',
+            },
+            fields: {
+              type: 'string',
+              description:
+                'Comma-separated columns to return, e.g. `date,status,client.name` (`id` and `date` are always returned)',
+            },
+            include: {
+              type: 'string',
+              description:
+                'Comma-separated relations to embed: professional, createdBy, client, service (default: all; empty: none)',
+            },
+            format: {
+              type: 'string',
+              enum: ['nested', 'normalized'],
+              default: 'nested',
+              description: 'normalized: rows keep foreign keys, related entities are under `included`',
+            },
             status: {
               type: 'string',
               enum: ['PENDING', 'CONFIRMED', 'COMPLETED', 'CANCELLED', 'NO_SHOW'],
@@ -74,12 +170,19 @@ export async function appointmentRoutes(app: FastifyInstance) {
             clientId: { type: 'string' },
             startDate: { type: 'string', format: 'date-time' },
             endDate: { type: 'string', format: 'date-time' },
+            expand: {
+              type: 'string',
+              enum: ['occurrences'],
+              description:
+                'occurrences: also return the series occurrences between startDate and endDate that have no appointment row yet (requires both dates)',
+            },
           },
         },
         response: {
           200: {
             ...appointmentListSchema,
           },
+          400: errorResponseSchema,
           401: errorResponseSchema,
           403: errorResponseSchema,
         },
@@ -88,6 +191,46 @@ export async function appointmentRoutes(app: FastifyInstance) {
     appointmentController.list.bind(appointmentController)
   )
 
+  app.get(
+    '/appointments/export',
+    {
+      preHandler: requireAuth,
+      config: { rateLimitCost: RATE_LIMIT_COST.export },
+      schema: {
+        tags: ['Appointments'],
+        summary: 'Export appointments as NDJSON or CSV',
+        description:
+          'Streams every appointment matching the filters, oldest first, read in keyset batches',
+        security: [{ bearerAuth: [] }],
+        querystring: {
+          type: 'object',
+          properties: {
+            format: {
+              type: 'string',
+              enum: ['ndjson', 'csv'],
+              default: 'ndjson',
+              description: 'ndjson: one JSON object per line; csv: a header line, then one line per row',
+            },
+            status: {
+              type: 'string',
+              enum: ['PENDING', 'CONFIRMED', 'COMPLETED', 'CANCELLED', 'NO_SHOW'],
+            },
+            professionalId: { type: 'string' },
+            clientId: { type: 'string' },
+            startDate: { type: 'string', format: 'date-time' },
+            endDate: { type: 'string', format: 'date-time' },
+          },
+        },
+        response: {
+          400: errorResponseSchema,
+          401: errorResponseSchema,
+          403: errorResponseSchema,
+        },
+      },
+    },
+    appointmentController.export.bind(appointmentController)
+  )
+
   app.get(
     '/appointments/:id',
     {
@@ -140,6 +283,166 @@ export async function appointmentRoutes(app: FastifyInstance) {
     appointmentController.create.bind(appointmentController)
   )
 
+  app.post(
+    '/appointments/bulk',
+    {
+      preHandler: requireAuth,
+      config: { rateLimitCost: RATE_LIMIT_COST.bulk },
+      schema: {
+        tags: ['Appointments'],
+        summary: 'Create many appointments',
+        description:
+          'Books up to 500 appointments in one request. Every item gets a result; items with a missing reference or a conflict (with booked appointments or an earlier item of the batch) fail without affecting the others.',
+        security: [{ bearerAuth: [] }],
+        body: {
+          type: 'object',
+          required: ['appointments'],
+          properties: {
+            appointments: {
+              type: 'array',
+              minItems: 1,
+              maxItems: 500,
+              items: {
+                type: 'object',
+                required: ['professionalId', 'clientId', 'serviceId', 'date'],
+                properties: {
+                  professionalId: { type: 'string' },
+                  clientId: { type: 'string' },
+                  serviceId: { type: 'string' },
+                  date: { type: 'string', format: 'date-time' },
+                  notes: { type: 'string' },
+                },
+              },
+            },
+          },
+        },
+        response: {
+          200: {
+            type: 'object',
+            properties: {
+              created: { type: 'number' },
+              failed: { type: 'number' },
+              results: {
+                type: 'array',
+                items: {
+                  type: 'object',
+                  properties: {
+                    index: { type: 'number' },
+                    status: { type: 'string', enum: ['created', 'failed'] },
+                    id: { type: 'string' },
+                    error: { type: 'string' },
+                  },
+                },
+              },
+            },
+          },
+          400: errorResponseSchema,
+          401: errorResponseSchema,
+          403: errorResponseSchema,
+          409: errorResponseSchema,
+        },
+      },
+    },
+    appointmentController.bulkCreate.bind(appointmentController)
+  )
+
+  app.post(
+    '/appointments/series',
+    {
+      preHandler: requireAuth,
+      schema: {
+        tags: ['Appointments'],
+        summary: 'Create recurring appointment series',
+        description:
+          'Books the same slot every week or every other week, for `count` occurrences or until `until` (at most 104). Occurrences are not stored: they show up in availability and in `GET /appointments?expand=occurrences` until they are materialized.',
+        security: [{ bearerAuth: [] }],
+        body: {
+          type: 'object',
+          required: ['professionalId', 'clientId', 'serviceId', 'date', 'recurrence'],
+          properties: {
+            professionalId: { type: 'string' },
+            clientId: { type: 'string' },
+            serviceId: { type: 'string' },
+            date: { type: 'string', format: 'date-time' },
+            notes: { type: 'string' },
+            recurrence: {
+              type: 'object',
+              properties: {
+                interval: { type: 'number', enum: [1, 2], default: 1 },
+                count: { type: 'number', minimum: 1, maximum: 104 },
+                until: { type: 'string', format: 'date-time' },
+              },
+            },
+          },
+        },
+        response: {
+          201: seriesSchema,
+          400: errorResponseSchema,
+          401: errorResponseSchema,
+          403: errorResponseSchema,
+          404: errorResponseSchema,
+          409: errorResponseSchema,
+        },
+      },
+    },
+    appointmentController.createSeries.bind(appointmentController)
+  )
+
+  app.post(
+    '/appointments/series/:id/occurrences',
+    {
+      preHandler: requireAuth,
+      schema: {
+        tags: ['Appointments'],
+        summary: 'Materialize a series occurrence',
+        description:
+          'Stores the occurrence starting at `occurrence` as a PENDING appointment so it can be confirmed, moved or cancelled. Returns the existing appointment (200) if it was already materialized.',
+        security: [{ bearerAuth: [] }],
+        params: { type: 'object', required: ['id'], properties: { id: { type: 'string' } } },
+        body: {
+          type: 'object',
+          required: ['occurrence'],
+          properties: {
+            occurrence: { type: 'string', format: 'date-time' },
+          },
+        },
+        response: {
+          200: appointmentSchema,
+          201: appointmentSchema,
+          400: errorResponseSchema,
+          401: errorResponseSchema,
+          403: errorResponseSchema,
+          404: errorResponseSchema,
+          409: errorResponseSchema,
+        },
+      },
+    },
+    appointmentController.materializeOccurrence.bind(appointmentController)
+  )
+
+  app.delete(
+    '/appointments/series/:id',
+    {
+      preHandler: requireAuth,
+      schema: {
+        tags: ['Appointments'],
+        summary: 'End appointment series',
+        description:
+          'Stops expanding the remaining occurrences. Materialized occurrences are appointments and are not changed.',
+        security: [{ bearerAuth: [] }],
+        params: { type: 'object', required: ['id'], properties: { id: { type: 'string' } } },
+        response: {
+          204: { type: 'null' },
+          400: errorResponseSchema,
+          401: errorResponseSchema,
+          403: errorResponseSchema,
+          404: errorResponseSchema,
+        },
+      },
+    },
+    appointmentController.deleteSeries.bind(appointmentController)
+  )
+
   app.put(
     '/appointments/:id',
     {
@@ -1,6 +1,7 @@
 import type { FastifyInstance } from 'fastify'
 import { authController } from '../controllers/authController.js'
 import { redis } from '../lib/redis.js'
+import { requireAuth } from '../middleware/auth.js'
 
 export async function authRoutes(app: FastifyInstance) {
   app.post(
@@ -47,6 +48,7 @@ export async function authRoutes(app: FastifyInstance) {
       schema: {
         tags: ['Auth'],
         summary: 'Refresh access token',
+        description: 'Rotates the refresh token: the presented token is revoked and a new one is returned',
         body: {
           type: 'object',
           required: ['refreshToken'],
@@ -59,6 +61,7 @@ export async function authRoutes(app: FastifyInstance) {
             type: 'object',
             properties: {
               accessToken: { type: 'string' },
+              refreshToken: { type: 'string' },
             },
           },
           401: { type: 'object', properties: { error: { type: 'string' } } },
@@ -83,6 +86,39 @@ export async function authRoutes(app: FastifyInstance) {
     authController.logout.bind(authController)
   )
 
+  app.get(
+    '/auth/sessions',
+    {
+      preHandler: requireAuth,
+      schema: {
+        tags: ['Auth'],
+        summary: 'List active sessions (refresh tokens)',
+        security: [{ bearerAuth: [] }],
+        response: {
+          200: {
+            type: 'object',
+            properties: {
+              data: {
+                type: 'array',
+                items: {
+                  type: 'object',
+                  properties: {
+                    id: { type: 'string' },
+                    createdAt: { type: 'string', format: 'date-time' },
+                    expiresAt: { type: 'string', format: 'date-time' },
+                    current: { type: 'boolean' },
+                  },
+                },
+              },
+            },
+          },
+          401: { type: 'object', properties: { error: { type: 'string' } } },
+        },
+      },
+    },
+    authController.listSessions.bind(authController)
+  )
+
   app.post(
     '/auth/request-otp',
     {
@@ -110,6 +146,8 @@ export async function authRoutes(app: FastifyInstance) {
       schema: {
         tags: ['Auth'],
         summary: 'Verify OTP',
+        description:
+          'Each OTP accepts a limited number of wrong codes (OTP_MAX_ATTEMPTS, default 5); after that it is discarded and 429 is returned',
         body: {
           type: 'object',
           required: ['email', 'otp'],
@@ -136,6 +174,7 @@ export async function authRoutes(app: FastifyInstance) {
             },
           },
           401: { type: 'object', properties: { error: { type: 'string' } } },
+          429: { type: 'object', properties: { error: { type: 'string' } } },
         },
       },
     },
@@ -182,18 +221,17 @@ export async function authRoutes(app: FastifyInstance) {
 
         const { identifier } = request.params as { identifier: string }
         const key = `${OTP_PREFIX}:${tenantId}:${identifier}`
-        const otpRaw = await redis.get(key)
-        const otp = otpRaw === null ? null : String(otpRaw)
+        const otp = await redis.get(key)
 
         if (!otp) {
           return reply.code(404).send({ error: 'OTP not found or expired' })
         }
 
-        const ttlSeconds = typeof redis.ttl === 'function' ? await redis.ttl(key) : null
+        const ttlSeconds = await redis.ttl(key)
 
         return {
           otp,
-          expiresIn: ttlSeconds && ttlSeconds > 0 ? ttlSeconds : 0,
+          expiresIn: ttlSeconds > 0 ? ttlSeconds : 0,
         }
       }
     )
@@ -26,6 +26,15 @@ export async function clientRoutes(app: FastifyInstance) {
           properties: {
             page: { type: 'number', minimum: 1, default: 1 },
             limit: { type: 'number', minimum: 1, maximum: 100, default: 20 },
+            cursor: {
+              type: 'string',
+              description: 'Keyset pagination: empty for the first page, then `pagination.nextCursor`',
+            },
+            withTotal: {
+              type: 'string',
+              enum: ['exact', 'estimate', 'false'],
+              description: 'Total count: exact (default for pages), estimate (cached) or false (default for cursors)',
+            },
           },
         },
         response: {
@@ -55,6 +64,9 @@ export async function clientRoutes(app: FastifyInstance) {
                   limit: { type: 'number' },
                   total: { type: 'number' },
                   totalPages: { type: 'number' },
+                  nextCursor: { type: 'string', nullable: true },
+                  hasMore: { type: 'boolean' },
+                  estimated: { type: 'boolean' },
                 },
               },
             },
@@ -1,6 +1,35 @@
 import { timingSafeEqual } from 'crypto'
-import type { FastifyInstance } from 'fastify'
+import type { FastifyInstance, FastifyReply, FastifyRequest } from 'fastify'
 import { notificationService } from '../services/notificationService.js'
+import { getMetricsSnapshot } from '../lib/metrics.js'
+
+/**
+ * Validates the x-cron-secret header. Sends the error response and returns false on failure.
+ */
+function assertCronSecret(request: FastifyRequest, reply: FastifyReply): boolean {
+  const cronSecretHeader = request.headers['x-cron-secret']
+  const expectedSecret = process.env.CRON_SECRET
+
+  if (!expectedSecret) {
+    reply.status(500).send({ error: 'CRON_SECRET not configured' })
+    return false
+  }
+
+  const cronSecret =
+    typeof cronSecretHeader === 'string' ? cronSecretHeader : (cronSecretHeader?.[0] ?? '')
+  const cronSecretBuffer = Buffer.from(cronSecret)
+  const expectedSecretBuffer = Buffer.from(expectedSecret)
+  const secretsMatch =
+    cronSecretBuffer.length === expectedSecretBuffer.length &&
+    timingSafeEqual(cronSecretBuffer, expectedSecretBuffer)
+
+  if (!secretsMatch) {
+    reply.status(401).send({ error: 'Invalid cron secret' })
+    return false
+  }
+
+  return true
+}
 
 export async function cronRoutes(app: FastifyInstance) {
   app.post(
@@ -41,23 +70,8 @@ export async function cronRoutes(app: FastifyInstance) {
     },
     async (request, reply) => {
       // Validate CRON_SECRET
-      const cronSecretHeader = request.headers['x-cron-secret']
-      const expectedSecret = process.env.CRON_SECRET
-
-      if (!expectedSecret) {
-        return reply.status(500).send({ error: 'CRON_SECRET not configured' })
-      }
-
-      const cronSecret =
-        typeof cronSecretHeader === 'string' ? cronSecretHeader : (cronSecretHeader?.[0] ?? '')
-      const cronSecretBuffer = Buffer.from(cronSecret)
-      const expectedSecretBuffer = Buffer.from(expectedSecret)
-      const secretsMatch =
-        cronSecretBuffer.length === expectedSecretBuffer.length &&
-        timingSafeEqual(cronSecretBuffer, expectedSecretBuffer)
-
-      if (!secretsMatch) {
-        return reply.status(401).send({ error: 'Invalid cron secret' })
+      if (!assertCronSecret(request, reply)) {
+        return reply
       }
 
       try {
@@ -76,4 +90,61 @@ export async function cronRoutes(app: FastifyInstance) {
       }
     }
   )
+
+  app.get(
+    '/cron/metrics',
+    {
+      schema: {
+        tags: ['Cron'],
+        summary: 'In-process metrics snapshot',
+        description:
+          'Protected by CRON_SECRET header. Returns counters and timings for the instance that served the request.',
+        headers: {
+          type: 'object',
+          properties: {
+            'x-cron-secret': { type: 'string' },
+          },
+        },
+        response: {
+          200: {
+            type: 'object',
+            properties: {
+              counters: { type: 'object', additionalProperties: { type: 'number' } },
+              timings: {
+                type: 'object',
+                additionalProperties: {
+                  type: 'object',
+                  properties: {
+                    count: { type: 'number' },
+                    totalMs: { type: 'number' },
+                    maxMs: { type: 'number' },
+                    avgMs: { type: 'number' },
+                  },
+                },
+              },
+            },
+          },
+          401: {
+            type: 'object',
+            properties: {
+              error: { type: 'string' },
+            },
+          },
+          500: {
+            type: 'object',
+            properties: {
+              error: { type: 'string' },
+            },
+          },
+        },
+      },
+    },
+    async (request, reply) => {
+      if (!assertCronSecret(request, reply)) {
+        return reply
+      }
+
+      return reply.status(200).send(getMetricsSnapshot())
+    }
+  )
 }
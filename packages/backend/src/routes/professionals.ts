@@ -12,6 +12,32 @@ const errorResponseSchema = {
   additionalProperties: true,
 } as const
 
+const availabilityQuerystring = {
+  type: 'object',
+  required: ['from', 'to', 'serviceId'],
+  properties: {
+    from: { type: 'string', format: 'date-time' },
+    to: { type: 'string', format: 'date-time', description: 'At most 31 days after `from`' },
+    serviceId: { type: 'string', description: 'Slots must fit this service duration' },
+  },
+} as const
+
+const slotSchema = {
+  type: 'object',
+  description: 'Free interval; a booking may start anywhere up to `end - duration`',
+  properties: {
+    start: { type: 'string', format: 'date-time' },
+    end: { type: 'string', format: 'date-time' },
+  },
+} as const
+
+const availabilityWindowProperties = {
+  from: { type: 'string', format: 'date-time' },
+  to: { type: 'string', format: 'date-time' },
+  serviceId: { type: 'string' },
+  duration: { type: 'number', description: 'Service duration in minutes' },
+} as const
+
 export async function professionalRoutes(app: FastifyInstance) {
   // List all professionals with pagination
   app.get(
@@ -28,6 +54,15 @@ export async function professionalRoutes(app: FastifyInstance) {
           properties: {
             page: { type: 'number', minimum: 1, default: 1 },
             limit: { type: 'number', minimum: 1, maximum: 100, default: 20 },
+            cursor: {
+              type: 'string',
+              description: 'Keyset pagination: empty for the first page, then `pagination.nextCursor`',
+            },
+            withTotal: {
+              type: 'string',
+              enum: ['exact', 'estimate', 'false'],
+              description: 'Total count: exact (default for pages), estimate (cached) or false (default for cursors)',
+            },
           },
         },
         response: {
@@ -57,6 +92,9 @@ export async function professionalRoutes(app: FastifyInstance) {
                   limit: { type: 'number' },
                   total: { type: 'number' },
                   totalPages: { type: 'number' },
+                  nextCursor: { type: 'string', nullable: true },
+                  hasMore: { type: 'boolean' },
+                  estimated: { type: 'boolean' },
                 },
               },
             },
@@ -69,6 +107,90 @@ export async function professionalRoutes(app: FastifyInstance) {
     professionalController.list.bind(professionalController)
   )
 
+  // Free slots of several professionals
+  app.get(
+    '/professionals/availability',
+    {
+      preHandler: requireAuth,
+      schema: {
+        tags: ['Professionals'],
+        summary: 'Availability of several professionals',
+        description:
+          'Free intervals that fit the service for each active professional (or those in `professionalIds`)',
+        security: [{ bearerAuth: [] }],
+        querystring: {
+          ...availabilityQuerystring,
+          properties: {
+            ...availabilityQuerystring.properties,
+            professionalIds: { type: 'string', description: 'Comma-separated professional ids' },
+          },
+        },
+        response: {
+          200: {
+            type: 'object',
+            properties: {
+              ...availabilityWindowProperties,
+              data: {
+                type: 'array',
+                items: {
+                  type: 'object',
+                  properties: {
+                    professionalId: { type: 'string' },
+                    name: { type: 'string' },
+                    slots: { type: 'array', items: slotSchema },
+                  },
+                },
+              },
+            },
+          },
+          400: errorResponseSchema,
+          404: errorResponseSchema,
+          401: errorResponseSchema,
+          403: errorResponseSchema,
+        },
+      },
+    },
+    professionalController.availabilityForMany.bind(professionalController)
+  )
+
+  // Free slots of one professional
+  app.get(
+    '/professionals/:id/availability',
+    {
+      preHandler: requireAuth,
+      schema: {
+        tags: ['Professionals'],
+        summary: 'Professional availability',
+        description:
+          'Free intervals of a professional between `from` and `to` that fit the service',
+        security: [{ bearerAuth: [] }],
+        params: {
+          type: 'object',
+          required: ['id'],
+          properties: {
+            id: { type: 'string' },
+          },
+        },
+        querystring: availabilityQuerystring,
+        response: {
+          200: {
+            type: 'object',
+            properties: {
+              ...availabilityWindowProperties,
+              professionalId: { type: 'string' },
+              slots: { type: 'array', items: slotSchema },
+            },
+          },
+          400: errorResponseSchema,
+          404: errorResponseSchema,
+          401: errorResponseSchema,
+          403: errorResponseSchema,
+        },
+      },
+    },
+    professionalController.availability.bind(professionalController)
+  )
+
   // Get professional by ID
   app.get(
     '/professionals/:id',
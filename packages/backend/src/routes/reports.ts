@@ -1,6 +1,15 @@
-import { FastifyInstance } from 'fastify'
+import { FastifyInstance, FastifyRequest } from 'fastify'
 import { reportController } from '../controllers/reportController.js'
 import { authMiddleware } from '../middleware/auth.js'
+import { reportRateLimitCost } from '../lib/rateLimitConfig.js'
+
+// Reports aggregate the whole requested period, so they consume more tenant rate limit tokens
+const reportRouteConfig = {
+  rateLimitCost: (request: FastifyRequest) => {
+    const { dateFrom, dateTo } = request.query as { dateFrom?: string; dateTo?: string }
+    return reportRateLimitCost(dateFrom, dateTo)
+  },
+}
 
 export async function reportRoutes(app: FastifyInstance) {
   // Financial Summary Endpoint
@@ -8,6 +17,7 @@ export async function reportRoutes(app: FastifyInstance) {
     '/reports/summary',
     {
       preHandler: [authMiddleware],
+      config: reportRouteConfig,
       schema: {
         tags: ['Reports'],
         summary: 'Get financial summary',
@@ -95,6 +105,7 @@ export async function reportRoutes(app: FastifyInstance) {
     '/reports/commissions',
     {
       preHandler: [authMiddleware],
+      config: reportRouteConfig,
       schema: {
         tags: ['Reports'],
         summary: 'Get commission report',
@@ -1,6 +1,15 @@
-import type { FastifyInstance } from 'fastify'
+import type { FastifyInstance, FastifyRequest } from 'fastify'
 import { transactionController } from '../controllers/transactionController.js'
 import { requireAuth } from '../middleware/auth.js'
+import { RATE_LIMIT_COST, listRateLimitCost } from '../lib/rateLimitConfig.js'
+
+// Streamed pages read up to 100 times a normal page, so they consume tokens by row count
+const listRouteConfig = {
+  rateLimitCost: (request: FastifyRequest) => {
+    const { stream, limit } = request.query as { stream?: string; limit?: string }
+    return listRateLimitCost(stream, limit)
+  },
+}
 
 const errorResponseSchema = {
   type: 'object',
@@ -19,6 +28,9 @@ const paginationSchema = {
     limit: { type: 'number' },
     total: { type: 'number' },
     totalPages: { type: 'number' },
+    nextCursor: { type: 'string', nullable: true },
+    hasMore: { type: 'boolean' },
+    estimated: { type: 'boolean' },
   },
   additionalProperties: true,
 } as const
@@ -45,11 +57,18 @@ const transactionSchema = {
   additionalProperties: true,
 } as const
 
+const includedSchema = {
+  type: 'object',
+  description: 'Side-loaded entities by collection, then by id (format=normalized)',
+  additionalProperties: { type: 'object', additionalProperties: true },
+} as const
+
 const transactionListSchema = {
   type: 'object',
   properties: {
     data: { type: 'array', items: transactionSchema },
     pagination: paginationSchema,
+    included: includedSchema,
   },
   additionalProperties: true,
 } as const
@@ -59,6 +78,7 @@ export async function transactionRoutes(app: FastifyInstance) {
     '/transactions',
     {
       preHandler: requireAuth,
+      config: listRouteConfig,
       schema: {
         tags: ['Transactions'],
         summary: 'List all transactions',
@@ -67,7 +87,32 @@ export async function transactionRoutes(app: FastifyInstance) {
           type: 'object',
           properties: {
             page: { type: 'number', default: 1 },
-            limit: { type: 'number', default: 20 },
+            limit: {
+              type: 'number',
+              default: 20,
+              description: 'Rows per page: at most 100, or 10000 with stream=true',
+            },
+            cursor: {
+              type: 'string',
+              description: 'Keyset pagination: empty for the first page, then `pagination.nextCursor`',
+            },
+            withTotal: {
+              type: 'string',
+              enum: ['exact', 'estimate', 'false'],
+              description: 'Total count: exact (default for pages), estimate (cached) or false (default for cursors)',
+            },
+            stream: {
+              type: 'string',
+              enum: ['true', 'false'],
+              description:
+                'true: write a cursor page to the response row by row, reading Postgres in keyset batches (export-sized limits; no total, nested format only)',
+            },
+            format: {
+              type: 'string',
+              enum: ['nested', 'normalized'],
+              default: 'nested',
+              description: 'normalized: rows keep createdById, creators are under `included`',
+            },
             type: { type: 'string', enum: ['INCOME', 'EXPENSE'] },
             category: { type: 'string' },
             startDate: { type: 'string', format: 'date-time' },
@@ -84,6 +129,42 @@ export async function transactionRoutes(app: FastifyInstance) {
     transactionController.list.bind(transactionController)
   )
 
+  app.get(
+    '/transactions/export',
+    {
+      preHandler: requireAuth,
+      config: { rateLimitCost: RATE_LIMIT_COST.export },
+      schema: {
+        tags: ['Transactions'],
+        summary: 'Export transactions as NDJSON or CSV',
+        description:
+          'Streams every transaction matching the filters, newest first, read in keyset batches',
+        security: [{ bearerAuth: [] }],
+        querystring: {
+          type: 'object',
+          properties: {
+            format: {
+              type: 'string',
+              enum: ['ndjson', 'csv'],
+              default: 'ndjson',
+              description: 'ndjson: one JSON object per line; csv: a header line, then one line per row',
+            },
+            type: { type: 'string', enum: ['INCOME', 'EXPENSE'] },
+            category: { type: 'string' },
+            startDate: { type: 'string', format: 'date-time' },
+            endDate: { type: 'string', format: 'date-time' },
+          },
+        },
+        response: {
+          400: errorResponseSchema,
+          401: errorResponseSchema,
+          403: errorResponseSchema,
+        },
+      },
+    },
+    transactionController.export.bind(transactionController)
+  )
+
   app.get(
     '/transactions/:id',
     {
@@ -0,0 +1,87 @@
+import { appointmentRepository } from '../repositories/appointmentRepository.js'
+import { appointmentSeriesRepository } from '../repositories/appointmentSeriesRepository.js'
+import { serviceRepository } from '../repositories/serviceRepository.js'
+import { professionalRepository } from '../repositories/professionalRepository.js'
+import { clientRepository } from '../repositories/clientRepository.js'
+import { expandOccurrences, toSeriesRule, type Recurrence } from '../lib/recurrence.js'
+import {
+  serializeAppointmentSeries,
+  serializeAppointmentWithRelations,
+} from '../lib/serializer.js'
+
+export interface CreateSeriesInput {
+  professionalId: string
+  clientId: string
+  serviceId: string
+  // Start of the first occurrence
+  date: string
+  notes?: string
+  recurrence: Recurrence
+  barbershopId: string
+  createdById: string
+}
+
+export class AppointmentSeriesService {
+  /**
+   * Books a recurring appointment. Only the series is stored; its occurrences are computed
+   * by the list and availability queries and stored one by one when they are materialized.
+   */
+  async createSeries(input: CreateSeriesInput) {
+    const { barbershopId } = input
+    const [professional, client, service] = await Promise.all([
+      professionalRepository.findById(input.professionalId, barbershopId),
+      clientRepository.findById(input.clientId, barbershopId),
+      serviceRepository.findById(input.serviceId, barbershopId),
+    ])
+    if (!professional) throw new Error('Professional not found')
+    if (!client) throw new Error('Client not found')
+    if (!service) throw new Error('Service not found')
+
+    const rule = toSeriesRule(new Date(input.date), service.duration, input.recurrence)
+    const series = await appointmentSeriesRepository.book({
+      ...rule,
+      barbershopId,
+      professionalId: input.professionalId,
+      clientId: input.clientId,
+      serviceId: input.serviceId,
+      createdById: input.createdById,
+      count: input.recurrence.count ?? null,
+      price: service.price,
+      notes: input.notes || null,
+    })
+    return serializeAppointmentSeries(series)
+  }
+
+  /**
+   * Stores the occurrence of a series starting at `occurrence` as an appointment, which can
+   * then be confirmed, moved or cancelled through the appointment endpoints.
+   */
+  async materializeOccurrence(
+    id: string,
+    barbershopId: string,
+    createdById: string,
+    occurrence: string
+  ) {
+    const series = await appointmentSeriesRepository.findById(id, barbershopId)
+    if (!series) throw new Error('Series not found')
+
+    const start = new Date(occurrence)
+    const [match] = expandOccurrences(series, start, new Date(start.getTime() + 1))
+    if (!match || match.start.getTime() !== start.getTime()) {
+      throw new Error('Occurrence not found')
+    }
+
+    const { appointment, created } = await appointmentRepository.materializeOccurrence(
+      series,
+      start,
+      createdById
+    )
+    return { appointment: serializeAppointmentWithRelations(appointment), created }
+  }
+
+  async deleteSeries(id: string, barbershopId: string): Promise<void> {
+    await appointmentSeriesRepository.deactivate(id, barbershopId)
+  }
+}
+
+export const appointmentSeriesService = new AppointmentSeriesService()
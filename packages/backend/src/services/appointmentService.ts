@@ -1,13 +1,31 @@
+import { addMinutes } from 'date-fns'
 import {
+  APPOINTMENT_CONFLICT_MESSAGE,
+  APPOINTMENT_STATUS_CHANGED_MESSAGE,
+  APPOINTMENT_FOREIGN_KEYS,
+  APPOINTMENT_RELATIONS,
   appointmentRepository,
+  type AppointmentProjection,
+  type AppointmentRelation,
   type PaginationParams,
   type ListFilters,
+  type ProjectedAppointment,
 } from '../repositories/appointmentRepository.js'
 import { serviceRepository } from '../repositories/serviceRepository.js'
 import { professionalRepository } from '../repositories/professionalRepository.js'
 import { clientRepository } from '../repositories/clientRepository.js'
 import type { AppointmentStatus, Prisma } from '@prisma/client'
-import { serializeAppointmentWithRelations } from '../lib/serializer.js'
+import {
+  decimalToNumber,
+  serializeAppointmentProjection,
+  serializeAppointmentSeries,
+  serializeAppointmentWithRelations,
+  serializeIncluded,
+} from '../lib/serializer.js'
+import type { ResponseFormat } from '../lib/projection.js'
+import { streamJsonList } from '../lib/jsonStream.js'
+import { streamExport, type ExportColumns, type ExportFormat } from '../lib/export.js'
+import { scheduleIntervals, type Interval } from '../lib/availability.js'
 
 // State machine for appointment status transitions
 const VALID_TRANSITIONS: Record<AppointmentStatus, AppointmentStatus[]> = {
@@ -30,6 +48,43 @@ function assertValidStatusTransition(
   }
 }
 
+// Exported rows select the names of their relations, not the whole entities
+const EXPORT_PROJECTION: AppointmentProjection = {
+  fields: [
+    'endsAt',
+    'status',
+    'professionalId',
+    'clientId',
+    'serviceId',
+    'price',
+    'commissionValue',
+    'notes',
+    'professional.name',
+    'client.name',
+    'service.name',
+  ],
+  include: [],
+}
+
+const relationName = (relation?: Record<string, unknown>) =>
+  (relation?.name as string | undefined) ?? null
+
+const APPOINTMENT_EXPORT_COLUMNS: ExportColumns<ProjectedAppointment> = {
+  id: (row) => row.id,
+  date: (row) => row.date.toISOString(),
+  endsAt: (row) => row.endsAt?.toISOString() ?? null,
+  status: (row) => row.status ?? null,
+  professionalId: (row) => row.professionalId ?? null,
+  professionalName: (row) => relationName(row.professional),
+  clientId: (row) => row.clientId ?? null,
+  clientName: (row) => relationName(row.client),
+  serviceId: (row) => row.serviceId ?? null,
+  serviceName: (row) => relationName(row.service),
+  price: (row) => decimalToNumber(row.price),
+  commissionValue: (row) => decimalToNumber(row.commissionValue),
+  notes: (row) => row.notes ?? null,
+}
+
 export interface CreateAppointmentInput {
   professionalId: string
   clientId: string
@@ -40,6 +95,31 @@ export interface CreateAppointmentInput {
   createdById: string
 }
 
+export type BulkAppointmentInput = Omit<CreateAppointmentInput, 'barbershopId' | 'createdById'>
+
+export type BulkAppointmentResult =
+  | { index: number; status: 'created'; id: string }
+  | { index: number; status: 'failed'; error: string }
+
+// A bulk item that passed reference validation, as an interval of its professional
+interface BulkCandidate extends Interval {
+  index: number
+  row: Prisma.AppointmentCreateManyInput
+}
+
+function groupBy<T>(items: readonly T[], key: (item: T) => string): Map<string, T[]> {
+  const groups = new Map<string, T[]>()
+  for (const item of items) {
+    const group = groups.get(key(item))
+    if (group) group.push(item)
+    else groups.set(key(item), [item])
+  }
+  return groups
+}
+
+// Extra collections a list may add next to the page (`?expand=`)
+export type ListExpansion = 'occurrences'
+
 export interface UpdateAppointmentInput {
   professionalId?: string
   clientId?: string
@@ -58,63 +138,241 @@ export class AppointmentService {
     return appointment ? serializeAppointmentWithRelations(appointment) : null
   }
 
-  async listAppointments(barbershopId: string, params: PaginationParams, filters?: ListFilters) {
-    const result = await appointmentRepository.list(barbershopId, params, filters)
+  async listAppointments(
+    barbershopId: string,
+    params: PaginationParams,
+    filters?: ListFilters,
+    projection: AppointmentProjection = {},
+    format: ResponseFormat = 'nested',
+    expand?: ListExpansion
+  ) {
+    if (expand === 'occurrences') {
+      const [page, occurrences] = await Promise.all([
+        this.listAppointments(barbershopId, params, filters, projection, format),
+        this.listOccurrences(barbershopId, filters),
+      ])
+      return { ...page, occurrences }
+    }
+
+    if (format === 'normalized') {
+      return this.listAppointmentsNormalized(barbershopId, params, filters, projection)
+    }
+
+    const result = await appointmentRepository.list(barbershopId, params, filters, projection)
     return {
-      data: result.data.map(serializeAppointmentWithRelations),
+      data: result.data.map(serializeAppointmentProjection),
       pagination: result.pagination,
     }
   }
 
-  async createAppointment(input: CreateAppointmentInput) {
-    // Verify all referenced entities exist
-    const [professional, client, service] = await Promise.all([
-      professionalRepository.findById(input.professionalId, input.barbershopId),
-      clientRepository.findById(input.clientId, input.barbershopId),
-      serviceRepository.findById(input.serviceId, input.barbershopId),
-    ])
+  /**
+   * Writes a cursor page to the response as rows arrive from keyset batches, converting and
+   * stringifying one row at a time: `{ data, pagination: { limit, nextCursor } }` like a
+   * buffered cursor page, without the total.
+   */
+  streamAppointments(
+    barbershopId: string,
+    params: { limit: number; cursor: string },
+    filters?: ListFilters,
+    projection: AppointmentProjection = {}
+  ) {
+    const rows = appointmentRepository.streamList(barbershopId, params, filters, projection)
+    return streamJsonList(
+      rows,
+      (row) => JSON.stringify(serializeAppointmentProjection(row)),
+      (nextCursor) => ({ pagination: { limit: params.limit, nextCursor } })
+    )
+  }
 
-    if (!professional) throw new Error('Professional not found')
-    if (!client) throw new Error('Client not found')
-    if (!service) throw new Error('Service not found')
+  /**
+   * Every appointment matching `filters` as NDJSON or CSV, oldest first, read in the same
+   * keyset batches as `streamAppointments` with no row limit.
+   */
+  exportAppointments(barbershopId: string, filters: ListFilters, format: ExportFormat) {
+    const rows = appointmentRepository.streamList(
+      barbershopId,
+      { limit: Number.POSITIVE_INFINITY, cursor: '' },
+      filters,
+      EXPORT_PROJECTION
+    )
+    return streamExport(rows, APPOINTMENT_EXPORT_COLUMNS, format)
+  }
+
+  /**
+   * Series occurrences in `[startDate, endDate)` that have no appointment row, as PENDING
+   * pseudo-appointments keyed by `seriesId` and start. They are computed for the window
+   * only and are not part of the paginated rows.
+   */
+  private async listOccurrences(barbershopId: string, filters: ListFilters = {}) {
+    if (!filters.startDate || !filters.endDate) {
+      throw new Error('startDate and endDate are required to expand occurrences')
+    }
+    if (filters.status && filters.status !== 'PENDING') return []
 
-    // Check for scheduling conflicts
-    const conflict = await appointmentRepository.checkConflict(
-      input.barbershopId,
-      input.professionalId,
-      new Date(input.date),
-      service.duration
+    const occurrences = await appointmentRepository.findSeriesOccurrences(
+      barbershopId,
+      new Date(filters.startDate),
+      new Date(filters.endDate),
+      {
+        professionalIds: filters.professionalId ? [filters.professionalId] : undefined,
+        clientId: filters.clientId,
+      }
+    )
+    return occurrences.map((occurrence) => ({
+      ...serializeAppointmentSeries(occurrence),
+      status: 'PENDING' as const,
+    }))
+  }
+
+  /**
+   * Rows keep only foreign keys; each distinct related entity is side-loaded once under
+   * `included` (`professionals`, `clients`, `services`).
+   */
+  private async listAppointmentsNormalized(
+    barbershopId: string,
+    params: PaginationParams,
+    filters: ListFilters | undefined,
+    { fields, include }: AppointmentProjection
+  ) {
+    const named = (fields ?? [])
+      .filter((field) => field.includes('.'))
+      .map((field) => field.split('.')[0] as AppointmentRelation)
+    const relations = [...new Set([...(include ?? APPOINTMENT_RELATIONS), ...named])]
+    const columns = fields?.filter((field) => !field.includes('.'))
+
+    const result = await appointmentRepository.list(barbershopId, params, filters, {
+      fields: columns && [
+        ...columns,
+        ...relations.map((relation) => APPOINTMENT_FOREIGN_KEYS[relation]),
+      ],
+      include: [],
+    })
+    const included = await appointmentRepository.loadIncluded(
+      barbershopId,
+      result.data,
+      relations,
+      fields
     )
 
-    if (conflict) {
-      throw new Error('Professional has a conflicting appointment at this time')
+    return {
+      data: result.data.map(serializeAppointmentProjection),
+      pagination: result.pagination,
+      included: serializeIncluded(included),
     }
+  }
 
-    // Create appointment with price snapshot
-    const appointment = await appointmentRepository.create({
+  async createAppointment(input: CreateAppointmentInput) {
+    // References, conflict check and insert run under a per-professional lock
+    const appointment = await appointmentRepository.book({
+      barbershopId: input.barbershopId,
+      professionalId: input.professionalId,
+      clientId: input.clientId,
+      serviceId: input.serviceId,
+      createdById: input.createdById,
       date: new Date(input.date),
       notes: input.notes || null,
-      price: Number(service.price),
-      status: 'PENDING',
-      barbershop: { connect: { id: input.barbershopId } },
-      professional: {
-        connect: {
-          barbershopId_id: { barbershopId: input.barbershopId, id: input.professionalId },
-        },
-      },
-      client: {
-        connect: { barbershopId_id: { barbershopId: input.barbershopId, id: input.clientId } },
-      },
-      service: {
-        connect: { barbershopId_id: { barbershopId: input.barbershopId, id: input.serviceId } },
-      },
-      createdBy: {
-        connect: { barbershopId_id: { barbershopId: input.barbershopId, id: input.createdById } },
-      },
     })
     return serializeAppointmentWithRelations(appointment)
   }
 
+  /**
+   * Creates many appointments at once, reporting a result per item instead of failing the
+   * batch. References are validated with one query per entity type; conflicts with booked
+   * appointments and between items are found by a sorted sweep per professional (of two
+   * overlapping items the earlier one wins); the rest is inserted with one statement.
+   */
+  async createAppointments(
+    barbershopId: string,
+    createdById: string,
+    items: BulkAppointmentInput[]
+  ) {
+    const unique = (values: string[]) => [...new Set(values)]
+    const [professionals, clients, services] = await Promise.all([
+      professionalRepository.findActive(barbershopId, unique(items.map((i) => i.professionalId))),
+      clientRepository.findActive(barbershopId, unique(items.map((i) => i.clientId))),
+      serviceRepository.findActive(barbershopId, unique(items.map((i) => i.serviceId))),
+    ])
+    const professionalIds = new Set(professionals.map(({ id }) => id))
+    const clientIds = new Set(clients.map(({ id }) => id))
+    const servicesById = new Map(services.map((service) => [service.id, service]))
+
+    const results: BulkAppointmentResult[] = new Array(items.length)
+    const fail = (index: number, error: string) => {
+      results[index] = { index, status: 'failed', error }
+    }
+
+    const candidates: BulkCandidate[] = []
+    items.forEach((item, index) => {
+      const service = servicesById.get(item.serviceId)
+      if (!professionalIds.has(item.professionalId)) return fail(index, 'Professional not found')
+      if (!clientIds.has(item.clientId)) return fail(index, 'Client not found')
+      if (!service) return fail(index, 'Service not found')
+
+      const date = new Date(item.date)
+      const endsAt = addMinutes(date, service.duration)
+      candidates.push({
+        index,
+        start: date,
+        end: endsAt,
+        row: {
+          barbershopId,
+          professionalId: item.professionalId,
+          clientId: item.clientId,
+          serviceId: item.serviceId,
+          createdById,
+          date,
+          endsAt,
+          // Price snapshot
+          price: service.price,
+          status: 'PENDING',
+          notes: item.notes || null,
+        },
+      })
+    })
+
+    if (candidates.length > 0) {
+      candidates.sort((a, b) => a.start.getTime() - b.start.getTime())
+      const byProfessional = groupBy(candidates, (candidate) => candidate.row.professionalId)
+      const window = {
+        from: candidates[0].start,
+        to: new Date(Math.max(...candidates.map((candidate) => candidate.end.getTime()))),
+      }
+
+      const created = await appointmentRepository.bookMany(
+        barbershopId,
+        [...byProfessional.keys()],
+        window,
+        (busy) => {
+          const busyByProfessional = groupBy(busy, (row) => row.professionalId)
+          const accepted: BulkCandidate[] = []
+          for (const [professionalId, group] of byProfessional) {
+            const booked = (busyByProfessional.get(professionalId) ?? []).map((row) => ({
+              start: row.date,
+              end: row.endsAt,
+            }))
+            const schedule = scheduleIntervals(booked, group)
+            for (const { index } of schedule.rejected) fail(index, APPOINTMENT_CONFLICT_MESSAGE)
+            accepted.push(...schedule.accepted)
+          }
+          return accepted.map((candidate) => candidate.row)
+        }
+      )
+
+      // Accepted rows never share a professional and start, so that pair identifies them
+      const slotKey = (professionalId: string, date: Date) => `${professionalId}:${date.getTime()}`
+      const createdIds = new Map(
+        created.map((row) => [slotKey(row.professionalId, row.date), row.id])
+      )
+      for (const { index, start, row } of candidates) {
+        const id = createdIds.get(slotKey(row.professionalId, start))
+        if (id && !results[index]) results[index] = { index, status: 'created', id }
+      }
+    }
+
+    const createdCount = results.filter((result) => result.status === 'created').length
+    return { created: createdCount, failed: items.length - createdCount, results }
+  }
+
   async updateAppointment(id: string, barbershopId: string, input: UpdateAppointmentInput) {
     const appointment = await appointmentRepository.findById(id, barbershopId)
     if (!appointment) throw new Error('Appointment not found')
@@ -127,31 +385,38 @@ export class AppointmentService {
       )
     }
 
-    // If changing date or professional, check for conflicts
-    if (input.date || input.professionalId) {
-      const professionalId = input.professionalId || appointment.professionalId
-      const newDate = input.date ? new Date(input.date) : appointment.date
+    const updateData: Prisma.AppointmentUpdateInput = {}
 
-      // Get service duration
+    // Changing date, professional or service moves the slot: recompute its end and check it
+    if (input.date || input.professionalId || input.serviceId) {
+      const professionalId = input.professionalId || appointment.professionalId
+      const date = input.date ? new Date(input.date) : appointment.date
       const serviceId = input.serviceId || appointment.serviceId
       const service = await serviceRepository.findById(serviceId, barbershopId)
       if (!service) throw new Error('Service not found')
+      const endsAt = addMinutes(date, service.duration)
 
       const conflict = await appointmentRepository.checkConflict(
         barbershopId,
         professionalId,
-        newDate,
-        service.duration,
+        date,
+        endsAt,
         id
       )
 
       if (conflict) {
-        throw new Error('Professional has a conflicting appointment at this time')
+        throw new Error(APPOINTMENT_CONFLICT_MESSAGE)
+      }
+
+      updateData.date = date
+      updateData.endsAt = endsAt
+      if (input.serviceId) {
+        updateData.service = { connect: { barbershopId_id: { barbershopId, id: serviceId } } }
+        // Update price snapshot
+        updateData.price = Number(service.price)
       }
     }
 
-    const updateData: Prisma.AppointmentUpdateInput = {}
-    if (input.date) updateData.date = new Date(input.date)
     if (input.professionalId) {
       const professional = await professionalRepository.findById(input.professionalId, barbershopId)
       if (!professional) throw new Error('Professional not found')
@@ -164,16 +429,14 @@ export class AppointmentService {
       if (!client) throw new Error('Client not found')
       updateData.client = { connect: { barbershopId_id: { barbershopId, id: input.clientId } } }
     }
-    if (input.serviceId) {
-      const service = await serviceRepository.findById(input.serviceId, barbershopId)
-      if (!service) throw new Error('Service not found')
-      updateData.service = { connect: { barbershopId_id: { barbershopId, id: input.serviceId } } }
-      // Update price snapshot
-      updateData.price = Number(service.price)
-    }
     if (input.notes) updateData.notes = input.notes
 
-    const updated = await appointmentRepository.update(id, barbershopId, updateData)
+    const updated = await appointmentRepository.update(
+      id,
+      barbershopId,
+      updateData,
+      appointment.status
+    )
     return serializeAppointmentWithRelations(updated)
   }
 
@@ -184,22 +447,34 @@ export class AppointmentService {
     // Validate status transition using state machine
     assertValidStatusTransition(appointment.status, input.status)
 
-    const updateData: Prisma.AppointmentUpdateInput = { status: input.status }
-
     // Calculate commission ONLY when transitioning TO COMPLETED (not if already completed)
     if (input.status === 'COMPLETED' && appointment.status !== 'COMPLETED') {
       const professional = await professionalRepository.findById(
         appointment.professionalId,
         barbershopId
       )
-      if (professional) {
-        const commissionValue =
-          Number(appointment.price) * (Number(professional.commissionRate) / 100)
-        updateData.commissionValue = commissionValue
-      }
+      const commissionValue = professional
+        ? Number(appointment.price) * (Number(professional.commissionRate) / 100)
+        : undefined
+      // Completion also feeds the professional's daily rollup (commission report)
+      const completed = await appointmentRepository.complete(
+        id,
+        barbershopId,
+        appointment.status,
+        commissionValue
+      )
+      // Another request changed the status since it was read
+      if (!completed) throw new Error(APPOINTMENT_STATUS_CHANGED_MESSAGE)
+      return serializeAppointmentWithRelations(completed)
     }
 
-    const updated = await appointmentRepository.update(id, barbershopId, updateData)
+    // Guarded by the validated status: a completed appointment is never cancelled afterwards
+    const updated = await appointmentRepository.update(
+      id,
+      barbershopId,
+      { status: input.status },
+      appointment.status
+    )
     return serializeAppointmentWithRelations(updated)
   }
 
@@ -211,7 +486,7 @@ export class AppointmentService {
     assertValidStatusTransition(appointment.status, 'CANCELLED')
 
     // Cancel the appointment instead of deleting it
-    await appointmentRepository.delete(id, barbershopId)
+    await appointmentRepository.delete(id, barbershopId, appointment.status)
   }
 }
 
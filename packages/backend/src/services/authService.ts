@@ -1,8 +1,24 @@
-import bcrypt from 'bcryptjs'
+import { randomInt, randomUUID } from 'node:crypto'
 import { prisma } from '../lib/prisma.js'
-import { redis } from '../lib/redis.js'
+import {
+  storeOTP,
+  verifyOTP,
+  storeRefreshToken,
+  deleteRefreshToken,
+  deleteAllRefreshTokens,
+  listRefreshTokens,
+  rotateRefreshToken,
+  consumeLegacyRefreshToken,
+  deleteLegacyRefreshToken,
+  type OtpVerifyResult,
+  type RefreshTokenSession,
+} from '../lib/redis.js'
+import { incrementCounter, timeAsync } from '../lib/metrics.js'
+import { comparePassword } from '../lib/passwordHasher.js'
 import type { Professional } from '@prisma/client'
 
+const REFRESH_TOKEN_TTL_MS = 7 * 24 * 60 * 60 * 1000 // 7 days
+
 export interface LoginInput {
   email: string
   password: string
@@ -34,7 +50,7 @@ export class AuthService {
     }
 
     // Verify password
-    const passwordValid = await bcrypt.compare(input.password, professional.passwordHash)
+    const passwordValid = await comparePassword(input.password, professional.passwordHash)
     if (!passwordValid) {
       throw new Error('Invalid credentials')
     }
@@ -52,33 +68,69 @@ export class AuthService {
     }
   }
 
-  async saveRefreshToken(
+  /**
+   * Creates a new refresh token session and returns its id (used as the JWT `jti`).
+   */
+  async createRefreshSession(professionalId: string): Promise<string> {
+    const tokenId = randomUUID()
+    await storeRefreshToken(professionalId, tokenId, this.newSessionMetadata())
+    return tokenId
+  }
+
+  /**
+   * Replaces a refresh token session; returns the new id, or null when the old
+   * token was already used or revoked.
+   */
+  async rotateRefreshSession(professionalId: string, tokenId: string): Promise<string | null> {
+    const newTokenId = randomUUID()
+    const rotated = await rotateRefreshToken(
+      professionalId,
+      tokenId,
+      newTokenId,
+      this.newSessionMetadata()
+    )
+    return rotated ? newTokenId : null
+  }
+
+  /**
+   * Exchanges a refresh token issued before sessions had ids for a new session, once.
+   * Returns the new id, or null when the token was already used or revoked.
+   */
+  async migrateLegacyRefreshSession(
     professionalId: string,
     barbershopId: string,
     refreshToken: string
-  ): Promise<void> {
-    const key = `barbershop:refresh:${barbershopId}:${professionalId}`
-    // 7 days TTL
-    await redis.setex(key, 604800, refreshToken)
+  ): Promise<string | null> {
+    const consumed = await consumeLegacyRefreshToken(barbershopId, professionalId, refreshToken)
+    return consumed ? this.createRefreshSession(professionalId) : null
+  }
+
+  async listRefreshSessions(professionalId: string): Promise<RefreshTokenSession[]> {
+    return listRefreshTokens(professionalId)
+  }
+
+  async revokeRefreshSession(professionalId: string, tokenId: string): Promise<void> {
+    await deleteRefreshToken(professionalId, tokenId)
   }
 
-  async getRefreshToken(professionalId: string, barbershopId: string): Promise<string | null> {
-    const key = `barbershop:refresh:${barbershopId}:${professionalId}`
-    return redis.get(key)
+  async revokeAllRefreshSessions(professionalId: string, barbershopId: string): Promise<void> {
+    await Promise.all([
+      deleteAllRefreshTokens(professionalId),
+      deleteLegacyRefreshToken(barbershopId, professionalId),
+    ])
   }
 
-  async deleteRefreshToken(professionalId: string, barbershopId: string): Promise<void> {
-    const key = `barbershop:refresh:${barbershopId}:${professionalId}`
-    await redis.del(key)
+  private newSessionMetadata() {
+    const createdAt = Date.now()
+    return { createdAt, expiresAt: createdAt + REFRESH_TOKEN_TTL_MS }
   }
 
   async requestOTP(email: string, barbershopId: string): Promise<void> {
     // Generate 6-digit OTP
-    const otp = Math.floor(100000 + Math.random() * 900000).toString()
+    const otp = randomInt(100000, 1000000).toString()
 
-    // Store in Redis with 5 minute TTL
-    const key = `barbershop:otp:${barbershopId}:${email}`
-    await redis.setex(key, 300, otp)
+    // Store in Redis with 5 minute TTL (resets the attempt counter)
+    await timeAsync('otp.issue', () => storeOTP(barbershopId, email, otp))
 
     // TODO: Send email with OTP (implement email service)
     if (process.env.NODE_ENV !== 'production') {
@@ -86,18 +138,10 @@ export class AuthService {
     }
   }
 
-  async verifyOTP(email: string, barbershopId: string, otp: string): Promise<boolean> {
-    const key = `barbershop:otp:${barbershopId}:${email}`
-    const storedOTP = await redis.get(key)
-    const storedOTPString = storedOTP === null ? null : String(storedOTP)
-
-    if (!storedOTPString || storedOTPString !== otp) {
-      return false
-    }
-
-    // Delete OTP after verification
-    await redis.del(key)
-    return true
+  async verifyOTP(email: string, barbershopId: string, otp: string): Promise<OtpVerifyResult> {
+    const result = await timeAsync('otp.verify', () => verifyOTP(barbershopId, email, otp))
+    incrementCounter(`otp.verify.${result}`)
+    return result
   }
 }
 
@@ -0,0 +1,75 @@
+import { appointmentRepository } from '../repositories/appointmentRepository.js'
+import { professionalRepository } from '../repositories/professionalRepository.js'
+import { serviceRepository } from '../repositories/serviceRepository.js'
+import { freeIntervals, type Interval } from '../lib/availability.js'
+
+export interface AvailabilityQuery {
+  from: Date
+  to: Date
+  serviceId: string
+}
+
+export interface ProfessionalAvailability {
+  professionalId: string
+  name: string
+  slots: Interval[]
+}
+
+export class AvailabilityService {
+  /**
+   * Free intervals of one professional that fit the service.
+   */
+  async getAvailability(professionalId: string, barbershopId: string, query: AvailabilityQuery) {
+    const { data, ...window } = await this.getAvailabilityForMany(barbershopId, query, [
+      professionalId,
+    ])
+    const [availability] = data
+    if (!availability) throw new Error('Professional not found')
+    return { ...window, professionalId, slots: availability.slots }
+  }
+
+  /**
+   * Free intervals of several professionals (all active ones by default). Bookings of every
+   * professional come from a single query and are split per professional in order.
+   */
+  async getAvailabilityForMany(
+    barbershopId: string,
+    query: AvailabilityQuery,
+    professionalIds?: string[]
+  ) {
+    const [service, professionals] = await Promise.all([
+      serviceRepository.findById(query.serviceId, barbershopId),
+      professionalRepository.findActive(barbershopId, professionalIds),
+    ])
+    if (!service) throw new Error('Service not found')
+
+    const busy = new Map<string, Interval[]>(professionals.map(({ id }) => [id, []]))
+    if (professionals.length > 0) {
+      const rows = await appointmentRepository.findBusyIntervals(
+        barbershopId,
+        [...busy.keys()],
+        query.from,
+        query.to
+      )
+      for (const row of rows) {
+        busy.get(row.professionalId)?.push({ start: row.date, end: row.endsAt })
+      }
+    }
+
+    const data: ProfessionalAvailability[] = professionals.map(({ id, name }) => ({
+      professionalId: id,
+      name,
+      slots: freeIntervals(busy.get(id) ?? [], query.from, query.to, service.duration),
+    }))
+
+    return {
+      from: query.from,
+      to: query.to,
+      serviceId: service.id,
+      duration: service.duration,
+      data,
+    }
+  }
+}
+
+export const availabilityService = new AvailabilityService()
@@ -1,5 +1,6 @@
 import { barbershopRepository } from '../repositories/barbershopRepository.js'
 import type { Barbershop, Prisma } from '@prisma/client'
+import { invalidateTenant } from '../lib/tenantCache.js'
 
 export interface UpdateBarbershopInput {
   name?: string
@@ -21,7 +22,12 @@ export class BarbershopService {
     if (input.name !== undefined) updateData.name = input.name
     if (input.isActive !== undefined) updateData.isActive = input.isActive
 
-    return barbershopRepository.update(id, updateData)
+    const updated = await barbershopRepository.update(id, updateData)
+
+    // Drop cached tenant resolution so isActive changes take effect immediately
+    await invalidateTenant(updated.slug)
+
+    return updated
   }
 }
 
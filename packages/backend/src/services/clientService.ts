@@ -68,11 +68,7 @@ export class ClientService {
   }
 
   async deleteClient(id: string, barbershopId: string): Promise<void> {
-    const client = await clientRepository.findById(id, barbershopId)
-    if (!client) {
-      throw new Error('Client not found')
-    }
-
+    // The repository checks existence and tenant in the write itself
     await clientRepository.delete(id, barbershopId)
   }
 }
@@ -1,10 +1,10 @@
-import bcrypt from 'bcryptjs'
 import {
   professionalRepository,
   type PaginationParams,
 } from '../repositories/professionalRepository.js'
 import type { Role, Prisma } from '@prisma/client'
 import { serializeProfessional } from '../lib/serializer.js'
+import { hashPassword } from '../lib/passwordHasher.js'
 
 export interface CreateProfessionalInput {
   name: string
@@ -45,7 +45,7 @@ export class ProfessionalService {
     }
 
     // Hash password
-    const passwordHash = await bcrypt.hash(input.password, 10)
+    const passwordHash = await hashPassword(input.password)
 
     // Create professional
     const professional = await professionalRepository.create({
@@ -86,7 +86,7 @@ export class ProfessionalService {
 
     // Hash password if provided
     if (input.password) {
-      updateData.passwordHash = await bcrypt.hash(input.password, 10)
+      updateData.passwordHash = await hashPassword(input.password)
     }
 
     const updated = await professionalRepository.update(id, barbershopId, updateData)
@@ -94,11 +94,7 @@ export class ProfessionalService {
   }
 
   async deleteProfessional(id: string, barbershopId: string): Promise<void> {
-    const professional = await professionalRepository.findById(id, barbershopId)
-    if (!professional) {
-      throw new Error('Professional not found')
-    }
-
+    // The repository checks existence and tenant in the write itself
     await professionalRepository.delete(id, barbershopId)
   }
 }
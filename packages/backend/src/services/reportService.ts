@@ -43,8 +43,7 @@ export class ReportService {
     const expenses = { total: new Decimal(0), count: 0, byCategory: {} as Record<string, number> }
 
     for (const t of transactions) {
-      const amount = t._sum.amount ? new Decimal(t._sum.amount) : new Decimal(0)
-      const count = t._count._all
+      const { amount, count } = t
 
       if (t.type === 'INCOME') {
         income.total = income.total.plus(amount)
@@ -112,30 +111,15 @@ export class ReportService {
       professionalId
     )
 
-    const professionalStats = commissions
-      .map((c) => {
-        if (!c.professional) return null
-
-        const revenue = c._sum?.price ? new Decimal(c._sum.price) : new Decimal(0)
-        const commission = c._sum?.commissionValue
-          ? new Decimal(c._sum.commissionValue)
-          : new Decimal(0)
-        const count =
-          typeof c._count === 'number'
-            ? c._count
-            : ((c._count as Record<string, number>)?._all ?? 0)
-
-        return {
-          id: c.professional.id,
-          name: c.professional.name,
-          email: c.professional.email,
-          commissionRate: c.professional.commissionRate.toNumber(),
-          appointmentsCompleted: count,
-          totalCommissions: commission.toNumber(),
-          totalRevenue: revenue.toNumber(),
-        }
-      })
-      .filter((p): p is NonNullable<typeof p> => p !== null)
+    const professionalStats = commissions.map((c) => ({
+      id: c.professional.id,
+      name: c.professional.name,
+      email: c.professional.email,
+      commissionRate: c.professional.commissionRate.toNumber(),
+      appointmentsCompleted: c.appointments,
+      totalCommissions: c.commissions.toNumber(),
+      totalRevenue: c.revenue.toNumber(),
+    }))
 
     const totals = professionalStats.reduce(
       (acc, curr) => {
@@ -42,11 +42,6 @@ export class ServiceService {
   }
 
   async updateService(id: string, barbershopId: string, input: UpdateServiceInput) {
-    const service = await serviceRepository.findById(id, barbershopId)
-    if (!service) {
-      throw new Error('Service not found')
-    }
-
     const updateData: Prisma.ServiceUpdateInput = {
       ...(input.name && { name: input.name }),
       ...(input.price !== undefined && { price: input.price }),
@@ -58,11 +53,7 @@ export class ServiceService {
   }
 
   async deleteService(id: string, barbershopId: string): Promise<void> {
-    const service = await serviceRepository.findById(id, barbershopId)
-    if (!service) {
-      throw new Error('Service not found')
-    }
-
+    // The repository checks existence and tenant in the write itself
     await serviceRepository.delete(id, barbershopId)
   }
 }
@@ -4,8 +4,25 @@ import {
   type ListFilters,
 } from '../repositories/transactionRepository.js'
 import { professionalRepository } from '../repositories/professionalRepository.js'
-import type { TransactionType, PaymentMethod, Prisma } from '@prisma/client'
-import { serializeTransactionWithRelations } from '../lib/serializer.js'
+import type { TransactionType, PaymentMethod, Prisma, Transaction } from '@prisma/client'
+import { serializeIncluded, serializeTransactionWithRelations } from '../lib/serializer.js'
+import type { ResponseFormat } from '../lib/projection.js'
+import { streamJsonList } from '../lib/jsonStream.js'
+import { streamExport, type ExportColumns, type ExportFormat } from '../lib/export.js'
+
+type ExportedTransaction = Transaction & { createdBy?: { name: string } | null }
+
+const TRANSACTION_EXPORT_COLUMNS: ExportColumns<ExportedTransaction> = {
+  id: (row) => row.id,
+  date: (row) => row.date.toISOString(),
+  type: (row) => row.type,
+  category: (row) => row.category,
+  description: (row) => row.description,
+  amount: (row) => row.amount.toNumber(),
+  paymentMethod: (row) => row.paymentMethod,
+  createdById: (row) => row.createdById,
+  createdByName: (row) => row.createdBy?.name ?? null,
+}
 
 export interface CreateTransactionInput {
   amount: number
@@ -33,12 +50,52 @@ export class TransactionService {
     return transaction ? serializeTransactionWithRelations(transaction) : null
   }
 
-  async listTransactions(barbershopId: string, params: PaginationParams, filters?: ListFilters) {
-    const result = await transactionRepository.list(barbershopId, params, filters)
-    return {
-      data: result.data.map(serializeTransactionWithRelations),
-      pagination: result.pagination,
+  async listTransactions(
+    barbershopId: string,
+    params: PaginationParams,
+    filters?: ListFilters,
+    format: ResponseFormat = 'nested'
+  ) {
+    const normalized = format === 'normalized'
+    const result = await transactionRepository.list(barbershopId, params, filters, !normalized)
+    const data = result.data.map(serializeTransactionWithRelations)
+    if (!normalized) {
+      return { data, pagination: result.pagination }
     }
+
+    // createdBy is side-loaded once per distinct professional under `included`
+    const included = await transactionRepository.loadIncluded(barbershopId, result.data)
+    return { data, pagination: result.pagination, included: serializeIncluded(included) }
+  }
+
+  /**
+   * Writes a cursor page to the response as rows arrive from keyset batches (see
+   * `AppointmentService.streamAppointments`).
+   */
+  streamTransactions(
+    barbershopId: string,
+    params: { limit: number; cursor: string },
+    filters?: ListFilters
+  ) {
+    const rows = transactionRepository.streamList(barbershopId, params, filters)
+    return streamJsonList(
+      rows,
+      (row) => JSON.stringify(serializeTransactionWithRelations(row)),
+      (nextCursor) => ({ pagination: { limit: params.limit, nextCursor } })
+    )
+  }
+
+  /**
+   * Every transaction matching `filters` as NDJSON or CSV, newest first, read in the same
+   * keyset batches as `streamTransactions` with no row limit.
+   */
+  exportTransactions(barbershopId: string, filters: ListFilters, format: ExportFormat) {
+    const rows = transactionRepository.streamList(
+      barbershopId,
+      { limit: Number.POSITIVE_INFINITY, cursor: '' },
+      filters
+    )
+    return streamExport(rows, TRANSACTION_EXPORT_COLUMNS, format)
   }
 
   async createTransaction(input: CreateTransactionInput) {
@@ -67,11 +124,6 @@ export class TransactionService {
   }
 
   async updateTransaction(id: string, barbershopId: string, input: UpdateTransactionInput) {
-    const transaction = await transactionRepository.findById(id, barbershopId)
-    if (!transaction) {
-      throw new Error('Transaction not found')
-    }
-
     const updateData: Prisma.TransactionUpdateInput = {}
     if (input.amount !== undefined) updateData.amount = input.amount
     if (input.type !== undefined) updateData.type = input.type
@@ -85,11 +137,7 @@ export class TransactionService {
   }
 
   async deleteTransaction(id: string, barbershopId: string): Promise<void> {
-    const transaction = await transactionRepository.findById(id, barbershopId)
-    if (!transaction) {
-      throw new Error('Transaction not found')
-    }
-
+    // The repository checks existence and tenant in the write itself
     await transactionRepository.delete(id, barbershopId)
   }
 }
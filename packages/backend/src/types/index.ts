@@ -28,6 +28,11 @@ declare module 'fastify' {
     tenantId: string
     tenantSlug: string
   }
+
+  interface FastifyContextConfig {
+    // Tenant rate limit tokens this route consumes per request (default 1)
+    rateLimitCost?: number | ((request: FastifyRequest) => number)
+  }
 }
 
 // Extend @fastify/jwt types